@@ -0,0 +1,156 @@
+"""
+Compression of responses in the encoding the client prefers.
+
+Responses of at least COMPRESSION_MIN_SIZE bytes are compressed with brotli
+when the client accepts it and the brotli package is installed, and with gzip
+otherwise. A streamed response (a long page of students) is compressed chunk
+by chunk: each chunk is flushed as it is compressed, so the browser renders
+the top of the page while the rest is still being written. Responses that are
+encoded already (precompressed static assets), event streams, whose events
+must reach the browser at once, types that do not compress (images,
+documents) and partial content, whose byte ranges refer to the file as
+stored, are passed on as they are. So are responses whose body is sent by
+another message than ``http.response.body``, such as a file the server sends
+itself (``http.response.zerocopy``).
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from school_management_system.web.assets import accepted_encodings, load_brotli
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+NOT_COMPRESSED_TYPES = ("text/event-stream",)
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(NOT_COMPRESSED_TYPES)
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, brotli, quality: int):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli = load_brotli()
+
+    def _encoding(self, scope: Scope) -> Optional[str]:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"))
+        if self.brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _stream(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli, self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.minimum_size <= 0:
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    "content-encoding" in headers
+                    or message["status"] == 206
+                    or "content-range" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk tells the size
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                if not passthrough and stream is None:
+                    # The body comes in another message, which must follow the start
+                    passthrough = True
+                    await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                stream = self._stream(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = stream.compress(body) + stream.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            data = stream.compress(body)
+            data += stream.flush() if more_body else stream.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -8,4 +8,9 @@ from school_management_system.api.endpoints import (
     exams,
     payments,
     reports,
+    query,
+    analytics,
+    cohorts,
+    changes,
+    live,
 )
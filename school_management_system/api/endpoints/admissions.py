@@ -1,13 +1,20 @@
-from typing import Any, List, Optional
-from datetime import date
+import os
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
+from school_management_system.config import settings
 from school_management_system.database.session import get_db
-from school_management_system.models.admission import Admission, AdmissionStatus
+from school_management_system.models.admission import Admission, AdmissionDocument, AdmissionStatus, DocumentBlob
+from school_management_system.models.student import EngineeringBranch
+from school_management_system.services import admission_service, document_service, duplicate_service
+from school_management_system.utils.downloads import stored_file_response
+from school_management_system.utils.storage import get_storage
+from school_management_system.utils.uploads import UploadTooLarge, receive_upload
 
 router = APIRouter()
 
@@ -17,6 +24,7 @@ class AdmissionBase(BaseModel):
     application_date: date
     status: AdmissionStatus = AdmissionStatus.PENDING
     desired_grade_level: str
+    desired_branch: Optional[EngineeringBranch] = None
     previous_school: Optional[str] = None
     previous_grade_level: Optional[str] = None
     notes: Optional[str] = None
@@ -43,6 +51,7 @@ class AdmissionUpdate(BaseModel):
     application_date: Optional[date] = None
     status: Optional[AdmissionStatus] = None
     desired_grade_level: Optional[str] = None
+    desired_branch: Optional[EngineeringBranch] = None
     previous_school: Optional[str] = None
     previous_grade_level: Optional[str] = None
     notes: Optional[str] = None
@@ -63,6 +72,9 @@ class AdmissionUpdate(BaseModel):
 
 class AdmissionInDBBase(AdmissionBase):
     id: int
+    status_changed_at: Optional[datetime] = None
+    claimed_by: Optional[str] = None
+    claimed_until: Optional[datetime] = None
 
     class Config:
         orm_mode = True
@@ -72,6 +84,108 @@ class AdmissionResponse(AdmissionInDBBase):
     pass
 
 
+class AdmissionTransitionRequest(BaseModel):
+    from_status: AdmissionStatus
+    to_status: AdmissionStatus
+    admission_ids: Optional[List[int]] = None  # Default: every application in from_status
+    limit: Optional[int] = Field(None, ge=1)
+    changed_by: Optional[str] = None
+    note: Optional[str] = None
+
+
+class AdmissionTransitionResponse(BaseModel):
+    from_status: AdmissionStatus
+    to_status: AdmissionStatus
+    transitioned: int
+    admission_ids: List[int]
+
+
+class AdmissionClaimRequest(BaseModel):
+    reviewer: str
+    batch_size: int = Field(20, ge=1, le=500)
+    lease_seconds: Optional[int] = Field(None, ge=1)
+
+
+class AdmissionReleaseRequest(BaseModel):
+    reviewer: str
+    admission_ids: List[int]
+
+
+class AdmissionConversionRequest(BaseModel):
+    enrollment_date: date
+    default_branch: Optional[EngineeringBranch] = None  # For applications without a desired branch
+    subject_ids: Optional[List[int]] = None  # Default: the subjects of the branch and year's current students
+    chunk_size: int = Field(1000, ge=1, le=5000)
+    limit: Optional[int] = Field(None, ge=1)
+    changed_by: Optional[str] = None
+
+
+class SkippedAdmission(BaseModel):
+    admission_id: int
+    reason: str
+
+
+class AdmissionConversionResponse(BaseModel):
+    converted: int
+    parent_accounts: int
+    parent_profiles: int
+    enrollments: int
+    skipped: int
+    skipped_sample: List[SkippedAdmission]
+
+
+class AdmissionDocumentResponse(BaseModel):
+    id: int
+    admission_id: int
+    document_type: str
+    document_path: str
+    upload_date: date
+    is_verified: bool = False
+    verification_date: Optional[date] = None
+    notes: Optional[str] = None
+    content_sha256: Optional[str] = None
+    original_filename: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class AdmissionDocumentUploadResponse(AdmissionDocumentResponse):
+    deduplicated: bool  # The same file was already stored
+
+
+class AdmissionQueueResponse(BaseModel):
+    status: AdmissionStatus
+    items: List[AdmissionResponse]
+    next_after_id: Optional[int] = None  # Pass as after_id for the next page; None on the last page
+
+
+class PossibleDuplicate(BaseModel):
+    record_type: str  # "admission" or "student"
+    record_id: int
+    first_name: str
+    last_name: str
+    date_of_birth: date
+    phone_number: Optional[str] = None
+    email: Optional[str] = None
+    score: float
+    components: Dict[str, float]  # Name, date of birth and contact similarity
+    matched_on: List[str]  # Blocking keys shared with the application
+
+
+class DuplicateClusterMatch(BaseModel):
+    admission_id: int
+    match_type: str
+    match_id: int
+    score: float
+
+
+class DuplicateCluster(BaseModel):
+    cluster_id: int  # Lowest application id of the cluster
+    computed_at: Optional[datetime] = None
+    matches: List[DuplicateClusterMatch]
+
+
 @router.post("/", response_model=AdmissionResponse)
 async def create_admission(
     admission_in: AdmissionCreate,
@@ -87,6 +201,146 @@ async def create_admission(
     return admission
 
 
+@router.post("/transitions", response_model=AdmissionTransitionResponse)
+async def transition_admissions(
+    transition_in: AdmissionTransitionRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Move applications from one status to another in bulk.
+    """
+    try:
+        moved = await admission_service.transition_admissions(
+            db,
+            transition_in.from_status,
+            transition_in.to_status,
+            admission_ids=transition_in.admission_ids,
+            limit=transition_in.limit,
+            changed_by=transition_in.changed_by,
+            note=transition_in.note,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return {
+        "from_status": transition_in.from_status,
+        "to_status": transition_in.to_status,
+        "transitioned": len(moved),
+        "admission_ids": moved,
+    }
+
+
+@router.post("/conversions", response_model=AdmissionConversionResponse)
+async def convert_admissions(
+    conversion_in: AdmissionConversionRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Turn all approved admission applications into students.
+    """
+    return await admission_service.convert_admissions(
+        db,
+        conversion_in.enrollment_date,
+        default_branch=conversion_in.default_branch,
+        subject_ids=conversion_in.subject_ids,
+        chunk_size=conversion_in.chunk_size,
+        limit=conversion_in.limit,
+        changed_by=conversion_in.changed_by,
+    )
+
+
+@router.get("/status-counts", response_model=Dict[str, int])
+async def get_admission_status_counts(
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the number of admission applications in each status.
+    """
+    return await admission_service.get_status_counts(db)
+
+
+@router.get("/queues/{status}", response_model=AdmissionQueueResponse)
+async def get_admission_queue(
+    status: AdmissionStatus,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    unclaimed_only: bool = False,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get a page of the review queue of a status, oldest application first.
+    """
+    items = await admission_service.get_queue(db, status, after_id, limit, unclaimed_only)
+    return {
+        "status": status,
+        "items": items,
+        "next_after_id": items[-1].id if len(items) == limit else None,
+    }
+
+
+@router.post("/queues/{status}/claim", response_model=List[AdmissionResponse])
+async def claim_admissions(
+    status: AdmissionStatus,
+    claim_in: AdmissionClaimRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Claim a batch of applications of a status for review.
+    """
+    return await admission_service.claim_admissions(
+        db,
+        status,
+        claim_in.reviewer,
+        claim_in.batch_size,
+        claim_in.lease_seconds or settings.ADMISSION_CLAIM_LEASE_SECONDS,
+    )
+
+
+@router.post("/queues/release", response_model=Dict[str, int])
+async def release_admissions(
+    release_in: AdmissionReleaseRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Release claimed applications back to their queues.
+    """
+    released = await admission_service.release_admissions(db, release_in.admission_ids, release_in.reviewer)
+    return {"released": released}
+
+
+@router.get("/duplicate-clusters", response_model=List[DuplicateCluster])
+async def get_duplicate_clusters(
+    after_cluster_id: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get a page of the duplicate applicant clusters found by the last clustering job.
+    """
+    return await duplicate_service.get_clusters(db, after_cluster_id, limit)
+
+
+@router.get("/{admission_id}/possible-duplicates", response_model=List[PossibleDuplicate])
+async def get_possible_duplicates(
+    admission_id: int,
+    min_score: float = Query(0.75, ge=0, le=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the applications and students that may be the same person as an application.
+    """
+    matches = await duplicate_service.find_possible_duplicates(db, admission_id, min_score, limit)
+    if matches is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admission application not found",
+        )
+    return matches
+
+
 @router.get("/{admission_id}", response_model=AdmissionResponse)
 async def get_admission(
     admission_id: int,
@@ -176,11 +430,165 @@ async def delete_admission(
 @router.get("/by-status/{status}", response_model=List[AdmissionResponse])
 async def get_admissions_by_status(
     status: AdmissionStatus,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
-    Get admission applications by status.
+    Get admission applications by status, a page at a time in id order.
     """
-    result = await db.execute(select(Admission).where(Admission.status == status))
-    admissions = result.scalars().all()
-    return admissions
+    return await admission_service.get_queue(db, status, after_id, limit)
+
+
+async def _get_admission_or_404(db: AsyncSession, admission_id: int) -> Admission:
+    result = await db.execute(select(Admission).where(Admission.id == admission_id))
+    admission = result.scalars().first()
+    if not admission:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admission application not found",
+        )
+    return admission
+
+
+@router.post(
+    "/{admission_id}/documents",
+    response_model=AdmissionDocumentUploadResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file", "document_type"],
+                        "properties": {
+                            "file": {"type": "string", "format": "binary"},
+                            "document_type": {"type": "string"},
+                            "notes": {"type": "string"},
+                        },
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_admission_document(
+    admission_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Upload a document of an admission application.
+
+    The body is a multipart form with the ``file``, its ``document_type``
+    and optional ``notes``. It is streamed to storage as it arrives.
+    """
+    await _get_admission_or_404(db, admission_id)
+    storage = get_storage()
+    try:
+        staged = await receive_upload(request, storage.staging_dir, settings.DOCUMENT_MAX_UPLOAD_MB * 1024 * 1024)
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    document_type = staged.fields.get("document_type", "").strip()
+    if not document_type:
+        os.remove(staged.path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="document_type is required",
+        )
+
+    document, is_new = await document_service.store_upload(
+        db, storage, admission_id, staged, document_type, staged.fields.get("notes")
+    )
+    if is_new:
+        background_tasks.add_task(document_service.generate_thumbnail, storage, staged.sha256)
+    return {**AdmissionDocumentResponse.from_orm(document).dict(), "deduplicated": not is_new}
+
+
+@router.get("/{admission_id}/documents", response_model=List[AdmissionDocumentResponse])
+async def get_admission_documents(
+    admission_id: int,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the documents of an admission application.
+    """
+    await _get_admission_or_404(db, admission_id)
+    result = await db.execute(
+        select(AdmissionDocument).where(AdmissionDocument.admission_id == admission_id).order_by(AdmissionDocument.id)
+    )
+    return result.scalars().all()
+
+
+async def _get_stored_document(db: AsyncSession, admission_id: int, document_id: int):
+    result = await db.execute(
+        select(AdmissionDocument, DocumentBlob)
+        .join(DocumentBlob, DocumentBlob.sha256 == AdmissionDocument.content_sha256)
+        .where(AdmissionDocument.id == document_id, AdmissionDocument.admission_id == admission_id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stored document not found",
+        )
+    return row
+
+
+@router.get("/{admission_id}/documents/{document_id}/content")
+async def download_admission_document(
+    admission_id: int,
+    document_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Download an uploaded document. Supports range requests.
+    """
+    document, blob = await _get_stored_document(db, admission_id, document_id)
+    return stored_file_response(
+        request,
+        get_storage(),
+        blob.storage_key,
+        blob.size_bytes,
+        media_type=blob.content_type,
+        filename=document.original_filename,
+        etag=blob.sha256,
+    )
+
+
+@router.get("/{admission_id}/documents/{document_id}/thumbnail")
+async def get_admission_document_thumbnail(
+    admission_id: int,
+    document_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the thumbnail of an uploaded image document.
+    """
+    document, blob = await _get_stored_document(db, admission_id, document_id)
+    if not blob.thumbnail_key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document has no thumbnail",
+        )
+    storage = get_storage()
+    return stored_file_response(
+        request,
+        storage,
+        blob.thumbnail_key,
+        await storage.size(blob.thumbnail_key),
+        media_type="image/jpeg",
+        etag=f"{blob.sha256}-thumbnail",
+    )
@@ -0,0 +1,134 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel
+
+from school_management_system.database.partitioning import parse_academic_year
+from school_management_system.services import analytics_service
+from school_management_system.services.analytics_service import store
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class AnalyticsTableStatus(BaseModel):
+    table: str
+    parts: int
+    rows: int
+    exported_at: Optional[datetime] = None
+
+
+class AnalyticsReport(BaseModel):
+    by: List[str]
+    rows: List[Dict[str, Any]]
+
+
+def _dimensions(by: str, allowed: Sequence[str]) -> Tuple[str, ...]:
+    dimensions = tuple(name.strip() for name in by.split(",") if name.strip())
+    unknown = [name for name in dimensions if name not in allowed]
+    if not dimensions or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Group by one or more of: {', '.join(allowed)}",
+        )
+    return dimensions
+
+
+def _year(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return parse_academic_year(value)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _report(report, tables: Sequence[str], by: Tuple[str, ...], *args) -> Dict[str, Any]:
+    try:
+        rows = await asyncio.to_thread(store.report, report, tables, by, *args)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {"by": list(by), "rows": rows}
+
+
+# API endpoints
+@router.get("/status", response_model=List[AnalyticsTableStatus])
+async def get_analytics_status() -> Any:
+    """
+    Rows and part files of each table in the analytics store, and when it
+    was last exported to.
+    """
+    try:
+        return await asyncio.to_thread(store.status)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+
+@router.get("/placement-rates", response_model=AnalyticsReport)
+async def get_placement_rates(by: str = "branch,cgpa_band") -> Any:
+    """
+    Placement rate and mean CGPA of students, grouped by any of branch,
+    enrollment_year, academic_year, cgpa_band, backlogs and gender.
+    """
+    dimensions = _dimensions(by, analytics_service.PLACEMENT_DIMENSIONS)
+    return await _report(analytics_service.placement_rates, ["students"], dimensions)
+
+
+@router.get("/fee-collection", response_model=AnalyticsReport)
+async def get_fee_collection(by: str = "academic_year") -> Any:
+    """
+    Amounts billed, collected and outstanding, grouped by any of
+    academic_year, term, branch and status.
+    """
+    dimensions = _dimensions(by, analytics_service.FEE_DIMENSIONS)
+    return await _report(analytics_service.fee_collection, ["fee_records", "students"], dimensions)
+
+
+@router.get("/payment-trends", response_model=AnalyticsReport)
+async def get_payment_trends(
+    by: str = "month",
+    from_year: Optional[str] = None,
+    to_year: Optional[str] = None,
+) -> Any:
+    """
+    Payments received, grouped by any of academic_year, month and
+    payment_method, optionally between two academic years (e.g. 2019-2020).
+    """
+    dimensions = _dimensions(by, analytics_service.PAYMENT_DIMENSIONS)
+    return await _report(
+        analytics_service.payment_trends, ["payments"], dimensions, _year(from_year), _year(to_year)
+    )
+
+
+@router.get("/pass-rates", response_model=AnalyticsReport)
+async def get_pass_rates(
+    by: str = "academic_year",
+    from_year: Optional[str] = None,
+    to_year: Optional[str] = None,
+) -> Any:
+    """
+    Pass rate and mean percentage of exam results, grouped by any of
+    academic_year, branch, exam_type, subject_id and exam_id.
+    """
+    dimensions = _dimensions(by, analytics_service.EXAM_DIMENSIONS)
+    return await _report(
+        analytics_service.pass_rates, ["exam_results", "students"], dimensions, _year(from_year), _year(to_year)
+    )
+
+
+@router.get("/attendance-rates", response_model=AnalyticsReport)
+async def get_attendance_rates(
+    by: str = "academic_year",
+    from_year: Optional[str] = None,
+    to_year: Optional[str] = None,
+) -> Any:
+    """
+    Attendance rate, grouped by any of academic_year, month, branch and
+    subject_id.
+    """
+    dimensions = _dimensions(by, analytics_service.ATTENDANCE_DIMENSIONS)
+    return await _report(
+        analytics_service.attendance_rates, ["attendance", "students"], dimensions, _year(from_year), _year(to_year)
+    )
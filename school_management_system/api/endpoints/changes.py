@@ -0,0 +1,96 @@
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from school_management_system.database.session import get_read_session
+from school_management_system.services import change_service
+
+router = APIRouter()
+
+# How often waiting consumers look for events published by other processes
+POLL_INTERVAL_SECONDS = 1.0
+# Comment lines sent on idle event streams, keeping proxies from closing them
+KEEPALIVE_SECONDS = 15.0
+
+
+# Pydantic schemas
+class Change(BaseModel):
+    sequence: int
+    table: str
+    row_id: Optional[int] = None
+    operation: str
+    changes: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+
+class ChangesPage(BaseModel):
+    changes: List[Change]
+    next: int  # Pass as ?since= to continue
+
+
+async def _read(since: int, limit: int, tables: Optional[List[str]]) -> List[Dict[str, Any]]:
+    async with get_read_session() as db:
+        return await change_service.read_changes(db, since, limit, tables)
+
+
+async def _wait_for_changes(
+    since: int, limit: int, tables: Optional[List[str]], timeout: float
+) -> List[Dict[str, Any]]:
+    deadline = time.monotonic() + timeout
+    while True:
+        changes = await _read(since, limit, tables)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            return changes
+        await change_service.wait_for_publish(min(remaining, POLL_INTERVAL_SECONDS))
+
+
+async def _event_stream(request: Request, since: int, limit: int, tables: Optional[List[str]]) -> AsyncIterator[str]:
+    yield "retry: 3000\n\n"
+    while not await request.is_disconnected():
+        changes = await _wait_for_changes(since, limit, tables, KEEPALIVE_SECONDS)
+        if not changes:
+            yield ": keepalive\n\n"
+            continue
+        for change in changes:
+            yield f"id: {change['sequence']}\nevent: change\ndata: {json.dumps(jsonable_encoder(change))}\n\n"
+        since = changes[-1]["sequence"]
+
+
+# API endpoints
+@router.get("/", response_model=ChangesPage)
+async def get_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=60),
+    tables: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    last_event_id: Optional[int] = Header(None),
+) -> Any:
+    """
+    Captured changes after sequence ``since``, oldest first, optionally of
+    some tables only (comma-separated).
+
+    With ``wait`` the request is held for up to that many seconds until
+    there are changes (long polling). With ``Accept: text/event-stream`` the
+    changes are streamed as Server-Sent Events with the sequence as event
+    id, so a reconnecting EventSource resumes where it left off.
+    """
+    table_names = [name.strip() for name in tables.split(",") if name.strip()] if tables else None
+    if accept and "text/event-stream" in accept:
+        start = last_event_id if last_event_id is not None else since
+        return StreamingResponse(
+            _event_stream(request, start, limit, table_names),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    changes = await _wait_for_changes(since, limit, table_names, wait)
+    return {"changes": changes, "next": changes[-1]["sequence"] if changes else since}
@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from school_management_system.models.student import AcademicYear, EngineeringBranch
+from school_management_system.services import cohort_service
+from school_management_system.services.cohort_service import CohortFilter
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class PlacementReport(BaseModel):
+    by: List[str]
+    rows: List[Dict[str, Any]]
+
+
+class CompanyCount(BaseModel):
+    company: str
+    placed: int
+    interns: int
+    converted: int
+    conversion_rate: Optional[float] = None
+
+
+def cohort_filter(
+    branch: Optional[List[EngineeringBranch]] = Query(None),
+    academic_year: Optional[List[AcademicYear]] = Query(None),
+    enrollment_year: Optional[List[int]] = Query(None),
+    min_cgpa: Optional[float] = Query(None, ge=0, le=10),
+    max_cgpa: Optional[float] = Query(None, ge=0, le=10),
+    min_backlogs: Optional[int] = Query(None, ge=0),
+    max_backlogs: Optional[int] = Query(None, ge=0),
+    gender: Optional[str] = None,
+    internship_status: Optional[List[str]] = Query(None),
+    scholarship_status: Optional[bool] = None,
+    hostel_resident: Optional[bool] = None,
+    include_inactive: bool = False,
+) -> CohortFilter:
+    """
+    Students a report covers, from query parameters; repeat a parameter to
+    allow several values (?branch=CSE&branch=IT).
+    """
+    return CohortFilter(
+        branches=tuple(sorted(set(branch or ()), key=lambda member: member.name)),
+        academic_years=tuple(sorted(set(academic_year or ()), key=lambda member: member.name)),
+        enrollment_years=tuple(sorted(set(enrollment_year or ()))),
+        min_cgpa=min_cgpa,
+        max_cgpa=max_cgpa,
+        min_backlogs=min_backlogs,
+        max_backlogs=max_backlogs,
+        gender=gender,
+        internship_statuses=tuple(sorted(set(internship_status or ()))),
+        scholarship_status=scholarship_status,
+        hostel_resident=hostel_resident,
+        include_inactive=include_inactive,
+    )
+
+
+# API endpoints
+@router.get("/placements", response_model=PlacementReport)
+async def get_placement_cohorts(
+    by: str = "branch,cgpa_band",
+    cohort: CohortFilter = Depends(cohort_filter),
+) -> Any:
+    """
+    Placement rate, mean CGPA and internship-to-placement conversion, grouped
+    by any of branch, academic_year, enrollment_year, cgpa_band, backlogs,
+    gender, internship_status, scholarship_status and hostel_resident.
+    """
+    dimensions = tuple(name.strip() for name in by.split(",") if name.strip())
+    try:
+        rows = await cohort_service.placement_rates(dimensions, cohort)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"by": list(dimensions), "rows": rows}
+
+
+@router.get("/companies", response_model=List[CompanyCount])
+async def get_company_counts(cohort: CohortFilter = Depends(cohort_filter)) -> Any:
+    """
+    Placements and internships per company, and the interns each company
+    placed.
+    """
+    return await cohort_service.company_counts(cohort)
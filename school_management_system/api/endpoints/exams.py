@@ -2,12 +2,16 @@ from typing import Any, List, Optional
 from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel
 
+from school_management_system.database.partitioning import in_academic_years, parse_academic_year
+from school_management_system.api.encoders import RowEncoder
 from school_management_system.database.session import get_db
 from school_management_system.models.exam import Exam, ExamType, ExamResult
+from school_management_system.services.archive_service import read_archive
 
 router = APIRouter()
 
@@ -51,7 +55,7 @@ class ExamInDBBase(ExamBase):
     id: int
 
     class Config:
-        from_attributes = True
+        orm_mode = True
 
 
 class ExamResponse(ExamInDBBase):
@@ -80,15 +84,20 @@ class ExamResultUpdate(BaseModel):
 
 class ExamResultInDBBase(ExamResultBase):
     id: int
+    exam_date: Optional[date] = None
 
     class Config:
-        from_attributes = True
+        orm_mode = True
 
 
 class ExamResultResponse(ExamResultInDBBase):
     pass
 
 
+# Hot list endpoints encode their rows directly (see api/encoders.py)
+exam_result_rows = RowEncoder(ExamResultResponse)
+
+
 # Exam endpoints
 @router.post("/", response_model=ExamResponse)
 async def create_exam(
@@ -215,7 +224,8 @@ async def create_exam_result(
     """
     # Check if exam exists
     exam_result = await db.execute(select(Exam).where(Exam.id == result_in.exam_id))
-    if not exam_result.scalars().first():
+    exam = exam_result.scalars().first()
+    if not exam:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Exam not found",
@@ -225,7 +235,8 @@ async def create_exam_result(
     query = select(ExamResult).where(
         ExamResult.student_id == result_in.student_id,
         ExamResult.exam_id == result_in.exam_id,
-        ExamResult.subject_id == result_in.subject_id
+        ExamResult.subject_id == result_in.subject_id,
+        or_(ExamResult.exam_date == exam.date, ExamResult.exam_date.is_(None)),
     )
     existing_result = await db.execute(query)
     if existing_result.scalars().first():
@@ -234,7 +245,8 @@ async def create_exam_result(
             detail="Result already exists for this student, exam, and subject",
         )
     
-    result = ExamResult(**result_in.dict())
+    # The exam's date is the partition key of its results
+    result = ExamResult(**result_in.dict(), exam_date=exam.date)
     db.add(result)
     await db.commit()
     await db.refresh(result)
@@ -267,22 +279,46 @@ async def get_results_by_exam(
     """
     Get all results for a specific exam.
     """
-    result = await db.execute(select(ExamResult).where(ExamResult.exam_id == exam_id))
+    query = select(ExamResult).where(ExamResult.exam_id == exam_id)
+    exam_date = (await db.execute(select(Exam.date).where(Exam.id == exam_id))).scalar()
+    if exam_date is not None:
+        # Results carry their exam's date, which limits the query to one partition
+        query = query.where(or_(ExamResult.exam_date == exam_date, ExamResult.exam_date.is_(None)))
+    result = await db.execute(query)
     exam_results = result.scalars().all()
-    return exam_results
+    return exam_result_rows.response(exam_results)
 
 
 @router.get("/results/by-student/{student_id}", response_model=List[ExamResultResponse])
 async def get_results_by_student(
     student_id: int,
+    academic_year: Optional[str] = None,
+    include_archived: bool = False,
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
-    Get all results for a specific student.
+    Get all results for a specific student, or those of one academic year
+    (e.g. 2023-2024). With include_archived, results of archived academic
+    years are included, for transcripts.
     """
-    result = await db.execute(select(ExamResult).where(ExamResult.student_id == student_id))
-    exam_results = result.scalars().all()
-    return exam_results
+    query = select(ExamResult).where(ExamResult.student_id == student_id)
+    start_year = None
+    if academic_year is not None:
+        try:
+            start_year = parse_academic_year(academic_year)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.where(in_academic_years(ExamResult.exam_date, start_year))
+    result = await db.execute(query)
+    exam_results = list(result.scalars().all())
+    if include_archived:
+        try:
+            exam_results.extend(await read_archive(
+                "exam_results", {"student_id": student_id}, None if start_year is None else [start_year]
+            ))
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return exam_result_rows.response(exam_results)
 
 
 @router.put("/results/{result_id}", response_model=ExamResultResponse)
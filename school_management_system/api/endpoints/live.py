@@ -0,0 +1,67 @@
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from school_management_system.services.live_service import LIVE_TOPICS, Subscription, hub
+
+router = APIRouter()
+
+# Comment lines sent on idle streams, keeping proxies from closing them
+KEEPALIVE_SECONDS = 15.0
+
+
+# Pydantic schemas
+class LiveStatus(BaseModel):
+    connections: int
+    max_connections: int
+    buffered: int
+    published: int
+    dropped: int
+    relay_running: bool
+
+
+async def _event_stream(subscription: Subscription) -> AsyncIterator[str]:
+    yield "retry: 5000\n\n"
+    while True:
+        events = await subscription.next_events(KEEPALIVE_SECONDS)
+        if events:
+            yield "".join(events)
+        if subscription.overflowed:
+            # Too far behind: the page reloads what it shows and reconnects
+            yield "event: overflow\ndata: {}\n\n"
+            return
+        if not events:
+            yield ": keepalive\n\n"
+
+
+# API endpoints
+@router.get("/events")
+async def get_live_events(topics: str = ",".join(LIVE_TOPICS)) -> Any:
+    """
+    Stream domain events of some topics (comma-separated: payments, results,
+    reports) as Server-Sent Events.
+    """
+    try:
+        subscription = hub.subscribe(name.strip() for name in topics.split(",") if name.strip())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return StreamingResponse(
+        _event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Runs when the stream ends or the client disconnects
+        background=BackgroundTask(hub.unsubscribe, subscription),
+    )
+
+
+@router.get("/status", response_model=LiveStatus)
+async def get_live_status() -> Any:
+    """
+    Live connections of this process and the events handed out to them.
+    """
+    return hub.status()
@@ -1,15 +1,26 @@
-from typing import Any, List, Optional
-from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time
+from decimal import Decimal
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel
 
+from school_management_system.api.encoders import RowEncoder
 from school_management_system.database.session import get_db
+from school_management_system.database.types import MoneyAmount, to_money
+from school_management_system.models.ledger import LedgerEvent, LedgerEventType
 from school_management_system.models.payment import (
     FeeStructure, FeeItem, FeeRecord, Payment, PaymentStatus, PaymentMethod, FeeType
 )
+from school_management_system.models.student import AcademicYear
+from school_management_system.services.billing_service import run_billing
+from school_management_system.services.ledger_service import (
+    balance_as_of, close_fee_record, outstanding_as_of, record_event, reverse_payment
+)
 
 router = APIRouter()
 
@@ -51,7 +62,7 @@ class FeeItemBase(BaseModel):
     name: str
     description: Optional[str] = None
     fee_type: FeeType
-    amount: float
+    amount: MoneyAmount
     due_date: Optional[date] = None
     is_mandatory: bool = True
     fee_structure_id: int
@@ -65,7 +76,7 @@ class FeeItemUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     fee_type: Optional[FeeType] = None
-    amount: Optional[float] = None
+    amount: Optional[MoneyAmount] = None
     due_date: Optional[date] = None
     is_mandatory: Optional[bool] = None
 
@@ -85,9 +96,9 @@ class FeeItemResponse(FeeItemInDBBase):
 class FeeRecordBase(BaseModel):
     academic_year: str
     term: str
-    total_amount: float
-    paid_amount: float = 0.0
-    balance: float
+    total_amount: MoneyAmount
+    paid_amount: MoneyAmount = Decimal("0.00")
+    balance: MoneyAmount
     status: PaymentStatus = PaymentStatus.PENDING
     due_date: date
     student_id: int
@@ -101,9 +112,9 @@ class FeeRecordCreate(FeeRecordBase):
 class FeeRecordUpdate(BaseModel):
     academic_year: Optional[str] = None
     term: Optional[str] = None
-    total_amount: Optional[float] = None
-    paid_amount: Optional[float] = None
-    balance: Optional[float] = None
+    total_amount: Optional[MoneyAmount] = None
+    paid_amount: Optional[MoneyAmount] = None
+    balance: Optional[MoneyAmount] = None
     status: Optional[PaymentStatus] = None
     due_date: Optional[date] = None
 
@@ -119,9 +130,36 @@ class FeeRecordResponse(FeeRecordInDBBase):
     pass
 
 
+class BillingRunRequest(BaseModel):
+    academic_year: str
+    term: str
+    due_date: date
+    grade_levels: Optional[List[AcademicYear]] = None
+    fee_structure_ids: Optional[List[int]] = None
+    terms_per_year: int = 1
+    dry_run: bool = False
+
+
+class BillingRunResponse(BaseModel):
+    academic_year: str
+    term: str
+    dry_run: bool
+    grades: Dict[str, Dict[str, Any]]
+
+
+class FeeSummaryResponse(BaseModel):
+    academic_year: str
+    term: str
+    status: PaymentStatus
+    fee_records: int
+    total_amount: MoneyAmount
+    paid_amount: MoneyAmount
+    balance: MoneyAmount
+
+
 # Pydantic schemas for Payment
 class PaymentBase(BaseModel):
-    amount: float
+    amount: MoneyAmount
     payment_date: datetime = datetime.now()
     payment_method: PaymentMethod
     transaction_id: Optional[str] = None
@@ -135,7 +173,7 @@ class PaymentCreate(PaymentBase):
 
 
 class PaymentUpdate(BaseModel):
-    amount: Optional[float] = None
+    amount: Optional[MoneyAmount] = None
     payment_date: Optional[datetime] = None
     payment_method: Optional[PaymentMethod] = None
     transaction_id: Optional[str] = None
@@ -154,6 +192,58 @@ class PaymentResponse(PaymentInDBBase):
     pass
 
 
+# Hot list endpoints encode their rows directly (see api/encoders.py)
+payment_rows = RowEncoder(PaymentResponse)
+
+
+# Pydantic schemas for the ledger
+class LedgerAdjustmentCreate(BaseModel):
+    event_type: LedgerEventType
+    amount: MoneyAmount
+    occurred_at: Optional[datetime] = None
+    description: Optional[str] = None
+
+
+class LedgerEventResponse(BaseModel):
+    id: int
+    fee_record_id: int
+    event_type: LedgerEventType
+    amount: MoneyAmount
+    charged_delta: MoneyAmount
+    paid_delta: MoneyAmount
+    occurred_at: datetime
+    recorded_at: datetime
+    payment_id: Optional[int] = None
+    reverses_event_id: Optional[int] = None
+    description: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class LedgerBalanceResponse(BaseModel):
+    fee_record_id: int
+    as_of: datetime
+    charged: MoneyAmount
+    paid: MoneyAmount
+    balance: MoneyAmount
+    snapshot_as_of: Optional[datetime] = None
+    tail_events: int
+
+
+class OutstandingResponse(BaseModel):
+    as_of: datetime
+    charged: MoneyAmount
+    paid: MoneyAmount
+    outstanding: MoneyAmount
+    snapshot_as_of: Optional[datetime] = None
+    tail_events: int
+
+
+def _end_of_day(as_of: Optional[date]) -> datetime:
+    return datetime.combine(as_of or date.today(), time.max)
+
+
 # FeeStructure endpoints
 @router.post("/fee-structures/", response_model=FeeStructureResponse)
 async def create_fee_structure(
@@ -379,11 +469,79 @@ async def create_fee_record(
     """
     fee_record = FeeRecord(**fee_record_in.dict())
     db.add(fee_record)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # uq_fee_records_student_term: one record per student and term
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Fee record already exists for this student and term",
+        )
+
+    # Opening events; the record's amounts are already set
+    if fee_record.total_amount > 0:
+        record_event(db, fee_record, LedgerEventType.CHARGE, fee_record.total_amount, apply=False)
+    if fee_record.paid_amount and fee_record.paid_amount > 0:
+        record_event(db, fee_record, LedgerEventType.PAYMENT, fee_record.paid_amount, apply=False)
+
     await db.commit()
     await db.refresh(fee_record)
     return fee_record
 
 
+@router.post("/fee-records/billing-run", response_model=BillingRunResponse)
+async def create_billing_run(
+    billing_run_in: BillingRunRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Create fee records for all active students from the active fee structures.
+
+    Students already billed for the academic year and term are skipped. With
+    ``dry_run`` nothing is written and the response describes what would be
+    created and which existing records no longer match their fee structure.
+    """
+    try:
+        return await run_billing(db, **billing_run_in.dict())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
+@router.get("/fee-records/summary", response_model=List[FeeSummaryResponse])
+async def get_fee_summary(
+    academic_year: Optional[str] = None,
+    term: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get fee record totals per academic year, term and status.
+
+    The sums are exact: amounts are stored in cents and summed in the database.
+    """
+    query = select(
+        FeeRecord.academic_year,
+        FeeRecord.term,
+        FeeRecord.status,
+        func.count().label("fee_records"),
+        func.coalesce(func.sum(FeeRecord.total_amount), 0).label("total_amount"),
+        func.coalesce(func.sum(FeeRecord.paid_amount), 0).label("paid_amount"),
+        func.coalesce(func.sum(FeeRecord.balance), 0).label("balance"),
+    )
+    if academic_year:
+        query = query.where(FeeRecord.academic_year == academic_year)
+    if term:
+        query = query.where(FeeRecord.term == term)
+    query = query.group_by(FeeRecord.academic_year, FeeRecord.term, FeeRecord.status).order_by(
+        FeeRecord.academic_year, FeeRecord.term, FeeRecord.status
+    )
+    result = await db.execute(query)
+    return [row._asdict() for row in result.all()]
+
+
 @router.get("/fee-records/{fee_record_id}", response_model=FeeRecordResponse)
 async def get_fee_record(
     fee_record_id: int,
@@ -438,10 +596,23 @@ async def update_fee_record(
             detail="Fee record not found",
         )
     
+    original_total = to_money(fee_record.total_amount)
+    original_paid = to_money(fee_record.paid_amount)
+
     # Update fee record fields
     update_data = fee_record_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(fee_record, field, value)
+
+    # Record changed amounts in the ledger
+    total_change = to_money(fee_record.total_amount) - original_total
+    if total_change:
+        event_type = LedgerEventType.CHARGE if total_change > 0 else LedgerEventType.DISCOUNT
+        record_event(db, fee_record, event_type, abs(total_change), description="Fee record updated", apply=False)
+    paid_change = to_money(fee_record.paid_amount) - original_paid
+    if paid_change:
+        event_type = LedgerEventType.PAYMENT if paid_change > 0 else LedgerEventType.REFUND
+        record_event(db, fee_record, event_type, abs(paid_change), description="Fee record updated", apply=False)
     
     await db.commit()
     await db.refresh(fee_record)
@@ -464,11 +635,90 @@ async def delete_fee_record(
             detail="Fee record not found",
         )
     
+    close_fee_record(db, fee_record, description="Fee record deleted")
     await db.delete(fee_record)
     await db.commit()
     return fee_record
 
 
+@router.get("/fee-records/{fee_record_id}/ledger", response_model=List[LedgerEventResponse])
+async def get_fee_record_ledger(
+    fee_record_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the ledger events of a fee record in the order they were recorded.
+    """
+    result = await db.execute(
+        select(LedgerEvent)
+        .where(LedgerEvent.fee_record_id == fee_record_id)
+        .order_by(LedgerEvent.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("/fee-records/{fee_record_id}/balance", response_model=LedgerBalanceResponse)
+async def get_fee_record_balance(
+    fee_record_id: int,
+    as_of: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get a fee record's balance from its ledger at the end of a day (default: today).
+    """
+    return await balance_as_of(db, fee_record_id, _end_of_day(as_of))
+
+
+@router.post("/fee-records/{fee_record_id}/adjustments", response_model=LedgerEventResponse)
+async def create_fee_record_adjustment(
+    fee_record_id: int,
+    adjustment_in: LedgerAdjustmentCreate,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Record an extra charge, a discount or a refund on a fee record.
+    """
+    if adjustment_in.event_type not in (LedgerEventType.CHARGE, LedgerEventType.DISCOUNT, LedgerEventType.REFUND):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Adjustments must be a charge, discount or refund",
+        )
+    result = await db.execute(select(FeeRecord).where(FeeRecord.id == fee_record_id))
+    fee_record = result.scalars().first()
+    if not fee_record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fee record not found",
+        )
+    
+    try:
+        ledger_event = record_event(db, fee_record, **adjustment_in.dict())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    await db.commit()
+    await db.refresh(ledger_event)
+    return ledger_event
+
+
+@router.get("/ledger/outstanding", response_model=OutstandingResponse)
+async def get_outstanding(
+    as_of: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the total charged, paid and outstanding over all fee records at the end
+    of a day (default: today).
+    """
+    return await outstanding_as_of(db, _end_of_day(as_of))
+
+
 # Payment endpoints
 @router.post("/payments/", response_model=PaymentResponse)
 async def create_payment(
@@ -490,16 +740,19 @@ async def create_payment(
     # Create payment
     payment = Payment(**payment_in.dict())
     db.add(payment)
+    await db.flush()
     
-    # Update fee record
-    fee_record.paid_amount += payment_in.amount
-    fee_record.balance = fee_record.total_amount - fee_record.paid_amount
-    
-    # Update status based on payment
-    if fee_record.balance <= 0:
-        fee_record.status = PaymentStatus.PAID
-    elif fee_record.paid_amount > 0:
-        fee_record.status = PaymentStatus.PARTIALLY_PAID
+    # Record it in the ledger, which updates the fee record's balance and status
+    try:
+        record_event(
+            db, fee_record, LedgerEventType.PAYMENT, payment.amount,
+            occurred_at=payment.payment_date, payment_id=payment.id,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     
     await db.commit()
     await db.refresh(payment)
@@ -534,7 +787,7 @@ async def get_payments_by_fee_record(
     """
     result = await db.execute(select(Payment).where(Payment.fee_record_id == fee_record_id))
     payments = result.scalars().all()
-    return payments
+    return payment_rows.response(payments)
 
 
 @router.put("/payments/{payment_id}", response_model=PaymentResponse)
@@ -554,32 +807,32 @@ async def update_payment(
             detail="Payment not found",
         )
     
-    # Get original amount
+    # Get original amount and date
     original_amount = payment.amount
+    original_date = payment.payment_date
     
-    # Update payment fields
     update_data = payment_in.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(payment, field, value)
     
-    # If amount was updated, update fee record
-    if "amount" in update_data and update_data["amount"] != original_amount:
-        # Get fee record
+    # If amount or date was updated, reverse the payment in the ledger and record it again
+    if update_data.get("amount", original_amount) != original_amount or \
+            update_data.get("payment_date", original_date) != original_date:
         result = await db.execute(select(FeeRecord).where(FeeRecord.id == payment.fee_record_id))
         fee_record = result.scalars().first()
-        
-        if fee_record:
-            # Update fee record
-            fee_record.paid_amount = fee_record.paid_amount - original_amount + payment.amount
-            fee_record.balance = fee_record.total_amount - fee_record.paid_amount
-            
-            # Update status based on payment
-            if fee_record.balance <= 0:
-                fee_record.status = PaymentStatus.PAID
-            elif fee_record.paid_amount > 0:
-                fee_record.status = PaymentStatus.PARTIALLY_PAID
-            else:
-                fee_record.status = PaymentStatus.PENDING
+        await reverse_payment(db, fee_record, payment, description="Payment updated")
+        try:
+            record_event(
+                db, fee_record, LedgerEventType.PAYMENT, update_data.get("amount", original_amount),
+                occurred_at=update_data.get("payment_date", original_date), payment_id=payment.id,
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+    
+    # Update payment fields
+    for field, value in update_data.items():
+        setattr(payment, field, value)
     
     await db.commit()
     await db.refresh(payment)
@@ -606,16 +859,8 @@ async def delete_payment(
     result = await db.execute(select(FeeRecord).where(FeeRecord.id == payment.fee_record_id))
     fee_record = result.scalars().first()
     
-    if fee_record:
-        # Update fee record
-        fee_record.paid_amount -= payment.amount
-        fee_record.balance = fee_record.total_amount - fee_record.paid_amount
-        
-        # Update status based on payment
-        if fee_record.paid_amount <= 0:
-            fee_record.status = PaymentStatus.PENDING
-        else:
-            fee_record.status = PaymentStatus.PARTIALLY_PAID
+    # Reverse the payment in the ledger, which updates the fee record's balance and status
+    await reverse_payment(db, fee_record, payment, description="Payment deleted")
     
     await db.delete(payment)
     await db.commit()
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from school_management_system.config import settings
+from school_management_system.database.session import get_db, get_read_session
+from school_management_system.services import query_service
+from school_management_system.services.query_service import QueryError
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class QueryRequest(BaseModel):
+    query: Optional[Dict[str, Any]] = None
+    id: Optional[str] = None  # Id or name of a persisted query, instead of the query
+    variables: Dict[str, Any] = {}
+
+
+class QueryResponse(BaseModel):
+    data: Dict[str, Any]
+    extensions: Dict[str, Any]
+
+
+class PersistedQueryCreate(BaseModel):
+    query: Dict[str, Any]
+    name: Optional[str] = None
+
+
+class PersistedQueryResponse(BaseModel):
+    id: str
+    name: Optional[str] = None
+    document: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+# API endpoints
+@router.post("/", response_model=QueryResponse)
+async def run_query(request: QueryRequest) -> Any:
+    """
+    Run a batched read query, given inline or as the id or name of a persisted
+    query. Reads are served by a replica when one is available.
+    """
+    if (request.query is None) == (request.id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send either a query or the id of a persisted query",
+        )
+    try:
+        async with get_read_session() as db:
+            if request.id is not None:
+                plan = await query_service.get_persisted_plan(db, request.id)
+                if plan is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Persisted query not found",
+                    )
+            elif settings.QUERY_PERSISTED_ONLY:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Only persisted queries are accepted",
+                )
+            else:
+                plan = query_service.get_plan(request.query)
+            return await query_service.execute_query(db, plan, request.variables)
+    except QueryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/schema")
+async def get_query_schema() -> Any:
+    """
+    List the root fields, types, fields and relationships queries can use.
+    """
+    return query_service.describe_schema()
+
+
+@router.post("/persisted", response_model=PersistedQueryResponse, status_code=status.HTTP_201_CREATED)
+async def create_persisted_query(
+    persisted_in: PersistedQueryCreate,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Register a query for execution by id (or name) without sending, parsing
+    and checking it again.
+    """
+    try:
+        return await query_service.register_persisted_query(db, persisted_in.query, persisted_in.name)
+    except QueryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/persisted", response_model=List[PersistedQueryResponse])
+async def read_persisted_queries(db: AsyncSession = Depends(get_db)) -> Any:
+    """
+    List the persisted queries.
+    """
+    return await query_service.list_persisted_queries(db)
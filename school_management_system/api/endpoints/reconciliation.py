@@ -0,0 +1,149 @@
+import io
+from typing import Any, List, Optional
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from pydantic import BaseModel
+
+from school_management_system.database.session import get_db
+from school_management_system.database.types import MoneyAmount
+from school_management_system.models.reconciliation import (
+    ExceptionReason, ExceptionStatus, StatementFormat, StatementImport, UnreconciledEntry
+)
+from school_management_system.services.reconciliation_service import reconcile_statement, resolve_exception
+from school_management_system.utils.statements import detect_format
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class StatementImportResponse(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    format: StatementFormat
+    status: str
+    entries: int
+    matched: int
+    matched_amount: MoneyAmount
+    duplicates: int
+    debits: int
+    exceptions: int
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class UnreconciledEntryResponse(BaseModel):
+    id: int
+    statement_import_id: int
+    line_number: int
+    booking_date: Optional[date] = None
+    amount: Optional[MoneyAmount] = None
+    transaction_id: Optional[str] = None
+    reference: Optional[str] = None
+    narration: Optional[str] = None
+    reason: ExceptionReason
+    detail: Optional[str] = None
+    status: ExceptionStatus
+    payment_id: Optional[int] = None
+    resolved_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class UnreconciledEntryResolve(BaseModel):
+    fee_record_id: Optional[int] = None  # None dismisses the entry
+
+
+@router.post("/imports/", response_model=StatementImportResponse)
+async def import_statement(
+    file: UploadFile = File(...),
+    format: Optional[StatementFormat] = None,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Import a bank or gateway statement (CSV, OFX or MT940) and post the
+    payments it matches to fee records.
+    """
+    head = file.file.read(4096).decode("utf-8", errors="replace")
+    file.file.seek(0)
+    statement_format = format or detect_format(file.filename, head)
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        return await reconcile_statement(db, lines, statement_format, filename=file.filename)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
+@router.get("/imports/{import_id}", response_model=StatementImportResponse)
+async def get_statement_import(
+    import_id: int,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get a statement import by ID.
+    """
+    result = await db.execute(select(StatementImport).where(StatementImport.id == import_id))
+    statement_import = result.scalars().first()
+    if not statement_import:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Statement import not found",
+        )
+    return statement_import
+
+
+@router.get("/exceptions/", response_model=List[UnreconciledEntryResponse])
+async def get_unreconciled_entries(
+    skip: int = 0,
+    limit: int = 100,
+    status: ExceptionStatus = ExceptionStatus.OPEN,
+    reason: Optional[ExceptionReason] = None,
+    import_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the queue of statement entries awaiting review.
+    """
+    query = select(UnreconciledEntry).where(UnreconciledEntry.status == status)
+    if reason:
+        query = query.where(UnreconciledEntry.reason == reason)
+    if import_id:
+        query = query.where(UnreconciledEntry.statement_import_id == import_id)
+
+    query = query.order_by(UnreconciledEntry.id).offset(skip).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+@router.post("/exceptions/{entry_id}/resolve", response_model=UnreconciledEntryResponse)
+async def resolve_unreconciled_entry(
+    entry_id: int,
+    resolution: UnreconciledEntryResolve,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Post an unreconciled entry to a fee record, or dismiss it.
+    """
+    result = await db.execute(select(UnreconciledEntry).where(UnreconciledEntry.id == entry_id))
+    entry = result.scalars().first()
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unreconciled entry not found",
+        )
+    try:
+        return await resolve_exception(db, entry, resolution.fee_record_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
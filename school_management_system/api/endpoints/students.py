@@ -1,14 +1,20 @@
-from typing import Any, List, Optional
-from datetime import date
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 from enum import Enum
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel, EmailStr, Field, validator
 
+from school_management_system.api.encoders import RowEncoder
 from school_management_system.database.session import get_db
+from school_management_system.database.types import MoneyAmount
+from school_management_system.models.admission import AdmissionStatus
+from school_management_system.models.exam import ExamType
+from school_management_system.models.payment import PaymentMethod, PaymentStatus
 from school_management_system.models.student import Student, EngineeringBranch, AcademicYear
+from school_management_system.services import student_overview_service
 
 router = APIRouter()
 
@@ -64,6 +70,11 @@ class StudentBase(BaseModel):
     hostel_resident: Optional[bool] = False
     hostel_room_number: Optional[str] = None
     
+    @validator('academic_year', 'branch', pre=True)
+    def use_enum_name(cls, v):
+        # Students read from the database carry the model enums, named like the API values
+        return v.name if isinstance(v, Enum) else v
+
     @validator('cgpa')
     def validate_cgpa(cls, v):
         if v is not None and (v < 0 or v > 10):
@@ -101,6 +112,99 @@ class StudentResponse(StudentInDBBase):
     pass
 
 
+# Hot list endpoints encode their rows directly (see api/encoders.py)
+student_rows = RowEncoder(StudentResponse)
+
+
+class OverviewSubject(BaseModel):
+    id: int
+    name: str
+    code: str
+    credits: Optional[int] = None
+    teacher_id: Optional[int] = None
+
+
+class OverviewExamResult(BaseModel):
+    id: int
+    exam_id: int
+    exam_name: str
+    exam_type: ExamType
+    date: date
+    subject_id: int
+    subject_name: str
+    score: float
+    total_marks: float
+    passing_marks: float
+    grade: Optional[str] = None
+    remarks: Optional[str] = None
+
+
+class OverviewPayment(BaseModel):
+    id: int
+    amount: MoneyAmount
+    payment_date: datetime
+    payment_method: PaymentMethod
+    transaction_id: Optional[str] = None
+    receipt_number: Optional[str] = None
+
+
+class OverviewFeeRecord(BaseModel):
+    id: int
+    academic_year: str
+    term: str
+    total_amount: MoneyAmount
+    paid_amount: MoneyAmount
+    balance: MoneyAmount
+    status: PaymentStatus
+    due_date: date
+    fee_structure_id: int
+    payments: List[OverviewPayment]
+
+
+class OverviewAttendance(BaseModel):
+    academic_year: str
+    total: int
+    by_status: Dict[str, int]
+    percentage: Optional[float] = None  # Present or late
+    first_date: Optional[date] = None
+    last_date: Optional[date] = None
+
+
+class OverviewProgressNote(BaseModel):
+    id: int
+    date: date
+    category: str
+    notes: str
+    action_items: Optional[str] = None
+    teacher_id: int
+
+
+class OverviewAdmission(BaseModel):
+    id: int
+    application_date: date
+    status: AdmissionStatus
+    desired_grade_level: str
+    desired_branch: Optional[EngineeringBranch] = None
+    previous_school: Optional[str] = None
+    previous_grade_level: Optional[str] = None
+    parent_name: str
+    parent_phone: str
+    parent_email: Optional[str] = None
+    relationship_to_applicant: str
+    status_changed_at: Optional[datetime] = None
+
+
+class StudentOverviewResponse(BaseModel):
+    # Only the requested sections are present
+    student: Optional[StudentResponse] = None
+    subjects: Optional[List[OverviewSubject]] = None
+    exam_results: Optional[List[OverviewExamResult]] = None
+    fee_records: Optional[List[OverviewFeeRecord]] = None
+    attendance: Optional[OverviewAttendance] = None
+    progress_notes: Optional[List[OverviewProgressNote]] = None
+    admission: Optional[OverviewAdmission] = None
+
+
 @router.post("/", response_model=StudentResponse)
 async def create_student(
     student_in: StudentCreate,
@@ -126,6 +230,34 @@ async def create_student(
     return student
 
 
+@router.get("/{student_id}/overview", response_model=StudentOverviewResponse, response_model_exclude_unset=True)
+async def get_student_overview(
+    student_id: int,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated sections to include, e.g. student,fee_records (default: all)"
+    ),
+) -> Any:
+    """
+    Get everything about a student in one response: details, subjects, exam
+    results, fee records with payments, attendance, progress notes and admission.
+    """
+    # No request session: the sections are read concurrently in sessions of their own
+    sections = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+    try:
+        overview = await student_overview_service.get_student_overview(student_id, sections)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    if overview is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found",
+        )
+    return overview
+
+
 @router.get("/{student_id}", response_model=StudentResponse)
 async def get_student(
     student_id: int,
@@ -155,7 +287,7 @@ async def get_students(
     """
     result = await db.execute(select(Student).offset(skip).limit(limit))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.put("/{student_id}", response_model=StudentResponse)
@@ -216,7 +348,7 @@ async def get_students_by_academic_year(
     """
     result = await db.execute(select(Student).where(Student.academic_year == academic_year))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.get("/by-branch/{branch}", response_model=List[StudentResponse])
@@ -229,7 +361,7 @@ async def get_students_by_branch(
     """
     result = await db.execute(select(Student).where(Student.branch == branch))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.get("/placed", response_model=List[StudentResponse])
@@ -241,7 +373,7 @@ async def get_placed_students(
     """
     result = await db.execute(select(Student).where(Student.placement_status == "Placed"))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.get("/with-backlogs", response_model=List[StudentResponse])
@@ -253,7 +385,7 @@ async def get_students_with_backlogs(
     """
     result = await db.execute(select(Student).where(Student.backlogs > 0))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.get("/with-scholarship", response_model=List[StudentResponse])
@@ -265,7 +397,7 @@ async def get_students_with_scholarship(
     """
     result = await db.execute(select(Student).where(Student.scholarship_status == True))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.get("/hostel-residents", response_model=List[StudentResponse])
@@ -277,7 +409,7 @@ async def get_hostel_residents(
     """
     result = await db.execute(select(Student).where(Student.hostel_resident == True))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
 
 
 @router.get("/by-parent/{parent_id}", response_model=List[StudentResponse])
@@ -290,4 +422,4 @@ async def get_students_by_parent(
     """
     result = await db.execute(select(Student).where(Student.parent_id == parent_id))
     students = result.scalars().all()
-    return students
+    return student_rows.response(students)
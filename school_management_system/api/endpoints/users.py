@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel, EmailStr
 
+from school_management_system.api.encoders import RowEncoder
 from school_management_system.database.session import get_db
 from school_management_system.models.user import User, Role
 from school_management_system.utils.security import (
@@ -44,6 +45,10 @@ class UserResponse(UserInDBBase):
     pass
 
 
+# Hot list endpoints encode their rows directly (see api/encoders.py)
+user_rows = RowEncoder(UserResponse)
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -112,7 +117,7 @@ async def get_users(
     """
     result = await db.execute(select(User).offset(skip).limit(limit))
     users = result.scalars().all()
-    return users
+    return user_rows.response(users)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -0,0 +1,100 @@
+"""
+Routers imported and included on first use.
+
+Importing an endpoint module builds its Pydantic models and routes, and with
+every router imported up front that dominates the time the application takes
+to import. Registered lazily, the application only knows each router's path
+prefix: the first request under a prefix imports its module and includes the
+router, and a request for the OpenAPI schema includes them all. A router
+registered without a prefix (the web pages) is included for the first
+request that no prefix claims and no included route matches.
+"""
+import importlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LazyRouter:
+    module: str
+    prefix: str
+    include_kwargs: Dict[str, Any] = field(default_factory=dict)
+    setup: Optional[Callable[[Any], None]] = None  # Called with the imported module
+    loaded: bool = False
+
+
+class LazyRouters:
+    """
+    The routers of an application, included when a request first needs them.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.routers: List[LazyRouter] = []
+
+    def add(self, module: str, prefix: str = "", setup: Optional[Callable[[Any], None]] = None, **include_kwargs) -> None:
+        """
+        Register the ``router`` of a module, included under ``prefix`` with the
+        other keyword arguments of ``include_router``.
+        """
+        self.routers.append(LazyRouter(module, prefix, include_kwargs, setup))
+
+    def _include(self, router: LazyRouter) -> None:
+        if router.loaded:
+            return
+        module = importlib.import_module(router.module)
+        if router.setup is not None:
+            router.setup(module)
+        self.app.include_router(module.router, prefix=router.prefix, **router.include_kwargs)
+        router.loaded = True
+        # The schema is rebuilt with the new routes on the next request for it
+        self.app.openapi_schema = None
+        logger.debug(f"Included router {router.module}")
+
+    def include_all(self) -> None:
+        for router in self.routers:
+            self._include(router)
+
+    def include_for_scope(self, scope) -> None:
+        """
+        Include the routers a request can reach.
+        """
+        path = scope["path"]
+        if path == self.app.openapi_url:
+            self.include_all()
+            return
+        claimed = False
+        for router in self.routers:
+            if router.prefix and (path == router.prefix or path.startswith(router.prefix + "/")):
+                claimed = True
+                self._include(router)
+        if not claimed and not any(route.matches(scope)[0] == Match.FULL for route in self.app.router.routes):
+            for router in self.routers:
+                if not router.prefix:
+                    self._include(router)
+
+    @property
+    def pending(self) -> bool:
+        return not all(router.loaded for router in self.routers)
+
+
+class LazyRouterMiddleware:
+    """
+    ASGI middleware including the routers a request needs before it is routed.
+    Once every router is included it only passes requests on.
+    """
+
+    def __init__(self, app, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and self.routers.pending:
+            self.routers.include_for_scope(scope)
+        await self.app(scope, receive, send)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Script to measure the bytes and requests of a dashboard load, with plain
+static files and with the fingerprinted, precompressed assets.
+
+The dashboard is requested in process (no network) like a browser would:
+the page, then every stylesheet and script it links from /static. A cold
+load starts with an empty browser cache. A warm load repeats it with the
+responses of the cold load cached. Assets that are still fresh are not
+requested. The others are revalidated with a conditional request, which is
+what browsers do for files without a lifetime once a page is reloaded.
+Assets from CDNs are listed but not fetched.
+
+Example:
+    python benchmark_assets.py
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from school_management_system.main import app
+from school_management_system.web.assets import STATIC_DIR, AssetFiles, asset_manifest, build_assets
+
+BROWSER_HEADERS = {"Accept-Encoding": "gzip, deflate, br", "Accept": "text/html,*/*"}
+ASSET_PATTERN = re.compile(r'<(?:script[^>]*\bsrc|link[^>]*\bhref)="([^"]+)"')
+
+
+def is_fresh(response: httpx.Response) -> bool:
+    cache_control = response.headers.get("cache-control", "")
+    return "immutable" in cache_control or ("max-age" in cache_control and "no-cache" not in cache_control)
+
+
+async def load(page: httpx.AsyncClient, assets: httpx.AsyncClient, path: str,
+               cache: Dict[str, httpx.Response]) -> Tuple[int, int, List[str]]:
+    """
+    Load a page and its local assets through a browser cache.
+
+    Returns:
+        Requests sent, body bytes received and the external assets
+    """
+    response = await page.get(path, headers=BROWSER_HEADERS)
+    response.raise_for_status()
+    requests, received = 1, response.num_bytes_downloaded
+    urls = ASSET_PATTERN.findall(response.text)
+    external = [url for url in urls if not url.startswith("/static/")]
+    for url in urls:
+        if url in external:
+            continue
+        cached = cache.get(url)
+        if cached is not None and is_fresh(cached):
+            continue
+        headers = dict(BROWSER_HEADERS)
+        if cached is not None:
+            if "etag" in cached.headers:
+                headers["If-None-Match"] = cached.headers["etag"]
+            if "last-modified" in cached.headers:
+                headers["If-Modified-Since"] = cached.headers["last-modified"]
+        asset = await assets.get(url, headers=headers)
+        requests += 1
+        received += asset.num_bytes_downloaded
+        if asset.status_code == 200:
+            cache[url] = asset
+        elif asset.status_code != 304:
+            raise RuntimeError(f"{url}: HTTP {asset.status_code}")
+    return requests, received, external
+
+
+async def measure(static_app, label: str, path: str) -> List[str]:
+    transport = httpx.ASGITransport(app=app)
+    static_transport = httpx.ASGITransport(app=Starlette(routes=[Mount("/static", app=static_app)]))
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as page, \
+            httpx.AsyncClient(transport=static_transport, base_url="http://localhost") as assets:
+        cache: Dict[str, httpx.Response] = {}
+        cold_requests, cold_bytes, external = await load(page, assets, path, cache)
+        warm_requests, warm_bytes, _ = await load(page, assets, path, cache)
+    print(f"{label:<28} {cold_requests:>8} {cold_bytes:>10,} {warm_requests:>8} {warm_bytes:>10,}")
+    return external
+
+
+async def run(args) -> None:
+    await app.router.startup()
+    print(f"{args.path} load (page and local assets; body bytes)")
+    print(f"{'':<28} {'cold load':>19} {'warm load':>19}")
+    print(f"{'':<28} {'requests':>8} {'bytes':>10} {'requests':>8} {'bytes':>10}")
+
+    # Plain static files, linked by their plain URLs
+    original_dir = asset_manifest.build_dir
+    asset_manifest.build_dir = tempfile.mkdtemp(prefix="assets-empty-")
+    asset_manifest.load()
+    await measure(StaticFiles(directory=STATIC_DIR), "plain static files", args.path)
+
+    build_dir = tempfile.mkdtemp(prefix="assets-")
+    report = build_assets(STATIC_DIR, build_dir)
+    asset_manifest.build_dir = build_dir
+    asset_manifest.load()
+    external = await measure(AssetFiles(STATIC_DIR, asset_manifest), "fingerprinted, precompressed", args.path)
+    asset_manifest.build_dir = original_dir
+    asset_manifest.load()
+
+    print(f"Built {report['assets']} assets: {report['bytes']:,} bytes, {report['gzip bytes']:,} gzipped, "
+          f"{report['br bytes']:,} with brotli (0 without the brotli package)")
+    print(f"Not counted, from CDNs: {', '.join(external)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the bytes and requests of a page load')
+    parser.add_argument('--path', default='/dashboard', help='Page loaded')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
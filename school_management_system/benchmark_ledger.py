@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+Script to benchmark point-in-time ledger balances against replaying every event.
+
+Synthetic events are loaded into a scratch database month by month, with a
+share of them backdated, and a snapshot is taken at each month end as the
+monthly ``ledger-snapshot`` job would. Then portfolio and per-record balances
+as of random times are computed both from the snapshots and by summing all
+events up to that time, and the results are compared.
+
+Example:
+    python benchmark_ledger.py --database-url sqlite:///ledger_benchmark.db --events 10000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from school_management_system.models import (  # noqa: F401 - register all tables on Base.metadata
+    user, student, admission, subject, timetable, exam, payment, report, job, reconciliation, ledger, query,
+)
+from school_management_system.models.ledger import LedgerEvent, LedgerEventType, LedgerSnapshot
+from school_management_system.services.data_generator_service import BulkLoader
+from school_management_system.services.ledger_service import balance_as_of, outstanding_as_of, take_snapshot
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Event mix: (type, charged sign, paid sign, cumulative probability)
+EVENT_MIX = [
+    (LedgerEventType.CHARGE, 1, 0, 0.15),
+    (LedgerEventType.PAYMENT, 0, 1, 0.80),
+    (LedgerEventType.DISCOUNT, -1, 0, 0.85),
+    (LedgerEventType.REFUND, 0, -1, 0.90),
+    (LedgerEventType.REVERSAL, 0, -1, 1.00),
+]
+
+
+def month_starts(start: date, months: int):
+    year, month = start.year, start.month
+    for _ in range(months + 1):
+        yield datetime(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def generate_month(rng: random.Random, first_id: int, count: int, fee_records: int,
+                   start: datetime, end: datetime, late_fraction: float):
+    """
+    Generate a month's events in the order they are recorded.
+    """
+    seconds = int((end - start).total_seconds())
+    rows = []
+    for event_id in range(first_id, first_id + count):
+        draw = rng.random()
+        for event_type, charged_sign, paid_sign, cumulative in EVENT_MIX:
+            if draw < cumulative:
+                break
+        amount = rng.randrange(100, 2500000) / 100
+        occurred_at = start + timedelta(seconds=rng.randrange(seconds))
+        if rng.random() < late_fraction:
+            # Recorded now, effective earlier: covered by the snapshot tail's id range
+            occurred_at -= timedelta(days=rng.randint(1, 90))
+        rows.append({
+            "id": event_id,
+            "fee_record_id": rng.randint(1, fee_records),
+            "event_type": event_type,
+            "amount": amount,
+            "charged_delta": charged_sign * amount,
+            "paid_delta": paid_sign * amount,
+            "occurred_at": occurred_at,
+            "recorded_at": end,
+            "payment_id": None,
+            "reverses_event_id": None,
+            "description": None,
+        })
+    return rows
+
+
+async def replay_outstanding(db: AsyncSession, as_of: datetime, fee_record_id=None):
+    query = select(func.sum(LedgerEvent.charged_delta - LedgerEvent.paid_delta)).where(LedgerEvent.occurred_at <= as_of)
+    if fee_record_id is not None:
+        query = query.where(LedgerEvent.fee_record_id == fee_record_id)
+    result = await db.execute(query)
+    return round(float(result.scalar() or 0), 2)
+
+
+async def timed(coroutine):
+    start = time.perf_counter()
+    result = await coroutine
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summary(label: str, timings, extra: str = "") -> None:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<32} median {statistics.median(ordered):>9.2f} ms   p95 {p95:>9.2f} ms  {extra}")
+
+
+async def run(args) -> int:
+    url = make_url(args.database_url)
+    sync_engine = create_engine(url)
+    async_engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]))
+    LedgerEvent.metadata.create_all(sync_engine, tables=[LedgerEvent.__table__, LedgerSnapshot.__table__])
+    rng = random.Random(args.seed)
+    months = list(month_starts(args.start, args.months))
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        result = await db.execute(select(func.count()).select_from(LedgerEvent))
+        if result.scalar():
+            print("Error: the database already has ledger events; use a scratch database")
+            return 1
+
+        print(f"Loading {args.events:,} events over {args.months} months into "
+              f"{url.render_as_string(hide_password=True)}")
+        print("=" * 60)
+        loader = BulkLoader(sync_engine)
+        load_time = snapshot_time = 0.0
+        snapshot_timings = []
+        next_id = 1
+        per_month = args.events // args.months
+        for m in range(args.months):
+            count = per_month if m < args.months - 1 else args.events - next_id + 1
+            start = time.perf_counter()
+            for offset in range(0, count, args.chunk_size):
+                loader.load({"ledger_events": generate_month(
+                    rng, next_id + offset, min(args.chunk_size, count - offset), args.fee_records,
+                    months[m], months[m + 1], args.late_fraction,
+                )})
+            next_id += count
+            load_time += time.perf_counter() - start
+
+            snapshot, elapsed = await timed(take_snapshot(db, months[m + 1] - timedelta(microseconds=1)))
+            snapshot_time += elapsed / 1000
+            snapshot_timings.append(elapsed)
+            print(f"  {months[m]:%Y-%m}: {next_id - 1:>12,} events, snapshot of {snapshot['records']:,} records "
+                  f"in {elapsed / 1000:.1f}s")
+        loader.reset_sequences()
+        print(f"Loaded in {load_time:.1f}s, snapshots in {snapshot_time:.1f}s")
+        print("=" * 60)
+
+        span = int((months[-1] - months[0]).total_seconds())
+        as_of_times = [months[0] + timedelta(seconds=rng.randrange(span)) for _ in range(args.queries)]
+        timings = {"snapshot": [], "replay": [], "record_snapshot": [], "record_replay": []}
+        tail_events = []
+        mismatches = 0
+        for as_of in as_of_times:
+            outstanding, elapsed = await timed(outstanding_as_of(db, as_of))
+            timings["snapshot"].append(elapsed)
+            tail_events.append(outstanding["tail_events"])
+            replayed, elapsed = await timed(replay_outstanding(db, as_of))
+            timings["replay"].append(elapsed)
+            mismatches += abs(float(outstanding["outstanding"]) - replayed) > 0.01
+
+            fee_record_id = rng.randint(1, args.fee_records)
+            balance, elapsed = await timed(balance_as_of(db, fee_record_id, as_of))
+            timings["record_snapshot"].append(elapsed)
+            replayed, elapsed = await timed(replay_outstanding(db, as_of, fee_record_id))
+            timings["record_replay"].append(elapsed)
+            mismatches += abs(float(balance["balance"]) - replayed) > 0.01
+
+    print(f"{args.queries} random as-of times:")
+    summary("outstanding, snapshot + tail", timings["snapshot"],
+            f"({statistics.mean(tail_events):,.0f} tail events on average)")
+    summary("outstanding, full replay", timings["replay"])
+    summary("record balance, snapshot + tail", timings["record_snapshot"])
+    summary("record balance, full replay", timings["record_replay"])
+    summary("monthly snapshot", snapshot_timings)
+    print(f"Mismatches between snapshot and replay: {mismatches}")
+    await async_engine.dispose()
+    return 1 if mismatches else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ledger snapshots against full replay')
+    parser.add_argument('--database-url', default='sqlite:///ledger_benchmark.db',
+                        help='Scratch database URL (default: sqlite:///ledger_benchmark.db)')
+    parser.add_argument('--events', type=int, default=10_000_000, help='Ledger events to load')
+    parser.add_argument('--fee-records', type=int, default=500_000, help='Fee records the events are spread over')
+    parser.add_argument('--months', type=int, default=24, help='Months the events are spread over')
+    parser.add_argument('--start', type=lambda value: date.fromisoformat(f"{value}-01"), default=date(2023, 1, 1),
+                        help='First month (YYYY-MM)')
+    parser.add_argument('--late-fraction', type=float, default=0.02,
+                        help='Share of events recorded after the month they take effect in')
+    parser.add_argument('--queries', type=int, default=50, help='Random as-of times queried')
+    parser.add_argument('--chunk-size', type=int, default=100_000, help='Events per loaded transaction')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+Load test of live updates: many idle Server-Sent Events connections on one
+uvicorn worker, and the time to fan events out to all of them.
+
+The application is started with uvicorn (one worker, change publisher
+enabled) against the configured database. The script opens the connections,
+reports the worker's memory per connection, then records payments and times
+how long each takes to reach every connection, from the commit to the last
+connection receiving it.
+
+Example:
+    USE_SQLITE_MEMORY=False SQLITE_PATH=college.db python benchmark_live.py --connections 5000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import httpx
+from sqlalchemy.future import select
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.models import (  # noqa: F401 - register all mappers
+    user, student, admission, subject, timetable, exam, payment, report, job, reconciliation, ledger, query, change,
+)
+from school_management_system.models.payment import FeeRecord, Payment, PaymentMethod
+
+HOST = "127.0.0.1"
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Listener:
+    """
+    One idle SSE connection counting the events it receives.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, port: int) -> None:
+        self.reader, self.writer = await asyncio.open_connection(HOST, port)
+        self.writer.write(
+            f"GET {settings.API_V1_STR}/live/events?topics=payments HTTP/1.1\r\n"
+            f"Host: {HOST}\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+        status = await self.reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"Connection refused: {status.decode().strip()}")
+        await self.reader.readuntil(b"retry: ")
+
+    async def listen(self, on_event) -> None:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if line.startswith(b"event: payment.posted"):
+                self.received += 1
+                on_event(self.received)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def wait_for_server(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"http://{HOST}:{port}/api")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("The server did not start")
+
+
+async def record_payment(fee_record_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        db.add(Payment(fee_record_id=fee_record_id, amount=1, payment_method=PaymentMethod.CASH,
+                       notes="benchmark_live"))
+        await db.commit()
+
+
+async def run(args, server: subprocess.Popen) -> int:
+    await wait_for_server(args.port)
+    async with AsyncSessionLocal() as db:
+        fee_record_id = (await db.execute(select(FeeRecord.id).limit(1))).scalar()
+    if fee_record_id is None:
+        print("Error: the database has no fee records; seed it first")
+        return 1
+    baseline = rss_mb(server.pid)
+
+    listeners = [Listener() for _ in range(args.connections)]
+    start = time.perf_counter()
+    for offset in range(0, len(listeners), 500):
+        await asyncio.gather(*(listener.connect(args.port) for listener in listeners[offset:offset + 500]))
+    connect_seconds = time.perf_counter() - start
+    loaded = rss_mb(server.pid)
+    print(f"{args.connections} idle connections opened in {connect_seconds:.1f}s")
+    print(f"  worker memory {baseline:.0f} MB -> {loaded:.0f} MB "
+          f"({(loaded - baseline) * 1024 / args.connections:.1f} KB per connection)")
+
+    arrived = {}
+
+    def on_event(count: int) -> None:
+        arrived[count] = arrived.get(count, 0) + 1
+        if arrived[count] == args.connections:
+            done[count].set()
+
+    done = {number: asyncio.Event() for number in range(1, args.events + 1)}
+    tasks = [asyncio.create_task(listener.listen(on_event)) for listener in listeners]
+    latencies = []
+    for number in range(1, args.events + 1):
+        start = time.perf_counter()
+        await record_payment(fee_record_id)
+        try:
+            await asyncio.wait_for(done[number].wait(), timeout=30)
+        except asyncio.TimeoutError:
+            print(f"  event {number} reached {arrived.get(number, 0)} of {args.connections} connections")
+            break
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(args.interval)
+
+    if latencies:
+        print(f"{len(latencies)} payments, commit to delivery on every connection "
+              f"(publish interval {args.publish_interval}s):")
+        print(f"  median {statistics.median(latencies):>8.1f} ms   max {max(latencies):>8.1f} ms")
+    async with httpx.AsyncClient() as client:
+        print(f"  hub status {(await client.get(f'http://{HOST}:{args.port}{settings.API_V1_STR}/live/status')).json()}")
+
+    for task in tasks:
+        task.cancel()
+    for listener in listeners:
+        listener.close()
+    return 0 if len(latencies) == args.events else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test live updates with many idle connections')
+    parser.add_argument('--connections', type=int, default=5000, help='Idle SSE connections opened')
+    parser.add_argument('--events', type=int, default=20, help='Payments recorded and timed')
+    parser.add_argument('--interval', type=float, default=0.5, help='Pause between payments (seconds)')
+    parser.add_argument('--publish-interval', type=float, default=0.1, help='Change publisher poll interval')
+    parser.add_argument('--port', type=int, default=8765, help='Port the worker listens on')
+    args = parser.parse_args()
+
+    if settings.USE_SQLITE_MEMORY:
+        print("Error: the load test needs a database file or server; set USE_SQLITE_MEMORY=False")
+        return 1
+
+    # Each connection is a file descriptor on both ends; the worker inherits the limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = args.connections + 1000
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+    env = {
+        **os.environ,
+        "CHANGE_PUBLISHER_ENABLED": "True",
+        "CHANGE_PUBLISH_INTERVAL_SECONDS": str(args.publish_interval),
+        "LIVE_MAX_CONNECTIONS": str(max(args.connections, settings.LIVE_MAX_CONNECTIONS)),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "school_management_system.main:app", "--host", HOST,
+         "--port", str(args.port), "--workers", "1", "--log-level", "warning", "--backlog", "4096"],
+        cwd=parent_dir, env=env,
+    )
+    try:
+        return asyncio.run(run(args, server))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Script to benchmark notification delivery through the outbox against a
+local SMTP sink, checking that every notification is delivered exactly once.
+
+A scratch SQLite database gets one user per notification and the outbox is
+filled with ``enqueue_notifications``, twice with the same idempotency keys.
+An aiosmtpd server on localhost receives the mail and refuses a share of first
+attempts with a temporary error, so retries are exercised too. The dispatcher
+then delivers batches until the outbox is drained. Throughput is reported,
+and the run fails unless each notification was enqueued once, sent once and
+accepted by the sink once under its stable Message-ID.
+
+Example:
+    python benchmark_notifications.py --messages 10000 --fail-rate 0.02
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from collections import Counter
+from email.parser import BytesHeaderParser
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from aiosmtpd.controller import Controller
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from school_management_system.config import settings
+from school_management_system.models import (  # noqa: F401 - register all tables on Base.metadata
+    user, student, admission, subject, timetable, exam, payment, report, job, reconciliation, ledger, query,
+)
+from school_management_system.models.report import Notification, NotificationStatus
+from school_management_system.models.user import User
+from school_management_system.services.notification_service import NotificationDispatcher, enqueue_notifications
+from school_management_system.utils.email import SMTPConnectionPool
+
+
+class SinkHandler:
+    """
+    Accept messages, counting them by Message-ID, and refuse a share of first
+    attempts with a temporary error.
+    """
+
+    def __init__(self, fail_rate: float):
+        self.fail_rate = fail_rate
+        self.accepted: Counter = Counter()
+        self.refused = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        message_id = BytesHeaderParser().parsebytes(envelope.content)["Message-ID"]
+        if message_id not in self.refused and random.random() < self.fail_rate:
+            self.refused.add(message_id)
+            return "451 4.3.0 Try again later"
+        self.accepted[message_id] += 1
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def outbox_rows(count: int):
+    return [
+        {
+            "recipient_id": i,
+            "subject": f"Notification {i}",
+            "body": f"Hello user {i}",
+            "notification_type": "email",
+            "idempotency_key": f"benchmark-{i}",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+async def run(args) -> int:
+    settings.EMAILS_FROM_EMAIL = "noreply@college.example"
+    settings.NOTIFICATION_RETRY_BASE_SECONDS = 0  # Retry refused sends on the next batch
+
+    directory = tempfile.mkdtemp(prefix="benchmark-notifications-")
+    path = os.path.join(directory, "outbox.db")
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Notification.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "email": f"user{i}@college.example", "full_name": f"User {i}",
+             "hashed_password": "-", "is_active": True, "is_superuser": False}
+            for i in range(1, args.messages + 1)
+        ])
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    # Enqueued twice: the second batch must be dropped on the idempotency keys
+    started = time.perf_counter()
+    for _ in range(2):
+        async with session_factory() as db:
+            await enqueue_notifications(db, outbox_rows(args.messages))
+            await db.commit()
+    enqueue_ms = (time.perf_counter() - started) * 1000
+
+    handler = SinkHandler(args.fail_rate)
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        pool = SMTPConnectionPool("127.0.0.1", port, start_tls=False, size=args.pool_size)
+        dispatcher = NotificationDispatcher(
+            session_factory, smtp_pool=pool, batch_size=args.batch_size, rate_per_second=args.rate,
+        )
+        started = time.perf_counter()
+        batches = 0
+        while await dispatcher.dispatch_batch():
+            batches += 1
+        elapsed = time.perf_counter() - started
+        await pool.close()
+    finally:
+        controller.stop()
+
+    async with session_factory() as db:
+        statuses = dict((await db.execute(
+            select(Notification.status, func.count()).group_by(Notification.status)
+        )).all())
+        retried = (await db.execute(select(func.count()).where(Notification.attempts > 1))).scalar()
+    await engine.dispose()
+
+    sent = statuses.get(NotificationStatus.SENT.value, 0)
+    print(f"Enqueued {args.messages:,} notifications twice in {enqueue_ms:.0f} ms")
+    print(f"Delivered in {elapsed:.1f} s over {batches} batches: {sent / elapsed:,.0f} messages/s "
+          f"({args.pool_size} connections, rate limit {args.rate:g}/s)")
+    print(f"Outbox: {statuses}; {retried:,} retried after {len(handler.refused):,} refusals")
+
+    checks = [
+        ("one outbox row per idempotency key", sum(statuses.values()) == args.messages),
+        ("every notification sent", sent == args.messages),
+        ("every message accepted by the sink", len(handler.accepted) == args.messages),
+        ("no message accepted twice", all(count == 1 for count in handler.accepted.values())),
+        ("every refused message retried", retried == len(handler.refused)),
+    ]
+    for description, passed in checks:
+        print(f"{'✅' if passed else '❌'} {description}")
+    return 0 if all(passed for _, passed in checks) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark notification delivery against a local SMTP sink')
+    parser.add_argument('--messages', type=int, default=10000, help='Notifications to deliver')
+    parser.add_argument('--fail-rate', type=float, default=0.02, help='Share of first attempts refused')
+    parser.add_argument('--pool-size', type=int, default=settings.SMTP_POOL_SIZE, help='SMTP connections')
+    parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_BATCH_SIZE, help='Claim batch size')
+    parser.add_argument('--rate', type=float, default=2000, help='Send rate limit per second')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
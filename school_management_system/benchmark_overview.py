@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Script to benchmark the student overview endpoint against the individual calls
+a profile page would otherwise make.
+
+Requests are sent to the application in process (no network), against the
+configured database, for random students. The fan-out is timed both one call
+after another and with the calls in flight together, as a browser sends them.
+The overview is timed with an empty cache and with every section cached.
+
+Example:
+    USE_SQLITE_MEMORY=False SQLITE_PATH=college.db python benchmark_overview.py --students 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import httpx
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.main import app
+from school_management_system.models.student import Student
+from school_management_system.services.student_overview_service import overview_cache
+
+API = settings.API_V1_STR
+
+
+async def fan_out(client: httpx.AsyncClient, student_id: int, concurrent: bool) -> None:
+    """
+    Fetch what the overview holds with the existing per-resource endpoints.
+
+    There are no per-student endpoints for subjects, attendance, progress notes
+    or the admission, so the fan-out covers less than the overview does.
+    """
+    urls = [
+        f"{API}/students/{student_id}",
+        f"{API}/exams/results/by-student/{student_id}",
+        f"{API}/payments/fee-records/by-student/{student_id}",
+    ]
+    if concurrent:
+        responses = await asyncio.gather(*(client.get(url) for url in urls))
+    else:
+        responses = [await client.get(url) for url in urls]
+    for response in responses:
+        response.raise_for_status()
+    # Payments can only be fetched once the fee records are known
+    payment_urls = [f"{API}/payments/payments/by-fee-record/{record['id']}" for record in responses[2].json()]
+    if concurrent:
+        responses = await asyncio.gather(*(client.get(url) for url in payment_urls))
+    else:
+        responses = [await client.get(url) for url in payment_urls]
+    for response in responses:
+        response.raise_for_status()
+
+
+async def overview(client: httpx.AsyncClient, student_id: int) -> None:
+    response = await client.get(f"{API}/students/{student_id}/overview")
+    response.raise_for_status()
+
+
+async def timed(coroutine) -> float:
+    start = time.perf_counter()
+    await coroutine
+    return (time.perf_counter() - start) * 1000
+
+
+def summary(label: str, timings) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<36} median {statistics.median(ordered):>8.2f} ms   p95 {p95:>8.2f} ms")
+
+
+async def run(args) -> int:
+    await app.router.startup()
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(func.count()).select_from(Student))
+            if not result.scalar():
+                print("Error: the database has no students; seed it first")
+                return 1
+            result = await db.execute(select(Student.id))
+            student_ids = result.scalars().all()
+        rng = random.Random(args.seed)
+        sample = [rng.choice(student_ids) for _ in range(args.students)]
+
+        timings = {"sequential": [], "concurrent": [], "cold": [], "cached": []}
+        async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+            for student_id in sample:
+                timings["sequential"].append(await timed(fan_out(client, student_id, concurrent=False)))
+                timings["concurrent"].append(await timed(fan_out(client, student_id, concurrent=True)))
+                overview_cache.clear()
+                timings["cold"].append(await timed(overview(client, student_id)))
+                timings["cached"].append(await timed(overview(client, student_id)))
+    finally:
+        await app.router.shutdown()
+
+    print(f"{args.students} random students (overview concurrency {settings.STUDENT_OVERVIEW_CONCURRENCY}):")
+    summary("fan-out, one call after another", timings["sequential"])
+    summary("fan-out, calls in flight together", timings["concurrent"])
+    summary("overview, empty cache", timings["cold"])
+    summary("overview, cached", timings["cached"])
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the student overview against individual calls')
+    parser.add_argument('--students', type=int, default=200, help='Random students requested')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Script to benchmark JSON serialization of the list endpoints, per router,
+and the bytes they put on the wire.
+
+For each router a page of rows is read from the database (use a seeded file
+database, see SQLITE_PATH) and serialized in process three ways:
+FastAPI's default path (validation into the response model,
+jsonable_encoder, then the standard library json), the same with
+ORJSONResponse, the default response class now, and the router's
+RowEncoder where it has one. The outputs are checked to decode to the same
+data. The bytes of the body are reported plain, gzipped and with brotli
+(when the brotli package is installed), at the levels of the compression
+middleware.
+
+Example:
+    SQLITE_PATH=/tmp/school.db USE_SQLITE_MEMORY=False python benchmark_serialization.py --rows 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import zlib
+from typing import Callable, List
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.future import select
+
+import school_management_system.main  # noqa: F401  (configures the mappers)
+from school_management_system.api.endpoints import exams, payments, students, subjects, users
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.models.exam import ExamResult
+from school_management_system.models.payment import Payment
+from school_management_system.models.student import Student
+from school_management_system.models.subject import Subject
+from school_management_system.models.user import User
+from school_management_system.web.assets import load_brotli
+
+# Router, ORM model, response model and the router's RowEncoder (None without one)
+ROUTERS = [
+    ("students", Student, students.StudentResponse, students.student_rows),
+    ("exams (results)", ExamResult, exams.ExamResultResponse, exams.exam_result_rows),
+    ("payments", Payment, payments.PaymentResponse, payments.payment_rows),
+    ("subjects", Subject, subjects.SubjectResponse, None),
+    ("users", User, users.UserResponse, users.user_rows),
+]
+
+
+async def timed(function: Callable, repeat: int) -> float:
+    """Median milliseconds of a call, which may be a coroutine function."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        if asyncio.iscoroutine(result):
+            await result
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+async def run(args) -> None:
+    brotli = load_brotli()
+    print(f"Serialization of {args.rows} rows per router (median of {args.repeat}, ms; body bytes)")
+    print(f"{'':<17} {'default':>8} {'orjson':>8} {'encoder':>8} {'bytes':>10} {'gzip':>9} {'br':>9}")
+    for label, model, response_model, encoder in ROUTERS:
+        async with AsyncSessionLocal() as db:
+            rows: List = (await db.execute(select(model).limit(args.rows))).scalars().all()
+        if not rows:
+            print(f"{label:<17} no rows")
+            continue
+        field = create_response_field(name=f"Response_{label}", type_=List[response_model])
+
+        async def default():
+            content = await serialize_response(field=field, response_content=rows)
+            return JSONResponse(content).body
+
+        async def with_orjson():
+            content = await serialize_response(field=field, response_content=rows)
+            return ORJSONResponse(content).body
+
+        body = await with_orjson()
+        if orjson.loads(await default()) != orjson.loads(body):
+            raise RuntimeError(f"{label}: ORJSONResponse differs from JSONResponse")
+        default_ms = await timed(default, args.repeat)
+        orjson_ms = await timed(with_orjson, args.repeat)
+        encoder_ms = "-"
+        if encoder is not None:
+            if orjson.loads(encoder.encode(rows)) != orjson.loads(body):
+                raise RuntimeError(f"{label}: RowEncoder differs from the response model")
+            encoder_ms = f"{await timed(lambda: encoder.encode(rows), args.repeat):.2f}"
+
+        gzipper = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        gzipped = len(gzipper.compress(body) + gzipper.flush())
+        br = f"{len(brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)):,}" if brotli else "-"
+        print(f"{label:<17} {default_ms:>8.2f} {orjson_ms:>8.2f} {encoder_ms:>8} {len(body):>10,} {gzipped:>9,} {br:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON serialization of the list endpoints')
+    parser.add_argument('--rows', type=int, default=1000, help='Rows per list')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per serializer')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Script to benchmark mixed read/write throughput of the in-memory SQLite
+database (one shared connection, StaticPool) against the persistent SQLite
+mode (WAL file, one writer connection and a pool of read-only connections).
+
+Each mode runs in a fresh interpreter, since the engines are created when
+the application is imported. Concurrent clients send requests to the
+application in process (no network) for a fixed time: GET requests for the
+student and subject lists and, for the given share of requests, a POST
+creating a subject. Throughput, latency and failed requests are reported per
+mode.
+
+Example:
+    python benchmark_sqlite.py --clients 50 --seconds 10 --writes 0.2
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+MODES = {
+    "memory (StaticPool)": {"USE_SQLITE_MEMORY": "True"},
+    "file (WAL, read pool)": {"USE_SQLITE_MEMORY": "False"},
+}
+READ_URLS = ("/students/?limit=50", "/subjects/")
+
+
+async def client(http, api: str, deadline: float, writes: float, codes, results: Dict[str, List]) -> None:
+    while time.perf_counter() < deadline:
+        write = random.random() < writes
+        started = time.perf_counter()
+        try:
+            if write:
+                code = next(codes)
+                response = await http.post(f"{api}/subjects/", json={
+                    "name": f"Benchmark {code}", "code": f"BM{code}", "grade_level": "1",
+                })
+            else:
+                response = await http.get(api + random.choice(READ_URLS))
+            error = f"HTTP {response.status_code}" if response.status_code >= 400 else None
+        except Exception as e:
+            while getattr(e, "exceptions", None):  # Raised through task groups
+                e = e.exceptions[0]
+            message = re.sub(r" at 0x[0-9a-f]+", "", str(e).splitlines()[0])
+            error = f"{type(e).__name__}: {message[:100]}"
+        kind = "write" if write else "read"
+        if error is None:
+            results[kind].append((time.perf_counter() - started) * 1000)
+        else:
+            results["errors"].append(kind)
+            results["reasons"].append(error)
+
+
+async def worker(args) -> None:
+    """Run the traffic in this interpreter and print the results as JSON."""
+    import httpx
+
+    from school_management_system.config import settings
+    from school_management_system.database.session import engine
+    from school_management_system.main import app
+
+    await app.router.startup()
+    results: Dict[str, List] = {"read": [], "write": [], "errors": [], "reasons": []}
+    codes = itertools.count()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=60) as http:
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(*(
+            client(http, settings.API_V1_STR, deadline, args.writes, codes, results) for _ in range(args.clients)
+        ))
+    await app.router.shutdown()
+    results["pool"] = type(engine.pool).__name__
+    print(json.dumps(results))
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))] if ordered else 0.0
+
+
+def run_mode(label: str, environment: Dict[str, str], args) -> None:
+    env = dict(os.environ, **environment, FAST_START="False")
+    for name in ("RENDER", "SERVERLESS"):
+        env.pop(name, None)
+    with tempfile.TemporaryDirectory(prefix="benchmark-sqlite-") as directory:
+        env["SQLITE_PATH"] = os.path.join(directory, "college.db")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--clients", str(args.clients),
+             "--seconds", str(args.seconds), "--writes", str(args.writes)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+    results = json.loads(output.strip().splitlines()[-1])
+    reads, writes, errors = results["read"], results["write"], results["errors"]
+    print(f"{label:<22} {results['pool']:<22} {(len(reads) + len(writes)) / args.seconds:>8.0f} "
+          f"{statistics.median(reads) if reads else 0:>8.1f} {percentile(reads, 0.95):>8.1f} "
+          f"{statistics.median(writes) if writes else 0:>8.1f} {percentile(writes, 0.95):>8.1f} "
+          f"{errors.count('read'):>7} {errors.count('write'):>7}")
+    for reason in sorted(set(results["reasons"])):
+        print(f"    {results['reasons'].count(reason)} failed: {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite memory and file modes under mixed traffic')
+    parser.add_argument('--clients', type=int, default=50, help='Concurrent clients')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration per mode')
+    parser.add_argument('--writes', type=float, default=0.2, help='Share of requests that write')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        asyncio.run(worker(args))
+        return
+    print(f"{args.clients} clients for {args.seconds:g} s, {args.writes:.0%} writes (latency in ms)")
+    print(f"{'':<22} {'pool':<22} {'req/s':>8} {'read p50':>8} {'read p95':>8} "
+          f"{'write p50':>8} {'write p95':>8} {'read err':>7} {'write err':>7}")
+    for label, environment in MODES.items():
+        run_mode(label, environment, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Script to measure how long the application takes to import, and fail when it
+takes longer than a budget.
+
+The application is imported in fresh interpreters started with
+``-X importtime``. The median import time is compared with the budget, and
+the import time report of the last run is summed per top-level package to
+show where the time goes. Run it in CI so that an eager import creeping back
+into the startup path fails the build.
+
+Example:
+    python benchmark_startup.py --fast-start --budget-ms 600
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+MODULE = "school_management_system.main"
+
+# Prints the wall time of the import, and of the startup handlers if asked
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+if {startup}:
+    import asyncio
+    asyncio.run({module}.app.router.startup())
+print(f"{{(imported - start) * 1000:.3f}} {{(time.perf_counter() - imported) * 1000:.3f}}")
+"""
+
+
+def parse_importtime(report: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse the ``-X importtime`` report on stderr.
+
+    Returns:
+        (module, self microseconds, cumulative microseconds) per imported module
+    """
+    modules = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def by_package(modules: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def probe(env: Dict[str, str], startup: bool) -> Tuple[float, float, str]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=MODULE, startup=startup)],
+        env=env, cwd=parent_dir, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    import_ms, startup_ms = (float(value) for value in result.stdout.split()[-2:])
+    return import_ms, startup_ms, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import time of the application against a budget')
+    parser.add_argument('--budget-ms', type=float, default=1000, help='Largest accepted median import time')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters measured')
+    parser.add_argument('--fast-start', action='store_true', help='Set FAST_START=True in the measured interpreters')
+    parser.add_argument('--startup', action='store_true', help='Also time the startup handlers')
+    parser.add_argument('--top', type=int, default=12, help='Packages listed in the breakdown')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [parent_dir, env.get("PYTHONPATH")]))
+    if args.fast_start:
+        env["FAST_START"] = "True"
+
+    try:
+        # The first run writes the bytecode caches and is not counted
+        probe(env, args.startup)
+        runs = [probe(env, args.startup) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"Error: importing {MODULE} failed: {e}")
+        return 1
+
+    import_ms = statistics.median(run[0] for run in runs)
+    modules = parse_importtime(runs[-1][2])
+    print(f"Import of {MODULE} (FAST_START={env.get('FAST_START', 'False')}), {args.runs} runs:")
+    print(f"  median {import_ms:.0f} ms   min {min(run[0] for run in runs):.0f} ms   "
+          f"max {max(run[0] for run in runs):.0f} ms   modules {len(modules)}")
+    if args.startup:
+        print(f"  startup handlers median {statistics.median(run[1] for run in runs):.0f} ms")
+    print("Self time by package (last run):")
+    for package, self_us in sorted(by_package(modules).items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<32} {self_us / 1000:>8.1f} ms")
+
+    if import_ms > args.budget_ms:
+        print(f"❌ Median import time {import_ms:.0f} ms is over the budget of {args.budget_ms:.0f} ms")
+        return 1
+    print(f"✅ Median import time {import_ms:.0f} ms is within the budget of {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Script to benchmark page rendering with the default Jinja2 templates against
+the precompiled, cached templates of the web routes.
+
+Every page template is rendered in process (no HTTP) with a sample context.
+The first render in a fresh process includes compiling the template, so it
+is timed separately from the renders after it: with default templates, with
+the templates precompiled at startup, and with the compiled code loaded from
+a bytecode cache on disk. A long student list is also streamed, timing the
+first chunk against the whole page.
+
+Example:
+    python benchmark_templates.py --renders 200 --rows 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from fastapi.templating import Jinja2Templates
+from starlette.requests import Request
+
+from school_management_system.main import app
+from school_management_system.models.student import AcademicYear, EngineeringBranch
+from school_management_system.services.mock_data_service import MockDataService
+from school_management_system.web.assets import asset_manifest
+from school_management_system.web.rendering import (
+    STREAM_BUFFER_SIZE, TEMPLATES_DIR, FragmentCache, FragmentCacheExtension, PageTemplates, data_versions,
+)
+
+
+def make_request() -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": [],
+        "app": app, "router": app.router, "root_path": "", "scheme": "http", "server": ("localhost", 80),
+    })
+
+
+def sample_context(students: List[dict]) -> Dict:
+    return {
+        "students": students[:10],
+        "student": students[0],
+        "user_id": 1,
+        "page": 1,
+        "total_pages": (len(students) + 9) // 10,
+        "total": len(students),
+        "branches": [b.name for b in EngineeringBranch],
+        "years": [y.name for y in AcademicYear],
+    }
+
+
+def timed(render: Callable[[], object], count: int) -> float:
+    """Median milliseconds of ``count`` renders."""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        render()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def first_render(templates: Jinja2Templates, name: str, context: Dict) -> float:
+    start = time.perf_counter()
+    templates.get_template(name).render({"request": make_request(), **context})
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark page rendering')
+    parser.add_argument('--renders', type=int, default=200, help='Renders timed per page after the first')
+    parser.add_argument('--rows', type=int, default=2000, help='Students in the streamed list')
+    args = parser.parse_args()
+
+    students = MockDataService.get_mock_students()
+    context = sample_context(students)
+    names = sorted(name for name in PageTemplates(TEMPLATES_DIR).env.list_templates(extensions=["html"])
+                   if name != "base.html")
+
+    bytecode_dir = tempfile.mkdtemp(prefix="templates-")
+    PageTemplates(TEMPLATES_DIR, bytecode_cache_dir=bytecode_dir).precompile()
+
+    # Without a fragment cache the cache tag renders its body every time
+    default = Jinja2Templates(directory=TEMPLATES_DIR, extensions=[FragmentCacheExtension])
+    default.env.globals["data_version"] = data_versions.get
+    default.env.globals["asset_url"] = asset_manifest.url
+    # A fresh environment per page, so that base.html is compiled in each first render
+    from_bytecode = {name: PageTemplates(TEMPLATES_DIR, bytecode_cache_dir=bytecode_dir) for name in names}
+    cached = PageTemplates(TEMPLATES_DIR, auto_reload=False, cache=FragmentCache(1000, 300))
+    start = time.perf_counter()
+    cached.precompile()
+    precompile_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'page':<30} {'first render (ms)':>32} {'later renders (ms)':>22}")
+    print(f"{'':<30} {'default':>10} {'bytecode':>10} {'precomp.':>10} {'default':>10} {'cached':>11}")
+    totals = [0.0] * 5
+    for name in names:
+        try:
+            row = [
+                first_render(default, name, context),
+                first_render(from_bytecode[name], name, context),
+                first_render(cached, name, context),
+                timed(lambda: default.get_template(name).render({"request": make_request(), **context}),
+                      args.renders),
+                timed(lambda: cached.get_template(name).render({"request": make_request(), **context}),
+                      args.renders),
+            ]
+        except Exception as e:
+            print(f"{name:<30} skipped: {e}")
+            continue
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f"{name:<30} " + " ".join(f"{value:>10.3f}" for value in row))
+    print(f"{'total':<30} " + " ".join(f"{value:>10.3f}" for value in totals))
+    print(f"Precompiling all templates took {precompile_ms:.1f} ms")
+
+    rows = (students * (args.rows // len(students) + 1))[:args.rows]
+    long_list = {**context, "students": rows, "page": 0}
+    template = cached.get_template("students/list.html")
+    start = time.perf_counter()
+    stream = template.stream({"request": make_request(), **long_list})
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    next(stream)
+    first_chunk_ms = (time.perf_counter() - start) * 1000
+    for _ in stream:
+        pass
+    streamed_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    template.render({"request": make_request(), **long_list, "page": -1})
+    whole_ms = (time.perf_counter() - start) * 1000
+    print(f"Student list of {args.rows} rows: rendered whole in {whole_ms:.1f} ms; "
+          f"streamed, first chunk after {first_chunk_ms:.1f} ms, last after {streamed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
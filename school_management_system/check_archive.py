@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Script to check that archived exam results read back as they were recorded.
+
+The application runs in process on its in-memory database, with the archive
+in a scratch directory. A student gets results in the 2019-2020 and the
+2024-2025 academic years, which are listed by student, then 2019-2020 is
+archived. Without include_archived only the 2024-2025 result may be listed;
+with it, every field of the archived result must have the value it was
+listed with before, also when asking for 2019-2020 alone. Archiving needs
+pyarrow (pip install pyarrow).
+
+Example:
+    python check_archive.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import httpx
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal, get_engine_for_init
+from school_management_system.main import app
+from school_management_system.models.exam import Exam, ExamType
+from school_management_system.models.student import AcademicYear, EngineeringBranch, Student
+from school_management_system.models.subject import Subject
+from school_management_system.services.archive_service import archive_academic_year
+from school_management_system.utils.parquet import load_pyarrow
+
+ARCHIVED_YEAR = 2019
+
+failures = 0
+
+
+def check(description: str, passed: bool) -> None:
+    global failures
+    print(f"{'✅' if passed else '❌'} {description}")
+    if not passed:
+        failures += 1
+
+
+async def create_rows() -> dict:
+    async with AsyncSessionLocal() as db:
+        student = Student(
+            first_name="Archive", last_name="Check", date_of_birth=date(2001, 1, 1), gender="Male",
+            enrollment_date=date(2019, 7, 1), academic_year=AcademicYear.FIRST_YEAR, branch=EngineeringBranch.CSE,
+            student_id="ARCHIVECHECK1",
+        )
+        subject = Subject(name="Archive check", code="ARCHIVECHECK1", grade_level="First Year")
+        exams = [
+            Exam(name=f"Archive check {day.year}", exam_type=ExamType.FINAL, date=day, total_marks=100,
+                 passing_marks=40, grade_level="First Year", academic_year=f"{day.year}-{day.year + 1}", term="Fall")
+            for day in (date(2019, 11, 15), date(2024, 11, 15))
+        ]
+        db.add_all([student, subject, *exams])
+        await db.commit()
+        return {"student_id": student.id, "subject_id": subject.id, "exam_ids": [exam.id for exam in exams]}
+
+
+async def run(args) -> int:
+    try:
+        load_pyarrow()
+    except RuntimeError as e:
+        print(e)
+        return 1
+    settings.ARCHIVE_PATH = tempfile.mkdtemp(prefix="archive-check-")
+    await app.router.startup()
+    api = f"{settings.API_V1_STR}/exams"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        rows = await create_rows()
+        student_id = rows["student_id"]
+        for exam_id, score, grade in zip(rows["exam_ids"], (87.5, 64.0), ("A", "C")):
+            response = await client.post(f"{api}/results/", json={
+                "score": score, "grade": grade, "remarks": f"Recorded for exam {exam_id}",
+                "student_id": student_id, "exam_id": exam_id, "subject_id": rows["subject_id"],
+            })
+            check(f"The result of exam {exam_id} is recorded", response.status_code == 200)
+
+        by_student = f"{api}/results/by-student/{student_id}"
+        recorded = sorted((await client.get(by_student)).json(), key=lambda result: result["id"])
+        check("Both results are listed before archiving", len(recorded) == 2)
+        archived, current = recorded
+
+        summary = await archive_academic_year(get_engine_for_init(), "exam_results", ARCHIVED_YEAR)
+        check("The 2019-2020 result is archived", summary["rows"] == 1)
+
+        listed = (await client.get(by_student)).json()
+        check("Without include_archived only the 2024-2025 result is listed", listed == [current])
+
+        # Results in the database come first, then archived ones
+        listed = (await client.get(by_student, params={"include_archived": "true"})).json()
+        check("With include_archived both results are listed", len(listed) == 2)
+        check("The current result is listed as before", listed[:1] == [current])
+        read_back = listed[-1] if listed else {}
+        for name, value in archived.items():
+            check(f"The archived {name} reads {value!r}", read_back.get(name) == value)
+
+        listed = (await client.get(by_student, params={"include_archived": "true", "academic_year": "2019-2020"})).json()
+        check("Asking for 2019-2020 lists the archived result alone", listed == [archived])
+
+    print(f"{failures} of the checks failed" if failures else "All checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check archived exam results against their recorded values')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Script to check the round trip of admission documents through the local and
+the S3 storage backends.
+
+The application runs in process on its in-memory database. For S3, moto
+stands in for the bucket (pip install moto). Each backend gets the same
+steps: a file large enough for a multipart upload is uploaded twice and
+must be stored once, downloaded whole, by range and conditionally; a range
+of a text file must not be compressed, and an image upload must get a
+thumbnail. Staging files must not be left behind.
+
+Example:
+    python check_document_storage.py --backend both
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+from datetime import date
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import httpx
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.main import app
+from school_management_system.models.admission import Admission
+from school_management_system.services.document_service import shutdown_thumbnail_pool
+from school_management_system.utils import storage as storage_module
+
+BUCKET = "college-documents-check"
+# Over boto3's 8 MB multipart threshold
+LARGE_FILE_BYTES = 12 * 1024 * 1024
+
+failures = 0
+
+
+def check(description: str, passed: bool) -> None:
+    global failures
+    print(f"{'✅' if passed else '❌'} {description}")
+    if not passed:
+        failures += 1
+
+
+def png_image(seed: int) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    # Backends share the database, so each gets its own image rather than a deduplicated one
+    Image.new("RGB", (640, 480), (30, 120, seed % 256)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def stored_keys(backend: str):
+    if backend == "s3":
+        client = storage_module.get_storage().client
+        pages = client.get_paginator("list_objects_v2").paginate(Bucket=BUCKET)
+        return [obj["Key"] for page in pages for obj in page.get("Contents", [])]
+    root = settings.DOCUMENT_STORAGE_PATH
+    return [os.path.relpath(os.path.join(d, n), root) for d, _, names in os.walk(root) for n in names]
+
+
+async def create_admission() -> int:
+    async with AsyncSessionLocal() as db:
+        admission = Admission(
+            desired_grade_level="First Year", first_name="Storage", last_name="Check",
+            date_of_birth=date(2006, 1, 1), gender="Female", address="1 Campus Road",
+            phone_number="5550100", parent_name="Parent", parent_phone="5550101",
+            relationship_to_applicant="Mother",
+        )
+        db.add(admission)
+        await db.commit()
+        return admission.id
+
+
+async def round_trip(client: httpx.AsyncClient, backend: str) -> None:
+    print(f"{backend} storage")
+    admission_id = await create_admission()
+    documents = f"{settings.API_V1_STR}/admissions/{admission_id}/documents"
+    content = os.urandom(LARGE_FILE_BYTES)
+
+    uploads = []
+    for _ in range(2):
+        response = await client.post(
+            documents, data={"document_type": "transcript"},
+            files={"file": ("transcript.bin", content, "application/octet-stream")},
+        )
+        check(f"Upload of {len(content):,} bytes succeeds", response.status_code == 200)
+        uploads.append(response.json())
+    check("The first upload is stored", uploads[0].get("deduplicated") is False)
+    check("The second upload is deduplicated", uploads[1].get("deduplicated") is True)
+    content_keys = [key for key in stored_keys(backend) if key.startswith("sha256/")]
+    check("The file is stored once", len(content_keys) == 1)
+
+    url = f"{documents}/{uploads[0]['id']}/content"
+    response = await client.get(url)
+    check("The download matches the upload", response.status_code == 200 and response.content == content)
+    response = await client.get(url, headers={"Range": "bytes=1000-1999"})
+    check("A range request returns that range",
+          response.status_code == 206 and response.content == content[1000:2000])
+    response = await client.get(url, headers={"Range": f"bytes=-{1024 * 1024}"})
+    check("A suffix range returns the end of the file",
+          response.status_code == 206 and response.content == content[-1024 * 1024:])
+    response = await client.get(url, headers={"If-None-Match": response.headers.get("etag", "")})
+    check("A conditional request is answered with 304", response.status_code == 304)
+
+    text = b"Semester transcript line\n" * 4096
+    response = await client.post(
+        documents, data={"document_type": "transcript"}, files={"file": ("transcript.txt", text, "text/plain")},
+    )
+    check("A text upload succeeds", response.status_code == 200)
+    response = await client.get(f"{documents}/{response.json()['id']}/content",
+                                headers={"Range": "bytes=1000-9999", "Accept-Encoding": "gzip"})
+    check("A range of a text file is returned uncompressed",
+          response.status_code == 206 and "content-encoding" not in response.headers
+          and response.content == text[1000:10000])
+
+    response = await client.post(
+        documents, data={"document_type": "photo"}, files={"file": ("photo.png", png_image(admission_id), "image/png")},
+    )
+    check("An image upload succeeds", response.status_code == 200)
+    # The thumbnail is rendered by a background task, which has run once the response is complete
+    response = await client.get(f"{documents}/{response.json()['id']}/thumbnail")
+    check("The image has a JPEG thumbnail",
+          response.status_code == 200 and response.headers.get("content-type") == "image/jpeg")
+
+    staging_dir = storage_module.get_storage().staging_dir
+    check("No staging files are left", not os.listdir(staging_dir))
+
+
+async def run_backend(backend: str) -> None:
+    scratch = tempfile.mkdtemp(prefix="document-storage-check-")
+    settings.DOCUMENT_STORAGE_BACKEND = backend
+    settings.DOCUMENT_STORAGE_PATH = os.path.join(scratch, "documents")
+    storage_module._storage = None
+    if backend == "s3":
+        settings.DOCUMENT_S3_BUCKET = BUCKET
+        settings.DOCUMENT_S3_REGION = "us-east-1"
+        storage_module.get_storage().client.create_bucket(Bucket=BUCKET)
+    storage = storage_module.get_storage()
+    storage.staging_dir = os.path.join(scratch, "staging")
+    os.makedirs(storage.staging_dir, exist_ok=True)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=120) as client:
+        await round_trip(client, backend)
+    storage_module._storage = None
+
+
+async def run(args) -> int:
+    await app.router.startup()
+    backends = ["local", "s3"] if args.backend == "both" else [args.backend]
+    for backend in backends:
+        if backend == "s3":
+            try:
+                from moto import mock_aws
+            except ImportError:
+                print("The S3 check needs moto (pip install moto)")
+                return 1
+            # Credentials for the stand-in only; nothing leaves the process
+            os.environ.update(AWS_ACCESS_KEY_ID="testing", AWS_SECRET_ACCESS_KEY="testing", AWS_DEFAULT_REGION="us-east-1")
+            with mock_aws():
+                await run_backend(backend)
+        else:
+            await run_backend(backend)
+    shutdown_thumbnail_pool()
+    print(f"{failures} of the checks failed" if failures else "All checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check document storage round trips')
+    parser.add_argument('--backend', choices=['local', 's3', 'both'], default='both', help='Backends checked')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Script to check the bounds of fee record adjustments in the ledger.
+
+The application runs in process on its in-memory database. A fee record of
+525.00 is created and 200.00 paid against it. Refunds of more than has been
+paid and discounts of more than is outstanding must be refused with 400 and
+leave the record as it was; refunds and discounts up to those amounts must
+be recorded, with the record's balance and status following them and the
+ledger balance agreeing with the record.
+
+Example:
+    python check_ledger.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import httpx
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.main import app
+from school_management_system.models.student import AcademicYear, EngineeringBranch, Student
+
+failures = 0
+
+
+def check(description: str, passed: bool) -> None:
+    global failures
+    print(f"{'✅' if passed else '❌'} {description}")
+    if not passed:
+        failures += 1
+
+
+def amounts(record: dict) -> tuple:
+    return tuple(Decimal(str(record[name])) for name in ("total_amount", "paid_amount", "balance")) + (record["status"],)
+
+
+async def create_student() -> int:
+    async with AsyncSessionLocal() as db:
+        student = Student(
+            first_name="Ledger", last_name="Check", date_of_birth=date(2006, 1, 1), gender="Female",
+            enrollment_date=date(2024, 7, 1), academic_year=AcademicYear.FIRST_YEAR, branch=EngineeringBranch.CSE,
+            student_id="LEDGERCHECK1",
+        )
+        db.add(student)
+        await db.commit()
+        return student.id
+
+
+async def run(args) -> int:
+    await app.router.startup()
+    api = f"{settings.API_V1_STR}/payments"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        student_id = await create_student()
+        response = await client.post(f"{api}/fee-structures/", json={
+            "name": "Ledger check", "academic_year": "2024-2025", "grade_level": "First Year",
+        })
+        fee_structure_id = response.json()["id"]
+        response = await client.post(f"{api}/fee-records/", json={
+            "academic_year": "2024-2025", "term": "Ledger check", "total_amount": "525.00", "balance": "525.00",
+            "due_date": "2024-09-01", "student_id": student_id, "fee_structure_id": fee_structure_id,
+        })
+        check("The fee record is created", response.status_code == 200)
+        record_id = response.json()["id"]
+        response = await client.post(f"{api}/payments/", json={
+            "amount": "200.00", "payment_method": "cash", "fee_record_id": record_id,
+        })
+        check("A payment of 200.00 is recorded", response.status_code == 200)
+
+        async def record():
+            return amounts((await client.get(f"{api}/fee-records/{record_id}")).json())
+
+        async def adjust(event_type: str, amount: str) -> int:
+            response = await client.post(f"{api}/fee-records/{record_id}/adjustments",
+                                         json={"event_type": event_type, "amount": amount})
+            return response.status_code
+
+        before = await record()
+        check("The record owes 325.00 of 525.00",
+              before == (Decimal("525"), Decimal("200"), Decimal("325"), "partially_paid"))
+        for event_type, amount, reason in [
+            ("refund", "1000000", "a refund far above what was paid"),
+            ("refund", "200.01", "a refund of a cent more than was paid"),
+            ("discount", "1000000", "a discount far above what is outstanding"),
+            ("discount", "325.01", "a discount of a cent more than is outstanding"),
+        ]:
+            check(f"{reason.capitalize()} is refused with 400", await adjust(event_type, amount) == 400)
+        check("Refused adjustments leave the record as it was", await record() == before)
+
+        check("A refund of 50.00 is recorded", await adjust("refund", "50.00") == 200)
+        check("It leaves 150.00 paid and 375.00 outstanding",
+              await record() == (Decimal("525"), Decimal("150"), Decimal("375"), "partially_paid"))
+        check("A discount of the whole 375.00 outstanding is recorded", await adjust("discount", "375.00") == 200)
+        check("The record is paid", await record() == (Decimal("150"), Decimal("150"), Decimal("0"), "paid"))
+        check("A refund of everything paid is recorded", await adjust("refund", "150.00") == 200)
+        check("The record owes its total again",
+              await record() == (Decimal("150"), Decimal("0"), Decimal("150"), "pending"))
+        check("A refund with nothing paid is refused with 400", await adjust("refund", "0.01") == 400)
+
+        balance = (await client.get(f"{api}/fee-records/{record_id}/balance")).json()
+        check("The ledger balance agrees with the record", Decimal(str(balance["balance"])) == Decimal("150"))
+
+    print(f"{failures} of the checks failed" if failures else "All checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the bounds of fee record adjustments')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
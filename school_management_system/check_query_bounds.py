@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Script to check that a nested query API query issues the same number of SQL
+statements however many rows it returns.
+
+A three-level query (students, their exam results and fee records, and the
+exams and payments of those) is run against the configured database (use a
+seeded file database) for a growing number of students. Every statement
+sent to the database is counted with a ``before_cursor_execute`` listener.
+The check fails unless the count is the same for every size, and no higher
+than one statement per root and per relationship the query names.
+
+Example:
+    USE_SQLITE_MEMORY=False SQLITE_PATH=college.db python check_query_bounds.py --sizes 5 50 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import event, func
+from sqlalchemy.future import select
+
+import school_management_system.main  # noqa: F401  (configures the mappers)
+from school_management_system.database.session import AsyncSessionLocal, engine
+from school_management_system.models.student import Student
+from school_management_system.services.query_service import execute_query, get_plan
+
+# One root and four relationships
+QUERY = {
+    "students": {
+        "args": {"order_by": ["id"], "limit": "$students"},
+        "fields": [
+            "id",
+            "first_name",
+            {"exam_results": {"args": {"limit": 5}, "fields": ["score", {"exam": {"fields": ["name"]}}]}},
+            {"fee_records": {"args": {"limit": 3}, "fields": ["term", {"payments": {"args": {"limit": 2},
+                                                                                     "fields": ["amount"]}}]}},
+        ],
+    }
+}
+MAX_STATEMENTS = 5
+
+
+def count_rows(value) -> int:
+    """Rows in a query result, at every level."""
+    if isinstance(value, list):
+        return sum(count_rows(item) for item in value)
+    if isinstance(value, dict):
+        return 1 + sum(count_rows(item) for item in value.values())
+    return 0
+
+
+async def run(args) -> int:
+    async with AsyncSessionLocal() as db:
+        students = (await db.execute(select(func.count()).select_from(Student))).scalar()
+    if students < max(args.sizes):
+        print(f"The database has {students} students; seed at least {max(args.sizes)} (see seed_data.py)")
+        return 1
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    plan = get_plan(QUERY)
+    counts = []
+    failed = False
+    for size in args.sizes:
+        statements.clear()
+        async with AsyncSessionLocal() as db:
+            result = await execute_query(db, plan, {"students": size})
+        counted = len(statements)
+        counts.append(counted)
+        rows = count_rows(result["data"])
+        print(f"{size:>5} students: {rows:>6} rows, {counted} statements "
+              f"(reported {result['extensions']['statements']})")
+        if len(result["data"]["students"]) != size:
+            print(f"❌ Expected {size} students, got {len(result['data']['students'])}")
+            failed = True
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    checks = [
+        ("the statement count does not grow with the rows", len(set(counts)) == 1),
+        (f"at most {MAX_STATEMENTS} statements (one per root and relationship)", max(counts) <= MAX_STATEMENTS),
+    ]
+    for description, passed in checks:
+        print(f"{'✅' if passed else '❌'} {description}")
+    return 1 if failed or not all(passed for _, passed in checks) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the statement bound of nested queries')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 50, 200], help='Students per run')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
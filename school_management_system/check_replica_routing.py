@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Script to check the routing of database sessions between a primary and a
+read replica.
+
+Two stub engines stand in for the primary and the replica: separate
+in-memory SQLite databases, each holding its own name, and the replica a
+replication lag its lag query reads. Requests are routed by a SessionRouter
+and every session reports which database served it: writes and pinned reads
+must reach the primary, other reads the replica unless it lags too far
+behind or cannot be reached.
+
+Example:
+    python check_replica_routing.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from school_management_system.database.routing import PRIMARY_UNTIL_HEADER, Replica, SessionRouter
+
+MAX_LAG_SECONDS = 5.0
+LAG_QUERY = "SELECT seconds FROM replication_lag"
+
+failures = 0
+
+
+def check(description: str, passed: bool) -> None:
+    global failures
+    print(f"{'✅' if passed else '❌'} {description}")
+    if not passed:
+        failures += 1
+
+
+async def stub_engine(name: str, lag: float = None):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE server (name TEXT)"))
+        await conn.execute(text("INSERT INTO server VALUES (:name)"), {"name": name})
+        if lag is not None:
+            await conn.execute(text("CREATE TABLE replication_lag (seconds REAL)"))
+            await conn.execute(text("INSERT INTO replication_lag VALUES (:lag)"), {"lag": lag})
+    return engine
+
+
+async def set_lag(replica: Replica, lag: float) -> None:
+    async with replica.engine.begin() as conn:
+        await conn.execute(text("UPDATE replication_lag SET seconds = :lag"), {"lag": lag})
+    replica.checked_at = 0.0  # Measured again on its next use
+
+
+def request(method: str = "GET", headers: dict = None) -> Request:
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw_headers, "query_string": b""})
+
+
+async def served_by(router: SessionRouter, req: Request) -> str:
+    session_factory = await router.factory_for(req)
+    async with session_factory() as session:
+        return (await session.execute(text("SELECT name FROM server"))).scalar()
+
+
+async def run(args) -> int:
+    primary_engine = await stub_engine("primary")
+    primary = sessionmaker(primary_engine, class_=AsyncSession, expire_on_commit=False)
+    replica = Replica(await stub_engine("replica", lag=0.0), lag_query=LAG_QUERY)
+    router = SessionRouter(
+        primary, [replica], max_lag_seconds=MAX_LAG_SECONDS, lag_check_interval=60,
+        read_your_writes_seconds=args.pin_seconds,
+    )
+
+    check("GET is served by the replica", await served_by(router, request()) == "replica")
+    for method in ("POST", "PUT", "PATCH", "DELETE"):
+        check(f"{method} is served by the primary", await served_by(router, request(method)) == "primary")
+    async with router.read_session() as session:
+        name = (await session.execute(text("SELECT name FROM server"))).scalar()
+    check("Background reads are served by the replica", name == "replica")
+
+    # Read-your-writes: a write pins the client to the primary
+    response = Response()
+    router.mark_write(response)
+    primary_until = response.headers.get(PRIMARY_UNTIL_HEADER)
+    check("A write sets the pin header", primary_until is not None)
+    check("The pin cookie is set", "db_primary_until=" in response.headers.get("set-cookie", ""))
+    pinned = {PRIMARY_UNTIL_HEADER: primary_until or ""}
+    check("A pinned GET is served by the primary", await served_by(router, request(headers=pinned)) == "primary")
+    cookie = {"Cookie": f"db_primary_until={primary_until}"}
+    check("A GET pinned by cookie is served by the primary", await served_by(router, request(headers=cookie)) == "primary")
+    expired = {PRIMARY_UNTIL_HEADER: f"{time.time() - 1:.3f}"}
+    check("An expired pin reads from the replica", await served_by(router, request(headers=expired)) == "replica")
+    check("A malformed pin reads from the replica",
+          await served_by(router, request(headers={PRIMARY_UNTIL_HEADER: "soon"})) == "replica")
+    await asyncio.sleep(args.pin_seconds + 0.1)
+    check(f"The pin lapses after {args.pin_seconds:g} s",
+          await served_by(router, request(headers=pinned)) == "replica")
+
+    # Replication lag
+    await set_lag(replica, MAX_LAG_SECONDS + 1)
+    check("A replica lagging too far behind is skipped", await served_by(router, request()) == "primary")
+    check("Its lag was measured", replica.lag == MAX_LAG_SECONDS + 1)
+    await set_lag(replica, MAX_LAG_SECONDS - 1)
+    check("It is used again once it caught up", await served_by(router, request()) == "replica")
+    await set_lag(replica, MAX_LAG_SECONDS + 1)
+    replica.checked_at = time.monotonic()
+    check("Lag is only measured again after the check interval", await served_by(router, request()) == "replica")
+
+    async with replica.engine.begin() as conn:
+        await conn.execute(text("DROP TABLE replication_lag"))
+    replica.checked_at = 0.0
+    check("An unreachable replica is skipped", await served_by(router, request()) == "primary")
+    check("Its lag is unknown", replica.lag is None)
+
+    await router.dispose()
+    await primary_engine.dispose()
+    print(f"{failures} of the checks failed" if failures else "All checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check session routing between a primary and a replica')
+    parser.add_argument('--pin-seconds', type=float, default=1, help='Read-your-writes window')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
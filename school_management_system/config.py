@@ -1,5 +1,5 @@
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set
 
 # Try to import BaseSettings from pydantic_settings (Pydantic v2)
 # If that fails, fall back to importing from pydantic directly (Pydantic v1)
@@ -15,6 +15,11 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "College Management System"
     API_V1_STR: str = "/api/v1"
     
+    # STARTUP
+    # Import API routers on the first request that needs them and leave the schema
+    # to the migration step (python jobs.py migrate), for fast serverless cold starts
+    FAST_START: bool = os.getenv("FAST_START", "False").lower() == "true"
+    
     # SECURITY
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
@@ -22,6 +27,8 @@ class Settings(BaseSettings):
     # DATABASE
     # Using SQLite in-memory database for development, PostgreSQL for production
     USE_SQLITE_MEMORY: bool = os.getenv("USE_SQLITE_MEMORY", "True").lower() == "true"
+    # Persistent SQLite file storage for small deployments (used when USE_SQLITE_MEMORY is False)
+    SQLITE_PATH: Optional[str] = os.getenv("SQLITE_PATH", "")
     SQLALCHEMY_DATABASE_URI: str = os.getenv("DATABASE_URL", "sqlite:///:memory:")
     
     # PostgreSQL settings (not used when USE_SQLITE_MEMORY is True)
@@ -35,12 +42,37 @@ class Settings(BaseSettings):
         if values.get("USE_SQLITE_MEMORY", False):
             return "sqlite:///:memory:"
         
+        if values.get("SQLITE_PATH"):
+            return f"sqlite:///{values.get('SQLITE_PATH')}"
+        
         if isinstance(v, str):
             return v
             
         # Build PostgreSQL connection string
         return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
     
+    # Read replicas (PostgreSQL only): comma-separated URLs in DATABASE_REPLICA_URLS
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_LAG_CHECK_INTERVAL: float = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+    # How long a client keeps reading from the primary after a write
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+    @property
+    def REPLICA_URLS(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+    # SQLite file mode tuning, applied as pragmas on every new connection
+    SQLITE_READ_POOL_SIZE: int = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    @property
+    def USE_SQLITE_FILE(self) -> bool:
+        return not self.USE_SQLITE_MEMORY and bool(self.SQLITE_PATH)
+    
     # EMAIL
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = 587
@@ -49,7 +81,137 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = os.getenv("SMTP_PASSWORD", "")
     EMAILS_FROM_EMAIL: Optional[str] = os.getenv("EMAILS_FROM_EMAIL", "")
     EMAILS_FROM_NAME: Optional[str] = os.getenv("EMAILS_FROM_NAME", "")
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "5"))
+    
+    # NOTIFICATIONS
+    # Run the outbox dispatcher inside the web process
+    NOTIFICATION_WORKER_ENABLED: bool = os.getenv("NOTIFICATION_WORKER_ENABLED", "False").lower() == "true"
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "200"))
+    NOTIFICATION_LEASE_SECONDS: int = int(os.getenv("NOTIFICATION_LEASE_SECONDS", "300"))
+    NOTIFICATION_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+    NOTIFICATION_RETRY_BASE_SECONDS: int = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "60"))
+    NOTIFICATION_RATE_PER_SECOND: float = float(os.getenv("NOTIFICATION_RATE_PER_SECOND", "50"))
+    
+    # ADMISSIONS
+    # How long a reviewer holds claimed applications
+    ADMISSION_CLAIM_LEASE_SECONDS: int = int(os.getenv("ADMISSION_CLAIM_LEASE_SECONDS", "1800"))
+    
+    # STUDENT OVERVIEW
+    # Sections of an overview queried at the same time, each on its own connection
+    STUDENT_OVERVIEW_CONCURRENCY: int = int(os.getenv("STUDENT_OVERVIEW_CONCURRENCY", "4"))
+    # Overviews are cached per process; writes through this process invalidate them,
+    # other processes' writes show after at most this long (0 disables the cache)
+    STUDENT_OVERVIEW_CACHE_SECONDS: int = int(os.getenv("STUDENT_OVERVIEW_CACHE_SECONDS", "60"))
+    STUDENT_OVERVIEW_CACHE_SIZE: int = int(os.getenv("STUDENT_OVERVIEW_CACHE_SIZE", "5000"))
+    
+    # QUERY API
+    QUERY_MAX_DEPTH: int = int(os.getenv("QUERY_MAX_DEPTH", "4"))
+    QUERY_DEFAULT_LIMIT: int = int(os.getenv("QUERY_DEFAULT_LIMIT", "50"))
+    QUERY_MAX_LIMIT: int = int(os.getenv("QUERY_MAX_LIMIT", "500"))
+    # Most rows a query may return across all its levels, from the limits it asks for
+    QUERY_MAX_COMPLEXITY: int = int(os.getenv("QUERY_MAX_COMPLEXITY", "20000"))
+    QUERY_PLAN_CACHE_SIZE: int = int(os.getenv("QUERY_PLAN_CACHE_SIZE", "500"))
+    # Only execute registered (persisted) queries, rejecting ad hoc documents
+    QUERY_PERSISTED_ONLY: bool = os.getenv("QUERY_PERSISTED_ONLY", "False").lower() == "true"
+    
+    # COHORT ANALYTICS
+    # Cohort reports are cached per process; changes to students through this
+    # process clear them, other processes' changes show after at most this long
+    COHORT_CACHE_SECONDS: int = int(os.getenv("COHORT_CACHE_SECONDS", "300"))
+    COHORT_CACHE_SIZE: int = int(os.getenv("COHORT_CACHE_SIZE", "500"))
     
+    # DOCUMENT STORAGE
+    # "local" keeps documents under DOCUMENT_STORAGE_PATH, "s3" in an S3-compatible bucket
+    DOCUMENT_STORAGE_BACKEND: str = os.getenv("DOCUMENT_STORAGE_BACKEND", "local")
+    DOCUMENT_STORAGE_PATH: str = os.getenv("DOCUMENT_STORAGE_PATH", "storage/documents")
+    DOCUMENT_MAX_UPLOAD_MB: int = int(os.getenv("DOCUMENT_MAX_UPLOAD_MB", "25"))
+    DOCUMENT_THUMBNAIL_WORKERS: int = int(os.getenv("DOCUMENT_THUMBNAIL_WORKERS", "2"))
+    # Serve local documents through nginx (X-Accel-Redirect) from this internal location
+    DOCUMENT_X_ACCEL_PREFIX: Optional[str] = os.getenv("DOCUMENT_X_ACCEL_PREFIX") or None
+    DOCUMENT_S3_BUCKET: Optional[str] = os.getenv("DOCUMENT_S3_BUCKET") or None
+    DOCUMENT_S3_PREFIX: str = os.getenv("DOCUMENT_S3_PREFIX", "")
+    DOCUMENT_S3_ENDPOINT_URL: Optional[str] = os.getenv("DOCUMENT_S3_ENDPOINT_URL") or None
+    DOCUMENT_S3_REGION: Optional[str] = os.getenv("DOCUMENT_S3_REGION") or None
+    
+    # MIGRATIONS
+    # Migration statements waiting longer than this for a lock fail instead of
+    # queueing the application's queries behind them (PostgreSQL)
+    MIGRATION_LOCK_TIMEOUT_MS: int = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", "5000"))
+    # Changes that block writes to larger tables for a scan or rewrite need `jobs.py migrate --force`
+    MIGRATION_MAX_BLOCKING_ROWS: int = int(os.getenv("MIGRATION_MAX_BLOCKING_ROWS", "100000"))
+    MIGRATION_BACKFILL_BATCH_SIZE: int = int(os.getenv("MIGRATION_BACKFILL_BATCH_SIZE", "5000"))
+    # Pause between backfill batches, leaving the database to live traffic
+    MIGRATION_BACKFILL_PAUSE_SECONDS: float = float(os.getenv("MIGRATION_BACKFILL_PAUSE_SECONDS", "0.1"))
+
+    # PARTITIONING
+    # Attendance, payments and exam results are partitioned by academic year (PostgreSQL);
+    # an academic year starts on the first day of this month
+    ACADEMIC_YEAR_START_MONTH: int = int(os.getenv("ACADEMIC_YEAR_START_MONTH", "8"))
+    # Partitions created ahead of the current academic year
+    PARTITION_YEARS_AHEAD: int = int(os.getenv("PARTITION_YEARS_AHEAD", "1"))
+    # Archived academic years are kept here as Parquet files (python jobs.py archive)
+    ARCHIVE_PATH: str = os.getenv("ARCHIVE_PATH", "storage/archive")
+
+    # ANALYTICS
+    # Columnar copy of the reporting tables, updated by python jobs.py analytics-export
+    ANALYTICS_PATH: str = os.getenv("ANALYTICS_PATH", "storage/analytics")
+    # Exports re-read rows changed this long before the previous export started,
+    # catching transactions that were still open then
+    ANALYTICS_WATERMARK_LAG_SECONDS: int = int(os.getenv("ANALYTICS_WATERMARK_LAG_SECONDS", "300"))
+    # Part files per table before they are compacted into one
+    ANALYTICS_MAX_PARTS: int = int(os.getenv("ANALYTICS_MAX_PARTS", "20"))
+
+    # CHANGE DATA CAPTURE
+    # Tables whose inserts, updates and deletes are written to the change_events outbox
+    # (comma-separated; empty turns capture off)
+    CHANGE_CAPTURE_TABLES: str = os.getenv(
+        "CHANGE_CAPTURE_TABLES", "students,attendance,exams,exam_results,fee_records,payments,admissions,reports"
+    )
+    # Run the change publisher inside the web process
+    CHANGE_PUBLISHER_ENABLED: bool = os.getenv("CHANGE_PUBLISHER_ENABLED", "False").lower() == "true"
+    CHANGE_PUBLISH_BATCH_SIZE: int = int(os.getenv("CHANGE_PUBLISH_BATCH_SIZE", "500"))
+    CHANGE_PUBLISH_INTERVAL_SECONDS: float = float(os.getenv("CHANGE_PUBLISH_INTERVAL_SECONDS", "1"))
+    # "local" (in-process stand-in) or the import path of a ChangeBroker class, e.g. "myapp.brokers:KafkaBroker"
+    CHANGE_BROKER: str = os.getenv("CHANGE_BROKER", "local")
+    # Published events are kept this long for consumers catching up (python jobs.py publish-changes --prune)
+    CHANGE_RETENTION_DAYS: int = int(os.getenv("CHANGE_RETENTION_DAYS", "7"))
+
+    @property
+    def CHANGE_CAPTURE_TABLE_NAMES(self) -> Set[str]:
+        return {name.strip() for name in self.CHANGE_CAPTURE_TABLES.split(",") if name.strip()}
+
+    # LIVE UPDATES
+    # Server-Sent Events connections served per process
+    LIVE_MAX_CONNECTIONS: int = int(os.getenv("LIVE_MAX_CONNECTIONS", "10000"))
+    # Events buffered per connection; a connection further behind is closed
+    LIVE_BUFFER_SIZE: int = int(os.getenv("LIVE_BUFFER_SIZE", "100"))
+
+    # TEMPLATES
+    # Compile every template when the web routes are set up instead of on its first request
+    TEMPLATE_PRECOMPILE: bool = os.getenv("TEMPLATE_PRECOMPILE", "True").lower() == "true"
+    # Compiled templates are kept here for the next process (empty disables);
+    # python jobs.py compile-templates fills it at build time
+    TEMPLATE_BYTECODE_CACHE_DIR: str = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR", "")
+    # Check templates for changes on every render (development)
+    TEMPLATE_AUTO_RELOAD: bool = os.getenv("TEMPLATE_AUTO_RELOAD", "True").lower() == "true"
+    # Rendered page fragments are cached per process, keyed by the version of their data;
+    # other processes' writes show after at most this long (0 disables the cache)
+    FRAGMENT_CACHE_SECONDS: int = int(os.getenv("FRAGMENT_CACHE_SECONDS", "300"))
+    FRAGMENT_CACHE_SIZE: int = int(os.getenv("FRAGMENT_CACHE_SIZE", "1000"))
+
+    # STATIC ASSETS
+    # Fingerprinted and precompressed assets written by python jobs.py build-assets
+    ASSET_BUILD_DIR: str = os.getenv(
+        "ASSET_BUILD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "web", "build")
+    )
+
+    # RESPONSE COMPRESSION
+    # Responses of at least this many bytes are sent with brotli or gzip (0 disables)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    # Brotli is used when the brotli package is installed
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
     # ADMIN USER
     FIRST_SUPERUSER: str = os.getenv("FIRST_SUPERUSER", "admin@example.com")
     FIRST_SUPERUSER_PASSWORD: str = os.getenv("FIRST_SUPERUSER_PASSWORD", "admin")
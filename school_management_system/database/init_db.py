@@ -1,9 +1,16 @@
 import logging
 import os
+from typing import List
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from school_management_system.database.base import Base
+from school_management_system.database.migrations import (
+    MigrationStep, check_lock_impact, create_indexes_concurrently, plan_migrations, run_migrations
+)
+from school_management_system.database.partitioning import ensure_partitions
 from school_management_system.database.session import get_engine_for_init, AsyncSessionLocal
 from school_management_system.models.user import User
 from school_management_system.utils.security import get_password_hash
@@ -12,18 +19,61 @@ from school_management_system.config import settings
 logger = logging.getLogger(__name__)
 
 
+async def create_schema(force: bool = False) -> List[MigrationStep]:
+    """
+    Create tables that don't exist and migrate existing tables to the current
+    models.
+
+    The pending changes are checked first: one that would block writes to a
+    table of more than ``MIGRATION_MAX_BLOCKING_ROWS`` rows while it scans or
+    rewrites it is refused unless ``force`` is set. On PostgreSQL the indexes
+    of existing tables are built concurrently once the other changes have
+    committed. The partitions of the current and next academic years are
+    created if missing.
+
+    Returns:
+        The steps that were applied
+
+    Raises:
+        MigrationBlockedError: If a blocking step is pending and ``force`` is not set
+    """
+    # Register every table on Base.metadata, whichever routers are loaded
+    from school_management_system.models import (  # noqa: F401
+        user, student, admission, subject, timetable, exam, payment, report, job, reconciliation, ledger, query, change,
+    )
+    
+    engine = get_engine_for_init()
+    concurrent = engine.dialect.name == "postgresql"
+    async with engine.begin() as conn:
+        if concurrent:
+            # Fail instead of queueing the application's queries behind a lock wait
+            await conn.execute(text(f"SET LOCAL lock_timeout = {int(settings.MIGRATION_LOCK_TIMEOUT_MS)}"))
+        steps = await conn.run_sync(plan_migrations, concurrent)
+        if not force:
+            check_lock_impact(steps, settings.MIGRATION_MAX_BLOCKING_ROWS)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations, concurrent)
+        await conn.run_sync(ensure_partitions)
+    
+    if concurrent and any(step.action.startswith(("create index", "create unique index")) for step in steps):
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.run_sync(create_indexes_concurrently, settings.MIGRATION_LOCK_TIMEOUT_MS)
+    
+    for step in steps:
+        if step.action != "create table":
+            logger.info(f"Migrated {step.table}: {step.action}")
+    return steps
+
+
 async def init_db() -> None:
     """
     Initialize the database:
     - Create tables if they don't exist
+    - Migrate existing tables to the current models
     - Create initial superuser if it doesn't exist
     """
-    # Get the engine for initialization
-    engine = get_engine_for_init()
-    
-    # Create tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await create_schema()
     
     # Create initial superuser
     try:
@@ -51,7 +101,7 @@ async def create_initial_superuser() -> None:
     try:
         async with AsyncSessionLocal() as session:
             # Check if superuser already exists
-            if settings.USE_SQLITE_MEMORY:
+            if settings.USE_SQLITE_MEMORY or settings.USE_SQLITE_FILE:
                 # For SQLite, use SQLAlchemy ORM query
                 result = await session.execute(
                     select(User).where(User.email == settings.FIRST_SUPERUSER)
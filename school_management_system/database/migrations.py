@@ -0,0 +1,471 @@
+"""
+Schema changes for databases created by earlier versions.
+
+``create_all`` only creates missing tables. Changes to existing tables, and
+the initial contents of tables derived from them, are applied here, after
+it. Each migration inspects the live schema, so running them again is a
+no-op.
+
+Before anything runs, ``plan_migrations`` lists the pending changes with the
+lock each takes and what it blocks while it holds it, so that a change that
+would stop writes to a large table for the length of a rewrite is caught
+before it starts (see ``init_db.create_schema``). On PostgreSQL the indexes
+and unique constraints of existing tables are built with ``CREATE [UNIQUE]
+INDEX CONCURRENTLY`` after the other changes commit, which leaves reads and
+writes running during the build, and every migration statement gives up
+after ``MIGRATION_LOCK_TIMEOUT_MS`` instead of queueing traffic behind it.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, Index, MetaData, UniqueConstraint, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.sql import sqltypes
+
+from school_management_system.database.base import Base
+from school_management_system.database.partitioning import is_partitioned, list_partitions
+from school_management_system.database.types import Money
+
+logger = logging.getLogger(__name__)
+
+# Rows converted to cents per statement when a SQLite table is rebuilt
+CONVERT_BATCH_ROWS = 5000
+
+
+class MigrationBlockedError(ValueError):
+    """
+    A pending migration would block writes to a large table for longer than
+    a moment.
+    """
+
+
+@dataclass
+class MigrationStep:
+    """
+    A pending schema change and its lock impact.
+    """
+    table: str
+    action: str
+    lock: str  # Lock taken, e.g. ACCESS EXCLUSIVE
+    blocks: str  # What waits while it is held: nothing, writes, or reads and writes
+    scales_with_rows: bool  # Held for a table scan or rewrite rather than a moment
+    rows: int = 0  # Estimated rows in the table
+    invalid: Optional[str] = None  # Why the step cannot run at all
+
+    @property
+    def blocking(self) -> bool:
+        return self.blocks != "nothing" and self.scales_with_rows
+
+
+def estimate_rows(conn: Connection, table_name: str) -> int:
+    """
+    Estimate the rows of a table without counting them: the planner's
+    estimate on PostgreSQL, the highest rowid on SQLite.
+    """
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+        ).scalar()
+    else:
+        rows = conn.execute(text(f"SELECT max(rowid) FROM {table_name}")).scalar()
+    return max(int(rows or 0), 0)
+
+
+def _pending_money_columns(conn: Connection) -> Dict[str, List[str]]:
+    """
+    Find the Money columns still stored as floating point or decimal amounts.
+    """
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    pending = {}
+    for table in Base.metadata.sorted_tables:
+        money = [column.name for column in table.columns if isinstance(column.type, Money)]
+        if not money or table.name not in existing:
+            continue
+        stored = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        stale = [name for name in money if name in stored and not isinstance(stored[name], sqltypes.Integer)]
+        if stale:
+            pending[table.name] = stale
+    return pending
+
+
+def _rebuild_sqlite_table(conn: Connection, table_name: str, columns: List[str]) -> None:
+    """
+    Recreate a SQLite table from its model, converting ``columns`` to cents.
+
+    SQLite cannot change a column's type, so the rows are copied into a new
+    table that replaces the old one. The amounts are then converted in
+    batches with the ``Money`` type's own conversion, so existing values are
+    rounded as new writes are (SQL rounding sees ``2.675`` as the float just
+    below it) and NULLs stay NULL.
+    """
+    table = Base.metadata.tables[table_name]
+    # A copy of every table, so the new table's foreign keys resolve
+    scratch = MetaData()
+    for other in Base.metadata.sorted_tables:
+        other.to_metadata(scratch)
+    new_table = table.to_metadata(scratch, name=f"_migrate_{table_name}")
+
+    stored = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    names = [column.name for column in table.columns if column.name in stored]
+    sequence = None
+    if conn.execute(text("SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_sequence'")).scalar():
+        sequence = conn.execute(
+            text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": table_name}
+        ).scalar()
+
+    conn.execute(CreateTable(new_table))
+    conn.execute(text(
+        f"INSERT INTO {new_table.name} ({', '.join(names)}) SELECT {', '.join(names)} FROM {table_name}"
+    ))
+    money = Money()
+    update = text(
+        f"UPDATE {new_table.name} SET {', '.join(f'{name} = :{name}' for name in columns)} WHERE rowid = :rowid"
+    )
+    last_rowid = 0
+    while True:
+        rows = conn.execute(text(
+            f"SELECT rowid, {', '.join(columns)} FROM {new_table.name} WHERE rowid > :after ORDER BY rowid LIMIT :limit"
+        ), {"after": last_rowid, "limit": CONVERT_BATCH_ROWS}).all()
+        if not rows:
+            break
+        conn.execute(update, [
+            {"rowid": row[0], **{name: money.process_bind_param(value, conn.dialect)
+                                 for name, value in zip(columns, row[1:])}}
+            for row in rows
+        ])
+        last_rowid = rows[-1][0]
+    conn.execute(text(f"DROP TABLE {table_name}"))
+    conn.execute(text(f"ALTER TABLE {new_table.name} RENAME TO {table_name}"))
+    for index in table.indexes:
+        index.create(conn)
+    if sequence is not None:
+        # Ids deleted from the end of an AUTOINCREMENT table stay retired
+        conn.execute(
+            text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name AND seq < :seq"),
+            {"seq": sequence, "name": table_name},
+        )
+
+
+def migrate_money_columns(conn: Connection) -> Dict[str, List[str]]:
+    """
+    Convert money columns from floating point amounts to whole cents.
+
+    Returns:
+        The converted columns per table
+    """
+    pending = _pending_money_columns(conn)
+    for table_name, columns in pending.items():
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                f"ALTER TABLE {table_name} " + ", ".join(
+                    f"ALTER COLUMN {name} TYPE BIGINT USING round(CAST({name} AS NUMERIC) * 100)::bigint"
+                    for name in columns
+                )
+            ))
+        elif conn.dialect.name == "sqlite":
+            _rebuild_sqlite_table(conn, table_name, columns)
+        else:
+            raise ValueError(f"Cannot migrate money columns on {conn.dialect.name}")
+        logger.info(f"Converted {table_name} ({', '.join(columns)}) to cents")
+    return pending
+
+
+def _missing_columns(conn: Connection) -> Dict[str, List[Column]]:
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        stored = {column["name"] for column in inspector.get_columns(table.name)}
+        columns = [column for column in table.columns if column.name not in stored]
+        if columns:
+            missing[table.name] = columns
+    return missing
+
+
+def add_missing_columns(conn: Connection) -> Dict[str, List[str]]:
+    """
+    Add the columns of the models that existing tables lack. Required
+    columns are added with their server default, which fills the existing
+    rows; a required column without one cannot be added.
+
+    Returns:
+        The added columns per table
+
+    Raises:
+        ValueError: If a required column has no server default
+    """
+    compiler = conn.dialect.ddl_compiler(conn.dialect, None)
+    added = {}
+    for table_name, missing in _missing_columns(conn).items():
+        table = Base.metadata.tables[table_name]
+        for column in missing:
+            definition = f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+            if not column.nullable:
+                if column.server_default is None:
+                    raise ValueError(f"Cannot add required column {table.name}.{column.name} to existing rows")
+                definition += f" NOT NULL DEFAULT {compiler.get_column_default_string(column)}"
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+        added[table.name] = [column.name for column in missing]
+        logger.info(f"Added {table.name} ({', '.join(added[table.name])})")
+    return added
+
+
+def _model_indexes(table) -> List[Index]:
+    """
+    The indexes a table's model declares, including those that back its
+    unique constraints. ``create_all`` creates the constraints with a new
+    table; on an existing table they are added as unique indexes, which
+    PostgreSQL can build concurrently and SQLite can add at all.
+    """
+    indexes = list(table.indexes)
+    constraints = [constraint for constraint in table.constraints if isinstance(constraint, UniqueConstraint)]
+    if constraints:
+        # Built on a copy, so the model's table does not gain indexes create_all would also create
+        copy = table.to_metadata(MetaData())
+        for constraint in constraints:
+            names = [column.name for column in constraint.columns]
+            name = constraint.name or f"uq_{table.name}_{'_'.join(names)}"
+            indexes.append(Index(name, *(copy.c[column] for column in names), unique=True))
+    return indexes
+
+
+def _missing_indexes(conn: Connection) -> List[Index]:
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        indexes = inspector.get_indexes(table.name)
+        constraints = inspector.get_unique_constraints(table.name)
+        stored = {index["name"] for index in indexes} | {constraint["name"] for constraint in constraints}
+        # Unnamed unique constraints are matched on their columns
+        unique_columns = {tuple(constraint["column_names"]) for constraint in constraints} | {
+            tuple(index["column_names"]) for index in indexes if index["unique"]
+        }
+        missing.extend(
+            index for index in _model_indexes(table)
+            if index.name not in stored and not (index.unique and tuple(index.columns.keys()) in unique_columns)
+        )
+    return missing
+
+
+def create_missing_indexes(conn: Connection) -> List[str]:
+    """
+    Create the indexes and unique constraints declared on existing tables
+    after they were created.
+
+    Returns:
+        The names of the created indexes
+    """
+    created = []
+    for index in _missing_indexes(conn):
+        index.create(conn)
+        created.append(index.name)
+        logger.info(f"Created index {index.name}")
+    return created
+
+
+def _concurrently(statement: str) -> str:
+    return re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY IF NOT EXISTS ", statement)
+
+
+def _build_partitioned_index(conn: Connection, name: str, table_name: str, statement: str) -> None:
+    # A partitioned table's index cannot be built concurrently: it is created
+    # invalid on the parent alone, built concurrently on each partition and
+    # becomes valid once every partition's index is attached to it
+    on_table = f" ON {table_name} "
+    conn.execute(text(
+        re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX IF NOT EXISTS ", statement).replace(
+            on_table, f" ON ONLY {table_name} ", 1)
+    ))
+    for partition in list_partitions(conn, table_name):
+        child = f"{partition}_{name}"[:63]
+        conn.execute(text(_concurrently(statement.replace(f" {name}{on_table}", f" {child} ON {partition} ", 1))))
+        conn.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+
+
+def create_indexes_concurrently(conn: Connection, lock_timeout_ms: Optional[int] = None) -> List[str]:
+    """
+    Build the missing indexes of existing PostgreSQL tables with
+    ``CREATE [UNIQUE] INDEX CONCURRENTLY``, which lets reads and writes go on
+    during the build. Unique constraints are added as unique indexes. Indexes
+    of partitioned tables are built partition by partition.
+
+    The connection must be in autocommit mode, since concurrent builds cannot
+    run in a transaction. A concurrent build that failed leaves an invalid
+    index behind; invalid indexes of the models are dropped and built again.
+
+    Returns:
+        The names of the built indexes
+    """
+    if lock_timeout_ms:
+        conn.execute(text(f"SET lock_timeout = {int(lock_timeout_ms)}"))
+    try:
+        declared = {index.name for table in Base.metadata.sorted_tables for index in _model_indexes(table)}
+        invalid = conn.execute(text(
+            "SELECT c.relname, c.relkind FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid"
+        )).all()
+        for name, kind in invalid:
+            if name in declared:
+                logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+                # Indexes of partitioned tables (kind I) cannot be dropped concurrently
+                concurrently = "" if kind == "I" else " CONCURRENTLY"
+                conn.execute(text(f"DROP INDEX{concurrently} IF EXISTS {name}"))
+
+        built = []
+        for index in _missing_indexes(conn):
+            statement = str(CreateIndex(index).compile(dialect=conn.dialect))
+            rows = estimate_rows(conn, index.table.name)
+            logger.info(f"Building index {index.name} on {index.table.name} (~{rows:,} rows) concurrently")
+            started = time.monotonic()
+            if is_partitioned(conn, index.table.name):
+                _build_partitioned_index(conn, index.name, index.table.name, statement)
+            else:
+                conn.execute(text(_concurrently(statement)))
+            built.append(index.name)
+            logger.info(f"Built index {index.name} in {time.monotonic() - started:.1f}s")
+        return built
+    finally:
+        if lock_timeout_ms:
+            conn.execute(text("RESET lock_timeout"))
+
+
+def seed_admission_status_counts(conn: Connection) -> None:
+    """
+    Count the admissions per status into the status counts table when it is
+    empty. From then on the counts are maintained with every change.
+    """
+    from school_management_system.models.admission import Admission, AdmissionStatus, AdmissionStatusCount
+
+    if conn.execute(select(func.count()).select_from(AdmissionStatusCount.__table__)).scalar():
+        return
+    counts = dict(conn.execute(
+        select(Admission.__table__.c.status, func.count()).group_by(Admission.__table__.c.status)
+    ).all())
+    conn.execute(insert(AdmissionStatusCount.__table__), [
+        {"status": admission_status, "count": counts.get(admission_status, 0)}
+        for admission_status in AdmissionStatus
+    ])
+
+
+def plan_migrations(conn: Connection, concurrent_indexes: bool = False) -> List[MigrationStep]:
+    """
+    List the pending changes with the lock each one takes, what the lock
+    blocks and for how long. Run it before ``create_all``, which would hide
+    the new tables.
+
+    Args:
+        conn: Connection to the database
+        concurrent_indexes: Whether PostgreSQL indexes will be built concurrently
+
+    Returns:
+        The pending steps, in the order they would run
+    """
+    postgres = conn.dialect.name == "postgresql"
+    existing = set(inspect(conn).get_table_names())
+    # SQLite takes a database-wide write lock; in WAL mode readers go on
+    table_lock, table_blocks = ("ACCESS EXCLUSIVE", "reads and writes") if postgres else ("database write lock", "writes")
+    rows: Dict[str, int] = {}
+
+    def table_rows(table_name: str) -> int:
+        if table_name not in rows:
+            rows[table_name] = estimate_rows(conn, table_name)
+        return rows[table_name]
+
+    steps = [
+        MigrationStep(table.name, "create table", "none", "nothing", False)
+        for table in Base.metadata.sorted_tables
+        if table.name not in existing
+    ]
+    for table_name, columns in _pending_money_columns(conn).items():
+        steps.append(MigrationStep(
+            table_name, f"convert {', '.join(columns)} to cents (rewrites the table)",
+            table_lock, table_blocks, True, table_rows(table_name),
+        ))
+    for table_name, columns in _missing_columns(conn).items():
+        # add_missing_columns refuses them, so the plan does too
+        required = [column.name for column in columns if not column.nullable and column.server_default is None]
+        steps.append(MigrationStep(
+            table_name, f"add column {', '.join(column.name for column in columns)}",
+            table_lock, table_blocks, False, table_rows(table_name),
+            invalid=f"required column {', '.join(required)} has no server default" if required else None,
+        ))
+    for index in _missing_indexes(conn):
+        table_name = index.table.name
+        create = f"create {'unique ' if index.unique else ''}index {index.name}"
+        if postgres and concurrent_indexes:
+            # Waits for transactions already running on the table, blocks nothing
+            step = MigrationStep(table_name, f"{create} concurrently", "SHARE UPDATE EXCLUSIVE",
+                                 "nothing", True, table_rows(table_name))
+        elif postgres:
+            step = MigrationStep(table_name, create, "SHARE", "writes", True, table_rows(table_name))
+        else:
+            step = MigrationStep(table_name, create, table_lock, table_blocks, True, table_rows(table_name))
+        steps.append(step)
+    return steps
+
+
+def check_lock_impact(steps: List[MigrationStep], max_blocking_rows: int) -> None:
+    """
+    Refuse steps that cannot run, and steps that would block a table of more
+    than ``max_blocking_rows`` rows for the length of a scan or rewrite.
+
+    Raises:
+        MigrationBlockedError: If such a step is pending
+    """
+    invalid = [step for step in steps if step.invalid]
+    if invalid:
+        raise MigrationBlockedError(
+            "Migrations cannot " + "; ".join(f"{step.action} to {step.table}: {step.invalid}" for step in invalid)
+        )
+    blocking = [step for step in steps if step.blocking and step.rows > max_blocking_rows]
+    if blocking:
+        raise MigrationBlockedError(
+            "Migrations would block " + "; ".join(
+                f"{step.blocks} on {step.table} (~{step.rows:,} rows) to {step.action}" for step in blocking
+            ) + "; run them in a maintenance window with 'python jobs.py migrate --force'"
+        )
+
+
+def long_running_transactions(conn: Connection, min_seconds: int = 60) -> List[Dict[str, object]]:
+    """
+    Transactions open for longer than ``min_seconds`` on PostgreSQL. Every
+    migration lock, including that of a concurrent index build, waits for
+    them, and while an exclusive lock waits new queries on the table queue
+    behind it.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+    result = conn.execute(text(
+        "SELECT pid, state, extract(epoch FROM now() - xact_start)::int AS seconds, left(query, 80) AS query "
+        "FROM pg_stat_activity "
+        "WHERE datname = current_database() AND pid <> pg_backend_pid() "
+        "AND xact_start < now() - make_interval(secs => :seconds) "
+        "ORDER BY xact_start"
+    ), {"seconds": min_seconds})
+    return [dict(row) for row in result.mappings()]
+
+
+def run_migrations(conn: Connection, concurrent_indexes: bool = False) -> None:
+    """
+    Bring the tables of an existing database up to date with the models.
+
+    With ``concurrent_indexes`` on PostgreSQL, the missing indexes are left
+    to ``create_indexes_concurrently``, to be built once this transaction
+    has committed.
+    """
+    migrate_money_columns(conn)
+    add_missing_columns(conn)
+    if not (concurrent_indexes and conn.dialect.name == "postgresql"):
+        create_missing_indexes(conn)
+    if "admissions" in Base.metadata.tables:
+        seed_admission_status_counts(conn)
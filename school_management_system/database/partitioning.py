@@ -0,0 +1,183 @@
+"""
+Range partitioning by academic year for the tables that grow every year.
+
+Attendance, payments and exam results are declared with ``partitioned_by``,
+naming the date column they are partitioned on. On PostgreSQL the tables are
+created with ``PARTITION BY RANGE`` on that column, with one partition per
+academic year (``attendance_y2024`` holds 2024-2025) and a default partition
+for rows outside them, so a query that filters on the column only scans the
+partitions of the years it asks for. ``ensure_partitions`` creates the
+partitions of the current academic year and the ones ahead of it; it runs
+with every schema creation and from ``python jobs.py partitions``.
+
+PostgreSQL requires the primary key of a partitioned table to include the
+partition column, and it cannot enforce foreign keys that refer to a
+partitioned table by ``id`` alone. The compile hooks below adapt the DDL of
+these tables: the models keep ``id`` as their primary key, which stays unique
+because ids come from one sequence, and foreign keys to them are kept in the
+models but not created. On SQLite nothing changes.
+
+Tables created unpartitioned by earlier versions stay unpartitioned; they
+have to be recreated to be partitioned.
+"""
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Table, and_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import ForeignKeyConstraint, PrimaryKeyConstraint
+from sqlalchemy.sql import ColumnElement
+
+from school_management_system.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Key of Table.info naming the partition column
+PARTITION_KEY = "partition_key"
+
+
+def partitioned_by(column_name: str, **table_args: Any) -> Dict[str, Any]:
+    """
+    ``__table_args__`` of a table partitioned by academic year on a date column.
+    """
+    return {
+        **table_args,
+        "postgresql_partition_by": f"RANGE ({column_name})",
+        "info": {PARTITION_KEY: column_name},
+    }
+
+
+def partition_key(table: Table) -> Optional[str]:
+    return table.info.get(PARTITION_KEY)
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _partitioned_primary_key(constraint, compiler, **kw):
+    key = partition_key(constraint.table)
+    if key is None or key in constraint.columns:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = [column.name for column in constraint.columns] + [key]
+    return "PRIMARY KEY (%s)" % ", ".join(compiler.preparer.quote(name) for name in columns)
+
+
+@compiles(ForeignKeyConstraint, "postgresql")
+def _foreign_key_to_partitioned(constraint, compiler, **kw):
+    if partition_key(constraint.referred_table) is not None:
+        return None  # Left out of CREATE TABLE
+    return compiler.visit_foreign_key_constraint(constraint, **kw)
+
+
+def academic_year_of(day: date) -> int:
+    """
+    The year an academic year starts in, for a day in it.
+    """
+    return day.year if day.month >= settings.ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_bounds(start_year: int) -> Tuple[date, date]:
+    """
+    First day of an academic year and first day of the next one.
+    """
+    month = settings.ACADEMIC_YEAR_START_MONTH
+    return date(start_year, month, 1), date(start_year + 1, month, 1)
+
+
+def academic_year_label(start_year: int) -> str:
+    return f"{start_year}-{start_year + 1}"
+
+
+def parse_academic_year(value: str) -> int:
+    """
+    Start year of an academic year given as "2023-2024" or "2023".
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    start, _, end = value.strip().partition("-")
+    if not start.isdigit() or (end and end != str(int(start) + 1)):
+        raise ValueError(f"Invalid academic year {value!r}, expected e.g. 2023-2024")
+    return int(start)
+
+
+def _bound(column: ColumnElement, day: date) -> Any:
+    return datetime.combine(day, datetime.min.time()) if isinstance(column.type, DateTime) else day
+
+
+def in_academic_years(column: ColumnElement, first_year: int, last_year: Optional[int] = None) -> ColumnElement:
+    """
+    Condition that a date column falls in the academic years from
+    ``first_year`` to ``last_year`` (the same year by default). Used on a
+    partition column it limits a query to the partitions of those years.
+    """
+    start, _ = academic_year_bounds(first_year)
+    _, end = academic_year_bounds(first_year if last_year is None else last_year)
+    return and_(column >= _bound(column, start), column < _bound(column, end))
+
+
+def partitioned_tables() -> List[Table]:
+    from school_management_system.database.base import Base
+
+    return [table for table in Base.metadata.sorted_tables if partition_key(table) is not None]
+
+
+def partition_name(table_name: str, start_year: int) -> str:
+    return f"{table_name}_y{start_year}"
+
+
+def list_partitions(conn: Connection, table_name: str) -> List[str]:
+    """
+    Names of the partitions of a PostgreSQL table.
+    """
+    return conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table_name}).scalars().all()
+
+
+def is_partitioned(conn: Connection, table_name: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :table"), {"table": table_name}).scalar()
+    return kind == "p"
+
+
+def ensure_partitions(conn: Connection, years_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """
+    Create the default partition and the partitions of the current and the
+    next ``years_ahead`` academic years (``PARTITION_YEARS_AHEAD``) of every
+    partitioned table. Does nothing on databases other than PostgreSQL.
+
+    A new partition cannot be created while the default partition holds rows
+    of its range, so partitions have to exist before their year starts.
+
+    Returns:
+        The names of the created partitions
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+    years_ahead = settings.PARTITION_YEARS_AHEAD if years_ahead is None else years_ahead
+    current = academic_year_of(today or date.today())
+    created = []
+    for table in partitioned_tables():
+        if not is_partitioned(conn, table.name):
+            logger.warning(f"{table.name} was created unpartitioned; recreate it to partition it by academic year")
+            continue
+        existing = set(list_partitions(conn, table.name))
+        if f"{table.name}_default" not in existing:
+            conn.execute(text(f"CREATE TABLE {table.name}_default PARTITION OF {table.name} DEFAULT"))
+            created.append(f"{table.name}_default")
+        for start_year in range(current, current + years_ahead + 1):
+            name = partition_name(table.name, start_year)
+            if name in existing:
+                continue
+            start, end = academic_year_bounds(start_year)
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table.name} FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+            created.append(name)
+    for name in created:
+        logger.info(f"Created partition {name}")
+    return created
@@ -0,0 +1,155 @@
+"""
+Routing of database sessions between the primary (writer) and read replicas.
+"""
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Requests with these methods never write and may use a replica session
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Cookie and header carrying the time until which a client reads from the primary
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
+PRIMARY_UNTIL_HEADER = "X-DB-Primary-Until"
+
+# Replication delay of a PostgreSQL standby in seconds; 0 when fully replayed
+POSTGRES_LAG_QUERY = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class Replica:
+    """
+    A read engine together with its most recently measured replication lag.
+    """
+
+    def __init__(self, engine: AsyncEngine, lag_query: Optional[str] = None):
+        self.engine = engine
+        self.lag_query = lag_query
+        self.session_factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False
+        )
+        self.lag: Optional[float] = 0.0
+        self.checked_at = 0.0
+
+    async def refresh_lag(self) -> Optional[float]:
+        """
+        Measure the replica's lag; None means the replica is unreachable.
+        """
+        self.checked_at = time.monotonic()
+        if not self.lag_query:
+            self.lag = 0.0
+            return self.lag
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.execute(text(self.lag_query))
+                self.lag = float(result.scalar() or 0.0)
+        except Exception as e:
+            logger.warning(f"Replica {self.engine.url.render_as_string(hide_password=True)} lag check failed: {e}")
+            self.lag = None
+        return self.lag
+
+
+class SessionRouter:
+    """
+    Hand out primary sessions for writes and replica sessions for reads.
+
+    Replicas are used round-robin. A replica whose lag exceeds
+    ``max_lag_seconds`` (or which cannot be reached) is skipped until its next
+    lag check, and reads fall back to the primary when no replica qualifies.
+    After a write, the client is pinned to the primary for
+    ``read_your_writes_seconds`` via a cookie and response header so it reads
+    its own writes.
+    """
+
+    def __init__(
+        self,
+        primary_factory: sessionmaker,
+        replicas: List[Replica],
+        max_lag_seconds: float = 5.0,
+        lag_check_interval: float = 2.0,
+        read_your_writes_seconds: int = 0,
+    ):
+        self.primary_factory = primary_factory
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._next = itertools.cycle(range(len(replicas))) if replicas else None
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self.replicas)
+
+    def wants_primary(self, request: Request) -> bool:
+        """
+        Whether the request must be served by the primary.
+        """
+        if request.method not in READ_METHODS:
+            return True
+        if not self.read_your_writes_seconds:
+            return False
+        primary_until = request.headers.get(PRIMARY_UNTIL_HEADER) or request.cookies.get(PRIMARY_UNTIL_COOKIE)
+        try:
+            return primary_until is not None and float(primary_until) > time.time()
+        except ValueError:
+            return False
+
+    async def _is_usable(self, replica: Replica) -> bool:
+        if time.monotonic() - replica.checked_at >= self.lag_check_interval:
+            await replica.refresh_lag()
+        return replica.lag is not None and replica.lag <= self.max_lag_seconds
+
+    async def read_factory(self) -> sessionmaker:
+        """
+        Pick the next usable replica, falling back to the primary.
+        """
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next)]
+            if await self._is_usable(replica):
+                return replica.session_factory
+        if self.replicas:
+            logger.info("No replica within lag limits; reading from primary")
+        return self.primary_factory
+
+    async def factory_for(self, request: Request) -> sessionmaker:
+        if not self.has_replicas or self.wants_primary(request):
+            return self.primary_factory
+        return await self.read_factory()
+
+    def mark_write(self, response) -> None:
+        """
+        Pin the client to the primary for the read-your-writes window.
+        """
+        if not self.read_your_writes_seconds:
+            return
+        primary_until = f"{time.time() + self.read_your_writes_seconds:.3f}"
+        response.headers[PRIMARY_UNTIL_HEADER] = primary_until
+        response.set_cookie(
+            PRIMARY_UNTIL_COOKIE, primary_until, max_age=self.read_your_writes_seconds, httponly=True
+        )
+
+    @asynccontextmanager
+    async def read_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Session for background reads such as report and export jobs.
+        """
+        session_factory = await self.read_factory() if self.has_replicas else self.primary_factory
+        async with session_factory() as session:
+            yield session
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
@@ -1,19 +1,62 @@
-from typing import Generator
+import sys
+from typing import Generator, List
 import os
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, StaticPool
 
 from school_management_system.config import settings
+from school_management_system.database.routing import (
+    POSTGRES_LAG_QUERY, Replica, SessionRouter,
+)
 
 # For SQLite in-memory in serverless, we need to use a shared in-memory database
 # This is a workaround for the fact that each request gets a new connection
 # We'll use a shared URI with mode=memory&cache=shared
 SQLITE_SHARED_URI = "file:memdb?mode=memory&cache=shared"
 
+
+def _apply_sqlite_pragmas(engine: AsyncEngine, read_only: bool = False) -> None:
+    """
+    Tune every new SQLite connection of the engine for file-backed storage.
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            # WAL lets readers proceed while the single writer commits
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
 # Function to create engine - this ensures a new connection for each serverless invocation
 def get_engine():
-    if settings.USE_SQLITE_MEMORY:
+    if settings.USE_SQLITE_FILE:
+        # File-backed SQLite allows one writer at a time, so the write engine
+        # holds a single connection and concurrent writers queue on the pool
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{settings.SQLITE_PATH}",
+            echo=False,
+            future=True,
+            connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+            # Explicit: older SQLAlchemy 2.0 releases default aiosqlite files to NullPool
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        )
+        _apply_sqlite_pragmas(engine)
+        return engine
+    elif settings.USE_SQLITE_MEMORY:
         # Use SQLite for in-memory database with shared cache for serverless
         if os.environ.get("RENDER") or os.environ.get("SERVERLESS"):
             return create_async_engine(
@@ -35,16 +78,48 @@ def get_engine():
             )
     else:
         # Use PostgreSQL for production
-        return create_async_engine(
-            str(settings.SQLALCHEMY_DATABASE_URI).replace("postgresql://", "postgresql+asyncpg://"),
+        return _create_postgres_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+
+def _create_postgres_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        str(url).replace("postgresql://", "postgresql+asyncpg://"),
+        echo=False,
+        future=True,
+        # Important for serverless: limit connection pool size
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+    )
+
+
+def get_read_replicas() -> List[Replica]:
+    """
+    Create the replicas serving read-only requests; empty when reads share the
+    main engine.
+    """
+    if settings.USE_SQLITE_FILE:
+        # Read-only connections never take the write lock, so under WAL they
+        # run concurrently with each other and with the writer
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///file:{settings.SQLITE_PATH}?mode=ro&uri=true",
             echo=False,
             future=True,
-            # Important for serverless: limit connection pool size
-            pool_size=1,
+            connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.SQLITE_READ_POOL_SIZE,
             max_overflow=0,
-            pool_recycle=3600,
-            pool_pre_ping=True,
         )
+        _apply_sqlite_pragmas(engine, read_only=True)
+        return [Replica(engine)]
+    if not settings.USE_SQLITE_MEMORY:
+        return [
+            Replica(_create_postgres_engine(url), lag_query=POSTGRES_LAG_QUERY)
+            for url in settings.REPLICA_URLS
+        ]
+    return []
 
 # Create engine
 engine = get_engine()
@@ -54,14 +129,34 @@ AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False
 )
 
+# Route reads to replicas and writes to the primary. A SQLite file has no
+# replication lag, so read-your-writes pinning is only needed for replicas.
+session_router = SessionRouter(
+    AsyncSessionLocal,
+    get_read_replicas(),
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    lag_check_interval=settings.REPLICA_LAG_CHECK_INTERVAL,
+    read_your_writes_seconds=0 if settings.USE_SQLITE_FILE else settings.READ_YOUR_WRITES_SECONDS,
+)
+
 # Store a reference to the engine for initialization
 _engine = engine
 
-async def get_db() -> Generator:
+async def get_db(request: Request) -> Generator:
     """
     Dependency for getting async database session.
     For serverless environments, we create a new session for each request.
     """
+    if session_router.has_replicas:
+        # Reads go to a replica (or the SQLite read-only pool), writes to the primary
+        session_factory = await session_router.factory_for(request)
+        async with session_factory() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+        return
+
     # For Vercel serverless with SQLite, we need to ensure tables exist for each new instance
     if os.environ.get("RENDER") or os.environ.get("SERVERLESS") and settings.USE_SQLITE_MEMORY:
         # We'll use the same engine but create a new session
@@ -90,6 +185,29 @@ async def get_db() -> Generator:
             finally:
                 await session.close()
 
+def get_read_session():
+    """
+    Session for background reads such as report and export jobs, served by a
+    replica when one is available.
+    """
+    return session_router.read_session()
+
+def pool_capacity(session_factory: sessionmaker) -> int:
+    """
+    How many sessions of the factory can hold a connection at the same time.
+    """
+    pool = session_factory.kw["bind"].sync_engine.pool
+    if isinstance(pool, QueuePool):
+        max_overflow = pool._max_overflow
+        return sys.maxsize if max_overflow < 0 else pool.size() + max_overflow
+    if isinstance(pool, NullPool):
+        return sys.maxsize
+    # StaticPool and the like share a single connection
+    return 1
+
 # Export the engine for use in init_db
 def get_engine_for_init():
     return _engine
+
+# Change capture listens to every session, whichever modules are loaded
+from school_management_system.models import change  # noqa: E402,F401
@@ -0,0 +1,89 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger, Integer, Numeric
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+
+def to_money(value: Any) -> Decimal:
+    """
+    Convert an amount to a Decimal rounded to cents, halves away from zero.
+
+    Floats are converted through their shortest representation, so ``100.1``
+    becomes ``Decimal("100.10")`` rather than its binary approximation.
+    """
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class Money(TypeDecorator):
+    """
+    Amount of money stored as a whole number of minor units (cents) in a BIGINT.
+
+    Values are Decimals with two decimal places; floats, ints and strings are
+    accepted and rounded with ``to_money``. SUM over the column is an exact
+    integer sum on every backend.
+
+    In SQL expressions amounts can be added to, subtracted from and compared
+    with other amounts, and multiplied or floor divided (``//``) by plain
+    numbers, which are not scaled.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    class Comparator(TypeDecorator.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            if op in (operators.add, operators.sub, operators.neg):
+                return op, self.type
+            if op in (operators.mul, operators.floordiv) and not isinstance(other_comparator.type, Money):
+                return op, self.type
+            return op, Numeric()
+
+    comparator_factory = Comparator
+
+    def coerce_compared_value(self, op, value):
+        if op in (operators.mul, operators.truediv, operators.floordiv):
+            return Integer() if isinstance(value, int) else Numeric()
+        return self
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return int(to_money(value).scaleb(2))
+
+    def process_result_value(self, value: Any, dialect) -> Optional[Decimal]:
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-2)
+
+
+class MoneyAmount(Decimal):
+    """
+    Pydantic field type for an amount of money: a number with at most two
+    decimal places, validated to a Decimal.
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="number", multipleOf=0.01)
+
+    @classmethod
+    def validate(cls, value: Any) -> Decimal:
+        if isinstance(value, bool) or not isinstance(value, (int, float, str, Decimal)):
+            raise TypeError("amount must be a number")
+        try:
+            amount = Decimal(repr(value) if isinstance(value, float) else value)
+            money = amount.quantize(CENT, rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError("amount must be a finite number")
+        if money != amount:
+            raise ValueError("amount has more than two decimal places")
+        return money
@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+"""
+Script to run the College Management System batch jobs.
+
+Example:
+    python jobs.py migrate --check
+    python jobs.py migrate --backfill applicant-keys-admissions
+    python jobs.py partitions --years-ahead 2
+    python jobs.py archive --academic-year 2019-2020
+    python jobs.py analytics-export
+    python jobs.py publish-changes --prune
+    TEMPLATE_BYTECODE_CACHE_DIR=.template-cache python jobs.py compile-templates
+    python jobs.py build-assets
+    python jobs.py fee-reminders --date 2024-03-31
+    python jobs.py billing-run --academic-year 2024-2025 --term Fall --due-date 2024-08-15 --dry-run
+    python jobs.py reconcile statement.csv
+    python jobs.py ledger-snapshot --as-of 2024-03-31
+    python jobs.py duplicate-clusters --min-score 0.85
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import date, datetime
+
+# Add the parent directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from school_management_system.config import settings
+from school_management_system.database.base import Base
+from school_management_system.database.init_db import create_initial_superuser, create_schema
+from school_management_system.database.migrations import long_running_transactions, plan_migrations
+from school_management_system.database.partitioning import (
+    ensure_partitions, parse_academic_year, partitioned_tables,
+)
+from school_management_system.database.session import AsyncSessionLocal, get_engine_for_init
+from school_management_system.models import (  # noqa: F401 - register all tables on Base.metadata
+    user, student, admission, subject, timetable, exam, payment, report, job, reconciliation, ledger, query, change,
+)
+from school_management_system.models.reconciliation import StatementFormat
+from school_management_system.models.student import AcademicYear, EngineeringBranch
+from school_management_system.services.admission_service import convert_admissions, rebuild_status_counts
+from school_management_system.services.analytics_service import ANALYTICS_TABLES, export_analytics
+from school_management_system.services.archive_service import archive_academic_year
+from school_management_system.services.backfill_service import BACKFILLS, run_backfill
+from school_management_system.services.billing_service import run_billing
+from school_management_system.services.change_service import ChangePublisher, prune_changes
+from school_management_system.services.duplicate_service import cluster_applicants
+from school_management_system.services.fee_reminder_service import run_fee_reminder_job
+from school_management_system.services.ledger_service import backfill_ledger, take_snapshot
+from school_management_system.services.reconciliation_service import reconcile_statement
+from school_management_system.utils.statements import detect_format
+from school_management_system.web.assets import STATIC_DIR, build_assets
+from school_management_system.web.rendering import TEMPLATES_DIR, PageTemplates
+
+
+async def migrate_check() -> dict:
+    engine = get_engine_for_init()
+    async with engine.connect() as conn:
+        steps = await conn.run_sync(plan_migrations, engine.dialect.name == "postgresql")
+        transactions = await conn.run_sync(long_running_transactions)
+    print(f"  {'table':<28} {'lock':<24} {'blocks':<17} {'rows':>12}  step")
+    for step in steps:
+        blocks = step.blocks if step.scales_with_rows or step.blocks == "nothing" else f"{step.blocks} (brief)"
+        print(f"  {step.table:<28} {step.lock:<24} {blocks:<17} {step.rows:>12,}  {step.action}")
+    for transaction in transactions:
+        print(f"Transaction {transaction['pid']} open for {transaction['seconds']}s ({transaction['state']}): "
+              f"{transaction['query']}; migration locks wait for it")
+    blocking = [step for step in steps if step.blocking and step.rows > settings.MIGRATION_MAX_BLOCKING_ROWS]
+    if blocking:
+        print(f"{len(blocking)} steps block large tables and need --force")
+    invalid = [step for step in steps if step.invalid]
+    if invalid:
+        raise ValueError(f"{len(invalid)} steps cannot run: " + "; ".join(
+            f"{step.action} to {step.table} ({step.invalid})" for step in invalid
+        ))
+    return {"steps": len(steps), "blocking_steps": len(blocking), "long_transactions": len(transactions)}
+
+
+async def migrate(args) -> dict:
+    if args.check:
+        return await migrate_check()
+    steps = await create_schema(force=args.force)
+    await create_initial_superuser()
+    summary = {"steps": len(steps), "tables": len(Base.metadata.tables)}
+    for name in args.backfill or []:
+        async with AsyncSessionLocal() as db:
+            result = await run_backfill(db, BACKFILLS[name], args.batch_size, args.pause)
+        summary[name] = result["rows"]
+    return summary
+
+
+async def partitions(args) -> dict:
+    engine = get_engine_for_init()
+    async with engine.begin() as conn:
+        created = await conn.run_sync(ensure_partitions, args.years_ahead)
+    for name in created:
+        print(f"Created partition {name}")
+    return {"created": len(created)}
+
+
+async def archive(args) -> dict:
+    engine = get_engine_for_init()
+    start_year = parse_academic_year(args.academic_year)
+    summary = {}
+    for table_name in args.tables or [table.name for table in partitioned_tables()]:
+        result = await archive_academic_year(engine, table_name, start_year, args.batch_size)
+        summary[f"{table_name} rows"] = result["rows"]
+        summary[f"{table_name} bytes"] = result["bytes"]
+    return summary
+
+
+async def analytics_export(args) -> dict:
+    return await export_analytics(args.tables, args.batch_size)
+
+
+async def publish_changes(args) -> dict:
+    publisher = ChangePublisher(AsyncSessionLocal, batch_size=args.batch_size)
+    try:
+        summary = {"published": await publisher.publish_pending()}
+    finally:
+        await publisher.broker.close()
+    if args.prune:
+        async with AsyncSessionLocal() as db:
+            summary["pruned"] = await prune_changes(db)
+    return summary
+
+
+async def compile_templates(args) -> dict:
+    if not settings.TEMPLATE_BYTECODE_CACHE_DIR:
+        raise ValueError("Set TEMPLATE_BYTECODE_CACHE_DIR to the directory compiled templates are kept in")
+    templates = PageTemplates(TEMPLATES_DIR, bytecode_cache_dir=settings.TEMPLATE_BYTECODE_CACHE_DIR)
+    return {"templates": templates.precompile()}
+
+
+async def build_static_assets(args) -> dict:
+    return build_assets(STATIC_DIR, settings.ASSET_BUILD_DIR)
+
+
+async def fee_reminders(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await run_fee_reminder_job(db, today=args.date, batch_size=args.batch_size)
+
+
+async def billing_run(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        summary = await run_billing(
+            db,
+            academic_year=args.academic_year,
+            term=args.term,
+            due_date=args.due_date,
+            grade_levels=[AcademicYear[name] for name in args.grade_levels] if args.grade_levels else None,
+            fee_structure_ids=args.fee_structure_ids,
+            terms_per_year=args.terms_per_year,
+            dry_run=args.dry_run,
+        )
+    print(json.dumps(summary, indent=2, default=str))
+    counts = {}
+    for entry in summary["grades"].values():
+        for key in ("created", "to_create", "already_billed", "changed"):
+            if key in entry:
+                counts[key] = counts.get(key, 0) + entry[key]
+    return counts
+
+
+async def reconcile(args) -> dict:
+    with open(args.file, encoding="utf-8-sig", errors="replace", newline="") as f:
+        statement_format = StatementFormat[args.format] if args.format else detect_format(args.file, f.read(4096))
+        f.seek(0)
+        async with AsyncSessionLocal() as db:
+            statement_import = await reconcile_statement(
+                db, f, statement_format, filename=os.path.basename(args.file), batch_size=args.batch_size
+            )
+    return {
+        "statement_import": statement_import.id,
+        "entries": statement_import.entries,
+        "matched": statement_import.matched,
+        "duplicates": statement_import.duplicates,
+        "debits": statement_import.debits,
+        "exceptions": statement_import.exceptions,
+    }
+
+
+async def ledger_backfill(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await backfill_ledger(db, batch_size=args.batch_size)
+
+
+async def ledger_snapshot(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        snapshot = await take_snapshot(db, datetime.combine(args.as_of, datetime.max.time()))
+    print(f"Snapshot as of {snapshot['as_of']} covers events up to id {snapshot['last_event_id']}")
+    return {
+        "records": snapshot["records"],
+        "tail_events": snapshot["tail_events"],
+        "late_events": snapshot["late_events"],
+    }
+
+
+async def admission_counts(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        summary = await rebuild_status_counts(db)
+    drift = {name: count - summary["previous"][name] for name, count in summary["counts"].items()}
+    print(f"Corrected counts: {', '.join(f'{name} {delta:+d}' for name, delta in drift.items() if delta) or 'none'}")
+    return summary["counts"]
+
+
+async def admission_conversion(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        summary = await convert_admissions(
+            db,
+            enrollment_date=args.enrollment_date,
+            default_branch=EngineeringBranch[args.branch] if args.branch else None,
+            subject_ids=args.subject_ids,
+            chunk_size=args.chunk_size,
+        )
+    for skipped in summary.pop("skipped_sample"):
+        print(f"Skipped admission {skipped['admission_id']}: {skipped['reason']}")
+    return summary
+
+
+async def duplicate_clusters(args) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await cluster_applicants(db, min_score=args.min_score, max_block_size=args.max_block_size)
+
+
+JOBS = {
+    "migrate": migrate,
+    "partitions": partitions,
+    "archive": archive,
+    "analytics-export": analytics_export,
+    "publish-changes": publish_changes,
+    "compile-templates": compile_templates,
+    "build-assets": build_static_assets,
+    "fee-reminders": fee_reminders,
+    "billing-run": billing_run,
+    "reconcile": reconcile,
+    "ledger-backfill": ledger_backfill,
+    "ledger-snapshot": ledger_snapshot,
+    "admission-counts": admission_counts,
+    "admission-conversion": admission_conversion,
+    "duplicate-clusters": duplicate_clusters,
+}
+
+
+# Jobs that do not use the database
+OFFLINE_JOBS = {"compile-templates", "build-assets"}
+
+
+async def run_job(args) -> dict:
+    # Databases created before a job was added lack its checkpoint table
+    if args.job != "migrate" and args.job not in OFFLINE_JOBS:
+        await create_schema()
+    return await JOBS[args.job](args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run College Management System batch jobs')
+    subparsers = parser.add_subparsers(dest='job', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help='Create and migrate the database schema and the initial superuser')
+    migrate_parser.add_argument('--check', action='store_true',
+                                help='Only list the pending steps with their locks and long-running transactions')
+    migrate_parser.add_argument('--force', action='store_true',
+                                help='Apply steps that block writes to large tables (maintenance window)')
+    migrate_parser.add_argument('--backfill', nargs='+', choices=sorted(BACKFILLS),
+                                help='Backfills to run after the schema is migrated')
+    migrate_parser.add_argument('--batch-size', type=int, help='Ids per backfill transaction')
+    migrate_parser.add_argument('--pause', type=float, help='Seconds between backfill transactions')
+
+    partitions_parser = subparsers.add_parser('partitions', help='Create the partitions of the coming academic years')
+    partitions_parser.add_argument('--years-ahead', type=int, default=settings.PARTITION_YEARS_AHEAD,
+                                   help='Academic years after the current one to create partitions for')
+
+    archive_parser = subparsers.add_parser('archive', help='Move an academic year of partitioned tables to Parquet files')
+    archive_parser.add_argument('--academic-year', required=True, help='Academic year archived, e.g. 2019-2020')
+    archive_parser.add_argument('--tables', nargs='+', choices=sorted(table.name for table in partitioned_tables()),
+                                help='Tables archived (default: attendance, payments and exam results)')
+    archive_parser.add_argument('--batch-size', type=int, default=50000, help='Rows read and deleted at a time')
+
+    analytics = subparsers.add_parser('analytics-export', help='Copy changed rows to the analytics store')
+    analytics.add_argument('--tables', nargs='+', choices=list(ANALYTICS_TABLES),
+                           help='Tables exported (default: all)')
+    analytics.add_argument('--batch-size', type=int, default=50000, help='Rows fetched and written at a time')
+
+    changes = subparsers.add_parser('publish-changes', help='Publish captured changes to the change broker')
+    changes.add_argument('--batch-size', type=int, default=500, help='Changes published at a time')
+    changes.add_argument('--prune', action='store_true',
+                         help='Delete published changes older than CHANGE_RETENTION_DAYS')
+
+    subparsers.add_parser('compile-templates', help='Compile the web templates into TEMPLATE_BYTECODE_CACHE_DIR')
+
+    subparsers.add_parser('build-assets', help='Fingerprint and precompress the static assets into ASSET_BUILD_DIR')
+
+    reminders = subparsers.add_parser('fee-reminders', help='Remind parents of overdue fees and mark them overdue')
+    reminders.add_argument('--date', type=date.fromisoformat, default=date.today(),
+                           help='Reference date (YYYY-MM-DD); fees due before it are overdue (default: today)')
+    reminders.add_argument('--batch-size', type=int, default=2000, help='Parents processed per transaction')
+
+    billing = subparsers.add_parser('billing-run', help='Create fee records for all students from the fee structures')
+    billing.add_argument('--academic-year', required=True, help='Academic year billed, e.g. 2024-2025')
+    billing.add_argument('--term', required=True, help='Term billed, e.g. Fall')
+    billing.add_argument('--due-date', type=date.fromisoformat, required=True, help='Due date (YYYY-MM-DD)')
+    billing.add_argument('--grade-levels', nargs='+', choices=[g.name for g in AcademicYear],
+                         help='Grade levels to bill (default: all)')
+    billing.add_argument('--fee-structure-ids', nargs='+', type=int, help='Restrict the fee structures considered')
+    billing.add_argument('--terms-per-year', type=int, default=1, help='Terms the annual charge is split over')
+    billing.add_argument('--dry-run', action='store_true', help='Show what would be billed without writing')
+
+    reconcile_parser = subparsers.add_parser('reconcile', help='Match a bank statement to fee records and post payments')
+    reconcile_parser.add_argument('file', help='Statement file (CSV, OFX or MT940)')
+    reconcile_parser.add_argument('--format', choices=[f.name for f in StatementFormat],
+                                  help='Statement format (default: detected from the file)')
+    reconcile_parser.add_argument('--batch-size', type=int, default=5000, help='Entries posted per transaction')
+
+    backfill = subparsers.add_parser('ledger-backfill', help='Write ledger events for fee records that have none')
+    backfill.add_argument('--batch-size', type=int, default=5000, help='Fee records per transaction')
+
+    snapshot = subparsers.add_parser('ledger-snapshot', help='Snapshot fee record balances for as-of queries')
+    snapshot.add_argument('--as-of', type=date.fromisoformat, default=date.today(),
+                          help='Day (YYYY-MM-DD) whose closing balances are snapshotted (default: today)')
+
+    subparsers.add_parser('admission-counts', help='Recount the admissions per status')
+
+    conversion = subparsers.add_parser('admission-conversion', help='Turn approved admissions into students')
+    conversion.add_argument('--enrollment-date', type=date.fromisoformat, required=True,
+                            help='Enrollment date (YYYY-MM-DD); its year is part of the USNs')
+    conversion.add_argument('--branch', choices=[b.name for b in EngineeringBranch],
+                            help='Branch of admissions that do not name one')
+    conversion.add_argument('--subject-ids', nargs='+', type=int,
+                            help='Subjects to enroll in (default: those of the branch and year\'s students)')
+    conversion.add_argument('--chunk-size', type=int, default=1000, help='Admissions converted per transaction')
+
+    duplicates = subparsers.add_parser('duplicate-clusters', help='Cluster applicants that are likely the same person')
+    duplicates.add_argument('--min-score', type=float, default=0.8, help='Lowest score that links two records')
+    duplicates.add_argument('--max-block-size', type=int, default=200,
+                            help='Skip blocking keys shared by more records than this')
+
+    args = parser.parse_args()
+
+    if settings.USE_SQLITE_MEMORY and args.job not in OFFLINE_JOBS:
+        print("Error: jobs cannot run against the in-memory database; set USE_SQLITE_MEMORY=False")
+        return 1
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    start_time = time.time()
+    try:
+        result = asyncio.run(run_job(args))
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+    elapsed_time = time.time() - start_time
+
+    print("=" * 60)
+    for key, value in result.items():
+        print(f"  {key:<20} {value:>12,}")
+    print(f"Job {args.job} finished in {elapsed_time:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
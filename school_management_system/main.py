@@ -1,36 +1,25 @@
+import asyncio
 import os
 import sys
-import uvicorn
 import logging
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 from sqlalchemy.future import select
 
-# Apply bcrypt patch before importing any other modules
-from school_management_system.utils.bcrypt_patch import apply_patch
-apply_patch()
-
 from school_management_system.config import settings
-from school_management_system.api.endpoints import (
-    users,
-    students,
-    admissions,
-    subjects,
-    timetables,
-    exams,
-    payments,
-    reports,
-)
-from school_management_system.web.routes import router as web_router
+from school_management_system.api.compression import CompressionMiddleware
+from school_management_system.api.lazy_routers import LazyRouterMiddleware, LazyRouters
 from school_management_system.database.init_db import init_db
-from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.database.session import AsyncSessionLocal, session_router
+from school_management_system.database.routing import READ_METHODS
 from school_management_system.models.user import User
+from school_management_system.web.assets import AssetFiles, asset_manifest
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 # Set up CORS
@@ -44,54 +33,105 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses in the encoding the client prefers
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
 # Get the base directory for the application
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Mount static files - use absolute paths for Vercel compatibility
 static_dir = os.path.join(BASE_DIR, "school_management_system", "web", "static")
 if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.mount("/static", AssetFiles(directory=static_dir, manifest=asset_manifest), name="static")
 else:
     # Fallback for development environment
-    app.mount("/static", StaticFiles(directory="web/static"), name="static")
+    app.mount("/static", AssetFiles(directory="web/static", manifest=asset_manifest), name="static")
 
-# Set up templates - use absolute paths for Vercel compatibility
-templates_dir = os.path.join(BASE_DIR, "school_management_system", "web", "templates")
-if os.path.exists(templates_dir):
-    templates = Jinja2Templates(directory=templates_dir)
-else:
-    # Fallback for development environment
-    templates = Jinja2Templates(directory="web/templates")
+def use_templates(web_routes) -> None:
+    """Make the templates available to the web routes."""
+    from school_management_system.web.rendering import create_templates
+    # Set up templates - use absolute paths for Vercel compatibility
+    templates_dir = os.path.join(BASE_DIR, "school_management_system", "web", "templates")
+    if os.path.exists(templates_dir):
+        web_routes.templates = create_templates(templates_dir)
+    else:
+        # Fallback for development environment
+        web_routes.templates = create_templates("web/templates")
 
-# Make templates available to routes
-import school_management_system.web.routes
-school_management_system.web.routes.templates = templates
+# API routers, by module and path prefix
+routers = LazyRouters(app)
+for name in (
+    "users",
+    "students",
+    "admissions",
+    "subjects",
+    "timetables",
+    "exams",
+    "payments",
+    "reports",
+    "reconciliation",
+    "query",
+    "analytics",
+    "cohorts",
+    "changes",
+    "live",
+):
+    routers.add(f"school_management_system.api.endpoints.{name}", prefix=f"{settings.API_V1_STR}/{name}", tags=[name])
 
-# Include API routers
-app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
-app.include_router(students.router, prefix=f"{settings.API_V1_STR}/students", tags=["students"])
-app.include_router(admissions.router, prefix=f"{settings.API_V1_STR}/admissions", tags=["admissions"])
-app.include_router(subjects.router, prefix=f"{settings.API_V1_STR}/subjects", tags=["subjects"])
-app.include_router(timetables.router, prefix=f"{settings.API_V1_STR}/timetables", tags=["timetables"])
-app.include_router(exams.router, prefix=f"{settings.API_V1_STR}/exams", tags=["exams"])
-app.include_router(payments.router, prefix=f"{settings.API_V1_STR}/payments", tags=["payments"])
-app.include_router(reports.router, prefix=f"{settings.API_V1_STR}/reports", tags=["reports"])
+# Web routes
+routers.add("school_management_system.web.routes", setup=use_templates)
 
-# Include web routes
-app.include_router(web_router)
+# In fast start mode routers are imported by the first request that needs them
+if settings.FAST_START:
+    app.add_middleware(LazyRouterMiddleware, routers=routers)
+else:
+    routers.include_all()
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the database on startup."""
     try:
-        await init_db()
+        if settings.FAST_START and not settings.USE_SQLITE_MEMORY:
+            # The schema is created by the migration step (python jobs.py migrate)
+            logging.info("Fast start: skipping database initialization")
+        else:
+            await init_db()
     except Exception as e:
-        import logging
         logging.error(f"Error initializing database: {e}")
         # In serverless environments, we don't want to crash the application
         # if database initialization fails, as it might be a temporary issue
         # that will resolve on the next request
         pass
+    
+    if settings.NOTIFICATION_WORKER_ENABLED:
+        from school_management_system.services.notification_service import NotificationDispatcher
+        app.state.notification_stop = asyncio.Event()
+        app.state.notification_task = asyncio.create_task(
+            NotificationDispatcher(AsyncSessionLocal).run(app.state.notification_stop)
+        )
+    
+    if settings.CHANGE_PUBLISHER_ENABLED:
+        from school_management_system.services.change_service import ChangePublisher
+        app.state.change_stop = asyncio.Event()
+        app.state.change_task = asyncio.create_task(ChangePublisher(AsyncSessionLocal).run(app.state.change_stop))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers."""
+    if getattr(app.state, "notification_task", None):
+        app.state.notification_stop.set()
+        await app.state.notification_task
+    if getattr(app.state, "change_task", None):
+        app.state.change_stop.set()
+        await app.state.change_task
+    
+    from school_management_system.services.document_service import shutdown_thumbnail_pool
+    shutdown_thumbnail_pool()
 
 # For Vercel serverless, we need to ensure the database is initialized
 # This middleware will check if the database is initialized on each request
@@ -102,7 +142,7 @@ async def db_session_middleware(request, call_next):
     is_serverless = os.environ.get("SERVERLESS") is not None
     
     # Initialize database if needed
-    if (is_render or is_serverless):
+    if (is_render or is_serverless) and not settings.FAST_START:
         try:
             # Quick check to see if the database is initialized
             # We'll just try to get the first user
@@ -126,10 +166,20 @@ async def db_session_middleware(request, call_next):
     response = await call_next(request)
     return response
 
+# After a successful write, pin the client to the primary database for a short
+# window so its next reads do not hit a replica that has not caught up yet
+@app.middleware("http")
+async def read_your_writes_middleware(request, call_next):
+    response = await call_next(request)
+    if session_router.has_replicas and request.method not in READ_METHODS and response.status_code < 400:
+        session_router.mark_write(response)
+    return response
+
 @app.get("/api")
 async def api_root():
     """API root endpoint."""
     return {"message": "Welcome to the College Management System API"}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("school_management_system.main:app", host="0.0.0.0", port=8000, reload=True)
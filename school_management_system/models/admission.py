@@ -1,10 +1,13 @@
+from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, Enum, Text, DateTime
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, ForeignKey, Date, Enum, Float, Text, DateTime, Index, delete, event, insert, inspect, update
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
 from school_management_system.database.base import Base
+from school_management_system.models.student import EngineeringBranch, Student
+from school_management_system.utils.matching import blocking_keys, person_record
 
 
 class AdmissionStatus(enum.Enum):
@@ -30,6 +33,7 @@ class Admission(Base):
     application_date = Column(Date, nullable=False, default=func.current_date())
     status = Column(Enum(AdmissionStatus), nullable=False, default=AdmissionStatus.PENDING)
     desired_grade_level = Column(String, nullable=False)
+    desired_branch = Column(Enum(EngineeringBranch), nullable=True)
     previous_school = Column(String, nullable=True)
     previous_grade_level = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
@@ -50,8 +54,13 @@ class Admission(Base):
     parent_address = Column(String, nullable=True)
     relationship_to_applicant = Column(String, nullable=False)
     
+    # Review queue
+    status_changed_at = Column(DateTime, nullable=True, default=func.now())
+    claimed_by = Column(String, nullable=True)  # Reviewer holding the application
+    claimed_until = Column(DateTime, nullable=True)  # End of the reviewer's lease
+    
     # Foreign keys
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=True, index=True)
     
     # Relationships
     student = relationship("Student", back_populates="admission")
@@ -59,6 +68,195 @@ class Admission(Base):
     interviews = relationship("AdmissionInterview", back_populates="admission")
     communications = relationship("AdmissionCommunication", back_populates="admission")
 
+    __table_args__ = (
+        # Per-status work queues are read in id order
+        Index("ix_admissions_queue", "status", "id"),
+    )
+
+
+class AdmissionStatusChange(Base):
+    """
+    AdmissionStatusChange model for the audit trail of admission status changes.
+
+    ``admission_id`` has no foreign key, so the trail outlives deleted
+    applications.
+    """
+    __tablename__ = "admission_status_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    admission_id = Column(Integer, nullable=False, index=True)
+    from_status = Column(Enum(AdmissionStatus), nullable=True)  # NULL for new applications
+    to_status = Column(Enum(AdmissionStatus), nullable=True)  # NULL for deleted applications
+    changed_at = Column(DateTime, nullable=False, default=func.now())
+    changed_by = Column(String, nullable=True)
+    note = Column(Text, nullable=True)
+
+
+class AdmissionStatusCount(Base):
+    """
+    AdmissionStatusCount model for the number of admissions in each status.
+
+    The counts are maintained with every status change, so queue sizes are
+    read without counting the admissions table.
+    """
+    __tablename__ = "admission_status_counts"
+
+    status = Column(Enum(AdmissionStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+def adjust_status_counts(connection, deltas) -> None:
+    """
+    Add ``deltas`` (a mapping of status to change) to the status counts.
+    """
+    table = AdmissionStatusCount.__table__
+    for admission_status, delta in deltas.items():
+        if admission_status is None or not delta:
+            continue
+        result = connection.execute(
+            update(table).where(table.c.status == admission_status).values(count=table.c.count + delta)
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(status=admission_status, count=delta))
+
+
+# Admissions changed one at a time through the ORM keep the counts and the
+# audit trail up to date here; bulk transitions do so themselves
+@event.listens_for(Admission, "after_insert")
+def _count_new_admission(mapper, connection, target):
+    adjust_status_counts(connection, {target.status: 1})
+    connection.execute(insert(AdmissionStatusChange.__table__).values(
+        admission_id=target.id, from_status=None, to_status=target.status, changed_at=datetime.utcnow()
+    ))
+
+
+@event.listens_for(Admission, "before_update")
+def _stamp_status_change(mapper, connection, target):
+    if inspect(target).attrs.status.history.has_changes():
+        target.status_changed_at = datetime.utcnow()
+        target.claimed_by = None
+        target.claimed_until = None
+
+
+@event.listens_for(Admission, "after_update")
+def _count_status_change(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.has_changes() or not history.deleted:
+        return
+    previous = history.deleted[0]
+    if previous == target.status:
+        return
+    adjust_status_counts(connection, {previous: -1, target.status: 1})
+    connection.execute(insert(AdmissionStatusChange.__table__).values(
+        admission_id=target.id, from_status=previous, to_status=target.status, changed_at=datetime.utcnow()
+    ))
+
+
+@event.listens_for(Admission, "after_delete")
+def _count_deleted_admission(mapper, connection, target):
+    adjust_status_counts(connection, {target.status: -1})
+    connection.execute(insert(AdmissionStatusChange.__table__).values(
+        admission_id=target.id, from_status=target.status, to_status=None, changed_at=datetime.utcnow()
+    ))
+
+
+class ApplicantRecordType(enum.Enum):
+    ADMISSION = "admission"
+    STUDENT = "student"
+
+
+class ApplicantKey(Base):
+    """
+    ApplicantKey model for the blocking keys of applicants and students.
+
+    Records sharing a key are candidate duplicates (see ``utils.matching``).
+    """
+    __tablename__ = "applicant_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    record_type = Column(Enum(ApplicantRecordType), nullable=False)
+    record_id = Column(Integer, nullable=False)  # Admission or student id
+    key_type = Column(String, nullable=False)  # last_name_dob, phone, email, ...
+    key = Column(String, nullable=False)
+
+    __table_args__ = (
+        # Candidates are looked up by key; the record columns make it covering
+        Index("ix_applicant_keys_key", "key", "record_type", "record_id"),
+        Index("ix_applicant_keys_record", "record_type", "record_id"),
+    )
+
+
+class ApplicantMatch(Base):
+    """
+    ApplicantMatch model for the duplicate clusters found by the clustering job.
+
+    Each row links an application to a record of the same cluster it scored
+    against; ``cluster_id`` is the lowest application id of the cluster.
+    """
+    __tablename__ = "applicant_matches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cluster_id = Column(Integer, nullable=False, index=True)
+    admission_id = Column(Integer, nullable=False, index=True)
+    match_type = Column(Enum(ApplicantRecordType), nullable=False)
+    match_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime, nullable=False, default=func.now())
+
+
+# Fields the blocking keys are derived from
+APPLICANT_KEY_FIELDS = ("first_name", "last_name", "date_of_birth", "phone_number", "email")
+
+
+def applicant_key_rows(record_type: ApplicantRecordType, records) -> List[dict]:
+    """
+    The ``applicant_keys`` rows of admissions or students (any objects with
+    ``id`` and the APPLICANT_KEY_FIELDS attributes).
+    """
+    rows = []
+    for record in records:
+        person = person_record(
+            record.first_name, record.last_name, record.date_of_birth, record.phone_number, record.email
+        )
+        for key_type, key in blocking_keys(person):
+            rows.append({"record_type": record_type, "record_id": record.id, "key_type": key_type, "key": key})
+    return rows
+
+
+def _replace_applicant_keys(connection, record_type: ApplicantRecordType, target, insert_new: bool = True) -> None:
+    table = ApplicantKey.__table__
+    connection.execute(
+        delete(table).where(table.c.record_type == record_type, table.c.record_id == target.id)
+    )
+    rows = applicant_key_rows(record_type, [target]) if insert_new else []
+    if rows:
+        connection.execute(insert(table), rows)
+
+
+def _index_applicant_events(model, record_type: ApplicantRecordType) -> None:
+    # Records added or changed one at a time through the ORM keep their keys
+    # up to date here; bulk inserts index their rows themselves, and the
+    # clustering job indexes any record that is still missing keys
+    @event.listens_for(model, "after_insert")
+    def _index_new_record(mapper, connection, target):
+        rows = applicant_key_rows(record_type, [target])
+        if rows:
+            connection.execute(insert(ApplicantKey.__table__), rows)
+
+    @event.listens_for(model, "after_update")
+    def _reindex_record(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in APPLICANT_KEY_FIELDS):
+            _replace_applicant_keys(connection, record_type, target)
+
+    @event.listens_for(model, "after_delete")
+    def _unindex_record(mapper, connection, target):
+        _replace_applicant_keys(connection, record_type, target, insert_new=False)
+
+
+_index_applicant_events(Admission, ApplicantRecordType.ADMISSION)
+_index_applicant_events(Student, ApplicantRecordType.STUDENT)
+
 
 class AdmissionDocument(Base):
     """
@@ -68,12 +266,16 @@ class AdmissionDocument(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     document_type = Column(String, nullable=False)  # Birth Certificate, Previous School Records, etc.
-    document_path = Column(String, nullable=False)  # Path to the stored document
+    document_path = Column(String, nullable=False)  # Path to the stored document; the storage key of uploads
     upload_date = Column(Date, nullable=False, default=func.current_date())
     is_verified = Column(Boolean, default=False)
     verification_date = Column(Date, nullable=True)
     notes = Column(Text, nullable=True)
     
+    # Uploaded file
+    content_sha256 = Column(String(64), nullable=True, index=True)
+    original_filename = Column(String, nullable=True)
+    
     # Foreign keys
     admission_id = Column(Integer, ForeignKey("admissions.id"), nullable=False)
     
@@ -81,6 +283,20 @@ class AdmissionDocument(Base):
     admission = relationship("Admission", back_populates="documents")
 
 
+class DocumentBlob(Base):
+    """
+    DocumentBlob model for a stored file, shared by every document with the same content.
+    """
+    __tablename__ = "document_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=True)  # As sent with the first upload
+    storage_key = Column(String, nullable=False)
+    thumbnail_key = Column(String, nullable=True)  # Set once a preview has been generated
+    created_at = Column(DateTime, nullable=False, default=func.now())
+
+
 class AdmissionInterview(Base):
     """
     AdmissionInterview model for tracking interviews conducted during admission.
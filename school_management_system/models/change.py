@@ -0,0 +1,129 @@
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String, Text, event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from school_management_system.config import settings
+from school_management_system.database.base import Base
+
+
+class ChangeOperation(enum.Enum):
+    """
+    Enum for captured change operations.
+    """
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class ChangeEvent(Base):
+    """
+    ChangeEvent model for the outbox of captured row changes.
+
+    Rows are written in the transaction that made the change, so a change
+    is captured exactly when it commits. The publisher numbers them with a
+    sequence in the order it publishes them; consumers resume from the last
+    sequence they saw.
+    """
+    __tablename__ = "change_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sequence = Column(Integer, unique=True, nullable=True)  # Set when published
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=True)  # None for bulk statements, whose rows are unknown
+    operation = Column(Enum(ChangeOperation), nullable=False)
+    changes = Column(Text, nullable=True)  # JSON: new column values (all of them on insert)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    published_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The publisher takes unpublished events in the order they were written
+        Index(
+            "ix_change_events_unpublished", "id",
+            postgresql_where=sequence.is_(None), sqlite_where=sequence.is_(None),
+        ),
+    )
+
+
+# Capture. ORM changes are written at flush, bulk statements when they run;
+# both roll back with the transaction. Statements run on a connection rather
+# than a session are not captured.
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.name  # Stored by name, like in the database
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _json(values: Dict[str, Any]) -> str:
+    return json.dumps(values, default=_plain)
+
+
+def _captured(table_name: str) -> bool:
+    return table_name in settings.CHANGE_CAPTURE_TABLE_NAMES
+
+
+def _event(instance, operation: ChangeOperation) -> Dict[str, Any]:
+    state = inspect(instance)
+    mapper = state.mapper
+    changes = None
+    if operation is ChangeOperation.INSERT:
+        changes = {attr.key: _plain(getattr(instance, attr.key)) for attr in mapper.column_attrs}
+    elif operation is ChangeOperation.UPDATE:
+        changes = {
+            attr.key: _plain(getattr(instance, attr.key))
+            for attr in mapper.column_attrs
+            if state.attrs[attr.key].history.has_changes()
+        }
+    identity = mapper.primary_key_from_instance(instance)
+    return {
+        "table_name": mapper.local_table.name,
+        "row_id": identity[0] if len(identity) == 1 else None,
+        "operation": operation,
+        "changes": _json(changes) if changes is not None else None,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_flushed_changes(session, flush_context):
+    events: List[Dict[str, Any]] = []
+    for instances, operation in (
+        (session.new, ChangeOperation.INSERT),
+        (session.dirty, ChangeOperation.UPDATE),
+        (session.deleted, ChangeOperation.DELETE),
+    ):
+        for instance in instances:
+            if isinstance(instance, ChangeEvent) or not _captured(inspect(instance).mapper.local_table.name):
+                continue
+            if operation is ChangeOperation.UPDATE and not session.is_modified(instance, include_collections=False):
+                continue
+            events.append(_event(instance, operation))
+    if events:
+        session.connection().execute(ChangeEvent.__table__.insert(), events)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capture_bulk_changes(orm_execute_state):
+    if orm_execute_state.is_insert:
+        operation = ChangeOperation.INSERT
+    elif orm_execute_state.is_update:
+        operation = ChangeOperation.UPDATE
+    elif orm_execute_state.is_delete:
+        operation = ChangeOperation.DELETE
+    else:
+        return
+    table_name = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+    if table_name and _captured(table_name):
+        orm_execute_state.session.connection().execute(
+            ChangeEvent.__table__.insert(),
+            {"table_name": table_name, "row_id": None, "operation": operation, "changes": None},
+        )
@@ -1,9 +1,11 @@
 from typing import List, Optional
 from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Float, Table
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import enum
 
 from school_management_system.database.base import Base
+from school_management_system.database.partitioning import partitioned_by
 
 
 class ExamType(enum.Enum):
@@ -173,9 +175,11 @@ class ExamResult(Base):
     score = Column(Float, nullable=False)
     grade = Column(String, nullable=True)
     remarks = Column(Text, nullable=True)
+    exam_date = Column(Date, nullable=True)  # Date of the exam, the partition key; required on PostgreSQL
+    updated_at = Column(DateTime, nullable=True, default=func.now(), onupdate=func.now(), index=True)  # Analytics export watermark
     
     # Foreign keys
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
     exam_id = Column(Integer, ForeignKey("exams.id"), nullable=False)
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=False)
     
@@ -183,3 +187,5 @@ class ExamResult(Base):
     exam = relationship("Exam", back_populates="results")
     student = relationship("Student")
     subject = relationship("Subject")
+
+    __table_args__ = partitioned_by("exam_date")
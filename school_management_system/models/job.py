@@ -0,0 +1,17 @@
+from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from school_management_system.database.base import Base
+
+
+class JobCheckpoint(Base):
+    """
+    JobCheckpoint model for tracking progress of resumable batch jobs.
+    """
+    __tablename__ = "job_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)  # e.g. fee_reminders:2024-03-31
+    cursor = Column(String, nullable=True)  # Last processed key, job specific
+    is_complete = Column(Boolean, default=False)
+    updated_at = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
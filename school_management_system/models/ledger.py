@@ -0,0 +1,77 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index, UniqueConstraint, event
+from sqlalchemy.sql import func
+import enum
+
+from school_management_system.database.base import Base
+from school_management_system.database.types import Money
+
+
+class LedgerEventType(enum.Enum):
+    """
+    Enum for ledger event types.
+    """
+    CHARGE = "charge"
+    PAYMENT = "payment"
+    REFUND = "refund"
+    DISCOUNT = "discount"
+    REVERSAL = "reversal"
+
+
+class LedgerEvent(Base):
+    """
+    LedgerEvent model for the append-only log of money movements on fee records.
+
+    Rows are never updated or deleted; corrections are made by appending a
+    REVERSAL. The fee record and payment are referenced without foreign keys
+    so the log outlives rows deleted from those tables.
+    """
+    __tablename__ = "ledger_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fee_record_id = Column(Integer, nullable=False)
+    event_type = Column(Enum(LedgerEventType), nullable=False)
+    amount = Column(Money, nullable=False)  # As reported, always positive
+    charged_delta = Column(Money, nullable=False)  # Effect on the amount charged
+    paid_delta = Column(Money, nullable=False)  # Effect on the amount paid
+    occurred_at = Column(DateTime, nullable=False)  # Business time, used for as-of queries
+    recorded_at = Column(DateTime, nullable=False, default=func.now())
+    payment_id = Column(Integer, nullable=True, index=True)
+    reverses_event_id = Column(Integer, nullable=True)
+    description = Column(String, nullable=True)
+
+    __table_args__ = (
+        # As-of queries sum the deltas of a time range; the indexes cover them
+        Index("ix_ledger_events_record_occurred", "fee_record_id", "occurred_at", "charged_delta", "paid_delta"),
+        Index("ix_ledger_events_occurred", "occurred_at", "fee_record_id", "charged_delta", "paid_delta"),
+        Index("ix_ledger_events_record_id", "fee_record_id", "id"),
+    )
+
+
+@event.listens_for(LedgerEvent, "before_update")
+@event.listens_for(LedgerEvent, "before_delete")
+def _reject_ledger_changes(mapper, connection, target):
+    raise ValueError("Ledger events are append-only; append a reversal instead")
+
+
+class LedgerSnapshot(Base):
+    """
+    LedgerSnapshot model for fee record totals at a point in time.
+
+    A snapshot has one row per fee record changed since the previous snapshot
+    and one row with no fee record holding the totals over all fee records.
+    It covers the events that occurred at or before ``as_of`` with ids up to
+    the ``last_event_id`` of its totals row.
+    """
+    __tablename__ = "ledger_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fee_record_id = Column(Integer, nullable=True)  # NULL for the totals over all fee records
+    as_of = Column(DateTime, nullable=False)
+    last_event_id = Column(Integer, nullable=True)  # Set on the totals row
+    charged = Column(Money, nullable=False)
+    paid = Column(Money, nullable=False)
+
+    __table_args__ = (
+        # Also serves "latest snapshot of a record (or of the totals) before a time"
+        UniqueConstraint("fee_record_id", "as_of", name="uq_ledger_snapshots_record_as_of"),
+    )
@@ -1,10 +1,12 @@
 from typing import List, Optional
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Float, Table
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Table, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
 from school_management_system.database.base import Base
+from school_management_system.database.partitioning import partitioned_by
+from school_management_system.database.types import Money
 
 
 class PaymentStatus(enum.Enum):
@@ -77,7 +79,7 @@ class FeeItem(Base):
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     fee_type = Column(Enum(FeeType), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     due_date = Column(Date, nullable=True)
     is_mandatory = Column(Boolean, default=True)
     
@@ -97,11 +99,12 @@ class FeeRecord(Base):
     id = Column(Integer, primary_key=True, index=True)
     academic_year = Column(String, nullable=False)
     term = Column(String, nullable=False)
-    total_amount = Column(Float, nullable=False)
-    paid_amount = Column(Float, default=0.0)
-    balance = Column(Float, nullable=False)
+    total_amount = Column(Money, nullable=False)
+    paid_amount = Column(Money, default=0)
+    balance = Column(Money, nullable=False)
     status = Column(Enum(PaymentStatus), nullable=False, default=PaymentStatus.PENDING)
     due_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, nullable=True, default=func.now(), onupdate=func.now(), index=True)  # Analytics export watermark
     
     # Foreign keys
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -112,6 +115,15 @@ class FeeRecord(Base):
     fee_structure = relationship("FeeStructure")
     payments = relationship("Payment", back_populates="fee_record")
 
+    __table_args__ = (
+        # A student is billed at most once per term; also serves lookups by student
+        UniqueConstraint("student_id", "academic_year", "term", name="uq_fee_records_student_term"),
+        # Overdue scans filter on status and due date
+        Index("ix_fee_records_status_due_date", "status", "due_date"),
+        # Ledger events refer to fee records by id, so ids must never be reused
+        {"sqlite_autoincrement": True},
+    )
+
 
 class Payment(Base):
     """
@@ -120,19 +132,23 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     payment_date = Column(DateTime, nullable=False, default=func.now())
     payment_method = Column(Enum(PaymentMethod), nullable=False)
-    transaction_id = Column(String, nullable=True)
+    transaction_id = Column(String, nullable=True, index=True)
     receipt_number = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
+    updated_at = Column(DateTime, nullable=True, default=func.now(), onupdate=func.now(), index=True)  # Analytics export watermark
     
     # Foreign keys
-    fee_record_id = Column(Integer, ForeignKey("fee_records.id"), nullable=False)
+    fee_record_id = Column(Integer, ForeignKey("fee_records.id"), nullable=False, index=True)
     
     # Relationships
     fee_record = relationship("FeeRecord", back_populates="payments")
 
+    # Ledger events refer to payments by id, so ids must never be reused
+    __table_args__ = partitioned_by("payment_date", sqlite_autoincrement=True)
+
 
 class Discount(Base):
     """
@@ -144,7 +160,7 @@ class Discount(Base):
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     discount_type = Column(String, nullable=False)  # Percentage, Fixed Amount
-    discount_value = Column(Float, nullable=False)
+    discount_value = Column(Money, nullable=False)  # Percent, or an amount
     start_date = Column(Date, nullable=True)
     end_date = Column(Date, nullable=True)
     is_active = Column(Boolean, default=True)
@@ -166,7 +182,7 @@ class FinancialAid(Base):
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     aid_type = Column(String, nullable=False)  # Scholarship, Grant, Loan
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=True)
     is_active = Column(Boolean, default=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from school_management_system.database.base import Base
+
+
+class PersistedQuery(Base):
+    """
+    PersistedQuery model for query documents registered ahead of time, so
+    clients send the id instead of the document.
+    """
+    __tablename__ = "persisted_queries"
+
+    id = Column(String(64), primary_key=True)  # SHA-256 of the canonical document
+    name = Column(String, unique=True, nullable=True)  # e.g. fee-dashboard
+    document = Column(Text, nullable=False)  # Canonical JSON
+    created_at = Column(DateTime, nullable=False, default=func.now())
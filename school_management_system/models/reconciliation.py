@@ -0,0 +1,90 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+
+from school_management_system.database.base import Base
+from school_management_system.database.types import Money
+
+
+class StatementFormat(enum.Enum):
+    """
+    Enum for bank statement file formats.
+    """
+    CSV = "csv"
+    OFX = "ofx"
+    MT940 = "mt940"
+
+
+class ExceptionReason(enum.Enum):
+    """
+    Enum for reasons a statement entry could not be reconciled.
+    """
+    UNPARSEABLE = "unparseable"
+    NO_MATCH = "no_match"
+    AMBIGUOUS = "ambiguous"
+    OVERPAYMENT = "overpayment"
+
+
+class ExceptionStatus(enum.Enum):
+    """
+    Enum for the review status of an unreconciled entry.
+    """
+    OPEN = "open"
+    RESOLVED = "resolved"
+    DISMISSED = "dismissed"
+
+
+class StatementImport(Base):
+    """
+    StatementImport model for tracking imported bank statements.
+    """
+    __tablename__ = "statement_imports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String, nullable=True)
+    format = Column(Enum(StatementFormat), nullable=False)
+    status = Column(String, nullable=False, default="Processing")  # Processing, Completed, Failed
+    entries = Column(Integer, default=0)
+    matched = Column(Integer, default=0)
+    matched_amount = Column(Money, default=0)
+    duplicates = Column(Integer, default=0)
+    debits = Column(Integer, default=0)
+    exceptions = Column(Integer, default=0)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    unreconciled_entries = relationship("UnreconciledEntry", back_populates="statement_import")
+
+
+class UnreconciledEntry(Base):
+    """
+    UnreconciledEntry model for the queue of statement entries needing review.
+    """
+    __tablename__ = "reconciliation_exceptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    line_number = Column(Integer, nullable=False)
+    booking_date = Column(Date, nullable=True)
+    amount = Column(Money, nullable=True)
+    transaction_id = Column(String, nullable=True, index=True)  # Bank id, or a digest of the entry
+    reference = Column(String, nullable=True)
+    narration = Column(Text, nullable=True)
+    reason = Column(Enum(ExceptionReason), nullable=False)
+    detail = Column(String, nullable=True)
+    status = Column(Enum(ExceptionStatus), nullable=False, default=ExceptionStatus.OPEN)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    resolved_at = Column(DateTime, nullable=True)
+
+    # Foreign keys
+    statement_import_id = Column(Integer, ForeignKey("statement_imports.id"), nullable=False)
+    payment_id = Column(Integer, ForeignKey("payments.id"), nullable=True)
+
+    # Relationships
+    statement_import = relationship("StatementImport", back_populates="unreconciled_entries")
+    payment = relationship("Payment")
+
+    __table_args__ = (
+        Index("ix_reconciliation_exceptions_queue", "status", "id"),
+    )
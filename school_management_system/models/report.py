@@ -1,5 +1,5 @@
 from typing import List, Optional
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Float, Table
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Float, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -134,6 +134,16 @@ class StudentProgressReport(Base):
     student = relationship("Student")
 
 
+class NotificationStatus(str, enum.Enum):
+    """
+    Delivery states stored in Notification.status.
+    """
+    PENDING = "Pending"
+    SENDING = "Sending"
+    SENT = "Sent"
+    FAILED = "Failed"
+
+
 class NotificationTemplate(Base):
     """
     NotificationTemplate model for managing notification templates.
@@ -162,10 +172,17 @@ class Notification(Base):
     subject = Column(String, nullable=False)
     body = Column(Text, nullable=False)
     notification_type = Column(String, nullable=False)  # Email, SMS, In-app, etc.
-    status = Column(String, nullable=False)  # Pending, Sent, Failed, etc.
+    status = Column(String, nullable=False)  # Pending, Sending, Sent, Failed
     sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, nullable=False, default=func.now())
     
+    # Outbox delivery state
+    idempotency_key = Column(String, unique=True, index=True, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime, nullable=True)
+    locked_until = Column(DateTime, nullable=True)  # Lease held by the worker sending it
+    last_error = Column(Text, nullable=True)
+    
     # Foreign keys
     template_id = Column(Integer, ForeignKey("notification_templates.id"), nullable=True)
     recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -173,3 +190,7 @@ class Notification(Base):
     # Relationships
     template = relationship("NotificationTemplate", back_populates="notifications")
     recipient = relationship("User")
+
+    __table_args__ = (
+        Index("ix_notifications_outbox", "status", "next_attempt_at"),
+    )
@@ -1,9 +1,11 @@
 from typing import List, Optional
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, Table, Text, Float, Enum
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Date, DateTime, Table, Text, Float, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 import enum
 
 from school_management_system.database.base import Base
+from school_management_system.database.partitioning import partitioned_by
 
 # Association table for many-to-many relationship between students and subjects
 student_subject = Table(
@@ -67,9 +69,10 @@ class Student(Base):
     scholarship_details = Column(String, nullable=True)
     hostel_resident = Column(Boolean, default=False)
     hostel_room_number = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=True, default=func.now(), onupdate=func.now(), index=True)  # Analytics export watermark
 
     # Foreign keys
-    parent_id = Column(Integer, ForeignKey("parent_profiles.id"), nullable=True)
+    parent_id = Column(Integer, ForeignKey("parent_profiles.id"), nullable=True, index=True)
 
     # Relationships
     parent = relationship("ParentProfile", back_populates="students")
@@ -80,6 +83,22 @@ class Student(Base):
     admission = relationship("Admission", back_populates="student", uselist=False)
 
 
+class UsnSequence(Base):
+    """
+    UsnSequence model for the last USN number issued per branch and enrollment year.
+    """
+    __tablename__ = "usn_sequences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    branch = Column(Enum(EngineeringBranch), nullable=False)
+    enrollment_year = Column(Integer, nullable=False)
+    last_number = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("branch", "enrollment_year", name="uq_usn_sequences_branch_year"),
+    )
+
+
 class Attendance(Base):
     """
     Attendance model for tracking student attendance.
@@ -90,15 +109,18 @@ class Attendance(Base):
     date = Column(Date, nullable=False)
     status = Column(String, nullable=False)  # Present, Absent, Late, Excused
     remarks = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=True, default=func.now(), onupdate=func.now(), index=True)  # Analytics export watermark
     
     # Foreign keys
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=True)
     
     # Relationships
     student = relationship("Student", back_populates="attendance_records")
     subject = relationship("Subject", back_populates="attendance_records")
 
+    __table_args__ = partitioned_by("date")
+
 
 # ExamResult is now defined in exam.py
 
@@ -116,7 +138,7 @@ class StudentProgress(Base):
     action_items = Column(Text, nullable=True)
     
     # Foreign keys
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
     teacher_id = Column(Integer, ForeignKey("teacher_profiles.id"), nullable=False)
     
     # Relationships
@@ -10,10 +10,6 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-# Apply bcrypt patch before importing any other modules
-from school_management_system.utils.bcrypt_patch import apply_patch
-apply_patch()
-
 import uvicorn
 
 if __name__ == "__main__":
@@ -0,0 +1,540 @@
+"""
+Admissions pipeline: bulk status transitions and per-status review queues.
+
+A transition moves every matching application from one status to another
+with a single UPDATE ... RETURNING. The audit rows and the per-status
+counts are written in the same transaction, so an intake of thousands of
+applications is moved with a handful of statements.
+
+Reviewers work from per-status queues read in id order with keyset
+pagination. They claim applications in batches under a time-limited lease,
+like the notification dispatcher, so two reviewers never hold the same
+application and one that walked away releases it when the lease expires.
+
+Approved applications of an intake are converted into students a chunk at a
+time. Each chunk allocates its USNs from ``usn_sequences`` and bulk inserts
+the parent accounts, students and subject enrolments. It then links the
+applications to their students with one UPDATE and marks them ENROLLED, all
+in one transaction. Converted applications leave the APPROVED queue, so a
+rerun after a failure resumes with the first unconverted chunk.
+"""
+import logging
+import secrets
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.models.admission import (
+    Admission, AdmissionStatus, AdmissionStatusChange, AdmissionStatusCount, ApplicantKey, ApplicantRecordType,
+    adjust_status_counts, applicant_key_rows,
+)
+from school_management_system.models.student import (
+    AcademicYear, EngineeringBranch, Student, UsnSequence, student_subject
+)
+from school_management_system.models.user import ParentProfile, Role, User, user_role
+from school_management_system.utils.security import get_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Digits of the running number in a USN such as CSE20240042
+USN_NUMBER_WIDTH = 4
+
+ALLOWED_TRANSITIONS = {
+    AdmissionStatus.PENDING: {
+        AdmissionStatus.REVIEWING, AdmissionStatus.WAITLISTED, AdmissionStatus.REJECTED, AdmissionStatus.WITHDRAWN,
+    },
+    AdmissionStatus.REVIEWING: {
+        AdmissionStatus.PENDING, AdmissionStatus.APPROVED, AdmissionStatus.WAITLISTED,
+        AdmissionStatus.REJECTED, AdmissionStatus.WITHDRAWN,
+    },
+    AdmissionStatus.WAITLISTED: {
+        AdmissionStatus.REVIEWING, AdmissionStatus.APPROVED, AdmissionStatus.REJECTED, AdmissionStatus.WITHDRAWN,
+    },
+    AdmissionStatus.APPROVED: {AdmissionStatus.ENROLLED, AdmissionStatus.WITHDRAWN},
+    AdmissionStatus.REJECTED: {AdmissionStatus.REVIEWING},
+    AdmissionStatus.ENROLLED: {AdmissionStatus.WITHDRAWN},
+    AdmissionStatus.WITHDRAWN: set(),
+}
+
+
+def _unclaimed(now: datetime, reviewer: Optional[str] = None):
+    """
+    Applications not held by another reviewer's lease.
+    """
+    conditions = [Admission.claimed_until.is_(None), Admission.claimed_until < now]
+    if reviewer:
+        conditions.append(Admission.claimed_by == reviewer)
+    return or_(*conditions)
+
+
+async def _record_transitions(
+    db: AsyncSession,
+    admission_ids: List[int],
+    from_status: AdmissionStatus,
+    to_status: AdmissionStatus,
+    changed_at: datetime,
+    changed_by: Optional[str],
+    note: Optional[str],
+) -> None:
+    """
+    Write the audit rows and status count changes of a bulk transition.
+    """
+    if not admission_ids:
+        return
+    await db.execute(insert(AdmissionStatusChange), [
+        {
+            "admission_id": admission_id,
+            "from_status": from_status,
+            "to_status": to_status,
+            "changed_at": changed_at,
+            "changed_by": changed_by,
+            "note": note,
+        }
+        for admission_id in admission_ids
+    ])
+    await db.run_sync(lambda session: adjust_status_counts(
+        session.connection(), {from_status: -len(admission_ids), to_status: len(admission_ids)}
+    ))
+
+
+async def transition_admissions(
+    db: AsyncSession,
+    from_status: AdmissionStatus,
+    to_status: AdmissionStatus,
+    admission_ids: Optional[List[int]] = None,
+    limit: Optional[int] = None,
+    changed_by: Optional[str] = None,
+    note: Optional[str] = None,
+) -> List[int]:
+    """
+    Move applications from one status to another in one statement.
+
+    Applications claimed by a reviewer other than ``changed_by`` are left
+    alone. Moved applications are released.
+
+    Args:
+        db: Database session
+        from_status: Status the applications are in
+        to_status: Status to move them to
+        admission_ids: Restrict the transition to these applications
+        limit: Move at most this many applications, oldest first
+        changed_by: Reviewer or user recorded in the audit trail
+        note: Note recorded in the audit trail
+
+    Returns:
+        Ids of the moved applications
+
+    Raises:
+        ValueError: If the transition is not allowed
+    """
+    if to_status not in ALLOWED_TRANSITIONS[from_status]:
+        raise ValueError(f"Cannot move admissions from {from_status.value} to {to_status.value}")
+
+    now = datetime.utcnow()
+    movable = and_(Admission.status == from_status, _unclaimed(now, changed_by))
+    if admission_ids is not None:
+        movable = and_(movable, Admission.id.in_(admission_ids))
+    targets = select(Admission.id).where(movable).order_by(Admission.id).with_for_update(skip_locked=True)
+    if limit is not None:
+        targets = targets.limit(limit)
+
+    result = await db.execute(
+        update(Admission)
+        .where(Admission.id.in_(targets.scalar_subquery()), movable)
+        .values(status=to_status, status_changed_at=now, claimed_by=None, claimed_until=None)
+        .returning(Admission.id)
+        .execution_options(synchronize_session=False)
+    )
+    moved = sorted(result.scalars().all())
+    await _record_transitions(db, moved, from_status, to_status, now, changed_by, note)
+    await db.commit()
+    logger.info(f"Moved {len(moved)} admissions from {from_status.value} to {to_status.value}")
+    return moved
+
+
+async def get_queue(
+    db: AsyncSession,
+    admission_status: AdmissionStatus,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+    unclaimed_only: bool = False,
+) -> List[Admission]:
+    """
+    Get a page of the applications in a status, in id order.
+
+    Pages are keyed on the last id of the previous page, so each page is a
+    range scan of the (status, id) index however deep into the queue it is.
+    """
+    query = select(Admission).where(Admission.status == admission_status)
+    if after_id is not None:
+        query = query.where(Admission.id > after_id)
+    if unclaimed_only:
+        query = query.where(_unclaimed(datetime.utcnow()))
+    result = await db.execute(query.order_by(Admission.id).limit(limit))
+    return result.scalars().all()
+
+
+async def claim_admissions(
+    db: AsyncSession,
+    admission_status: AdmissionStatus,
+    reviewer: str,
+    batch_size: int,
+    lease_seconds: int,
+) -> List[Admission]:
+    """
+    Claim up to ``batch_size`` applications of a status for a reviewer.
+
+    Applications the reviewer already holds are claimed again, which extends
+    their lease. On PostgreSQL rows are locked with ``FOR UPDATE SKIP LOCKED``
+    so concurrent reviewers claim disjoint batches.
+
+    Returns:
+        The claimed applications, in id order
+    """
+    now = datetime.utcnow()
+    claimable = and_(Admission.status == admission_status, _unclaimed(now, reviewer))
+    result = await db.execute(
+        select(Admission.id)
+        .where(claimable)
+        .order_by(Admission.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    ids = result.scalars().all()
+    if not ids:
+        await db.commit()
+        return []
+
+    result = await db.execute(
+        update(Admission)
+        .where(Admission.id.in_(ids), claimable)
+        .values(claimed_by=reviewer, claimed_until=now + timedelta(seconds=lease_seconds))
+        .returning(Admission.id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed_ids = result.scalars().all()
+    await db.commit()
+    if not claimed_ids:
+        return []
+    result = await db.execute(select(Admission).where(Admission.id.in_(claimed_ids)).order_by(Admission.id))
+    return result.scalars().all()
+
+
+async def release_admissions(db: AsyncSession, admission_ids: List[int], reviewer: str) -> int:
+    """
+    Release applications held by a reviewer before their lease expires.
+
+    Returns:
+        Number of applications released
+    """
+    result = await db.execute(
+        update(Admission)
+        .where(Admission.id.in_(admission_ids), Admission.claimed_by == reviewer)
+        .values(claimed_by=None, claimed_until=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_status_counts(db: AsyncSession) -> Dict[str, int]:
+    """
+    Get the number of applications in each status from the maintained counts.
+    """
+    result = await db.execute(select(AdmissionStatusCount.status, AdmissionStatusCount.count))
+    counts = {admission_status.value: 0 for admission_status in AdmissionStatus}
+    counts.update({admission_status.value: count for admission_status, count in result.all()})
+    return counts
+
+
+async def rebuild_status_counts(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Recount the applications per status, replacing the maintained counts.
+
+    Only needed after admissions were changed outside the application.
+
+    Returns:
+        The previous and the recounted counts per status
+    """
+    previous = await get_status_counts(db)
+    result = await db.execute(select(Admission.status, func.count()).group_by(Admission.status))
+    counts = dict(result.all())
+    await db.execute(delete(AdmissionStatusCount))
+    await db.execute(insert(AdmissionStatusCount), [
+        {"status": admission_status, "count": counts.get(admission_status, 0)}
+        for admission_status in AdmissionStatus
+    ])
+    await db.commit()
+    return {
+        "previous": previous,
+        "counts": {admission_status.value: counts.get(admission_status, 0) for admission_status in AdmissionStatus},
+    }
+
+
+def _grade_level(desired_grade_level: str) -> Optional[AcademicYear]:
+    """
+    Read an application's desired grade level, by value or by name.
+    """
+    wanted = (desired_grade_level or "").strip().lower()
+    for grade_level in AcademicYear:
+        if wanted in (grade_level.value.lower(), grade_level.name.lower()):
+            return grade_level
+    return None
+
+
+async def _allocate_usns(db: AsyncSession, branch: EngineeringBranch, year: int, count: int) -> List[str]:
+    """
+    Reserve ``count`` consecutive USNs of a branch and enrollment year.
+
+    The branch and year's sequence row is locked by the UPDATE until the
+    chunk commits, so concurrent conversions never issue the same number.
+    A new sequence starts after the highest USN already in use.
+    """
+    result = await db.execute(
+        update(UsnSequence)
+        .where(UsnSequence.branch == branch, UsnSequence.enrollment_year == year)
+        .values(last_number=UsnSequence.last_number + count)
+        .returning(UsnSequence.last_number)
+        .execution_options(synchronize_session=False)
+    )
+    last_number = result.scalar()
+    prefix = f"{branch.name}{year}"
+    if last_number is None:
+        result = await db.execute(
+            select(Student.student_id).where(Student.student_id.startswith(prefix, autoescape=True))
+        )
+        suffixes = [usn[len(prefix):] for usn in result.scalars().all()]
+        last_number = max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0) + count
+        await db.execute(insert(UsnSequence).values(branch=branch, enrollment_year=year, last_number=last_number))
+    return [f"{prefix}{number:0{USN_NUMBER_WIDTH}d}" for number in range(last_number - count + 1, last_number + 1)]
+
+
+async def _cohort_subjects(db: AsyncSession, branch: EngineeringBranch, grade_level: AcademicYear) -> List[int]:
+    """
+    Subjects the active students of a branch and grade level are enrolled in.
+    """
+    result = await db.execute(
+        select(student_subject.c.subject_id)
+        .join(Student, Student.id == student_subject.c.student_id)
+        .where(Student.branch == branch, Student.academic_year == grade_level, Student.is_active == True)
+        .distinct()
+    )
+    return sorted(result.scalars().all())
+
+
+async def _parent_profiles(
+    db: AsyncSession, applications: List[Any], password_hash: str, parent_role_id: Optional[int]
+) -> Tuple[Dict[str, int], int, int]:
+    """
+    Find or create the parent profile of each parent email in a chunk.
+
+    Returns:
+        Profile id per lowercased email, and the number of accounts and
+        profiles created
+    """
+    parents = {}
+    for application in applications:
+        email = (application.parent_email or "").strip().lower()
+        if email and email not in parents:
+            parents[email] = application
+
+    result = await db.execute(select(User.id, User.email).where(User.email.in_(list(parents))))
+    user_ids = {email: user_id for user_id, email in result.all()}
+    new_users = [
+        {
+            "email": email,
+            "full_name": application.parent_name,
+            "hashed_password": password_hash,
+            "is_active": True,
+            "is_superuser": False,
+        }
+        for email, application in parents.items()
+        if email not in user_ids
+    ]
+    if new_users:
+        result = await db.execute(
+            insert(User).returning(User.id, User.email, sort_by_parameter_order=True), new_users
+        )
+        created_ids = {email: user_id for user_id, email in result.all()}
+        user_ids.update(created_ids)
+        if parent_role_id is not None:
+            await db.execute(insert(user_role), [
+                {"user_id": user_id, "role_id": parent_role_id} for user_id in created_ids.values()
+            ])
+
+    result = await db.execute(
+        select(ParentProfile.id, ParentProfile.user_id).where(ParentProfile.user_id.in_(list(user_ids.values())))
+    )
+    profile_ids = {user_id: profile_id for profile_id, user_id in result.all()}
+    new_profiles = [
+        {
+            "user_id": user_id,
+            "phone_number": parents[email].parent_phone,
+            "address": parents[email].parent_address or parents[email].address,
+        }
+        for email, user_id in user_ids.items()
+        if user_id not in profile_ids
+    ]
+    if new_profiles:
+        result = await db.execute(
+            insert(ParentProfile).returning(ParentProfile.id, ParentProfile.user_id, sort_by_parameter_order=True),
+            new_profiles,
+        )
+        profile_ids.update({user_id: profile_id for profile_id, user_id in result.all()})
+    return (
+        {email: profile_ids[user_id] for email, user_id in user_ids.items()},
+        len(new_users),
+        len(new_profiles),
+    )
+
+
+async def convert_admissions(
+    db: AsyncSession,
+    enrollment_date: date,
+    default_branch: Optional[EngineeringBranch] = None,
+    subject_ids: Optional[List[int]] = None,
+    chunk_size: int = 1000,
+    limit: Optional[int] = None,
+    changed_by: Optional[str] = None,
+    sample_size: int = 50,
+) -> Dict[str, Any]:
+    """
+    Turn the approved applications of an intake into students.
+
+    Each student gets the next USN of their branch and enrollment year, a
+    parent profile (shared by applications with the same parent email, and
+    reusing an existing account with that email) and the given subjects, or
+    by default those of the branch and grade level's current students. New
+    parent accounts get an unknown random password until one is set for them.
+
+    Args:
+        db: Database session
+        enrollment_date: Enrollment date of the new students; its year is part of the USN
+        default_branch: Branch of applications that do not name one
+        subject_ids: Subjects to enroll every new student in
+        chunk_size: Applications converted per transaction
+        limit: Convert at most this many applications
+        changed_by: User recorded in the admissions audit trail
+        sample_size: Maximum skipped applications listed in the result
+
+    Returns:
+        Counts of the created rows, and the applications that could not be
+        converted with the reason
+    """
+    password_hash = get_password_hash(secrets.token_urlsafe(32))
+    result = await db.execute(select(Role.id).where(Role.name == "parent"))
+    parent_role_id = result.scalar()
+    cohort_subjects: Dict[Tuple[EngineeringBranch, AcademicYear], List[int]] = {}
+    report: Dict[str, Any] = {
+        "converted": 0, "parent_accounts": 0, "parent_profiles": 0, "enrollments": 0, "skipped": 0,
+        "skipped_sample": [],
+    }
+
+    after_id = 0
+    while limit is None or report["converted"] < limit:
+        batch = chunk_size if limit is None else min(chunk_size, limit - report["converted"])
+        result = await db.execute(
+            select(Admission.__table__)
+            .where(
+                Admission.status == AdmissionStatus.APPROVED,
+                Admission.student_id.is_(None),
+                Admission.id > after_id,
+            )
+            .order_by(Admission.id)
+            .limit(batch)
+        )
+        applications = result.all()
+        if not applications:
+            break
+        after_id = applications[-1].id
+
+        groups: Dict[Tuple[EngineeringBranch, AcademicYear], List[Any]] = {}
+        for application in applications:
+            grade_level = _grade_level(application.desired_grade_level)
+            branch = application.desired_branch or default_branch
+            reason = None
+            if grade_level is None:
+                reason = f"Unknown grade level {application.desired_grade_level!r}"
+            elif branch is None:
+                reason = "No branch"
+            if reason:
+                report["skipped"] += 1
+                if len(report["skipped_sample"]) < sample_size:
+                    report["skipped_sample"].append({"admission_id": application.id, "reason": reason})
+                continue
+            groups.setdefault((branch, grade_level), []).append(application)
+        if not groups:
+            continue
+
+        converting = [application for group in groups.values() for application in group]
+        profile_ids, accounts, profiles = await _parent_profiles(db, converting, password_hash, parent_role_id)
+
+        students = []
+        for (branch, grade_level), group in groups.items():
+            usns = await _allocate_usns(db, branch, enrollment_date.year, len(group))
+            for application, usn in zip(group, usns):
+                students.append({
+                    "first_name": application.first_name,
+                    "last_name": application.last_name,
+                    "date_of_birth": application.date_of_birth,
+                    "gender": application.gender,
+                    "enrollment_date": enrollment_date,
+                    "academic_year": grade_level,
+                    "branch": branch,
+                    "student_id": usn,
+                    "address": application.address,
+                    "phone_number": application.phone_number,
+                    "email": application.email,
+                    "is_active": True,
+                    "parent_id": profile_ids.get((application.parent_email or "").strip().lower()),
+                })
+        result = await db.execute(insert(Student).returning(Student.id, sort_by_parameter_order=True), students)
+        student_ids = result.scalars().all()
+        admission_students = {
+            application.id: student_id for application, student_id in zip(converting, student_ids)
+        }
+        # The students share their applications' details, so their blocking keys too
+        key_rows = applicant_key_rows(ApplicantRecordType.STUDENT, converting)
+        for row in key_rows:
+            row["record_id"] = admission_students[row["record_id"]]
+        if key_rows:
+            await db.execute(insert(ApplicantKey), key_rows)
+
+        enrollments = []
+        for application, student in zip(converting, students):
+            key = (student["branch"], student["academic_year"])
+            if subject_ids is None and key not in cohort_subjects:
+                cohort_subjects[key] = await _cohort_subjects(db, *key)
+            for subject_id in subject_ids if subject_ids is not None else cohort_subjects[key]:
+                enrollments.append({"student_id": admission_students[application.id], "subject_id": subject_id})
+        if enrollments:
+            await db.execute(insert(student_subject), enrollments)
+
+        now = datetime.utcnow()
+        await db.execute(
+            update(Admission)
+            .where(Admission.id.in_(list(admission_students)))
+            .values(
+                student_id=case(admission_students, value=Admission.id),
+                status=AdmissionStatus.ENROLLED,
+                status_changed_at=now,
+                claimed_by=None,
+                claimed_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await _record_transitions(
+            db, list(admission_students), AdmissionStatus.APPROVED, AdmissionStatus.ENROLLED,
+            now, changed_by, "Converted to student",
+        )
+        await db.commit()
+
+        report["converted"] += len(converting)
+        report["parent_accounts"] += accounts
+        report["parent_profiles"] += profiles
+        report["enrollments"] += len(enrollments)
+        logger.info(f"Converted admissions up to id {after_id}: {report['converted']} students so far")
+    return report
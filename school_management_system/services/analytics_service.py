@@ -0,0 +1,471 @@
+"""
+Analytics store: a columnar copy of students, exam results, fee records,
+payments and attendance for reports over many years.
+
+``export_analytics`` copies the rows of each table changed since its last
+export into a new Parquet part file under ``ANALYTICS_PATH/<table>/``,
+reading them from a replica when there is one. Changed rows are found by
+their ``updated_at`` column, which every insert and update sets. The
+watermark saved after an export is the database clock at its start less
+``ANALYTICS_WATERMARK_LAG_SECONDS``: a transaction stamps its rows with its
+start time, so rows it commits after an export began are picked up by the
+next one. Rows exported twice do no harm, since every part carries its batch
+number and only the latest version of a row is read. Once a table has more
+than ``ANALYTICS_MAX_PARTS`` parts they are compacted into one. Rows deleted
+or archived from the database stay in the store, so it keeps the history of
+every year it exported.
+
+The reports never query the database. ``AnalyticsStore`` loads a table's
+parts into memory once and keeps them until an export changes its files, and
+the reports group and aggregate them with Arrow compute kernels. Results are
+cached until the files change.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal, get_read_session
+from school_management_system.models.exam import Exam, ExamResult
+from school_management_system.models.payment import FeeRecord, Payment
+from school_management_system.models.student import Attendance, Student
+from school_management_system.services.job_service import get_checkpoint, save_checkpoint
+from school_management_system.utils.parquet import COMPRESSION, arrow_schema, arrow_table, load_pyarrow
+
+logger = logging.getLogger(__name__)
+
+# Rows read from the database and written per row group
+EXPORT_BATCH_SIZE = 50000
+# Reports kept in the result cache
+RESULT_CACHE_SIZE = 256
+# Attendance statuses that count as attended
+ATTENDED_STATUSES = ("present", "late")
+
+
+@dataclass
+class AnalyticsTable:
+    name: str
+    model: Any  # Model whose updated_at is the change watermark
+    query: Callable[[], Select]  # Exported columns; the first is the row id
+
+
+ANALYTICS_TABLES: Dict[str, AnalyticsTable] = {
+    table.name: table
+    for table in (
+        AnalyticsTable("students", Student, lambda: select(
+            Student.id, Student.branch, Student.academic_year, Student.enrollment_date, Student.gender,
+            Student.is_active, Student.cgpa, Student.backlogs, Student.internship_status, Student.placement_status,
+            Student.placement_company, Student.scholarship_status, Student.hostel_resident,
+        )),
+        AnalyticsTable("exam_results", ExamResult, lambda: select(
+            ExamResult.id, ExamResult.student_id, ExamResult.exam_id, ExamResult.subject_id, ExamResult.score,
+            func.coalesce(ExamResult.exam_date, Exam.date).label("exam_date"), Exam.exam_type,
+            Exam.total_marks, Exam.passing_marks,
+        ).join(Exam, Exam.id == ExamResult.exam_id)),
+        AnalyticsTable("fee_records", FeeRecord, lambda: select(
+            FeeRecord.id, FeeRecord.student_id, FeeRecord.academic_year, FeeRecord.term, FeeRecord.total_amount,
+            FeeRecord.paid_amount, FeeRecord.balance, FeeRecord.status, FeeRecord.due_date,
+        )),
+        AnalyticsTable("payments", Payment, lambda: select(
+            Payment.id, Payment.fee_record_id, Payment.amount, Payment.payment_date, Payment.payment_method,
+        )),
+        AnalyticsTable("attendance", Attendance, lambda: select(
+            Attendance.id, Attendance.student_id, Attendance.subject_id, Attendance.date, Attendance.status,
+        )),
+    )
+}
+
+
+def _table_schema(pa, table: AnalyticsTable):
+    return arrow_schema(pa, table.query().selected_columns).append(pa.field("_batch", pa.int64()))
+
+
+def _part_files(name: str) -> List[str]:
+    directory = os.path.join(settings.ANALYTICS_PATH, name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, entry)
+        for entry in os.listdir(directory)
+        if entry.startswith("part-") and entry.endswith(".parquet")
+    )
+
+
+def _part_file(name: str, batch: int) -> str:
+    return os.path.join(settings.ANALYTICS_PATH, name, f"part-{batch:08d}.parquet")
+
+
+def _latest_rows(pa, table):
+    """
+    Keep only the row of the latest batch for every id.
+    """
+    if table.num_rows == 0:
+        return table
+    latest = table.group_by("id").aggregate([("_batch", "max")])
+    return table.join(
+        latest, keys=["id", "_batch"], right_keys=["id", "_batch_max"], join_type="inner"
+    ).select(table.column_names)
+
+
+def _read_parts(pa, parts: Sequence[str]):
+    return _latest_rows(pa, pa.concat_tables([pa.parquet.read_table(path) for path in parts]))
+
+
+def _compact(pa, table: AnalyticsTable, batch: int) -> None:
+    parts = _part_files(table.name)
+    if len(parts) <= settings.ANALYTICS_MAX_PARTS:
+        return
+    rows = _read_parts(pa, parts)
+    # Every row gets the latest batch, so the compacted part wins over any
+    # older part left behind by an interrupted compaction
+    rows = rows.set_column(
+        rows.schema.get_field_index("_batch"), "_batch", pa.array([batch] * rows.num_rows, type=pa.int64())
+    )
+    path = _part_file(table.name, batch)
+    pa.parquet.write_table(rows, f"{path}.partial", compression=COMPRESSION)
+    os.replace(f"{path}.partial", path)
+    for part in parts:
+        if part != path:
+            os.remove(part)
+    logger.info(f"Compacted {len(parts)} parts of analytics table {table.name} into {rows.num_rows:,} rows")
+
+
+async def export_table(table: AnalyticsTable, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Export the rows of a table changed since its last export to a new part.
+
+    Args:
+        table: Table to export, from ``ANALYTICS_TABLES``
+        batch_size: Rows fetched and written at a time
+
+    Returns:
+        The number of rows exported and the batch number of the part
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    pa = load_pyarrow()
+    schema = _table_schema(pa, table)
+    async with AsyncSessionLocal() as db:
+        checkpoint = await get_checkpoint(db, f"analytics:{table.name}")
+        state = json.loads(checkpoint.cursor) if checkpoint.cursor else {}
+        batch = state.get("batch", 0) + 1
+
+        query = table.query().order_by(table.model.id)
+        if state.get("watermark"):
+            query = query.where(table.model.updated_at >= datetime.fromisoformat(state["watermark"]))
+        path = _part_file(table.name, batch)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = 0
+        writer = pa.parquet.ParquetWriter(f"{path}.partial", schema, compression=COMPRESSION)
+        try:
+            async with get_read_session() as read_db:
+                started = (await read_db.execute(select(func.now()))).scalar()
+                result = await read_db.stream(query.execution_options(yield_per=batch_size))
+                async for chunk in result.partitions(batch_size):
+                    writer.write_table(arrow_table(pa, schema, [(*row, batch) for row in chunk]))
+                    rows += len(chunk)
+        finally:
+            writer.close()
+
+        if rows:
+            os.replace(f"{path}.partial", path)
+        else:
+            os.remove(f"{path}.partial")
+            batch -= 1
+        watermark = started - timedelta(seconds=settings.ANALYTICS_WATERMARK_LAG_SECONDS)
+        await save_checkpoint(db, checkpoint, json.dumps({"watermark": watermark.isoformat(), "batch": batch}))
+
+    if rows:
+        _compact(pa, table, batch)
+    logger.info(f"Exported {rows:,} changed rows of {table.name} to the analytics store")
+    return {"rows": rows, "batch": batch}
+
+
+async def export_analytics(names: Optional[List[str]] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Export the changed rows of the analytics tables (all by default).
+
+    Returns:
+        Rows exported per table
+    """
+    return {
+        name: (await export_table(ANALYTICS_TABLES[name], batch_size))["rows"]
+        for name in names or list(ANALYTICS_TABLES)
+    }
+
+
+class AnalyticsStore:
+    """
+    The exported tables, loaded into memory, and the reports computed from
+    them. Tables are reloaded when their part files change.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, Tuple[Tuple, Any]] = {}
+        self._results: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _files_key(name: str) -> Tuple:
+        return tuple((path, os.stat(path).st_mtime_ns) for path in _part_files(name))
+
+    def table(self, name: str):
+        """
+        The latest version of every exported row of a table.
+
+        Raises:
+            RuntimeError: If pyarrow is not installed
+        """
+        pa = load_pyarrow()
+        key = self._files_key(name)
+        cached = self._tables.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        parts = [path for path, _ in key]
+        table = _read_parts(pa, parts) if parts else _table_schema(pa, ANALYTICS_TABLES[name]).empty_table()
+        self._tables[name] = (key, table)
+        return table
+
+    def report(self, report: Callable[..., List[Dict[str, Any]]], tables: Sequence[str], *args) -> List[Dict[str, Any]]:
+        """
+        Run a report over the store, or return its cached result when the
+        tables it reads have not changed since.
+        """
+        key = (report.__name__, args, tuple(self._files_key(name) for name in tables))
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        result = report(self, *args)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return result
+
+    def status(self) -> List[Dict[str, Any]]:
+        tables = []
+        for name in ANALYTICS_TABLES:
+            parts = _part_files(name)
+            tables.append({
+                "table": name,
+                "parts": len(parts),
+                "rows": self.table(name).num_rows if parts else 0,
+                "exported_at": datetime.fromtimestamp(max(os.path.getmtime(path) for path in parts)) if parts else None,
+            })
+        return tables
+
+
+store = AnalyticsStore()
+
+
+# Reports. Each takes the store and the grouping columns (``by``), checked by
+# the caller against the report's dimensions, and returns one dict per group.
+
+def _academic_years(pc, dates):
+    return pc.subtract(
+        pc.year(dates), pc.cast(pc.less(pc.month(dates), settings.ACADEMIC_YEAR_START_MONTH), "int64")
+    )
+
+
+def _in_years(pc, years, first_year: Optional[int], last_year: Optional[int]):
+    mask = None
+    if first_year is not None:
+        mask = pc.greater_equal(years, first_year)
+    if last_year is not None:
+        upper = pc.less_equal(years, last_year)
+        mask = upper if mask is None else pc.and_(mask, upper)
+    return mask
+
+
+def _with_branch(store: "AnalyticsStore", table):
+    students = store.table("students").select(["id", "branch"]).rename_columns(["student_id", "branch"])
+    return table.join(students, keys="student_id", join_type="left outer")
+
+
+def _grouped(pa, table, by: List[str], aggregations: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    grouped = table.group_by(by).aggregate(aggregations)
+    return grouped.sort_by([(name, "ascending") for name in by]).to_pylist()
+
+
+def _rate(numerator: Optional[float], denominator: Optional[float]) -> Optional[float]:
+    return round(100 * numerator / denominator, 2) if denominator else None
+
+
+PLACEMENT_DIMENSIONS = ("branch", "enrollment_year", "academic_year", "cgpa_band", "backlogs", "gender")
+
+
+def placement_rates(store: AnalyticsStore, by: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """
+    Share of students placed, and their mean CGPA, per group. CGPA bands are
+    whole points (7 holds 7.00 to 7.99).
+    """
+    pa = load_pyarrow()
+    pc = pa.compute
+    students = store.table("students")
+    table = pa.table({
+        "branch": students["branch"],
+        "enrollment_year": pc.year(students["enrollment_date"]),
+        "academic_year": students["academic_year"],
+        "cgpa_band": pc.cast(pc.floor(students["cgpa"]), "int64"),
+        "backlogs": students["backlogs"],
+        "gender": students["gender"],
+        "cgpa": students["cgpa"],
+        "placed": pc.cast(pc.fill_null(pc.equal(students["placement_status"], "Placed"), False), "int64"),
+    })
+    rows = _grouped(pa, table, list(by), [("placed", "count"), ("placed", "sum"), ("cgpa", "mean")])
+    return [{
+        **{name: row[name] for name in by},
+        "students": row["placed_count"],
+        "placed": row["placed_sum"],
+        "placement_rate": _rate(row["placed_sum"], row["placed_count"]),
+        "mean_cgpa": round(row["cgpa_mean"], 2) if row["cgpa_mean"] is not None else None,
+    } for row in rows]
+
+
+FEE_DIMENSIONS = ("academic_year", "term", "branch", "status")
+
+
+def fee_collection(store: AnalyticsStore, by: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """
+    Amounts billed, collected and outstanding per group of fee records.
+    """
+    pa = load_pyarrow()
+    pc = pa.compute
+    records = store.table("fee_records")
+    table = pa.table({
+        "student_id": records["student_id"],
+        "academic_year": records["academic_year"],
+        "term": records["term"],
+        "status": records["status"],
+        "billed": pc.cast(records["total_amount"], pa.float64()),
+        "collected": pc.cast(pc.fill_null(records["paid_amount"], 0), pa.float64()),
+        "outstanding": pc.cast(records["balance"], pa.float64()),
+    })
+    if "branch" in by:
+        table = _with_branch(store, table)
+    rows = _grouped(pa, table, list(by), [
+        ("billed", "count"), ("billed", "sum"), ("collected", "sum"), ("outstanding", "sum"),
+    ])
+    return [{
+        **{name: row[name] for name in by},
+        "fee_records": row["billed_count"],
+        "billed": round(row["billed_sum"], 2),
+        "collected": round(row["collected_sum"], 2),
+        "outstanding": round(row["outstanding_sum"], 2),
+        "collection_rate": _rate(row["collected_sum"], row["billed_sum"]),
+    } for row in rows]
+
+
+PAYMENT_DIMENSIONS = ("academic_year", "month", "payment_method")
+
+
+def payment_trends(
+    store: AnalyticsStore, by: Tuple[str, ...], first_year: Optional[int], last_year: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Number and total of payments received per group, e.g. per month.
+    """
+    pa = load_pyarrow()
+    pc = pa.compute
+    payments = store.table("payments")
+    years = _academic_years(pc, payments["payment_date"])
+    table = pa.table({
+        "academic_year": years,
+        "month": pc.strftime(payments["payment_date"], format="%Y-%m"),
+        "payment_method": payments["payment_method"],
+        "amount": pc.cast(payments["amount"], pa.float64()),
+    })
+    mask = _in_years(pc, years, first_year, last_year)
+    if mask is not None:
+        table = table.filter(mask)
+    rows = _grouped(pa, table, list(by), [("amount", "count"), ("amount", "sum")])
+    return [{
+        **{name: row[name] for name in by},
+        "payments": row["amount_count"],
+        "amount": round(row["amount_sum"], 2),
+    } for row in rows]
+
+
+EXAM_DIMENSIONS = ("academic_year", "branch", "exam_type", "subject_id", "exam_id")
+
+
+def pass_rates(
+    store: AnalyticsStore, by: Tuple[str, ...], first_year: Optional[int], last_year: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Share of exam results at or above the passing marks, and the mean
+    percentage, per group.
+    """
+    pa = load_pyarrow()
+    pc = pa.compute
+    results = store.table("exam_results")
+    years = _academic_years(pc, results["exam_date"])
+    table = pa.table({
+        "student_id": results["student_id"],
+        "academic_year": years,
+        "exam_type": results["exam_type"],
+        "subject_id": results["subject_id"],
+        "exam_id": results["exam_id"],
+        "passed": pc.cast(pc.greater_equal(results["score"], results["passing_marks"]), "int64"),
+        "percentage": pc.multiply(pc.divide(results["score"], results["total_marks"]), 100),
+    })
+    mask = _in_years(pc, years, first_year, last_year)
+    if mask is not None:
+        table = table.filter(mask)
+    if "branch" in by:
+        table = _with_branch(store, table)
+    rows = _grouped(pa, table, list(by), [("passed", "count"), ("passed", "sum"), ("percentage", "mean")])
+    return [{
+        **{name: row[name] for name in by},
+        "results": row["passed_count"],
+        "passed": row["passed_sum"],
+        "pass_rate": _rate(row["passed_sum"], row["passed_count"]),
+        "mean_percentage": round(row["percentage_mean"], 2) if row["percentage_mean"] is not None else None,
+    } for row in rows]
+
+
+ATTENDANCE_DIMENSIONS = ("academic_year", "month", "branch", "subject_id")
+
+
+def attendance_rates(
+    store: AnalyticsStore, by: Tuple[str, ...], first_year: Optional[int], last_year: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Share of attendance marks that are present or late, per group.
+    """
+    pa = load_pyarrow()
+    pc = pa.compute
+    attendance = store.table("attendance")
+    years = _academic_years(pc, attendance["date"])
+    table = pa.table({
+        "student_id": attendance["student_id"],
+        "academic_year": years,
+        "month": pc.strftime(pc.cast(attendance["date"], pa.timestamp("s")), format="%Y-%m"),
+        "subject_id": attendance["subject_id"],
+        "attended": pc.cast(
+            pc.is_in(pc.utf8_lower(attendance["status"]), value_set=pa.array(ATTENDED_STATUSES)), "int64"
+        ),
+    })
+    mask = _in_years(pc, years, first_year, last_year)
+    if mask is not None:
+        table = table.filter(mask)
+    if "branch" in by:
+        table = _with_branch(store, table)
+    rows = _grouped(pa, table, list(by), [("attended", "count"), ("attended", "sum")])
+    return [{
+        **{name: row[name] for name in by},
+        "marks": row["attended_count"],
+        "attended": row["attended_sum"],
+        "attendance_rate": _rate(row["attended_sum"], row["attended_count"]),
+    } for row in rows]
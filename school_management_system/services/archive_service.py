@@ -0,0 +1,216 @@
+"""
+Archive of past academic years in Parquet files.
+
+The rows of a partitioned table (attendance, payments, exam results) from an
+academic year that is over are written to a compressed Parquet file and
+removed from the database, one table and academic year at a time:
+
+    <ARCHIVE_PATH>/<table>/academic_year=2019-2020/<table>.parquet
+
+The directories follow Hive partitioning, so a table's archive reads as one
+data set and a filter on ``academic_year`` skips the other years' files.
+``read_archive`` reads archived rows back, e.g. for transcripts.
+
+On PostgreSQL the year's partition is detached, which takes its rows out of
+every query at once instead of deleting them one by one, then copied and
+dropped. Where the year has no partition of its own (SQLite, or years before
+partitioning) the rows are copied and then deleted in batches. The file is
+written under a temporary name and renamed once its row count is checked, and
+rows are only removed after that, so an interrupted archive run loses
+nothing.
+
+Parquet support needs pyarrow (pip install pyarrow).
+"""
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, MetaData, Table, delete, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from school_management_system.config import settings
+from school_management_system.database.base import Base
+from school_management_system.database.partitioning import (
+    academic_year_label, academic_year_of, in_academic_years, is_partitioned, list_partitions, partition_key,
+    partition_name,
+)
+from school_management_system.utils.parquet import COMPRESSION, arrow_schema, arrow_table, load_pyarrow
+
+logger = logging.getLogger(__name__)
+
+# Rows read and written per batch
+BATCH_SIZE = 50000
+
+
+def archive_file(table_name: str, start_year: int) -> str:
+    return os.path.join(
+        settings.ARCHIVE_PATH, table_name, f"academic_year={academic_year_label(start_year)}", f"{table_name}.parquet"
+    )
+
+
+def _copy_of(table: Table, name: str) -> Table:
+    """
+    The columns of ``table`` on a table of another name (a detached partition).
+    """
+    return Table(name, MetaData(), *(Column(column.name, column.type) for column in table.columns))
+
+
+def _partition_state(conn: Connection, table_name: str, name: str) -> Tuple[bool, bool]:
+    """
+    Whether a table has the partition ``name``, and whether that partition
+    was detached by an interrupted run and still exists.
+    """
+    if not is_partitioned(conn, table_name):
+        return False, False
+    if name in list_partitions(conn, table_name):
+        return True, False
+    return False, inspect(conn).has_table(name)
+
+
+async def _write_parquet(engine: AsyncEngine, source: Table, condition, path: str, batch_size: int) -> int:
+    pa = load_pyarrow()
+    schema = arrow_schema(pa, source.columns)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.partial"
+    query = select(source).order_by(source.c.id)
+    if condition is not None:
+        query = query.where(condition)
+
+    rows = 0
+    writer = pa.parquet.ParquetWriter(partial, schema, compression=COMPRESSION)
+    try:
+        async with engine.connect() as conn:
+            result = await conn.stream(query.execution_options(yield_per=batch_size))
+            async for batch in result.partitions(batch_size):
+                writer.write_table(arrow_table(pa, schema, batch))
+                rows += len(batch)
+    finally:
+        writer.close()
+
+    written = pa.parquet.ParquetFile(partial).metadata.num_rows
+    if written != rows:
+        os.remove(partial)
+        raise RuntimeError(f"Archive {path} holds {written} rows instead of {rows}")
+    os.replace(partial, path)
+    return rows
+
+
+async def archive_academic_year(
+    engine: AsyncEngine,
+    table_name: str,
+    start_year: int,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Move the rows of a table from one academic year to a Parquet file.
+
+    Args:
+        engine: Engine of the primary database
+        table_name: A partitioned table (attendance, payments, exam_results)
+        start_year: Year the academic year starts in
+        batch_size: Rows read, written and deleted at a time
+
+    Returns:
+        Rows archived and the size of the file
+
+    Raises:
+        ValueError: If the table is not partitioned by academic year, the year
+            is not over or it is archived already
+        RuntimeError: If pyarrow is not installed
+    """
+    table = Base.metadata.tables.get(table_name)
+    if table is None or partition_key(table) is None:
+        raise ValueError(f"{table_name} is not partitioned by academic year")
+    if start_year >= academic_year_of(date.today()):
+        raise ValueError(f"Academic year {academic_year_label(start_year)} is not over")
+    path = archive_file(table.name, start_year)
+    if os.path.exists(path):
+        raise ValueError(f"{table.name} {academic_year_label(start_year)} is archived already in {path}")
+    load_pyarrow()
+
+    name = partition_name(table.name, start_year)
+    async with engine.connect() as conn:
+        has_partition, detached = await conn.run_sync(_partition_state, table.name, name)
+
+    if has_partition:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            # Waits for queries using the partition instead of blocking the table
+            await conn.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {name} CONCURRENTLY"))
+        logger.info(f"Detached partition {name}")
+
+    if has_partition or detached:
+        rows = await _write_parquet(engine, _copy_of(table, name), None, path, batch_size)
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE {name}"))
+    else:
+        condition = in_academic_years(table.c[partition_key(table)], start_year)
+        rows = await _write_parquet(engine, table, condition, path, batch_size)
+        while True:
+            async with engine.begin() as conn:
+                ids = select(table.c.id).where(condition).limit(batch_size).scalar_subquery()
+                result = await conn.execute(delete(table).where(table.c.id.in_(ids)))
+            if not result.rowcount:
+                break
+
+    size = os.path.getsize(path)
+    logger.info(f"Archived {rows:,} rows of {table.name} {academic_year_label(start_year)} to {path} ({size:,} bytes)")
+    return {"rows": rows, "bytes": size}
+
+
+def archived_years(table_name: str) -> List[int]:
+    """
+    Start years of the archived academic years of a table.
+    """
+    directory = os.path.join(settings.ARCHIVE_PATH, table_name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        int(entry.split("=", 1)[1].split("-")[0])
+        for entry in os.listdir(directory)
+        if entry.startswith("academic_year=") and os.path.exists(os.path.join(directory, entry, f"{table_name}.parquet"))
+    )
+
+
+def _read_archive(table_name: str, filters: Dict[str, Any], start_years: Optional[List[int]]) -> List[Dict[str, Any]]:
+    pa = load_pyarrow()
+    paths = [
+        archive_file(table_name, start_year)
+        for start_year in archived_years(table_name)
+        if start_years is None or start_year in start_years
+    ]
+    if not paths:
+        return []
+    dataset = pa.dataset.dataset(paths, format="parquet")
+    expression = None
+    for column, value in filters.items():
+        condition = pa.dataset.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(filter=expression).to_pylist()
+
+
+async def read_archive(
+    table_name: str,
+    filters: Dict[str, Any],
+    start_years: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Read archived rows of a table.
+
+    Args:
+        table_name: Archived table
+        filters: Column values the rows must have, e.g. ``{"student_id": 42}``
+        start_years: Academic years read (default all archived years)
+
+    Returns:
+        The matching rows as dicts; enum columns hold the member names
+
+    Raises:
+        RuntimeError: If there are archives and pyarrow is not installed
+    """
+    if not archived_years(table_name):
+        return []
+    return await asyncio.to_thread(_read_archive, table_name, filters, start_years)
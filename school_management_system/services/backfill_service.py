@@ -0,0 +1,125 @@
+"""
+Backfills: data migrations that fill in derived rows or columns over tables
+too large to change in one transaction.
+
+A backfill walks a table's primary key in ranges of ``batch_size`` ids. Each
+range is filled in its own short transaction, committed together with a
+checkpoint in ``job_checkpoints``, so an interrupted backfill resumes after
+the last committed range. A completed backfill starts over from the first id
+when run again, and only changes the rows still missing their data. Between
+ranges the runner sleeps for ``pause_seconds``, leaving the database to live
+traffic, and it logs its progress with the rate and the time left.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import func, inspect, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.config import settings
+from school_management_system.models.admission import Admission, ApplicantRecordType
+from school_management_system.models.exam import Exam, ExamResult
+from school_management_system.models.student import Student
+from school_management_system.services.duplicate_service import index_keys_in_range
+from school_management_system.services.job_service import get_checkpoint, save_checkpoint
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5
+
+
+@dataclass
+class Backfill:
+    name: str
+    description: str
+    model: Any  # Model whose integer primary key is walked
+    fill: Callable[[AsyncSession, int, int], Awaitable[int]]  # Fills ids in (low, high], returns rows changed
+
+
+async def _admission_keys(db: AsyncSession, low: int, high: int) -> int:
+    return await index_keys_in_range(db, ApplicantRecordType.ADMISSION, low, high)
+
+
+async def _student_keys(db: AsyncSession, low: int, high: int) -> int:
+    return await index_keys_in_range(db, ApplicantRecordType.STUDENT, low, high)
+
+
+async def _exam_result_dates(db: AsyncSession, low: int, high: int) -> int:
+    result = await db.execute(
+        update(ExamResult)
+        .where(ExamResult.id > low, ExamResult.id <= high, ExamResult.exam_date.is_(None))
+        .values(exam_date=select(Exam.date).where(Exam.id == ExamResult.exam_id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+BACKFILLS: Dict[str, Backfill] = {
+    backfill.name: backfill
+    for backfill in (
+        Backfill("applicant-keys-admissions", "Blocking keys of applications loaded without them",
+                 Admission, _admission_keys),
+        Backfill("applicant-keys-students", "Blocking keys of students loaded without them",
+                 Student, _student_keys),
+        Backfill("exam-result-dates", "Exam dates of exam results, their partition key",
+                 ExamResult, _exam_result_dates),
+    )
+}
+
+
+async def run_backfill(
+    db: AsyncSession,
+    backfill: Backfill,
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Run a backfill over every id of its table, resuming an interrupted run.
+
+    Args:
+        db: Database session
+        backfill: Backfill to run, from ``BACKFILLS``
+        batch_size: Ids per transaction (default ``MIGRATION_BACKFILL_BATCH_SIZE``)
+        pause_seconds: Pause between transactions (default ``MIGRATION_BACKFILL_PAUSE_SECONDS``)
+
+    Returns:
+        Counts of batches run and rows changed, and the highest id covered
+    """
+    batch_size = batch_size or settings.MIGRATION_BACKFILL_BATCH_SIZE
+    pause_seconds = settings.MIGRATION_BACKFILL_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    primary_key = inspect(backfill.model).primary_key[0]
+    result = await db.execute(select(func.max(primary_key)))
+    max_id = result.scalar() or 0
+
+    checkpoint = await get_checkpoint(db, f"backfill:{backfill.name}")
+    low = 0 if checkpoint.is_complete else int(checkpoint.cursor or 0)
+    if low:
+        logger.info(f"Backfill {backfill.name}: resuming after id {low:,}")
+    first = low
+    batches = changed = 0
+    started = reported = time.monotonic()
+    while low < max_id:
+        high = min(low + batch_size, max_id)
+        changed += await backfill.fill(db, low, high)
+        await save_checkpoint(db, checkpoint, str(high))
+        low = high
+        batches += 1
+
+        now = time.monotonic()
+        if now - reported >= PROGRESS_INTERVAL or low >= max_id:
+            rate = (low - first) / max(now - started, 1e-6)
+            logger.info(
+                f"Backfill {backfill.name}: {low / max_id:.1%} (ids to {low:,} of {max_id:,}), "
+                f"{changed:,} rows changed, {rate:,.0f} ids/s, {(max_id - low) / rate if rate else 0:.0f}s left"
+            )
+            reported = now
+        if pause_seconds > 0 and low < max_id:
+            await asyncio.sleep(pause_seconds)
+
+    await save_checkpoint(db, checkpoint, str(low), is_complete=True)
+    return {"batches": batches, "rows": changed, "max_id": max_id}
@@ -0,0 +1,318 @@
+"""
+Billing runs: fee records for a whole intake from the active fee structures.
+
+A student is billed from the active fee structure of the run's academic year
+for their grade level. A grade-specific structure takes precedence over an
+"All" structure. The annual charge is the sum of the structure's mandatory
+items, less percentage discounts, less fixed-amount discounts, less the
+student's financial aid. The result, floored at zero, is split evenly over
+``terms_per_year``, rounded down to whole cents. Amounts are computed in
+cents (see ``Money``), so totals are exact.
+
+Everything that is the same for all students of a grade (items and
+discounts) is computed once. The per-student part, financial aid, is joined
+in SQL, so each grade level is billed with a single INSERT ... SELECT.
+Students that already have a record for the academic year and term are
+skipped, which makes a run idempotent per (student, academic_year, term).
+"""
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, exists, func, insert, literal, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.database.types import Money, to_money
+from school_management_system.models.payment import (
+    Discount, FeeItem, FeeRecord, FeeStructure, FinancialAid, PaymentStatus
+)
+from school_management_system.models.student import AcademicYear, Student
+from school_management_system.services.ledger_service import record_charges
+
+logger = logging.getLogger(__name__)
+
+ALL_GRADES = "All"
+PERCENTAGE_DISCOUNT = "percentage"
+# Fee record ids per statement recording opening charges; keeps the IN list
+# within the bound parameter limits of SQLite and asyncpg
+CHARGE_BATCH_SIZE = 1000
+
+
+async def _resolve_structures(
+    db: AsyncSession,
+    academic_year: str,
+    grade_levels: List[AcademicYear],
+    fee_structure_ids: Optional[List[int]],
+) -> Dict[AcademicYear, FeeStructure]:
+    """
+    Pick the fee structure that applies to each grade level.
+
+    Raises:
+        ValueError: If a grade level matches more than one structure
+    """
+    query = select(FeeStructure).where(
+        FeeStructure.academic_year == academic_year, FeeStructure.is_active == True
+    )
+    if fee_structure_ids:
+        query = query.where(FeeStructure.id.in_(fee_structure_ids))
+    result = await db.execute(query)
+    structures = result.scalars().all()
+
+    resolved = {}
+    for grade_level in grade_levels:
+        candidates = [s for s in structures if s.grade_level == grade_level.value]
+        if not candidates:
+            candidates = [s for s in structures if s.grade_level == ALL_GRADES]
+        if len(candidates) > 1:
+            raise ValueError(
+                f"Fee structures {sorted(s.id for s in candidates)} all apply to {grade_level.value}; "
+                f"select one with fee_structure_ids"
+            )
+        if candidates:
+            resolved[grade_level] = candidates[0]
+    return resolved
+
+
+async def _structure_charges(
+    db: AsyncSession, structure_ids: List[int], as_of: date
+) -> Dict[int, Decimal]:
+    """
+    Annual charge per fee structure after discounts, before financial aid.
+    """
+    result = await db.execute(
+        select(FeeItem.fee_structure_id, func.sum(FeeItem.amount))
+        .where(FeeItem.fee_structure_id.in_(structure_ids), FeeItem.is_mandatory == True)
+        .group_by(FeeItem.fee_structure_id)
+    )
+    gross = {structure_id: total or Decimal("0.00") for structure_id, total in result.all()}
+
+    # Discounts without a fee structure apply to every structure
+    result = await db.execute(
+        select(Discount.fee_structure_id, Discount.discount_type, Discount.discount_value).where(
+            Discount.is_active == True,
+            or_(Discount.fee_structure_id.in_(structure_ids), Discount.fee_structure_id.is_(None)),
+            or_(Discount.start_date.is_(None), Discount.start_date <= as_of),
+            or_(Discount.end_date.is_(None), Discount.end_date >= as_of),
+        )
+    )
+    discounts = result.all()
+
+    charges = {}
+    for structure_id in structure_ids:
+        total = gross.get(structure_id, Decimal("0.00"))
+        applicable = [d for d in discounts if d.fee_structure_id in (structure_id, None)]
+        percentage = sum(
+            (d.discount_value for d in applicable if d.discount_type.lower() == PERCENTAGE_DISCOUNT), Decimal("0.00")
+        )
+        fixed = sum(
+            (d.discount_value for d in applicable if d.discount_type.lower() != PERCENTAGE_DISCOUNT), Decimal("0.00")
+        )
+        charges[structure_id] = max(to_money(total * (1 - min(percentage, 100) / 100)) - fixed, Decimal("0.00"))
+    return charges
+
+
+def _aid_subquery(as_of: date):
+    """
+    Total financial aid per student active on the given date.
+    """
+    return (
+        select(FinancialAid.student_id, func.sum(FinancialAid.amount).label("amount"))
+        .where(
+            FinancialAid.is_active == True,
+            FinancialAid.start_date <= as_of,
+            or_(FinancialAid.end_date.is_(None), FinancialAid.end_date >= as_of),
+        )
+        .group_by(FinancialAid.student_id)
+        .subquery()
+    )
+
+
+def _term_total(charge: Decimal, aid, terms_per_year: int):
+    annual = literal(charge, Money()) - func.coalesce(aid.c.amount, 0)
+    return case((annual > 0, annual // terms_per_year), else_=literal(0, Money()))
+
+
+def _billing_select(
+    grade_level: AcademicYear,
+    charge: Decimal,
+    terms_per_year: int,
+    academic_year: str,
+    term: str,
+    as_of: date,
+):
+    """
+    Select each unbilled student of a grade with their term total.
+    """
+    aid = _aid_subquery(as_of)
+    total = _term_total(charge, aid, terms_per_year)
+    already_billed = exists().where(
+        FeeRecord.student_id == Student.id,
+        FeeRecord.academic_year == academic_year,
+        FeeRecord.term == term,
+    )
+    return (
+        select(Student.id.label("student_id"), total.label("total"))
+        .select_from(Student)
+        .outerjoin(aid, aid.c.student_id == Student.id)
+        .where(Student.academic_year == grade_level, Student.is_active == True, ~already_billed)
+    )
+
+
+async def _diff(
+    db: AsyncSession,
+    grade_level: AcademicYear,
+    charge: Decimal,
+    terms_per_year: int,
+    academic_year: str,
+    term: str,
+    as_of: date,
+    sample_size: int,
+) -> Dict[str, Any]:
+    """
+    Compare a grade's existing records with what a run would bill now.
+    """
+    pending = _billing_select(grade_level, charge, terms_per_year, academic_year, term, as_of).subquery()
+    result = await db.execute(select(func.count(), func.coalesce(func.sum(pending.c.total), 0)))
+    to_create, amount = result.one()
+
+    # Existing records whose total no longer matches the structure; a run never
+    # changes them, they are listed for review
+    aid = _aid_subquery(as_of)
+    expected = _term_total(charge, aid, terms_per_year)
+    existing = (
+        select(
+            FeeRecord.id.label("fee_record_id"),
+            Student.id.label("student_id"),
+            Student.student_id.label("usn"),
+            FeeRecord.total_amount.label("total_amount"),
+            expected.label("expected_amount"),
+        )
+        .join(Student, Student.id == FeeRecord.student_id)
+        .outerjoin(aid, aid.c.student_id == Student.id)
+        .where(
+            Student.academic_year == grade_level,
+            FeeRecord.academic_year == academic_year,
+            FeeRecord.term == term,
+        )
+        .subquery()
+    )
+    mismatch = existing.c.total_amount != existing.c.expected_amount
+    result = await db.execute(
+        select(func.count(), func.coalesce(func.sum(case((mismatch, 1), else_=0)), 0)).select_from(existing)
+    )
+    billed, changed = result.one()
+    result = await db.execute(
+        select(existing).where(mismatch).order_by(existing.c.student_id).limit(sample_size)
+    )
+    return {
+        "to_create": to_create,
+        "amount_to_bill": amount,
+        "already_billed": billed,
+        "changed": changed,
+        "changed_sample": [
+            {
+                "fee_record_id": row.fee_record_id,
+                "student_id": row.student_id,
+                "usn": row.usn,
+                "total_amount": row.total_amount,
+                "expected_amount": row.expected_amount,
+            }
+            for row in result.all()
+        ],
+    }
+
+
+async def run_billing(
+    db: AsyncSession,
+    academic_year: str,
+    term: str,
+    due_date: date,
+    grade_levels: Optional[List[AcademicYear]] = None,
+    fee_structure_ids: Optional[List[int]] = None,
+    terms_per_year: int = 1,
+    dry_run: bool = False,
+    sample_size: int = 50,
+) -> Dict[str, Any]:
+    """
+    Create fee records for every active student without one for the term.
+
+    Args:
+        db: Database session
+        academic_year: Academic year billed, e.g. 2024-2025
+        term: Term billed, e.g. Fall
+        due_date: Due date of the new records; discounts and aid active on it apply
+        grade_levels: Grade levels to bill (default: all)
+        fee_structure_ids: Restrict the structures considered
+        terms_per_year: Number of terms the annual charge is split over
+        dry_run: Report what would change without writing anything
+        sample_size: Maximum mismatched records listed per grade level in a dry run
+
+    Returns:
+        Per grade level, the structure used and the records created (or, in a
+        dry run, the diff against existing records)
+
+    Raises:
+        ValueError: If the run's parameters are inconsistent
+    """
+    if terms_per_year < 1:
+        raise ValueError("terms_per_year must be at least 1")
+    grade_levels = grade_levels or list(AcademicYear)
+    structures = await _resolve_structures(db, academic_year, grade_levels, fee_structure_ids)
+    charges = await _structure_charges(db, sorted({s.id for s in structures.values()}), due_date)
+
+    report: Dict[str, Any] = {"academic_year": academic_year, "term": term, "dry_run": dry_run, "grades": {}}
+    created_ids: List[int] = []
+    for grade_level in grade_levels:
+        structure = structures.get(grade_level)
+        if structure is None:
+            report["grades"][grade_level.value] = {"fee_structure_id": None, "skipped": "No active fee structure"}
+            continue
+        charge = charges[structure.id]
+        entry: Dict[str, Any] = {"fee_structure_id": structure.id, "annual_charge": charge}
+        if dry_run:
+            entry.update(await _diff(
+                db, grade_level, charge, terms_per_year, academic_year, term, due_date, sample_size
+            ))
+        else:
+            pending = _billing_select(grade_level, charge, terms_per_year, academic_year, term, due_date).subquery()
+            result = await db.execute(
+                insert(FeeRecord).from_select(
+                    ["academic_year", "term", "total_amount", "paid_amount", "balance", "status",
+                     "due_date", "student_id", "fee_structure_id"],
+                    select(
+                        literal(academic_year),
+                        literal(term),
+                        pending.c.total,
+                        literal(0, Money()),
+                        pending.c.total,
+                        literal(PaymentStatus.PENDING, FeeRecord.__table__.c.status.type),
+                        literal(due_date),
+                        pending.c.student_id,
+                        literal(structure.id),
+                    ),
+                ).returning(FeeRecord.id)
+            )
+            ids = result.scalars().all()
+            created_ids.extend(ids)
+            entry["created"] = len(ids)
+        report["grades"][grade_level.value] = entry
+
+    if dry_run:
+        await db.rollback()
+    else:
+        # Opening charges of exactly the records this run created (records
+        # created concurrently, e.g. through the API, carry their own); a
+        # record with nothing to pay gets none
+        occurred_at = datetime.now()
+        for start in range(0, len(created_ids), CHARGE_BATCH_SIZE):
+            await record_charges(
+                db,
+                and_(FeeRecord.id.in_(created_ids[start:start + CHARGE_BATCH_SIZE]), FeeRecord.total_amount > 0),
+                occurred_at,
+                f"Billing run {academic_year} {term}",
+            )
+        await db.commit()
+        logger.info(f"Billing run {academic_year} {term}: created {len(created_ids)} fee records")
+    return report
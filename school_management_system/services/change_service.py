@@ -0,0 +1,281 @@
+"""
+Change data capture: publishing the change_events outbox.
+
+Inserts, updates and deletes on the tables of CHANGE_CAPTURE_TABLES are
+written to the ``change_events`` outbox by session events (see
+``models/change.py``) in the transaction that makes them. The publisher takes
+unpublished events in batches, numbers them with a gap-free sequence and
+hands each batch to the broker and to the subscribers of this process.
+
+Sequences are assigned under a lock on the publisher's checkpoint row, so
+concurrent publishers take turns and a change committed late still gets a
+later sequence than everything published before it. A consumer that
+resumes after the last sequence it saw (``read_changes``, or
+``/api/v1/changes?since=``) misses nothing. The broker receives a batch
+before its sequences commit; if it fails the batch is published again later,
+so brokers may see an event more than once and should drop sequences they
+have seen.
+
+The broker is pluggable: CHANGE_BROKER names a ``ChangeBroker`` subclass by
+import path, or "local" for ``LocalBroker``, an in-process stand-in that
+keeps the latest events in memory.
+"""
+import asyncio
+import importlib
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+from sqlalchemy import bindparam, delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.config import settings
+from school_management_system.models.change import ChangeEvent
+from school_management_system.models.job import JobCheckpoint
+from school_management_system.services.job_service import get_checkpoint, save_checkpoint
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint holding the last published sequence
+PUBLISHER_CHECKPOINT = "changes:publisher"
+# Events kept by the local stand-in broker
+LOCAL_BROKER_SIZE = 10000
+
+
+def event_dict(row, sequence: Optional[int] = None) -> Dict[str, Any]:
+    """
+    A change_events row as published.
+    """
+    return {
+        "sequence": sequence if sequence is not None else row.sequence,
+        "table": row.table_name,
+        "row_id": row.row_id,
+        "operation": row.operation.value,
+        "changes": json.loads(row.changes) if row.changes else None,
+        "created_at": row.created_at,
+    }
+
+
+class ChangeBroker:
+    """
+    Destination of published change events, e.g. a message queue.
+    """
+
+    async def publish(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Deliver a batch of events, in sequence order. Raising makes the
+        publisher retry the batch.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalBroker(ChangeBroker):
+    """
+    In-process stand-in broker keeping the latest LOCAL_BROKER_SIZE events.
+    """
+
+    def __init__(self, max_events: int = LOCAL_BROKER_SIZE):
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+
+    async def publish(self, events: List[Dict[str, Any]]) -> None:
+        self.events.extend(events)
+        logger.debug(f"Published changes {events[0]['sequence']} to {events[-1]['sequence']}")
+
+
+def load_broker(path: Optional[str] = None) -> ChangeBroker:
+    """
+    The broker configured by CHANGE_BROKER.
+
+    Raises:
+        RuntimeError: If the broker class cannot be imported
+    """
+    path = path or settings.CHANGE_BROKER
+    if path == "local":
+        return LocalBroker()
+    module_name, _, class_name = path.partition(":")
+    try:
+        broker_class = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise RuntimeError(f"Cannot load change broker {path}: {e}")
+    return broker_class()
+
+
+# In-process subscribers, called with every batch this process publishes
+Subscriber = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+_subscribers: List[Subscriber] = []
+# Set and replaced whenever this process publishes, waking long polls
+_published = asyncio.Event()
+
+
+def subscribe(subscriber: Subscriber) -> Callable[[], None]:
+    """
+    Call ``subscriber`` with every batch of events this process publishes.
+
+    Returns:
+        A function that unsubscribes it
+    """
+    _subscribers.append(subscriber)
+    return lambda: _subscribers.remove(subscriber) if subscriber in _subscribers else None
+
+
+async def _notify(events: List[Dict[str, Any]]) -> None:
+    global _published
+    for subscriber in list(_subscribers):
+        try:
+            await subscriber(events)
+        except Exception as e:
+            logger.error(f"Change subscriber {subscriber!r} failed: {e}")
+    published, _published = _published, asyncio.Event()
+    published.set()
+
+
+async def wait_for_publish(timeout: float) -> None:
+    """
+    Wait until this process publishes changes, at most ``timeout`` seconds.
+    """
+    try:
+        await asyncio.wait_for(_published.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def publish_changes(db: AsyncSession, broker: ChangeBroker, batch_size: Optional[int] = None) -> int:
+    """
+    Publish one batch of unpublished change events.
+
+    Args:
+        db: Session on the primary database
+        broker: Destination of the batch
+        batch_size: Most events published (default CHANGE_PUBLISH_BATCH_SIZE)
+
+    Returns:
+        Number of events published
+    """
+    checkpoint = await get_checkpoint(db, PUBLISHER_CHECKPOINT)
+    # Writing the checkpoint first locks it (its row on PostgreSQL, the
+    # database on SQLite) until the sequences commit
+    await db.execute(
+        update(JobCheckpoint)
+        .where(JobCheckpoint.id == checkpoint.id)
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.refresh(checkpoint)
+    last_sequence = int(checkpoint.cursor or 0)
+
+    events = ChangeEvent.__table__
+    result = await db.execute(
+        select(events)
+        .where(events.c.sequence.is_(None))
+        .order_by(events.c.id)
+        .limit(batch_size or settings.CHANGE_PUBLISH_BATCH_SIZE)
+    )
+    rows = result.all()
+    if not rows:
+        await db.rollback()
+        return 0
+
+    sequences = range(last_sequence + 1, last_sequence + 1 + len(rows))
+    await db.execute(
+        update(events)
+        .where(events.c.id == bindparam("event_id"))
+        .values(sequence=bindparam("event_sequence"), published_at=datetime.utcnow()),
+        [{"event_id": row.id, "event_sequence": sequence} for row, sequence in zip(rows, sequences)],
+    )
+    batch = [event_dict(row, sequence) for row, sequence in zip(rows, sequences)]
+    try:
+        await broker.publish(batch)
+    except Exception:
+        await db.rollback()
+        raise
+    await save_checkpoint(db, checkpoint, str(sequences[-1]))
+    await _notify(batch)
+    return len(batch)
+
+
+async def read_changes(
+    db: AsyncSession,
+    since: int,
+    limit: int,
+    tables: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Published change events after sequence ``since``, oldest first.
+    """
+    events = ChangeEvent.__table__
+    query = select(events).where(events.c.sequence > since)
+    if tables:
+        query = query.where(events.c.table_name.in_(tables))
+    result = await db.execute(query.order_by(events.c.sequence).limit(limit))
+    return [event_dict(row) for row in result]
+
+
+async def last_sequence(db: AsyncSession) -> int:
+    """
+    Sequence of the latest published change (0 if there is none).
+    """
+    result = await db.execute(select(func.max(ChangeEvent.sequence)))
+    return result.scalar() or 0
+
+
+async def prune_changes(db: AsyncSession, retention_days: Optional[int] = None) -> int:
+    """
+    Delete published events older than CHANGE_RETENTION_DAYS.
+    """
+    days = settings.CHANGE_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    result = await db.execute(
+        delete(ChangeEvent)
+        .where(ChangeEvent.sequence.is_not(None), ChangeEvent.published_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+class ChangePublisher:
+    """
+    Publish captured changes as they are written.
+    """
+
+    def __init__(self, session_factory, broker: Optional[ChangeBroker] = None, batch_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.broker = broker or load_broker()
+        self.batch_size = batch_size or settings.CHANGE_PUBLISH_BATCH_SIZE
+
+    async def publish_pending(self) -> int:
+        """
+        Publish batches until no event is left.
+        """
+        total = 0
+        while True:
+            async with self.session_factory() as db:
+                published = await publish_changes(db, self.broker, self.batch_size)
+            total += published
+            if published < self.batch_size:
+                return total
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None, poll_interval: Optional[float] = None) -> None:
+        """
+        Publish changes until ``stop_event`` is set.
+        """
+        stop_event = stop_event or asyncio.Event()
+        poll_interval = poll_interval or settings.CHANGE_PUBLISH_INTERVAL_SECONDS
+        try:
+            while not stop_event.is_set():
+                try:
+                    await self.publish_pending()
+                except Exception as e:
+                    logger.error(f"Error publishing changes: {e}")
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.broker.close()
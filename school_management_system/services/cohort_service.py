@@ -0,0 +1,310 @@
+"""
+Placement cohort analytics: placement rates and internship conversion of
+students grouped by any combination of branch, year, CGPA band, backlogs and
+the like, and placements and internships per company.
+
+Each report is one grouped query over the students table, so the database
+does the counting and only one row per group comes back. Students can be
+narrowed by any combination of the filters of ``CohortFilter`` first. Unlike
+the analytics store, which reports from the last export, cohorts are read
+live from the database (a replica when there is one).
+
+Results are cached per report, grouping and filter set for
+COHORT_CACHE_SECONDS. Session events clear the cache when a transaction that
+changed a student's cohort fields (placement, internship, CGPA, backlogs,
+branch and year) commits, or ran a bulk statement on the students table. The
+cache is per process, so writes made by other processes show once the
+entries expire.
+"""
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, and_, case, cast, event, extract, func, inspect, literal, union_all
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from school_management_system.config import settings
+from school_management_system.database.session import get_read_session
+from school_management_system.models.student import AcademicYear, EngineeringBranch, Student
+
+logger = logging.getLogger(__name__)
+
+# Internship statuses of students who did an internship
+INTERNED_STATUSES = ("Completed", "Ongoing")
+
+# Grouping columns by name. CGPA bands are whole points (7 holds 7.00 to 7.99)
+COHORT_DIMENSIONS = {
+    "branch": Student.branch,
+    "academic_year": Student.academic_year,
+    "enrollment_year": extract("year", Student.enrollment_date),
+    "cgpa_band": cast(Student.cgpa, Integer),
+    "backlogs": Student.backlogs,
+    "gender": Student.gender,
+    "internship_status": Student.internship_status,
+    "scholarship_status": Student.scholarship_status,
+    "hostel_resident": Student.hostel_resident,
+}
+
+# Student columns the reports read; changing one invalidates the cached results
+COHORT_FIELDS = (
+    "branch", "academic_year", "enrollment_date", "cgpa", "backlogs", "gender", "is_active",
+    "internship_status", "internship_company", "placement_status", "placement_company",
+    "scholarship_status", "hostel_resident",
+)
+
+
+@dataclass(frozen=True)
+class CohortFilter:
+    """
+    Students a report covers. Empty tuples and None leave a field unfiltered;
+    the filter is hashable and keys the result cache.
+    """
+    branches: Tuple[EngineeringBranch, ...] = ()
+    academic_years: Tuple[AcademicYear, ...] = ()
+    enrollment_years: Tuple[int, ...] = ()
+    min_cgpa: Optional[float] = None
+    max_cgpa: Optional[float] = None
+    min_backlogs: Optional[int] = None
+    max_backlogs: Optional[int] = None
+    gender: Optional[str] = None
+    internship_statuses: Tuple[str, ...] = ()
+    scholarship_status: Optional[bool] = None
+    hostel_resident: Optional[bool] = None
+    include_inactive: bool = False
+
+    def conditions(self) -> List[Any]:
+        conditions = []
+        if self.branches:
+            conditions.append(Student.branch.in_(self.branches))
+        if self.academic_years:
+            conditions.append(Student.academic_year.in_(self.academic_years))
+        if self.enrollment_years:
+            conditions.append(COHORT_DIMENSIONS["enrollment_year"].in_(self.enrollment_years))
+        if self.min_cgpa is not None:
+            conditions.append(Student.cgpa >= self.min_cgpa)
+        if self.max_cgpa is not None:
+            conditions.append(Student.cgpa <= self.max_cgpa)
+        if self.min_backlogs is not None:
+            conditions.append(Student.backlogs >= self.min_backlogs)
+        if self.max_backlogs is not None:
+            conditions.append(Student.backlogs <= self.max_backlogs)
+        if self.gender is not None:
+            conditions.append(Student.gender == self.gender)
+        if self.internship_statuses:
+            conditions.append(Student.internship_status.in_(self.internship_statuses))
+        if self.scholarship_status is not None:
+            conditions.append(Student.scholarship_status == self.scholarship_status)
+        if self.hostel_resident is not None:
+            conditions.append(Student.hostel_resident == self.hostel_resident)
+        if not self.include_inactive:
+            conditions.append(Student.is_active == True)
+        return conditions
+
+
+def _count(condition) -> Any:
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _rate(numerator: Optional[int], denominator: Optional[int]) -> Optional[float]:
+    return round(100 * numerator / denominator, 2) if denominator else None
+
+
+_placed = Student.placement_status == "Placed"
+# Students with a placement outcome (final years)
+_eligible = Student.placement_status.is_not(None)
+_interned = Student.internship_status.in_(INTERNED_STATUSES)
+
+
+async def _placement_rates(by: Tuple[str, ...], cohort: CohortFilter) -> List[Dict[str, Any]]:
+    groups = [COHORT_DIMENSIONS[name].label(name) for name in by]
+    query = (
+        select(
+            *groups,
+            func.count().label("students"),
+            _count(_eligible).label("eligible"),
+            _count(_placed).label("placed"),
+            func.avg(Student.cgpa).label("mean_cgpa"),
+            _count(and_(_interned, _eligible)).label("interned"),
+            _count(and_(_interned, _placed)).label("interned_placed"),
+        )
+        .where(*cohort.conditions())
+        .group_by(*groups)
+        .order_by(*groups)
+    )
+    async with get_read_session() as db:
+        result = await db.execute(query)
+    return [{
+        **{name: row._mapping[name] for name in by},
+        "students": row.students,
+        "eligible": row.eligible,
+        "placed": row.placed,
+        "placement_rate": _rate(row.placed, row.eligible),
+        "mean_cgpa": round(row.mean_cgpa, 2) if row.mean_cgpa is not None else None,
+        "interned": row.interned,
+        "interned_placed": row.interned_placed,
+        "conversion_rate": _rate(row.interned_placed, row.interned),
+    } for row in result]
+
+
+async def _companies(cohort: CohortFilter) -> List[Dict[str, Any]]:
+    conditions = cohort.conditions()
+    # One row per placement and per internship, counted by company together
+    events = union_all(
+        select(
+            Student.placement_company.label("company"),
+            literal(1).label("placed"),
+            literal(0).label("interns"),
+            literal(0).label("converted"),
+        ).where(_placed, Student.placement_company.is_not(None), *conditions),
+        select(
+            Student.internship_company.label("company"),
+            literal(0),
+            literal(1),
+            case((and_(_placed, Student.placement_company == Student.internship_company), 1), else_=0),
+        ).where(_interned, Student.internship_company.is_not(None), *conditions),
+    ).subquery()
+    query = (
+        select(
+            events.c.company,
+            func.sum(events.c.placed).label("placed"),
+            func.sum(events.c.interns).label("interns"),
+            func.sum(events.c.converted).label("converted"),
+        )
+        .group_by(events.c.company)
+        .order_by(func.sum(events.c.placed).desc(), events.c.company)
+    )
+    async with get_read_session() as db:
+        result = await db.execute(query)
+    return [{
+        "company": row.company,
+        "placed": row.placed,
+        "interns": row.interns,
+        "converted": row.converted,
+        "conversion_rate": _rate(row.converted, row.interns),
+    } for row in result]
+
+
+class CohortCache:
+    """
+    LRU cache of report results by report, grouping and filter, with a time
+    to live.
+
+    A result computed while an invalidation happened is not stored, since it
+    may have read the data from before the write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Tuple, rows: List[Dict[str, Any]], invalidations: int) -> None:
+        if not self.enabled or invalidations != self.invalidations:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, rows)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.invalidations += 1
+        self.entries.clear()
+
+
+cohort_cache = CohortCache(settings.COHORT_CACHE_SIZE, settings.COHORT_CACHE_SECONDS)
+
+
+async def _cached(key: Tuple, report, *args) -> List[Dict[str, Any]]:
+    rows = cohort_cache.get(key)
+    if rows is None:
+        invalidations = cohort_cache.invalidations
+        rows = await report(*args)
+        cohort_cache.put(key, rows, invalidations)
+    return rows
+
+
+async def placement_rates(by: Tuple[str, ...], cohort: CohortFilter = CohortFilter()) -> List[Dict[str, Any]]:
+    """
+    Placement rate, mean CGPA and internship-to-placement conversion of the
+    students of a cohort, per group.
+
+    The placement rate is over the students with a placement outcome, and
+    the conversion rate is the share of those who did an internship that
+    were placed.
+
+    Args:
+        by: Grouping columns, from COHORT_DIMENSIONS
+        cohort: Students included
+
+    Returns:
+        One dict per group, ordered by the grouping columns
+
+    Raises:
+        ValueError: If a grouping column is unknown
+    """
+    unknown = [name for name in by if name not in COHORT_DIMENSIONS]
+    if not by or unknown:
+        raise ValueError(f"Group by one or more of: {', '.join(COHORT_DIMENSIONS)}")
+    return await _cached(("placement_rates", by, cohort), _placement_rates, by, cohort)
+
+
+async def company_counts(cohort: CohortFilter = CohortFilter()) -> List[Dict[str, Any]]:
+    """
+    Students placed at and interning with each company, and how many interns
+    the company went on to place, most placements first.
+    """
+    return await _cached(("company_counts", cohort), _companies, cohort)
+
+
+# Invalidation. Changes are noted at flush and applied at commit; a rolled
+# back transaction changed nothing.
+
+_PENDING = "cohort_changed"
+
+
+def _changes_cohort(instance) -> bool:
+    state = inspect(instance)
+    return any(state.attrs[name].history.has_changes() for name in COHORT_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_changed_students(session, flush_context):
+    if any(isinstance(instance, Student) for instance in (*session.new, *session.deleted)) or any(
+        isinstance(instance, Student) and _changes_cohort(instance) for instance in session.dirty
+    ):
+        session.info[_PENDING] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_changes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) == Student.__tablename__:
+        orm_execute_state.session.info[_PENDING] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    if session.info.pop(_PENDING, False):
+        cohort_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_PENDING, None)
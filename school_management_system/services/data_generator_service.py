@@ -0,0 +1,660 @@
+"""
+Synthetic data generator for seeding the database at production scale.
+
+Unlike MockDataService, which returns a handful of hard-coded rows for the demo
+UI, this module produces millions of consistent rows (students per branch and
+year, fee records with payments and ledger events, exam results, timetables and
+attendance).
+
+Every row is derived from the seed and the student's global index only, so the
+output is identical regardless of chunk size or the number of worker processes.
+Primary keys are allocated arithmetically from that index, which lets chunks be
+generated independently in a process pool and loaded in any order.
+"""
+import csv
+import datetime
+import io
+import logging
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.engine import Connection, Engine
+
+from school_management_system.database.base import Base
+from school_management_system.models.student import EngineeringBranch, AcademicYear
+from school_management_system.models.exam import ExamType
+from school_management_system.models.ledger import LedgerEventType
+from school_management_system.models.payment import PaymentStatus, PaymentMethod, FeeType
+from school_management_system.models.timetable import DayOfWeek
+
+logger = logging.getLogger(__name__)
+
+# Tables in foreign-key order; chunks are loaded table by table in this order.
+TABLE_ORDER = [
+    "users",
+    "teacher_profiles",
+    "parent_profiles",
+    "subjects",
+    "fee_structures",
+    "fee_items",
+    "exams",
+    "timetables",
+    "timetable_slots",
+    "students",
+    "student_subject",
+    "fee_records",
+    "payments",
+    "ledger_events",
+    "exam_results",
+    "attendance",
+]
+
+TERMS = ["Fall", "Spring"]
+EXAM_TYPES = [ExamType.MIDTERM, ExamType.FINAL]
+WEEKDAYS = [DayOfWeek.MONDAY, DayOfWeek.TUESDAY, DayOfWeek.WEDNESDAY, DayOfWeek.THURSDAY, DayOfWeek.FRIDAY]
+PERIODS = [
+    (datetime.time(9, 0), datetime.time(10, 0)),
+    (datetime.time(10, 15), datetime.time(11, 15)),
+    (datetime.time(11, 30), datetime.time(12, 30)),
+    (datetime.time(13, 30), datetime.time(14, 30)),
+    (datetime.time(14, 45), datetime.time(15, 45)),
+]
+MAX_PAYMENTS_PER_RECORD = 2
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Ananya", "Arjun", "Bhavana", "Chetan", "Deepa",
+    "Divya", "Gaurav", "Harini", "Ishaan", "Kavya", "Karthik", "Lakshmi", "Manoj",
+    "Meera", "Nikhil", "Pooja", "Pranav", "Priya", "Rahul", "Rohan", "Sahana",
+    "Sanjay", "Shreya", "Sneha", "Suresh", "Tanvi", "Varun", "Vikram", "Yamini",
+]
+LAST_NAMES = [
+    "Acharya", "Bhat", "Desai", "Gowda", "Hegde", "Iyer", "Joshi", "Kamath",
+    "Kulkarni", "Kumar", "Menon", "Nair", "Patel", "Pillai", "Rao", "Reddy",
+    "Shah", "Sharma", "Shetty", "Singh", "Srinivasan", "Verma", "Yadav",
+]
+CITIES = ["Bangalore", "Mysore", "Mangalore", "Hubli", "Belgaum", "Chennai", "Hyderabad", "Pune"]
+COMPANIES = ["TechSolutions Inc.", "Infosys", "Wipro", "TCS", "Accenture", "Bosch", "Siemens", "Intel"]
+SUBJECT_TOPICS = [
+    "Engineering Mathematics", "Core Theory", "Design and Analysis",
+    "Systems Laboratory", "Applied Project", "Professional Elective",
+]
+
+# Grade bands as (minimum score, letter), highest first.
+GRADE_BANDS = [(90, "A+"), (80, "A"), (70, "B"), (60, "C"), (50, "D"), (40, "E"), (0, "F")]
+
+# Fee items per structure as (name, type, base amount).
+FEE_ITEMS = [
+    ("Tuition Fee", FeeType.TUITION, 85000.0),
+    ("Laboratory Fee", FeeType.LABORATORY, 15000.0),
+    ("Library Fee", FeeType.LIBRARY, 2000.0),
+    ("Examination Fee", FeeType.EXAMINATION, 3000.0),
+]
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """
+    Parameters controlling the size and shape of the generated data set.
+    """
+    seed: int = 42
+    students_per_group: int = 1000
+    branches: Tuple[EngineeringBranch, ...] = tuple(EngineeringBranch)
+    academic_year: str = "2023-2024"
+    subjects_per_group: int = 6
+    teachers_per_branch: int = 8
+    attendance_days: int = 20
+    user_id_offset: int = 0
+    password_hash: str = ""
+
+    @property
+    def start_year(self) -> int:
+        return int(self.academic_year.split("-")[0])
+
+    @property
+    def group_count(self) -> int:
+        return len(self.branches) * len(AcademicYear)
+
+    @property
+    def total_students(self) -> int:
+        return self.students_per_group * self.group_count
+
+    @property
+    def teacher_count(self) -> int:
+        return len(self.branches) * self.teachers_per_branch
+
+
+def _grade_for(score: float) -> str:
+    for minimum, letter in GRADE_BANDS:
+        if score >= minimum:
+            return letter
+    return "F"
+
+
+def _group_of(config: GeneratorConfig, index: int) -> Tuple[int, int, int]:
+    """
+    Map a global student index to (branch index, year index, position in group).
+    """
+    group, position = divmod(index, config.students_per_group)
+    branch_idx, year_idx = divmod(group, len(AcademicYear))
+    return branch_idx, year_idx, position
+
+
+def _term_start(config: GeneratorConfig, term_idx: int) -> datetime.date:
+    if term_idx == 0:
+        return datetime.date(config.start_year, 8, 1)
+    return datetime.date(config.start_year + 1, 1, 2)
+
+
+@lru_cache(maxsize=8)
+def build_reference_data(config: GeneratorConfig) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Build the shared rows every student refers to: teachers, subjects, fee
+    structures, exams and timetables.
+
+    The result is cached so each worker process builds it only once.
+    """
+    years = list(AcademicYear)
+    rows: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLE_ORDER}
+
+    # Teachers
+    for b, branch in enumerate(config.branches):
+        for t in range(config.teachers_per_branch):
+            profile_id = b * config.teachers_per_branch + t + 1
+            user_id = config.user_id_offset + profile_id
+            rows["users"].append({
+                "id": user_id,
+                "email": f"teacher.{branch.name.lower()}.{t + 1}@seed.example.com",
+                "full_name": f"Prof. {FIRST_NAMES[(b + t) % len(FIRST_NAMES)]} {LAST_NAMES[(b * 3 + t) % len(LAST_NAMES)]}",
+                "hashed_password": config.password_hash,
+                "is_active": True,
+                "is_superuser": False,
+            })
+            rows["teacher_profiles"].append({
+                "id": profile_id,
+                "user_id": user_id,
+                "employee_id": f"EMP{b + 1:02d}{t + 1:03d}",
+                "department": branch.value,
+                "specialization": SUBJECT_TOPICS[t % len(SUBJECT_TOPICS)],
+            })
+
+    # Subjects, timetables and slots per (branch, year)
+    slot_id = 0
+    for b, branch in enumerate(config.branches):
+        for y, year in enumerate(years):
+            group = b * len(years) + y
+            timetable_id = group + 1
+            rows["timetables"].append({
+                "id": timetable_id,
+                "name": f"{branch.name} {year.value} Timetable",
+                "description": f"Timetable for {branch.name} {year.value} students",
+                "academic_year": config.academic_year,
+                "term": TERMS[0],
+                "grade_level": year.value,
+                "section": "A",
+                "is_active": True,
+            })
+            for k in range(config.subjects_per_group):
+                subject_id = group * config.subjects_per_group + k + 1
+                teacher_id = b * config.teachers_per_branch + k % config.teachers_per_branch + 1
+                rows["subjects"].append({
+                    "id": subject_id,
+                    "name": f"{branch.name} {SUBJECT_TOPICS[k % len(SUBJECT_TOPICS)]} {y + 1}",
+                    "code": f"{branch.name}{y + 1}{k + 1:02d}",
+                    "description": f"{SUBJECT_TOPICS[k % len(SUBJECT_TOPICS)]} for {branch.value}",
+                    "grade_level": year.value,
+                    "credits": 4 if k < 4 else 3,
+                    "is_active": True,
+                    "teacher_id": teacher_id,
+                })
+                # Three one-hour slots per subject per week
+                for n in range(3):
+                    position = k * 3 + n
+                    slot_id += 1
+                    start_time, end_time = PERIODS[position // len(WEEKDAYS) % len(PERIODS)]
+                    rows["timetable_slots"].append({
+                        "id": slot_id,
+                        "day": WEEKDAYS[position % len(WEEKDAYS)],
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "room_number": f"{branch.name}-{y + 1}0{k + 1}",
+                        "timetable_id": timetable_id,
+                        "subject_id": subject_id,
+                        "teacher_id": teacher_id,
+                    })
+
+    # Fee structures and items per grade level
+    item_id = 0
+    for y, year in enumerate(years):
+        rows["fee_structures"].append({
+            "id": y + 1,
+            "name": f"{year.value} Fee Structure",
+            "description": f"Fee structure for {year.value} students",
+            "academic_year": config.academic_year,
+            "grade_level": year.value,
+            "is_active": True,
+        })
+        for name, fee_type, amount in FEE_ITEMS:
+            item_id += 1
+            rows["fee_items"].append({
+                "id": item_id,
+                "name": name,
+                "description": f"{name} for {config.academic_year}",
+                "fee_type": fee_type,
+                "amount": amount + 2500.0 * y if fee_type == FeeType.TUITION else amount,
+                "due_date": datetime.date(config.start_year, 8, 15),
+                "is_mandatory": True,
+                "fee_structure_id": y + 1,
+            })
+
+    # Exams per grade level, term and exam type
+    exam_id = 0
+    for y, year in enumerate(years):
+        for term_idx, term in enumerate(TERMS):
+            for e, exam_type in enumerate(EXAM_TYPES):
+                exam_id += 1
+                exam_date = _term_start(config, term_idx) + datetime.timedelta(days=70 + 60 * e)
+                rows["exams"].append({
+                    "id": exam_id,
+                    "name": f"{year.value} {term} {exam_type.value.title()}",
+                    "description": f"{exam_type.value.title()} examination for {year.value}",
+                    "exam_type": exam_type,
+                    "date": exam_date,
+                    "start_time": "09:00",
+                    "end_time": "12:00",
+                    "total_marks": 100.0,
+                    "passing_marks": 40.0,
+                    "grade_level": year.value,
+                    "academic_year": config.academic_year,
+                    "term": term,
+                    "instructions": "Answer all questions.",
+                })
+
+    return rows
+
+
+def _ledger_event(
+    event_id: int,
+    record_id: int,
+    event_type: LedgerEventType,
+    amount: float,
+    occurred_at: datetime.datetime,
+    payment_id: Optional[int],
+    description: Optional[str],
+) -> Dict[str, Any]:
+    paid = event_type == LedgerEventType.PAYMENT
+    return {
+        "id": event_id,
+        "fee_record_id": record_id,
+        "event_type": event_type,
+        "amount": round(amount, 2),
+        "charged_delta": 0.0 if paid else round(amount, 2),
+        "paid_delta": round(amount, 2) if paid else 0.0,
+        "occurred_at": occurred_at,
+        "recorded_at": occurred_at,
+        "payment_id": payment_id,
+        "reverses_event_id": None,
+        "description": description,
+    }
+
+
+def _fee_total(reference: Dict[str, List[Dict[str, Any]]], structure_id: int) -> float:
+    return sum(item["amount"] for item in reference["fee_items"] if item["fee_structure_id"] == structure_id)
+
+
+def generate_student_rows(
+    config: GeneratorConfig, index: int, rows: Dict[str, List[Dict[str, Any]]]
+) -> None:
+    """
+    Append every row owned by the student at ``index`` to ``rows``.
+    """
+    rng = random.Random((config.seed << 32) ^ index)
+    reference = build_reference_data(config)
+    years = list(AcademicYear)
+    branch_idx, year_idx, position = _group_of(config, index)
+    branch = config.branches[branch_idx]
+    year = years[year_idx]
+    group = branch_idx * len(years) + year_idx
+
+    student_id = index + 1
+    parent_user_id = config.user_id_offset + config.teacher_count + student_id
+    ability = min(max(rng.gauss(0.0, 1.0), -2.5), 2.5)
+
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    gender = "Female" if rng.random() < 0.45 else "Male"
+    enroll_year = config.start_year - year_idx
+    city = rng.choice(CITIES)
+    usn_width = max(4, len(str(config.students_per_group)))
+
+    # Parent account and profile
+    rows["users"].append({
+        "id": parent_user_id,
+        "email": f"parent.{student_id}@seed.example.com",
+        "full_name": f"{rng.choice(FIRST_NAMES)} {last_name}",
+        "hashed_password": config.password_hash,
+        "is_active": True,
+        "is_superuser": False,
+    })
+    rows["parent_profiles"].append({
+        "id": student_id,
+        "user_id": parent_user_id,
+        "phone_number": f"{rng.randint(6, 9)}{rng.randint(0, 999999999):09d}",
+        "address": f"{rng.randint(1, 999)} Main Road, {city}",
+    })
+
+    # Student
+    cgpa = round(min(max(7.0 + 1.1 * ability + rng.gauss(0.0, 0.4), 4.0), 10.0), 2)
+    backlogs = 0 if ability > -0.5 else rng.randint(0, 2 + year_idx)
+    is_final = year == AcademicYear.FINAL_YEAR
+    placed = is_final and rng.random() < min(max(0.55 + 0.2 * ability, 0.05), 0.98)
+    internship_status = "Not Started"
+    internship_company = None
+    if year_idx >= 2:
+        internship_status = "Completed" if is_final or rng.random() < 0.4 else "Ongoing"
+        internship_company = rng.choice(COMPANIES)
+    hostel = rng.random() < 0.35
+
+    rows["students"].append({
+        "id": student_id,
+        "first_name": first_name,
+        "last_name": last_name,
+        "date_of_birth": datetime.date(enroll_year - 18, rng.randint(1, 12), rng.randint(1, 28)),
+        "gender": gender,
+        "enrollment_date": datetime.date(enroll_year, 8, 1),
+        "academic_year": year,
+        "branch": branch,
+        "student_id": f"{branch.name}{enroll_year}{position + 1:0{usn_width}d}",
+        "address": f"{rng.randint(1, 999)} College Road, {city}",
+        "phone_number": f"{rng.randint(6, 9)}{rng.randint(0, 999999999):09d}",
+        "email": f"{first_name}.{last_name}.{student_id}@seed.example.com".lower(),
+        "is_active": True,
+        "cgpa": cgpa,
+        "backlogs": backlogs,
+        "internship_company": internship_company,
+        "internship_status": internship_status,
+        "project_title": f"{branch.name} Capstone Project {student_id}" if is_final else None,
+        "project_guide": None,
+        "placement_status": ("Placed" if placed else "Not Placed") if is_final else None,
+        "placement_company": rng.choice(COMPANIES) if placed else None,
+        "scholarship_status": cgpa >= 9.0,
+        "scholarship_details": "Merit Scholarship" if cgpa >= 9.0 else None,
+        "hostel_resident": hostel,
+        "hostel_room_number": f"H{rng.randint(1, 4)}-{rng.randint(100, 450)}" if hostel else None,
+        "parent_id": student_id,
+    })
+
+    subject_ids = [group * config.subjects_per_group + k + 1 for k in range(config.subjects_per_group)]
+    for subject_id in subject_ids:
+        rows["student_subject"].append({"student_id": student_id, "subject_id": subject_id})
+
+    # Fee records and payments, one record per term
+    structure_id = year_idx + 1
+    total = round(_fee_total(reference, structure_id) / len(TERMS), 2)
+    payer_profile = rng.random()
+    for term_idx, term in enumerate(TERMS):
+        record_id = index * len(TERMS) + term_idx + 1
+        due_date = _term_start(config, term_idx) + datetime.timedelta(days=14)
+        if payer_profile < 0.7:
+            paid_amounts = [total] if rng.random() < 0.6 else [round(total / 2, 2), total - round(total / 2, 2)]
+        elif payer_profile < 0.9:
+            paid_amounts = [round(total * rng.choice([0.25, 0.5, 0.75]), 2)]
+        else:
+            paid_amounts = []
+        paid = sum(paid_amounts)
+        balance = round(total - paid, 2)
+        if balance <= 0:
+            status = PaymentStatus.PAID
+        elif paid > 0:
+            status = PaymentStatus.PARTIALLY_PAID
+        else:
+            status = PaymentStatus.PENDING
+        charged_at = datetime.datetime.combine(_term_start(config, term_idx), datetime.time.min)
+        event_id = (record_id - 1) * (MAX_PAYMENTS_PER_RECORD + 1) + 1
+        rows["ledger_events"].append(_ledger_event(
+            event_id, record_id, LedgerEventType.CHARGE, total, charged_at, None, "Term fees"
+        ))
+        rows["fee_records"].append({
+            "id": record_id,
+            "academic_year": config.academic_year,
+            "term": term,
+            "total_amount": total,
+            "paid_amount": paid,
+            "balance": balance,
+            "status": status,
+            "due_date": due_date,
+            "student_id": student_id,
+            "fee_structure_id": structure_id,
+        })
+        for k, amount in enumerate(paid_amounts):
+            payment_id = (record_id - 1) * MAX_PAYMENTS_PER_RECORD + k + 1
+            paid_on = due_date + datetime.timedelta(days=rng.randint(-10, 30 + 30 * k))
+            rows["payments"].append({
+                "id": payment_id,
+                "amount": amount,
+                "payment_date": datetime.datetime.combine(paid_on, datetime.time(rng.randint(9, 17), rng.randint(0, 59))),
+                "payment_method": rng.choice(list(PaymentMethod)),
+                "transaction_id": f"TXN{payment_id:010d}",
+                "receipt_number": f"REC{payment_id:010d}",
+                "notes": "Installment" if len(paid_amounts) > 1 else "Full payment",
+                "fee_record_id": record_id,
+            })
+            rows["ledger_events"].append(_ledger_event(
+                event_id + k + 1, record_id, LedgerEventType.PAYMENT, amount,
+                rows["payments"][-1]["payment_date"], payment_id, None,
+            ))
+
+    # Exam results for every exam of the student's grade level and subject
+    exams = [exam for exam in reference["exams"] if exam["grade_level"] == year.value]
+    results_per_student = len(exams) * config.subjects_per_group
+    result_id = index * results_per_student
+    for exam in exams:
+        for subject_id in subject_ids:
+            result_id += 1
+            score = round(min(max(rng.gauss(68.0 + 12.0 * ability, 9.0), 0.0), 100.0), 1)
+            rows["exam_results"].append({
+                "id": result_id,
+                "score": score,
+                "grade": _grade_for(score),
+                "remarks": None,
+                "exam_date": exam["date"],
+                "student_id": student_id,
+                "exam_id": exam["id"],
+                "subject_id": subject_id,
+            })
+
+    # Attendance: one mark per subject per teaching day
+    attendance_id = index * config.attendance_days * config.subjects_per_group
+    present_rate = min(max(0.86 + 0.05 * ability, 0.5), 0.99)
+    day = _term_start(config, 0)
+    for _ in range(config.attendance_days):
+        while day.weekday() >= 5:
+            day += datetime.timedelta(days=1)
+        for subject_id in subject_ids:
+            attendance_id += 1
+            roll = rng.random()
+            if roll < present_rate:
+                status = "Present"
+            elif roll < present_rate + 0.03:
+                status = "Late"
+            else:
+                status = "Absent"
+            rows["attendance"].append({
+                "id": attendance_id,
+                "date": day,
+                "status": status,
+                "remarks": None,
+                "student_id": student_id,
+                "subject_id": subject_id,
+            })
+        day += datetime.timedelta(days=1)
+
+
+def generate_chunk(config: GeneratorConfig, start: int, stop: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate the rows for students ``start`` (inclusive) to ``stop`` (exclusive).
+    """
+    rows: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLE_ORDER}
+    for index in range(start, stop):
+        generate_student_rows(config, index, rows)
+    return rows
+
+
+def _generate_chunk_task(args: Tuple[GeneratorConfig, int, int]) -> Dict[str, List[Dict[str, Any]]]:
+    config, start, stop = args
+    return generate_chunk(config, start, stop)
+
+
+def iter_chunks(
+    config: GeneratorConfig, chunk_size: int = 2000, workers: int = 1
+) -> Iterator[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Yield generated chunks in student order, using a process pool when
+    ``workers`` is greater than one.
+
+    At most ``2 * workers`` chunks are in flight so memory stays bounded.
+    """
+    tasks = [
+        (config, start, min(start + chunk_size, config.total_students))
+        for start in range(0, config.total_students, chunk_size)
+    ]
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_chunk_task(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = 2 * workers
+        pending = [executor.submit(_generate_chunk_task, task) for task in tasks[:window]]
+        next_task = len(pending)
+        while pending:
+            future = pending.pop(0)
+            if next_task < len(tasks):
+                pending.append(executor.submit(_generate_chunk_task, tasks[next_task]))
+                next_task += 1
+            yield future.result()
+
+
+def _copy_value(value: Any) -> Any:
+    """
+    Convert a Python value to its PostgreSQL COPY (CSV) text form.
+    """
+    if value is None:
+        return None
+    if hasattr(value, "name") and hasattr(value, "value"):
+        # SQLAlchemy Enum columns store the member name
+        return value.name
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+class BulkLoader:
+    """
+    Load generated rows with COPY on PostgreSQL and executemany elsewhere,
+    one transaction per chunk.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.use_copy = engine.dialect.name == "postgresql"
+        self.counts: Dict[str, int] = {name: 0 for name in TABLE_ORDER}
+
+    def load(self, rows_by_table: Dict[str, List[Dict[str, Any]]]) -> None:
+        with self.engine.begin() as conn:
+            for table_name in TABLE_ORDER:
+                rows = rows_by_table.get(table_name)
+                if not rows:
+                    continue
+                if self.use_copy:
+                    self._copy(conn, table_name, rows)
+                else:
+                    conn.execute(Base.metadata.tables[table_name].insert(), rows)
+                self.counts[table_name] += len(rows)
+
+    def _copy(self, conn: Connection, table_name: str, rows: List[Dict[str, Any]]) -> None:
+        columns = list(rows[0].keys())
+        # COPY bypasses SQLAlchemy, so custom types (such as Money) convert their values here
+        table = Base.metadata.tables[table_name]
+        converters = {
+            c: table.c[c].type.process_bind_param for c in columns if isinstance(table.c[c].type, TypeDecorator)
+        }
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            values = (
+                converters[c](row[c], conn.dialect) if c in converters else row[c] for c in columns
+            )
+            writer.writerow(["" if v is None else v for v in (_copy_value(v) for v in values)])
+        buffer.seek(0)
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def reset_sequences(self) -> None:
+        """
+        Move PostgreSQL id sequences past the explicitly assigned primary keys.
+        """
+        if not self.use_copy:
+            return
+        with self.engine.begin() as conn:
+            for table_name in TABLE_ORDER:
+                if "id" not in Base.metadata.tables[table_name].c:
+                    continue
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table_name}), 1))"
+                ))
+
+
+def prepare_config(engine: Engine, config: GeneratorConfig) -> GeneratorConfig:
+    """
+    Check the target database is empty of generated data and offset user ids
+    past any existing accounts (such as the initial superuser).
+    """
+    students = Base.metadata.tables["students"]
+    users = Base.metadata.tables["users"]
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(students)).scalar():
+            raise ValueError("Target database already contains students; seed into an empty database")
+        max_user_id = conn.execute(select(func.max(users.c.id))).scalar() or 0
+    return replace(config, user_id_offset=max_user_id)
+
+
+def seed_database(
+    engine: Engine,
+    config: GeneratorConfig,
+    chunk_size: int = 2000,
+    workers: int = 1,
+    progress: Optional[Any] = None,
+) -> Dict[str, int]:
+    """
+    Generate and load a full data set into ``engine``.
+
+    Returns the number of rows inserted per table.
+    """
+    config = prepare_config(engine, config)
+    loader = BulkLoader(engine)
+    loader.load(build_reference_data(config))
+
+    loaded_students = 0
+    for chunk in iter_chunks(config, chunk_size=chunk_size, workers=workers):
+        loader.load(chunk)
+        loaded_students += len(chunk["students"])
+        if progress:
+            progress(loaded_students, config.total_students)
+
+    loader.reset_sequences()
+    logger.info(f"Seeded {loaded_students} students")
+    return loader.counts
@@ -0,0 +1,173 @@
+"""
+Admission documents: content-addressed storage and thumbnails.
+
+An upload is staged while it streams in (see ``utils.uploads``) and then
+stored under its SHA-256 digest. ``document_blobs`` has one row per stored
+file, so a file uploaded again, by the same or another applicant, only adds
+an ``admission_documents`` row pointing at the existing file.
+
+Thumbnails of image uploads are rendered with Pillow in a process pool,
+after the upload has been answered, so the event loop never decodes images.
+Without Pillow no thumbnails are generated.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.config import settings
+from school_management_system.database.session import AsyncSessionLocal
+from school_management_system.models.admission import AdmissionDocument, DocumentBlob
+from school_management_system.utils.storage import DocumentStorage, content_key, thumbnail_key
+from school_management_system.utils.uploads import StagedUpload
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/tiff", "image/bmp"}
+
+_thumbnail_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_thumbnail_pool() -> ProcessPoolExecutor:
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        _thumbnail_pool = ProcessPoolExecutor(max_workers=settings.DOCUMENT_THUMBNAIL_WORKERS)
+    return _thumbnail_pool
+
+
+def shutdown_thumbnail_pool() -> None:
+    """
+    Stop the thumbnail worker processes, if they were started.
+    """
+    global _thumbnail_pool
+    if _thumbnail_pool is not None:
+        _thumbnail_pool.shutdown(wait=True)
+        _thumbnail_pool = None
+
+
+def render_thumbnail(source_path: str, target_path: str, size: Tuple[int, int] = THUMBNAIL_SIZE) -> bool:
+    """
+    Write a JPEG thumbnail of an image file. Runs in a worker process.
+
+    Returns:
+        False if Pillow is not installed or the file is not a readable image
+    """
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:
+        return False
+    try:
+        with Image.open(source_path) as image:
+            image.draft("RGB", size)  # Lets the JPEG decoder downscale while decoding
+            image.thumbnail(size)
+            image.convert("RGB").save(target_path, "JPEG", quality=80)
+    except (UnidentifiedImageError, OSError):
+        return False
+    return True
+
+
+async def store_upload(
+    db: AsyncSession,
+    storage: DocumentStorage,
+    admission_id: int,
+    staged: StagedUpload,
+    document_type: str,
+    notes: Optional[str] = None,
+) -> Tuple[AdmissionDocument, bool]:
+    """
+    Store a staged upload and record it as a document of an application.
+
+    The staged file is consumed. When a file with the same digest is
+    already stored, the staged copy is discarded.
+
+    Returns:
+        The new document, and whether its file was stored for the first time
+    """
+    key = content_key(staged.sha256)
+    result = await db.execute(select(DocumentBlob.sha256).where(DocumentBlob.sha256 == staged.sha256))
+    is_new = result.scalar() is None
+    if is_new:
+        try:
+            await storage.save(key, staged.path)
+            db.add(DocumentBlob(
+                sha256=staged.sha256,
+                size_bytes=staged.size,
+                content_type=staged.content_type,
+                storage_key=key,
+            ))
+            await db.commit()
+        except IntegrityError:
+            # The same file was stored by a concurrent upload
+            await db.rollback()
+            is_new = False
+    else:
+        os.remove(staged.path)
+
+    document = AdmissionDocument(
+        admission_id=admission_id,
+        document_type=document_type,
+        document_path=key,
+        notes=notes,
+        content_sha256=staged.sha256,
+        original_filename=staged.filename,
+    )
+    db.add(document)
+    await db.flush()
+    await db.refresh(document)
+    # Committing last hands the connection back before the thumbnail task
+    # needs one (SQLite has a single writer connection)
+    await db.commit()
+    logger.info(
+        f"Stored document {document.id} of admission {admission_id} "
+        f"({staged.size} bytes, {'new' if is_new else 'deduplicated'})"
+    )
+    return document, is_new
+
+
+async def generate_thumbnail(storage: DocumentStorage, sha256: str) -> Optional[str]:
+    """
+    Render and store the thumbnail of a stored image file.
+
+    Returns:
+        The thumbnail's storage key, or None when the file is not an image
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(DocumentBlob).where(DocumentBlob.sha256 == sha256))
+        blob = result.scalars().first()
+        if blob is None or blob.thumbnail_key or (blob.content_type or "").lower() not in THUMBNAIL_CONTENT_TYPES:
+            return None
+        storage_key = blob.storage_key
+
+    source_path = storage.local_path(storage_key)
+    fetched = None
+    fd, target_path = tempfile.mkstemp(dir=storage.staging_dir, suffix=".jpg")
+    os.close(fd)
+    try:
+        if source_path is None:
+            fd, fetched = tempfile.mkstemp(dir=storage.staging_dir)
+            os.close(fd)
+            await storage.fetch(storage_key, fetched)
+            source_path = fetched
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(_get_thumbnail_pool(), render_thumbnail, source_path, target_path)
+        if not rendered:
+            return None
+        key = thumbnail_key(sha256)
+        await storage.save(key, target_path)
+    finally:
+        for path in (target_path, fetched):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(DocumentBlob).where(DocumentBlob.sha256 == sha256).values(thumbnail_key=key))
+        await db.commit()
+    return key
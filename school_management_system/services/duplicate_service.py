@@ -0,0 +1,349 @@
+"""
+Duplicate applicants: possible duplicates of an application and clusters of
+the whole applicant pool.
+
+Every application and student has a few blocking keys in ``applicant_keys``
+(see ``utils.matching``), written as records are added or changed. Only
+records sharing a key are compared, so finding the duplicates of one
+application reads a handful of index entries, and clustering the pool
+compares each record with the few others in its blocks instead of with
+everyone.
+
+The clustering job streams the keys in key order, so each block arrives as a
+run of rows. Blocks larger than ``max_block_size`` (a phone number shared by
+a whole hostel, say) carry no information and are skipped. The scored pairs
+are joined into clusters with union-find, and the clusters replace the
+previous contents of ``applicant_matches``.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, exists, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.models.admission import (
+    Admission, ApplicantKey, ApplicantMatch, ApplicantRecordType, applicant_key_rows
+)
+from school_management_system.models.student import Student
+from school_management_system.utils.matching import PersonRecord, blocking_keys, person_record, score_pair
+
+logger = logging.getLogger(__name__)
+
+ADMISSION = ApplicantRecordType.ADMISSION
+STUDENT = ApplicantRecordType.STUDENT
+MODELS = {ADMISSION: Admission, STUDENT: Student}
+
+Record = Tuple[ApplicantRecordType, int]
+
+
+def _person(row) -> PersonRecord:
+    return person_record(row.first_name, row.last_name, row.date_of_birth, row.phone_number, row.email)
+
+
+def _unindexed(record_type: ApplicantRecordType):
+    model = MODELS[record_type]
+    return (
+        select(model.id, model.first_name, model.last_name, model.date_of_birth, model.phone_number, model.email)
+        .where(~exists().where(ApplicantKey.record_type == record_type, ApplicantKey.record_id == model.id))
+    )
+
+
+async def index_missing_keys(db: AsyncSession, record_type: ApplicantRecordType, chunk_size: int = 5000) -> int:
+    """
+    Write the blocking keys of records that have none, such as rows loaded in
+    bulk or created before the index existed.
+
+    Returns:
+        Number of records indexed
+    """
+    model = MODELS[record_type]
+    indexed = 0
+    after_id = 0
+    while True:
+        result = await db.execute(
+            _unindexed(record_type).where(model.id > after_id).order_by(model.id).limit(chunk_size)
+        )
+        records = result.all()
+        if not records:
+            break
+        after_id = records[-1].id
+        rows = applicant_key_rows(record_type, records)
+        if rows:
+            await db.execute(insert(ApplicantKey), rows)
+        await db.commit()
+        indexed += len(records)
+    if indexed:
+        logger.info(f"Indexed the blocking keys of {indexed} {record_type.value} records")
+    return indexed
+
+
+async def index_keys_in_range(db: AsyncSession, record_type: ApplicantRecordType, low: int, high: int) -> int:
+    """
+    Write the blocking keys of the records with ids in ``(low, high]`` that
+    have none, without committing. Used by the ``applicant-keys`` backfill.
+
+    Returns:
+        Number of records indexed
+    """
+    model = MODELS[record_type]
+    result = await db.execute(_unindexed(record_type).where(model.id > low, model.id <= high))
+    records = result.all()
+    rows = applicant_key_rows(record_type, records)
+    if rows:
+        await db.execute(insert(ApplicantKey), rows)
+    return len(records)
+
+
+async def _load_people(db: AsyncSession, record_type: ApplicantRecordType, ids) -> Dict[int, Any]:
+    model = MODELS[record_type]
+    rows = {}
+    ids = list(ids)
+    for start in range(0, len(ids), 500):
+        result = await db.execute(select(model).where(model.id.in_(ids[start:start + 500])))
+        rows.update((record.id, record) for record in result.scalars())
+    return rows
+
+
+async def find_possible_duplicates(
+    db: AsyncSession, admission_id: int, min_score: float = 0.75, limit: int = 20
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Find the applications and students that may be the same person as an
+    application.
+
+    The application's own student (once it has been converted) is not a
+    duplicate and is left out.
+
+    Args:
+        db: Database session
+        admission_id: Application to look up
+        min_score: Lowest score reported
+        limit: Maximum number of matches
+
+    Returns:
+        Matches, best first, with their score, its components and the keys
+        shared with the application; None if the application does not exist
+    """
+    result = await db.execute(select(Admission).where(Admission.id == admission_id))
+    admission = result.scalars().first()
+    if admission is None:
+        return None
+    applicant = _person(admission)
+    keys = dict((key, key_type) for key_type, key in blocking_keys(applicant))
+    if not keys:
+        return []
+
+    result = await db.execute(
+        select(ApplicantKey.record_type, ApplicantKey.record_id, ApplicantKey.key)
+        .where(ApplicantKey.key.in_(list(keys)))
+    )
+    shared: Dict[Record, Set[str]] = {}
+    for record_type, record_id, key in result:
+        shared.setdefault((record_type, record_id), set()).add(keys[key])
+    shared.pop((ADMISSION, admission.id), None)
+    if admission.student_id is not None:
+        shared.pop((STUDENT, admission.student_id), None)
+
+    matches = []
+    for record_type in (ADMISSION, STUDENT):
+        people = await _load_people(db, record_type, [rid for rtype, rid in shared if rtype == record_type])
+        for record_id, record in people.items():
+            score, components = score_pair(applicant, _person(record))
+            if score < min_score:
+                continue
+            matches.append({
+                "record_type": record_type.value,
+                "record_id": record_id,
+                "first_name": record.first_name,
+                "last_name": record.last_name,
+                "date_of_birth": record.date_of_birth,
+                "phone_number": record.phone_number,
+                "email": record.email,
+                "score": score,
+                "components": components,
+                "matched_on": sorted(shared[(record_type, record_id)]),
+            })
+    matches.sort(key=lambda match: (-match["score"], match["record_type"], match["record_id"]))
+    return matches[:limit]
+
+
+async def _load_pool(db: AsyncSession, record_type: ApplicantRecordType, stream_chunk: int) -> Dict[int, PersonRecord]:
+    model = MODELS[record_type]
+    result = await db.stream(
+        select(model.id, model.first_name, model.last_name, model.date_of_birth, model.phone_number, model.email)
+        .execution_options(yield_per=stream_chunk)
+    )
+    return {row.id: _person(row) async for row in result}
+
+
+def _block_pairs(block: List[Record], converted: Dict[int, int]):
+    """
+    The pairs of a block that involve an application, in a canonical order.
+    """
+    for i, a in enumerate(block):
+        for b in block[i + 1:]:
+            if a[0] == ADMISSION and b[0] == ADMISSION:
+                if a[1] != b[1]:
+                    yield (a, b) if a[1] < b[1] else (b, a)
+            elif a[0] == ADMISSION:
+                if converted.get(a[1]) != b[1]:
+                    yield a, b
+            elif b[0] == ADMISSION:
+                if converted.get(b[1]) != a[1]:
+                    yield b, a
+            # Two students are not applicants
+
+
+async def cluster_applicants(
+    db: AsyncSession,
+    min_score: float = 0.8,
+    max_block_size: int = 200,
+    chunk_size: int = 5000,
+    stream_chunk: int = 20000,
+) -> Dict[str, int]:
+    """
+    Cluster every application with the applications and students that are
+    likely the same person, and store the clusters in ``applicant_matches``.
+
+    Args:
+        db: Database session
+        min_score: Lowest score that links two records
+        max_block_size: Blocks with more records than this are skipped
+        chunk_size: Records indexed and matches written per statement
+        stream_chunk: Rows fetched at a time while streaming
+
+    Returns:
+        Counts of indexed records, compared pairs, matches and clusters
+    """
+    report = {
+        "indexed": await index_missing_keys(db, ADMISSION, chunk_size)
+        + await index_missing_keys(db, STUDENT, chunk_size),
+    }
+    people = {
+        ADMISSION: await _load_pool(db, ADMISSION, stream_chunk),
+        STUDENT: await _load_pool(db, STUDENT, stream_chunk),
+    }
+    result = await db.execute(select(Admission.id, Admission.student_id).where(Admission.student_id.isnot(None)))
+    converted = dict(result.all())
+    logger.info(f"Clustering {len(people[ADMISSION])} applications against {len(people[STUDENT])} students")
+
+    pairs: Set[Tuple[Record, Record]] = set()
+    skipped_blocks = 0
+    block: List[Record] = []
+    current_key = None
+
+    def close_block():
+        nonlocal skipped_blocks
+        if len(block) > max_block_size:
+            skipped_blocks += 1
+        elif len(block) > 1:
+            pairs.update(_block_pairs(block, converted))
+
+    result = await db.stream(
+        select(ApplicantKey.key, ApplicantKey.record_type, ApplicantKey.record_id)
+        .order_by(ApplicantKey.key)
+        .execution_options(yield_per=stream_chunk)
+    )
+    async for key, record_type, record_id in result:
+        if key != current_key:
+            close_block()
+            block = []
+            current_key = key
+        block.append((record_type, record_id))
+    close_block()
+    report["candidate_pairs"] = len(pairs)
+    report["skipped_blocks"] = skipped_blocks
+
+    # Union-find over the records linked by a match
+    parent: Dict[Record, Record] = {}
+
+    def find(record: Record) -> Record:
+        root = record
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while record != root:
+            parent[record], record = root, parent.get(record, record)
+        return root
+
+    matches = []
+    for a, b in pairs:
+        first, second = people[a[0]].get(a[1]), people[b[0]].get(b[1])
+        if first is None or second is None:
+            continue  # Keys of a record deleted since it was indexed
+        score, _ = score_pair(first, second)
+        if score < min_score:
+            continue
+        matches.append((a, b, score))
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    # A cluster is named after its lowest application id
+    cluster_ids: Dict[Record, int] = {}
+    for a, _, _ in matches:
+        root = find(a)
+        cluster_ids[root] = min(cluster_ids.get(root, a[1]), a[1])
+
+    now = datetime.utcnow()
+    await db.execute(delete(ApplicantMatch))
+    rows = [
+        {
+            "cluster_id": cluster_ids[find(a)],
+            "admission_id": a[1],
+            "match_type": b[0],
+            "match_id": b[1],
+            "score": score,
+            "computed_at": now,
+        }
+        for a, b, score in matches
+    ]
+    for start in range(0, len(rows), chunk_size):
+        await db.execute(insert(ApplicantMatch), rows[start:start + chunk_size])
+    await db.commit()
+
+    report["matches"] = len(rows)
+    report["clusters"] = len(set(cluster_ids.values()))
+    logger.info(f"Found {report['clusters']} duplicate clusters from {report['matches']} matches")
+    return report
+
+
+async def get_clusters(
+    db: AsyncSession, after_cluster_id: int = 0, limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Read the clusters stored by the clustering job in ``cluster_id`` order.
+
+    Returns:
+        Clusters with their matches; pass the last ``cluster_id`` as
+        ``after_cluster_id`` for the next page
+    """
+    result = await db.execute(
+        select(ApplicantMatch.cluster_id)
+        .where(ApplicantMatch.cluster_id > after_cluster_id)
+        .group_by(ApplicantMatch.cluster_id)
+        .order_by(ApplicantMatch.cluster_id)
+        .limit(limit)
+    )
+    cluster_ids = result.scalars().all()
+    if not cluster_ids:
+        return []
+    result = await db.execute(
+        select(ApplicantMatch)
+        .where(ApplicantMatch.cluster_id.in_(cluster_ids))
+        .order_by(ApplicantMatch.cluster_id, ApplicantMatch.admission_id, ApplicantMatch.id)
+    )
+    clusters: Dict[int, Dict[str, Any]] = {
+        cluster_id: {"cluster_id": cluster_id, "computed_at": None, "matches": []} for cluster_id in cluster_ids
+    }
+    for match in result.scalars():
+        cluster = clusters[match.cluster_id]
+        cluster["computed_at"] = match.computed_at
+        cluster["matches"].append({
+            "admission_id": match.admission_id,
+            "match_type": match.match_type.value,
+            "match_id": match.match_id,
+            "score": match.score,
+        })
+    return list(clusters.values())
@@ -0,0 +1,193 @@
+"""
+Batch job sending reminders to parents for overdue fee records.
+
+The job walks parents in id order, a batch at a time. For each batch it
+streams the overdue fee records of those parents' students, renders one
+reminder per parent and enqueues them with a single multi-row INSERT. The
+batch's last parent id is committed as a checkpoint in the same transaction,
+so an interrupted run resumes where it stopped. Reminders also carry a
+per-day idempotency key. Finally, all past-due unpaid records are flipped to
+OVERDUE in one set-based UPDATE.
+"""
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.models.payment import FeeRecord, PaymentStatus
+from school_management_system.models.report import NotificationTemplate
+from school_management_system.models.student import Student
+from school_management_system.models.user import ParentProfile, User
+from school_management_system.services.job_service import get_checkpoint, save_checkpoint
+from school_management_system.services.notification_service import enqueue_from_template, get_template_by_name
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TEMPLATE_NAME = "fee_reminder"
+
+DEFAULT_REMINDER_SUBJECT = "Fee payment reminder: {{ '%.2f'|format(total_due) }} overdue"
+DEFAULT_REMINDER_BODY = """Dear {{ parent_name }},
+
+The following fees are overdue as of {{ today }}:
+
+{% for item in items -%}
+- {{ item.student_name }} ({{ item.usn }}), {{ item.academic_year }} {{ item.term }}: {{ '%.2f'|format(item.balance) }} (due {{ item.due_date }})
+{% endfor %}
+Total outstanding: {{ '%.2f'|format(total_due) }}
+
+Please make the payment at the earliest to avoid late fees.
+"""
+
+# Fee records in these states are settled and never reminded about
+SETTLED_STATUSES = [PaymentStatus.PAID, PaymentStatus.CANCELLED, PaymentStatus.REFUNDED]
+
+
+async def get_reminder_template(db: AsyncSession) -> NotificationTemplate:
+    """
+    Get the fee reminder template, creating the default one if missing.
+    """
+    template = await get_template_by_name(db, REMINDER_TEMPLATE_NAME)
+    if not template:
+        template = NotificationTemplate(
+            name=REMINDER_TEMPLATE_NAME,
+            description="Reminder for overdue fee records",
+            subject=DEFAULT_REMINDER_SUBJECT,
+            body=DEFAULT_REMINDER_BODY,
+            notification_type="Email",
+            is_active=True,
+        )
+        db.add(template)
+        await db.flush()
+    return template
+
+
+def _overdue_filter(today: date) -> List[Any]:
+    return [FeeRecord.status.notin_(SETTLED_STATUSES), FeeRecord.due_date < today]
+
+
+async def _next_parent_ids(db: AsyncSession, today: date, after: int, limit: int) -> List[int]:
+    """
+    Next ``limit`` parents, in id order, with at least one overdue fee record.
+    """
+    result = await db.execute(
+        select(Student.parent_id)
+        .join(FeeRecord, FeeRecord.student_id == Student.id)
+        .where(Student.parent_id > after, *_overdue_filter(today))
+        .group_by(Student.parent_id)
+        .order_by(Student.parent_id)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def _build_reminders(
+    db: AsyncSession, today: date, parent_ids: List[int], stream_chunk: int
+) -> List[Dict[str, Any]]:
+    """
+    Stream the overdue records of the given parents and group them per parent.
+    """
+    query = (
+        select(
+            ParentProfile.id, User.id, User.full_name,
+            Student.first_name, Student.last_name, Student.student_id,
+            FeeRecord.academic_year, FeeRecord.term, FeeRecord.balance, FeeRecord.due_date,
+        )
+        .join(Student, Student.id == FeeRecord.student_id)
+        .join(ParentProfile, ParentProfile.id == Student.parent_id)
+        .join(User, User.id == ParentProfile.user_id)
+        .where(ParentProfile.id.in_(parent_ids), *_overdue_filter(today))
+        .order_by(ParentProfile.id, Student.id, FeeRecord.due_date)
+        .execution_options(yield_per=stream_chunk)
+    )
+    reminders: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    result = await db.stream(query)
+    async for (parent_id, user_id, parent_name, first_name, last_name, usn,
+               academic_year, term, balance, due_date) in result:
+        if current is None or current["parent_id"] != parent_id:
+            current = {
+                "parent_id": parent_id,
+                "user_id": user_id,
+                "context": {
+                    "parent_name": parent_name or "Parent",
+                    "today": today.isoformat(),
+                    "items": [],
+                    "total_due": Decimal("0.00"),
+                },
+            }
+            reminders.append(current)
+        current["context"]["items"].append({
+            "student_name": f"{first_name} {last_name}",
+            "usn": usn,
+            "academic_year": academic_year,
+            "term": term,
+            "balance": balance or Decimal("0.00"),
+            "due_date": due_date.isoformat(),
+        })
+        current["context"]["total_due"] += balance or Decimal("0.00")
+    return reminders
+
+
+async def run_fee_reminder_job(
+    db: AsyncSession,
+    today: Optional[date] = None,
+    batch_size: int = 2000,
+    stream_chunk: int = 5000,
+) -> Dict[str, int]:
+    """
+    Enqueue reminders for all overdue fee records and mark them OVERDUE.
+
+    Args:
+        db: Database session (primary)
+        today: Reference date; records due before it are overdue
+        batch_size: Parents processed per transaction
+        stream_chunk: Rows fetched per round trip while streaming
+
+    Returns:
+        Counts of parents reminded, fee records covered and records marked overdue
+    """
+    today = today or date.today()
+    checkpoint = await get_checkpoint(db, f"fee_reminders:{today.isoformat()}")
+    stats = {"parents": 0, "fee_records": 0, "marked_overdue": 0}
+    if checkpoint.is_complete:
+        logger.info(f"Fee reminders for {today} already sent")
+        return stats
+
+    template = await get_reminder_template(db)
+    last_parent_id = int(checkpoint.cursor or 0)
+    if last_parent_id:
+        logger.info(f"Resuming fee reminders for {today} after parent {last_parent_id}")
+
+    while True:
+        parent_ids = await _next_parent_ids(db, today, last_parent_id, batch_size)
+        if not parent_ids:
+            break
+        reminders = await _build_reminders(db, today, parent_ids, stream_chunk)
+        await enqueue_from_template(
+            db,
+            template,
+            (
+                (reminder["user_id"], reminder["context"], f"fee_reminder:{today.isoformat()}:{reminder['user_id']}")
+                for reminder in reminders
+            ),
+        )
+        last_parent_id = parent_ids[-1]
+        await save_checkpoint(db, checkpoint, str(last_parent_id))
+        stats["parents"] += len(reminders)
+        stats["fee_records"] += sum(len(reminder["context"]["items"]) for reminder in reminders)
+
+    # Flip every past-due, unsettled record to OVERDUE in one statement
+    result = await db.execute(
+        update(FeeRecord)
+        .where(FeeRecord.status.in_([PaymentStatus.PENDING, PaymentStatus.PARTIALLY_PAID]), FeeRecord.due_date < today)
+        .values(status=PaymentStatus.OVERDUE)
+        .execution_options(synchronize_session=False)
+    )
+    stats["marked_overdue"] = result.rowcount
+    await save_checkpoint(db, checkpoint, str(last_parent_id), is_complete=True)
+    logger.info(f"Fee reminders for {today}: {stats}")
+    return stats
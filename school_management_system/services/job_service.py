@@ -0,0 +1,30 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.models.job import JobCheckpoint
+
+
+async def get_checkpoint(db: AsyncSession, name: str) -> JobCheckpoint:
+    """
+    Get the checkpoint of a job, creating it if the job has not run before.
+    """
+    result = await db.execute(select(JobCheckpoint).where(JobCheckpoint.name == name))
+    checkpoint = result.scalars().first()
+    if not checkpoint:
+        checkpoint = JobCheckpoint(name=name, cursor=None, is_complete=False)
+        db.add(checkpoint)
+        await db.flush()
+    return checkpoint
+
+
+async def save_checkpoint(
+    db: AsyncSession, checkpoint: JobCheckpoint, cursor: Optional[str], is_complete: bool = False
+) -> None:
+    """
+    Record job progress and commit it together with the work done so far.
+    """
+    checkpoint.cursor = cursor
+    checkpoint.is_complete = is_complete
+    await db.commit()
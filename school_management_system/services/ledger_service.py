@@ -0,0 +1,693 @@
+"""
+Append-only ledger of fee record money movements.
+
+Every change to what a fee record charges or what has been paid against it
+is recorded as a ``LedgerEvent``: a charge, payment, refund, discount or a
+reversal of an earlier event. Events are never changed. The ``total_amount``,
+``paid_amount``, ``balance`` and ``status`` columns of ``FeeRecord`` are a
+projection of its events, kept up to date as events are appended.
+
+Point-in-time balances use periodic ``LedgerSnapshot`` rows: at each
+snapshot time ``S``, a row for every fee record changed since the previous
+snapshot and a row of totals over all records. Snapshot rows are derived
+data; when an event is recorded late (it occurred before a snapshot that was
+already taken, e.g. a backdated payment), the next snapshot folds it into the
+earlier rows. So every snapshot covers the events that occurred at or before
+``S`` with ids up to the latest snapshot's ``last_event_id`` (``L``). The
+balance at ``T``, of one record or of all of them, is the latest snapshot row
+``S <= T`` plus the tail of events it does not cover:
+
+- events that occurred in ``(S, T]``, and
+- events recorded since the latest snapshot (``id > L``) that occurred at or
+  before ``S``.
+
+Both parts are index range scans, on ``occurred_at`` and on ``id``, so a
+query reads the events since the snapshot instead of replaying the whole
+history.
+"""
+import logging
+from datetime import datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, bindparam, case, exists, func, insert, literal, not_, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.database.types import Money, to_money
+from school_management_system.models.ledger import LedgerEvent, LedgerEventType, LedgerSnapshot
+from school_management_system.models.payment import FeeRecord, Payment, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+# (charged, paid) multipliers of an event's amount; reversals negate the event they reverse
+EVENT_EFFECTS = {
+    LedgerEventType.CHARGE: (1, 0),
+    LedgerEventType.DISCOUNT: (-1, 0),
+    LedgerEventType.PAYMENT: (0, 1),
+    LedgerEventType.REFUND: (0, -1),
+}
+
+# Statuses set by hand that balance changes do not override
+FINAL_STATUSES = (PaymentStatus.CANCELLED, PaymentStatus.REFUNDED)
+
+
+def apply_to_fee_record(fee_record: FeeRecord, charged_delta: Decimal, paid_delta: Decimal) -> None:
+    """
+    Apply an event's effect to the balance columns and status of a fee record.
+    """
+    total = to_money(fee_record.total_amount) + charged_delta
+    paid = to_money(fee_record.paid_amount) + paid_delta
+    fee_record.total_amount = total
+    fee_record.paid_amount = paid
+    fee_record.balance = total - paid
+    if fee_record.status in FINAL_STATUSES:
+        return
+    if total - paid <= 0:
+        fee_record.status = PaymentStatus.PAID
+    elif paid > 0:
+        fee_record.status = PaymentStatus.PARTIALLY_PAID
+    elif fee_record.status in (PaymentStatus.PAID, PaymentStatus.PARTIALLY_PAID):
+        fee_record.status = PaymentStatus.PENDING
+
+
+def _append(
+    db: AsyncSession,
+    fee_record_id: int,
+    event_type: LedgerEventType,
+    amount: Decimal,
+    charged_delta: Decimal,
+    paid_delta: Decimal,
+    occurred_at: Optional[datetime],
+    payment_id: Optional[int] = None,
+    reverses_event_id: Optional[int] = None,
+    description: Optional[str] = None,
+) -> LedgerEvent:
+    now = datetime.now()
+    ledger_event = LedgerEvent(
+        fee_record_id=fee_record_id,
+        event_type=event_type,
+        amount=amount,
+        charged_delta=charged_delta,
+        paid_delta=paid_delta,
+        occurred_at=occurred_at or now,
+        recorded_at=now,
+        payment_id=payment_id,
+        reverses_event_id=reverses_event_id,
+        description=description,
+    )
+    db.add(ledger_event)
+    return ledger_event
+
+
+def record_event(
+    db: AsyncSession,
+    fee_record: FeeRecord,
+    event_type: LedgerEventType,
+    amount: Any,
+    occurred_at: Optional[datetime] = None,
+    payment_id: Optional[int] = None,
+    description: Optional[str] = None,
+    apply: bool = True,
+) -> LedgerEvent:
+    """
+    Append a charge, discount, payment or refund to a fee record's ledger.
+
+    Args:
+        db: Database session; the event is written with the session's next flush
+        fee_record: Fee record the event belongs to; must have an id
+        event_type: Any event type except REVERSAL (see ``reverse_event``)
+        amount: Positive amount of the event
+        occurred_at: When the money moved (default: now)
+        payment_id: Payment the event records, if any
+        description: Free text shown in the ledger
+        apply: Also update the fee record's balance columns and status; pass
+            False when the caller has already set them. Refunds of more than
+            was paid and discounts of more than is outstanding are refused
+            when applied
+
+    Returns:
+        The new event
+
+    Raises:
+        ValueError: If the event type or amount is invalid, or the amount is
+            more than can be refunded or discounted
+    """
+    if event_type not in EVENT_EFFECTS:
+        raise ValueError(f"Cannot record a {event_type.value} event directly")
+    amount = to_money(amount)
+    if amount <= 0:
+        raise ValueError("Ledger amounts must be positive")
+    if apply:
+        paid = to_money(fee_record.paid_amount)
+        if event_type == LedgerEventType.REFUND and amount > paid:
+            raise ValueError(f"A refund cannot be more than the {paid} paid")
+        outstanding = to_money(fee_record.total_amount) - paid
+        if event_type == LedgerEventType.DISCOUNT and amount > outstanding:
+            raise ValueError(f"A discount cannot be more than the {outstanding} outstanding")
+    charged_sign, paid_sign = EVENT_EFFECTS[event_type]
+    charged_delta, paid_delta = amount * charged_sign, amount * paid_sign
+    if apply:
+        apply_to_fee_record(fee_record, charged_delta, paid_delta)
+    return _append(
+        db, fee_record.id, event_type, amount, charged_delta, paid_delta, occurred_at,
+        payment_id=payment_id, description=description,
+    )
+
+
+def reverse_event(
+    db: AsyncSession,
+    fee_record: Optional[FeeRecord],
+    original: LedgerEvent,
+    description: Optional[str] = None,
+) -> LedgerEvent:
+    """
+    Append a reversal cancelling the effect of an earlier event.
+
+    The reversal takes effect when the original did, so point-in-time
+    balances read as if the original had never happened, while both events
+    stay in the ledger. ``fee_record`` is updated when given.
+    """
+    charged_delta, paid_delta = -original.charged_delta, -original.paid_delta
+    if fee_record is not None:
+        apply_to_fee_record(fee_record, charged_delta, paid_delta)
+    return _append(
+        db, original.fee_record_id, LedgerEventType.REVERSAL, original.amount, charged_delta, paid_delta,
+        original.occurred_at,
+        payment_id=original.payment_id, reverses_event_id=original.id, description=description,
+    )
+
+
+async def reverse_payment(
+    db: AsyncSession, fee_record: Optional[FeeRecord], payment: Payment, description: Optional[str] = None
+) -> LedgerEvent:
+    """
+    Reverse the ledger event of a payment that is being changed or removed.
+
+    Payments made before the ledger was backfilled have no event; they are
+    reversed by their amount and date.
+    """
+    reversed_ids = select(LedgerEvent.reverses_event_id).where(
+        LedgerEvent.payment_id == payment.id,
+        LedgerEvent.reverses_event_id.is_not(None),
+    )
+    result = await db.execute(
+        select(LedgerEvent)
+        .where(
+            LedgerEvent.payment_id == payment.id,
+            LedgerEvent.event_type == LedgerEventType.PAYMENT,
+            LedgerEvent.id.not_in(reversed_ids),
+        )
+        .order_by(LedgerEvent.id.desc())
+        .limit(1)
+    )
+    original = result.scalars().first()
+    if original is not None:
+        return reverse_event(db, fee_record, original, description)
+
+    amount = to_money(payment.amount)
+    if fee_record is not None:
+        apply_to_fee_record(fee_record, Decimal("0.00"), -amount)
+    return _append(
+        db, payment.fee_record_id, LedgerEventType.REVERSAL, amount, Decimal("0.00"), -amount, payment.payment_date,
+        payment_id=payment.id, description=description,
+    )
+
+
+def close_fee_record(db: AsyncSession, fee_record: FeeRecord, description: Optional[str] = None) -> LedgerEvent:
+    """
+    Append a reversal bringing a deleted fee record's totals to zero.
+    """
+    charged, paid = to_money(fee_record.total_amount), to_money(fee_record.paid_amount)
+    return _append(
+        db, fee_record.id, LedgerEventType.REVERSAL, max(abs(charged), abs(paid)), -charged, -paid, None,
+        description=description,
+    )
+
+
+def _event_columns(*columns: Any) -> Dict[str, Any]:
+    return dict(zip(
+        ["fee_record_id", "event_type", "amount", "charged_delta", "paid_delta", "occurred_at", "recorded_at",
+         "payment_id", "description"],
+        columns,
+    ))
+
+
+async def record_charges(db: AsyncSession, condition: Any, occurred_at: datetime, description: str) -> int:
+    """
+    Append a CHARGE for every fee record matching ``condition`` with one
+    INSERT ... SELECT. ``condition`` must select only newly created records.
+
+    Returns:
+        The number of events written
+    """
+    columns = _event_columns(
+        FeeRecord.id,
+        literal(LedgerEventType.CHARGE, LedgerEvent.__table__.c.event_type.type),
+        FeeRecord.total_amount,
+        FeeRecord.total_amount,
+        literal(0, Money()),
+        literal(occurred_at),
+        func.now(),
+        literal(None, LedgerEvent.__table__.c.payment_id.type),
+        literal(description),
+    )
+    result = await db.execute(
+        insert(LedgerEvent).from_select(
+            list(columns),
+            select(*columns.values()).where(condition),
+        )
+    )
+    return result.rowcount
+
+
+async def record_payments(db: AsyncSession, condition: Any, description: Optional[str] = None) -> int:
+    """
+    Append a PAYMENT for every payment matching ``condition`` with one
+    INSERT ... SELECT. ``condition`` must select only newly created payments.
+
+    Returns:
+        The number of events written
+    """
+    columns = _event_columns(
+        Payment.fee_record_id,
+        literal(LedgerEventType.PAYMENT, LedgerEvent.__table__.c.event_type.type),
+        Payment.amount,
+        literal(0, Money()),
+        Payment.amount,
+        Payment.payment_date,
+        func.now(),
+        Payment.id,
+        literal(description),
+    )
+    result = await db.execute(
+        insert(LedgerEvent).from_select(
+            list(columns),
+            select(*columns.values()).where(condition),
+        )
+    )
+    return result.rowcount
+
+
+def _tail(
+    as_of: datetime, snapshot_as_of: Optional[datetime], last_event_id: Optional[int], *conditions: Any
+) -> List[Any]:
+    """
+    Select the events a snapshot does not cover, up to ``as_of``.
+
+    Returns the SELECTs to combine with UNION ALL: a time range scan of the
+    events that occurred since the snapshot, and an id range scan of those
+    recorded since, in which events already counted by the first are zeroed.
+    """
+    columns = (LedgerEvent.fee_record_id, LedgerEvent.charged_delta, LedgerEvent.paid_delta)
+    if snapshot_as_of is None:
+        return [select(*columns).where(LedgerEvent.occurred_at <= as_of, *conditions)]
+    backdated = LedgerEvent.occurred_at <= snapshot_as_of
+    return [
+        select(*columns).where(
+            LedgerEvent.occurred_at > snapshot_as_of, LedgerEvent.occurred_at <= as_of, *conditions
+        ),
+        select(
+            LedgerEvent.fee_record_id,
+            case((backdated, LedgerEvent.charged_delta), else_=0).label("charged_delta"),
+            case((backdated, LedgerEvent.paid_delta), else_=0).label("paid_delta"),
+        ).where(LedgerEvent.id > last_event_id, *conditions),
+    ]
+
+
+async def _latest_totals(db: AsyncSession, as_of: datetime) -> Optional[LedgerSnapshot]:
+    """
+    Get the totals row of the latest snapshot at or before ``as_of``.
+    """
+    result = await db.execute(
+        select(LedgerSnapshot)
+        .where(LedgerSnapshot.fee_record_id.is_(None), LedgerSnapshot.as_of <= as_of)
+        .order_by(LedgerSnapshot.as_of.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def _sum_tail(db: AsyncSession, tail: List[Any]) -> Any:
+    subquery = union_all(*tail).subquery()
+    result = await db.execute(
+        select(func.count(), func.sum(subquery.c.charged_delta), func.sum(subquery.c.paid_delta))
+    )
+    return result.one()
+
+
+async def balance_as_of(db: AsyncSession, fee_record_id: int, as_of: datetime) -> Dict[str, Any]:
+    """
+    Compute a fee record's charged, paid and outstanding amounts at a point in time.
+
+    Args:
+        db: Database session
+        fee_record_id: Fee record ID
+        as_of: Point in time; events that occurred later are ignored
+
+    Returns:
+        The totals, the snapshot they start from and the number of tail events read
+    """
+    snapshot = None
+    totals = await _latest_totals(db, as_of)
+    if totals is not None:
+        result = await db.execute(
+            select(LedgerSnapshot)
+            .where(LedgerSnapshot.fee_record_id == fee_record_id, LedgerSnapshot.as_of <= as_of)
+            .order_by(LedgerSnapshot.as_of.desc())
+            .limit(1)
+        )
+        snapshot = result.scalars().first()
+    charged = to_money(snapshot.charged) if snapshot else Decimal("0.00")
+    paid = to_money(snapshot.paid) if snapshot else Decimal("0.00")
+
+    tail_events, charged_delta, paid_delta = await _sum_tail(db, _tail(
+        as_of,
+        snapshot.as_of if snapshot else None,
+        totals.last_event_id if snapshot else None,
+        LedgerEvent.fee_record_id == fee_record_id,
+    ))
+    charged += to_money(charged_delta)
+    paid += to_money(paid_delta)
+    return {
+        "fee_record_id": fee_record_id,
+        "as_of": as_of,
+        "charged": charged,
+        "paid": paid,
+        "balance": charged - paid,
+        "snapshot_as_of": snapshot.as_of if snapshot else None,
+        "tail_events": tail_events,
+    }
+
+
+async def outstanding_as_of(db: AsyncSession, as_of: datetime) -> Dict[str, Any]:
+    """
+    Compute the amount charged, paid and outstanding over all fee records at a point in time.
+
+    Args:
+        db: Database session
+        as_of: Point in time; events that occurred later are ignored
+
+    Returns:
+        The totals, the snapshot they start from and the number of tail events read
+    """
+    snapshot = await _latest_totals(db, as_of)
+    charged = to_money(snapshot.charged) if snapshot else Decimal("0.00")
+    paid = to_money(snapshot.paid) if snapshot else Decimal("0.00")
+
+    tail_events, charged_delta, paid_delta = await _sum_tail(db, _tail(
+        as_of,
+        snapshot.as_of if snapshot else None,
+        snapshot.last_event_id if snapshot else None,
+    ))
+    charged += to_money(charged_delta)
+    paid += to_money(paid_delta)
+    return {
+        "as_of": as_of,
+        "charged": charged,
+        "paid": paid,
+        "outstanding": charged - paid,
+        "snapshot_as_of": snapshot.as_of if snapshot else None,
+        "tail_events": tail_events,
+    }
+
+
+async def _last_committed_event_id(db: AsyncSession) -> Optional[int]:
+    """
+    Get the highest event id below which every event is committed.
+
+    On PostgreSQL a transaction can commit an id lower than one already
+    visible, so in-flight writers are waited for with a short SHARE lock that
+    is released straight away. SQLite has a single writer, so the highest
+    visible id is enough.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text("LOCK TABLE ledger_events IN SHARE MODE"))
+        result = await db.execute(select(func.max(LedgerEvent.id)))
+        last_event_id = result.scalar()
+        await db.commit()
+        return last_event_id
+    result = await db.execute(select(func.max(LedgerEvent.id)))
+    return result.scalar()
+
+
+async def _fold_late_events(db: AsyncSession, previous: LedgerSnapshot, last_event_id: int) -> int:
+    """
+    Add events recorded since the previous snapshot that occurred before it to
+    the snapshot rows they belong in, and move every snapshot's coverage up to
+    ``last_event_id``.
+
+    Returns:
+        The number of late events
+    """
+    late = LedgerEvent.__table__.alias("late")
+    is_late = and_(
+        late.c.id > previous.last_event_id,
+        late.c.id <= last_event_id,
+        late.c.occurred_at <= previous.as_of,
+    )
+    result = await db.execute(
+        select(late.c.occurred_at, func.sum(late.c.charged_delta), func.sum(late.c.paid_delta))
+        .where(is_late)
+        .group_by(late.c.occurred_at)
+        .order_by(late.c.occurred_at)
+    )
+    late_totals = result.all()
+
+    if late_totals:
+        # Fee record rows at or after each late event
+        def late_sum(column: str) -> Any:
+            return (
+                select(func.coalesce(func.sum(late.c[column]), 0))
+                .where(
+                    is_late,
+                    late.c.fee_record_id == LedgerSnapshot.fee_record_id,
+                    late.c.occurred_at <= LedgerSnapshot.as_of,
+                )
+                .scalar_subquery()
+            )
+
+        await db.execute(
+            update(LedgerSnapshot)
+            .where(
+                LedgerSnapshot.fee_record_id.in_(select(late.c.fee_record_id).where(is_late)),
+                LedgerSnapshot.as_of >= late_totals[0][0],
+                LedgerSnapshot.as_of <= previous.as_of,
+            )
+            .values(
+                charged=LedgerSnapshot.charged + late_sum("charged_delta"),
+                paid=LedgerSnapshot.paid + late_sum("paid_delta"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        # Totals rows, from running sums of the late events
+        result = await db.execute(
+            select(LedgerSnapshot.id, LedgerSnapshot.as_of)
+            .where(
+                LedgerSnapshot.fee_record_id.is_(None),
+                LedgerSnapshot.as_of >= late_totals[0][0],
+                LedgerSnapshot.as_of <= previous.as_of,
+            )
+            .order_by(LedgerSnapshot.as_of)
+        )
+        corrections = []
+        charged = paid = Decimal("0.00")
+        position = 0
+        for snapshot_id, snapshot_as_of in result.all():
+            while position < len(late_totals) and late_totals[position][0] <= snapshot_as_of:
+                charged += to_money(late_totals[position][1])
+                paid += to_money(late_totals[position][2])
+                position += 1
+            corrections.append({"snapshot_id": snapshot_id, "late_charged": charged, "late_paid": paid})
+        snapshots = LedgerSnapshot.__table__
+        await db.execute(
+            update(snapshots)
+            .where(snapshots.c.id == bindparam("snapshot_id"))
+            .values(
+                charged=snapshots.c.charged + bindparam("late_charged"),
+                paid=snapshots.c.paid + bindparam("late_paid"),
+            ),
+            corrections,
+        )
+
+    await db.execute(
+        update(LedgerSnapshot)
+        .where(LedgerSnapshot.fee_record_id.is_(None))
+        .values(last_event_id=last_event_id)
+        .execution_options(synchronize_session=False)
+    )
+    return len(late_totals)
+
+
+async def take_snapshot(db: AsyncSession, as_of: datetime) -> Dict[str, Any]:
+    """
+    Snapshot fee record totals as of a point in time.
+
+    Only the events recorded since the previous snapshot, and those that
+    occurred since, are read. Each fee record they touch gets a row with its
+    latest snapshot row plus its events, written with a single
+    INSERT ... SELECT. Late events are then folded into the earlier
+    snapshots. Snapshots must be taken in time order, one at a time.
+
+    Args:
+        db: Database session
+        as_of: Point in time covered by the snapshot
+
+    Returns:
+        The snapshot's time, last event id, number of records, tail events read
+        and late events folded into earlier snapshots
+
+    Raises:
+        ValueError: If there are no events or ``as_of`` is not after the latest snapshot
+    """
+    result = await db.execute(select(func.max(LedgerSnapshot.as_of)))
+    latest_as_of = result.scalar()
+    if latest_as_of is not None and as_of <= latest_as_of:
+        raise ValueError(f"Ledger snapshots must be taken in order; the latest is as of {latest_as_of}")
+    last_event_id = await _last_committed_event_id(db)
+    if last_event_id is None:
+        raise ValueError("The ledger has no events to snapshot")
+
+    previous = await _latest_totals(db, as_of)
+    tail = _tail(
+        as_of,
+        previous.as_of if previous else None,
+        previous.last_event_id if previous else None,
+        LedgerEvent.id <= last_event_id,
+    )
+    tail_events, charged_delta, paid_delta = await _sum_tail(db, tail)
+
+    # Records touched since the previous snapshot: their latest row plus their tail events
+    tail_records = union_all(*tail).subquery()
+    earlier = LedgerSnapshot.__table__.alias("earlier")
+    latest_rows = select(
+        LedgerSnapshot.fee_record_id,
+        LedgerSnapshot.charged.label("charged_delta"),
+        LedgerSnapshot.paid.label("paid_delta"),
+    ).where(
+        LedgerSnapshot.fee_record_id.in_(select(tail_records.c.fee_record_id)),
+        LedgerSnapshot.as_of == (
+            select(func.max(earlier.c.as_of))
+            .where(earlier.c.fee_record_id == LedgerSnapshot.fee_record_id)
+            .scalar_subquery()
+        ),
+    )
+    totals = union_all(*tail, latest_rows).subquery()
+    result = await db.execute(
+        insert(LedgerSnapshot).from_select(
+            ["fee_record_id", "as_of", "charged", "paid"],
+            select(
+                totals.c.fee_record_id,
+                literal(as_of),
+                func.sum(totals.c.charged_delta),
+                func.sum(totals.c.paid_delta),
+            ).group_by(totals.c.fee_record_id),
+        )
+    )
+    records = result.rowcount
+
+    late_events = 0
+    if previous is not None:
+        previous_charged, previous_paid = to_money(previous.charged), to_money(previous.paid)
+        late_events = await _fold_late_events(db, previous, last_event_id)
+    else:
+        previous_charged = previous_paid = Decimal("0.00")
+    db.add(LedgerSnapshot(
+        fee_record_id=None,
+        as_of=as_of,
+        last_event_id=last_event_id,
+        charged=previous_charged + to_money(charged_delta),
+        paid=previous_paid + to_money(paid_delta),
+    ))
+    await db.commit()
+    logger.info(
+        f"Ledger snapshot as of {as_of}: {records} fee records changed, {tail_events} events, "
+        f"{late_events} late"
+    )
+    return {
+        "as_of": as_of,
+        "last_event_id": last_event_id,
+        "records": records,
+        "tail_events": tail_events,
+        "late_events": late_events,
+    }
+
+
+async def backfill_ledger(db: AsyncSession, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Write opening events for fee records that predate the ledger.
+
+    Each record without events gets a CHARGE of its total, dated at its due
+    date or its first payment if earlier, and a PAYMENT per payment. Where
+    ``paid_amount`` disagrees with the payments, a final PAYMENT or REFUND
+    makes the ledger agree with the record. Every batch is committed, so an
+    interrupted backfill continues where it stopped when run again.
+
+    Returns:
+        The number of fee records and events written
+    """
+    events_table = LedgerEvent.__table__
+    counts = {"fee_records": 0, "events": 0}
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(FeeRecord.id, FeeRecord.total_amount, FeeRecord.paid_amount, FeeRecord.due_date)
+            .where(
+                FeeRecord.id > last_id,
+                not_(exists().where(LedgerEvent.fee_record_id == FeeRecord.id)),
+            )
+            .order_by(FeeRecord.id)
+            .limit(batch_size)
+        )
+        records = result.all()
+        if not records:
+            break
+        last_id = records[-1].id
+
+        result = await db.execute(
+            select(Payment.id, Payment.fee_record_id, Payment.amount, Payment.payment_date)
+            .where(Payment.fee_record_id.in_([record.id for record in records]))
+            .order_by(Payment.fee_record_id, Payment.payment_date, Payment.id)
+        )
+        payments: Dict[int, List[Any]] = {}
+        for payment in result.all():
+            payments.setdefault(payment.fee_record_id, []).append(payment)
+
+        now = datetime.now()
+        rows = []
+        for record in records:
+            record_payments = payments.get(record.id, [])
+            charged_at = datetime.combine(record.due_date, time.min)
+            if record_payments:
+                charged_at = min(charged_at, record_payments[0].payment_date)
+            total = to_money(record.total_amount)
+            rows.append({
+                "fee_record_id": record.id, "event_type": LedgerEventType.CHARGE, "amount": abs(total),
+                "charged_delta": total, "paid_delta": Decimal("0.00"), "occurred_at": charged_at,
+                "recorded_at": now, "payment_id": None, "description": "Opening charge",
+            })
+            paid = Decimal("0.00")
+            for payment in record_payments:
+                amount = to_money(payment.amount)
+                paid += amount
+                rows.append({
+                    "fee_record_id": record.id, "event_type": LedgerEventType.PAYMENT, "amount": amount,
+                    "charged_delta": Decimal("0.00"), "paid_delta": amount, "occurred_at": payment.payment_date,
+                    "recorded_at": now, "payment_id": payment.id, "description": None,
+                })
+            adjustment = to_money(record.paid_amount) - paid
+            if adjustment:
+                rows.append({
+                    "fee_record_id": record.id,
+                    "event_type": LedgerEventType.PAYMENT if adjustment > 0 else LedgerEventType.REFUND,
+                    "amount": abs(adjustment), "charged_delta": Decimal("0.00"), "paid_delta": adjustment,
+                    "occurred_at": record_payments[-1].payment_date if record_payments else charged_at,
+                    "recorded_at": now, "payment_id": None, "description": "Opening balance adjustment",
+                })
+        await db.execute(events_table.insert(), rows)
+        await db.commit()
+        counts["fee_records"] += len(records)
+        counts["events"] += len(rows)
+        logger.info(f"Ledger backfill: {counts['fee_records']} fee records, {counts['events']} events")
+    return counts
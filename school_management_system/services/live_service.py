@@ -0,0 +1,207 @@
+"""
+Live updates: domain events pushed to browser sessions.
+
+Pages subscribe to topics over Server-Sent Events (``/api/v1/live/events``)
+and receive domain events as they happen instead of polling:
+
+    payments  payment.posted     a payment was recorded
+    results   result.published   an exam result was recorded or changed
+    reports   report.finished    a report was run
+
+The events come from the change feed (see ``change_service``). A relay task
+per process follows the feed while anyone is subscribed, turns the captured
+changes into domain events and fans them out through the in-process
+``LiveHub``. Every web worker runs its own relay, so a browser receives the
+events whichever worker it is connected to; one process must run the change
+publisher (CHANGE_PUBLISHER_ENABLED) for events to arrive within about a
+second. The relay reads the next changes only once the last ones were handed
+out, so a burst of writes is absorbed by the feed, not by memory.
+
+Publishing to a connection never waits. Each connection buffers at most
+LIVE_BUFFER_SIZE events; a connection that falls that far behind is sent an
+``overflow`` event and closed, and the browser reconnects and reloads what it
+shows. At most LIVE_MAX_CONNECTIONS connections are served per process.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from school_management_system.config import settings
+from school_management_system.database.session import get_read_session
+from school_management_system.services import change_service
+
+logger = logging.getLogger(__name__)
+
+LIVE_TOPICS = ("payments", "results", "reports")
+
+# Change feed tables the relay reads
+RELAYED_TABLES = ("payments", "exam_results", "reports")
+# Changes read from the feed at a time
+RELAY_BATCH_SIZE = 500
+# How often the relay looks for changes published by other processes
+RELAY_POLL_SECONDS = 1.0
+
+
+def _pick(changes: Optional[Dict[str, Any]], *names: str) -> Dict[str, Any]:
+    return {name: changes[name] for name in names if changes and name in changes}
+
+
+def domain_event(change: Dict[str, Any]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    """
+    The domain event of a captured change as ``(topic, name, data)``, or
+    None if it is of no interest to live pages.
+    """
+    table, operation, changes = change["table"], change["operation"], change["changes"]
+    if table == "payments" and operation == "insert":
+        return "payments", "payment.posted", {
+            "payment_id": change["row_id"],
+            **_pick(changes, "fee_record_id", "amount", "payment_method", "payment_date"),
+        }
+    if table == "exam_results" and operation in ("insert", "update") and change["row_id"] is not None:
+        return "results", "result.published", {
+            "result_id": change["row_id"],
+            **_pick(changes, "student_id", "exam_id", "subject_id", "score"),
+        }
+    if table == "reports" and operation == "update" and changes and changes.get("last_run"):
+        return "reports", "report.finished", {"report_id": change["row_id"], "last_run": changes["last_run"]}
+    return None
+
+
+def sse_frame(name: str, data: Dict[str, Any]) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscription:
+    """
+    A connection's buffer of events, as Server-Sent Events frames, bounded
+    to ``max_events``.
+    """
+
+    def __init__(self, topics: Iterable[str], max_events: int):
+        self.topics: Set[str] = set(topics)
+        self.max_events = max_events
+        self.events: Deque[str] = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def deliver(self, event: str) -> bool:
+        """
+        Buffer an event without waiting; False if the buffer is full.
+        """
+        if len(self.events) >= self.max_events:
+            self.overflowed = True
+            self._ready.set()
+            return False
+        self.events.append(event)
+        self._ready.set()
+        return True
+
+    async def next_events(self, timeout: float) -> List[str]:
+        """
+        The buffered events, waiting up to ``timeout`` seconds for one.
+        """
+        if not self.events and not self.overflowed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._ready.clear()
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+
+class LiveHub:
+    """
+    In-process fan-out of domain events to subscribed connections.
+    """
+
+    def __init__(self, max_connections: int, buffer_size: int):
+        self.max_connections = max_connections
+        self.buffer_size = buffer_size
+        self.subscriptions: Set[Subscription] = set()
+        self.published = 0
+        self.dropped = 0
+        self._relay: Optional[asyncio.Task] = None
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """
+        Subscribe a connection to topics of LIVE_TOPICS.
+
+        Raises:
+            ValueError: If a topic is unknown
+            RuntimeError: If the process serves LIVE_MAX_CONNECTIONS already
+        """
+        topics = list(topics)
+        unknown = [topic for topic in topics if topic not in LIVE_TOPICS]
+        if not topics or unknown:
+            raise ValueError(f"Subscribe to one or more of: {', '.join(LIVE_TOPICS)}")
+        if len(self.subscriptions) >= self.max_connections:
+            raise RuntimeError("Too many live connections; try again later")
+        subscription = Subscription(topics, self.buffer_size)
+        self.subscriptions.add(subscription)
+        if self._relay is None or self._relay.done():
+            self._relay = asyncio.create_task(self._run_relay())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+    def publish(self, topic: str, name: str, data: Dict[str, Any]) -> int:
+        """
+        Hand an event to every subscriber of its topic, dropping the
+        subscribers whose buffer is full.
+
+        Returns:
+            Number of subscribers it was delivered to
+        """
+        # Encoded once, however many connections it goes to
+        event = sse_frame(name, data)
+        delivered = 0
+        for subscription in list(self.subscriptions):
+            if topic not in subscription.topics:
+                continue
+            if subscription.deliver(event):
+                delivered += 1
+            else:
+                self.subscriptions.discard(subscription)
+                self.dropped += 1
+        self.published += 1
+        return delivered
+
+    async def _run_relay(self) -> None:
+        """
+        Follow the change feed from its current end while anyone is subscribed.
+        """
+        try:
+            async with get_read_session() as db:
+                since = await change_service.last_sequence(db)
+            while self.subscriptions:
+                async with get_read_session() as db:
+                    changes = await change_service.read_changes(db, since, RELAY_BATCH_SIZE, RELAYED_TABLES)
+                for change in changes:
+                    event = domain_event(change)
+                    if event is not None:
+                        self.publish(*event)
+                if changes:
+                    since = changes[-1]["sequence"]
+                if len(changes) < RELAY_BATCH_SIZE:
+                    await change_service.wait_for_publish(RELAY_POLL_SECONDS)
+        except Exception as e:
+            # The next subscription starts a new relay
+            logger.error(f"Live relay stopped: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.subscriptions),
+            "max_connections": self.max_connections,
+            "buffered": sum(len(subscription.events) for subscription in self.subscriptions),
+            "published": self.published,
+            "dropped": self.dropped,
+            "relay_running": self._relay is not None and not self._relay.done(),
+        }
+
+
+hub = LiveHub(settings.LIVE_MAX_CONNECTIONS, settings.LIVE_BUFFER_SIZE)
@@ -430,6 +430,7 @@ class MockDataService:
                 "score": 85.0,
                 "grade": "A",
                 "remarks": "Excellent understanding of concepts",
+                "exam_date": datetime.date(2023, 10, 15),
                 "student_id": 1,
                 "exam_id": 1,
                 "subject_id": 1,
@@ -439,6 +440,7 @@ class MockDataService:
                 "score": 78.0,
                 "grade": "B",
                 "remarks": "Good performance, needs improvement in normalization",
+                "exam_date": datetime.date(2023, 10, 17),
                 "student_id": 1,
                 "exam_id": 2,
                 "subject_id": 2,
@@ -448,6 +450,7 @@ class MockDataService:
                 "score": 92.0,
                 "grade": "A+",
                 "remarks": "Outstanding performance",
+                "exam_date": datetime.date(2023, 10, 16),
                 "student_id": 2,
                 "exam_id": 3,
                 "subject_id": 4,
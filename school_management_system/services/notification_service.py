@@ -0,0 +1,330 @@
+"""
+Notification outbox and delivery.
+
+Notifications are rendered and written to the ``notifications`` table (the
+outbox) by whoever needs to notify someone. A dispatcher then claims due rows
+in batches under a time-limited lease, sends them over a pooled SMTP
+connection at a bounded rate, and records the outcome. Failed sends are
+retried with exponential backoff until NOTIFICATION_MAX_ATTEMPTS is reached.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from jinja2 import Environment, StrictUndefined, Template
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.config import settings
+from school_management_system.models.report import Notification, NotificationStatus, NotificationTemplate
+from school_management_system.models.user import User
+from school_management_system.utils.email import SMTPConnectionPool, build_message, get_smtp_pool
+
+logger = logging.getLogger(__name__)
+
+_jinja_env = Environment(undefined=StrictUndefined, autoescape=False)
+_compiled_templates: Dict[Tuple[int, str], Tuple[Template, Template]] = {}
+
+
+def compile_template(template: NotificationTemplate) -> Tuple[Template, Template]:
+    """
+    Get the compiled subject and body of a template.
+
+    Compiled templates are cached per template id and content hash, so editing
+    a template invalidates its cache entry.
+    """
+    digest = hashlib.sha1(f"{template.subject}\0{template.body}".encode("utf-8")).hexdigest()
+    key = (template.id, digest)
+    compiled = _compiled_templates.get(key)
+    if compiled is None:
+        compiled = (_jinja_env.from_string(template.subject), _jinja_env.from_string(template.body))
+        _compiled_templates[key] = compiled
+    return compiled
+
+
+def render_template(template: NotificationTemplate, context: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Render a template's subject and body with the given context.
+    """
+    subject, body = compile_template(template)
+    return subject.render(context), body.render(context)
+
+
+async def get_template_by_name(db: AsyncSession, name: str) -> Optional[NotificationTemplate]:
+    """
+    Get an active notification template by name.
+    """
+    result = await db.execute(
+        select(NotificationTemplate).where(
+            NotificationTemplate.name == name, NotificationTemplate.is_active == True
+        )
+    )
+    return result.scalars().first()
+
+
+async def enqueue_notifications(db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert notifications into the outbox with a single multi-row INSERT.
+
+    Each row needs ``recipient_id``, ``subject``, ``body`` and
+    ``notification_type`` and may carry ``template_id`` and
+    ``idempotency_key``. Rows whose idempotency key already exists are
+    skipped, so enqueueing the same batch twice is harmless.
+
+    Returns:
+        Number of rows handed to the database
+    """
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    values = [
+        {
+            "status": NotificationStatus.PENDING.value,
+            "attempts": 0,
+            "created_at": now,
+            "template_id": None,
+            "idempotency_key": None,
+            **row,
+        }
+        for row in rows
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(Notification).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    elif dialect == "sqlite":
+        statement = sqlite.insert(Notification).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    else:
+        statement = Notification.__table__.insert()
+    await db.execute(statement, values)
+    return len(values)
+
+
+async def enqueue_from_template(
+    db: AsyncSession,
+    template: NotificationTemplate,
+    recipients: Iterable[Tuple[int, Dict[str, Any], Optional[str]]],
+) -> int:
+    """
+    Render a template for each ``(recipient_id, context, idempotency_key)`` and
+    enqueue the results.
+    """
+    rows = []
+    for recipient_id, context, idempotency_key in recipients:
+        subject, body = render_template(template, context)
+        rows.append({
+            "recipient_id": recipient_id,
+            "subject": subject,
+            "body": body,
+            "notification_type": template.notification_type,
+            "template_id": template.id,
+            "idempotency_key": idempotency_key,
+        })
+    return await enqueue_notifications(db, rows)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff for the given number of failed attempts.
+    """
+    return timedelta(seconds=settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+async def claim_batch(
+    db: AsyncSession, batch_size: int, lease_seconds: int
+) -> List[Tuple[int, str, str, str, Optional[str], int]]:
+    """
+    Claim up to ``batch_size`` due email notifications under a lease.
+
+    On PostgreSQL rows are locked with ``FOR UPDATE SKIP LOCKED`` so
+    concurrent dispatchers claim disjoint batches. The lease makes rows held
+    by a crashed dispatcher claimable again once it expires.
+
+    Returns:
+        ``(id, email, subject, body, idempotency_key, attempts)`` per claimed row
+    """
+    now = datetime.utcnow()
+    due = and_(
+        Notification.status.in_([NotificationStatus.PENDING.value, NotificationStatus.SENDING.value]),
+        Notification.notification_type.ilike("email"),
+        or_(Notification.next_attempt_at.is_(None), Notification.next_attempt_at <= now),
+        or_(Notification.locked_until.is_(None), Notification.locked_until < now),
+    )
+    result = await db.execute(
+        select(Notification.id)
+        .where(due)
+        .order_by(Notification.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    ids = result.scalars().all()
+    if not ids:
+        await db.commit()
+        return []
+
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.id.in_(ids), due)
+        .values(
+            status=NotificationStatus.SENDING.value,
+            locked_until=now + timedelta(seconds=lease_seconds),
+        )
+        .returning(Notification.id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed_ids = result.scalars().all()
+    result = await db.execute(
+        select(
+            Notification.id, User.email, Notification.subject, Notification.body,
+            Notification.idempotency_key, Notification.attempts,
+        )
+        .join(User, User.id == Notification.recipient_id)
+        .where(Notification.id.in_(claimed_ids))
+        .order_by(Notification.id)
+    )
+    claimed = [tuple(row) for row in result.all()]
+    await db.commit()
+    return claimed
+
+
+class RateLimiter:
+    """
+    Token bucket limiting sends to ``rate`` per second with bursts up to ``burst``.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(int(rate), 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class NotificationDispatcher:
+    """
+    Deliver outbox notifications by email.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        smtp_pool: Optional[SMTPConnectionPool] = None,
+        batch_size: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.smtp_pool = smtp_pool or get_smtp_pool(settings.SMTP_POOL_SIZE)
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.lease_seconds = lease_seconds or settings.NOTIFICATION_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+        self.rate_limiter = RateLimiter(rate_per_second or settings.NOTIFICATION_RATE_PER_SECOND)
+
+    async def _send(self, notification_id: int, email: str, subject: str, body: str,
+                    idempotency_key: Optional[str]) -> Optional[str]:
+        """
+        Send one message; returns the error text, or None on success.
+        """
+        if not email:
+            return "Recipient has no email address"
+        await self.rate_limiter.acquire()
+        # A Message-ID derived from the idempotency key lets receiving servers
+        # drop duplicates when a send is retried after an ambiguous failure
+        key = idempotency_key or f"notification-{notification_id}"
+        domain = (settings.EMAILS_FROM_EMAIL or "localhost").rsplit("@", 1)[-1]
+        message_id = f"<{hashlib.sha1(key.encode('utf-8')).hexdigest()}@{domain}>"
+        try:
+            await self.smtp_pool.send(build_message(email, subject, body, message_id=message_id))
+        except Exception as e:
+            return str(e) or e.__class__.__name__
+        return None
+
+    async def dispatch_batch(self) -> int:
+        """
+        Claim and deliver one batch.
+
+        Returns:
+            Number of notifications claimed
+        """
+        async with self.session_factory() as db:
+            claimed = await claim_batch(db, self.batch_size, self.lease_seconds)
+        if not claimed:
+            return 0
+
+        errors = await asyncio.gather(*(self._send(*row[:5]) for row in claimed))
+
+        now = datetime.utcnow()
+        sent_ids = [row[0] for row, error in zip(claimed, errors) if error is None]
+        async with self.session_factory() as db:
+            if sent_ids:
+                await db.execute(
+                    update(Notification)
+                    .where(Notification.id.in_(sent_ids))
+                    .values(
+                        status=NotificationStatus.SENT.value,
+                        sent_at=now,
+                        locked_until=None,
+                        last_error=None,
+                        attempts=Notification.attempts + 1,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            for row, error in zip(claimed, errors):
+                if error is None:
+                    continue
+                attempts = row[5] + 1
+                exhausted = attempts >= self.max_attempts
+                await db.execute(
+                    update(Notification)
+                    .where(Notification.id == row[0])
+                    .values(
+                        status=(NotificationStatus.FAILED if exhausted else NotificationStatus.PENDING).value,
+                        attempts=attempts,
+                        next_attempt_at=None if exhausted else now + retry_delay(attempts),
+                        locked_until=None,
+                        last_error=error[:1000],
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+        failed = len(claimed) - len(sent_ids)
+        if failed:
+            logger.warning(f"{failed} of {len(claimed)} notifications failed and were rescheduled")
+        return len(claimed)
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None, poll_interval: float = 5.0) -> None:
+        """
+        Deliver notifications until ``stop_event`` is set.
+        """
+        stop_event = stop_event or asyncio.Event()
+        try:
+            while not stop_event.is_set():
+                try:
+                    claimed = await self.dispatch_batch()
+                except Exception as e:
+                    logger.error(f"Error dispatching notifications: {e}")
+                    claimed = 0
+                if claimed < self.batch_size:
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self.smtp_pool.close()
@@ -0,0 +1,800 @@
+"""
+Batched read queries: a small JSON query language over the models, resolved
+with per-request loaders.
+
+A query names root collections and, for each, the fields to return. A field
+that is a relationship takes its own selection, to any depth up to
+``QUERY_MAX_DEPTH``::
+
+    {"students": {"args": {"where": {"branch": "$branch"}, "limit": 20},
+                  "fields": ["id", "first_name",
+                             {"subjects": {"fields": ["code", {"teacher": {"fields": ["id"]}}]}}]}}
+
+Queries are resolved one level at a time. Each relationship in a query is
+fetched with a single statement for all the parent rows of its level (``IN``
+over the parent keys, with a window function applying the per-parent limit
+of to-many relationships), so a query costs one statement per root and per
+relationship it names, however many rows each level returns. Rows read by
+primary key are kept for the rest of the request, and a relationship leading
+to rows already loaded (teachers reached from two paths, say) does not query
+again.
+
+Before anything runs, a query is checked against the registered types and its
+complexity, the most rows it can return given the limits of every level, is
+capped at ``QUERY_MAX_COMPLEXITY``. Checked queries are kept in a plan cache
+keyed by the SHA-256 of their canonical JSON. Queries registered in
+``persisted_queries`` are executed by id or name, so hot dashboard queries
+skip parsing and validation altogether.
+"""
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Enum, func, inspect, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm.interfaces import MANYTOMANY, MANYTOONE
+
+from school_management_system.config import settings
+from school_management_system.models.admission import Admission
+from school_management_system.models.exam import Exam, ExamResult
+from school_management_system.models.payment import FeeRecord, Payment
+from school_management_system.models.query import PersistedQuery
+from school_management_system.models.student import Attendance, Student, StudentProgress
+from school_management_system.models.subject import Subject
+from school_management_system.models.timetable import Timetable, TimetableSlot
+from school_management_system.models.user import ParentProfile, TeacherProfile, User
+
+logger = logging.getLogger(__name__)
+
+# Bound parameters per IN list; larger key sets are loaded in several statements
+IN_CHUNK_SIZE = 2000
+
+OPERATORS = {
+    "eq": lambda column, value: column.is_(None) if value is None else column == value,
+    "ne": lambda column, value: column.isnot(None) if value is None else column != value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "in": lambda column, value: column.in_(value),
+}
+
+
+class QueryError(ValueError):
+    """
+    A query that does not fit the schema, its variables or the limits.
+    """
+
+
+@dataclass
+class Relation:
+    """
+    A relationship between two query types, reduced to the columns a batched
+    load joins on.
+    """
+    name: str
+    target: "QueryType"
+    to_many: bool
+    parent_key: str  # Field of the parent rows holding the join value
+    child_column: Any  # Column of the target (or association) table matched against it
+    by_primary_key: bool  # Many-to-one onto the target's primary key
+    secondary: Any = None  # Association table of a many-to-many relationship
+    secondaryjoin: Any = None
+
+
+@dataclass
+class QueryType:
+    """
+    A model exposed to queries, with the columns and relationships it offers.
+    """
+    name: str
+    model: Any
+    exclude: Tuple[str, ...] = ()
+    columns: Dict[str, Any] = field(default_factory=dict)
+    relations: Dict[str, Relation] = field(default_factory=dict)
+
+    def __post_init__(self):
+        mapper = inspect(self.model)
+        self.table = mapper.local_table
+        self.columns = {
+            prop.key: prop.columns[0] for prop in mapper.column_attrs if prop.key not in self.exclude
+        }
+        self.primary_key = mapper.get_property_by_column(mapper.primary_key[0]).key
+        self.select_columns = [column.label(key) for key, column in self.columns.items()]
+
+    def field_for(self, column) -> Optional[str]:
+        for key, candidate in self.columns.items():
+            if candidate is column:
+                return key
+        return None
+
+
+QUERY_TYPES: Dict[str, QueryType] = {
+    query_type.name: query_type
+    for query_type in (
+        QueryType("Student", Student),
+        QueryType("Subject", Subject),
+        QueryType("Teacher", TeacherProfile),
+        QueryType("Parent", ParentProfile),
+        QueryType("User", User, exclude=("hashed_password",)),
+        QueryType("Timetable", Timetable),
+        QueryType("TimetableSlot", TimetableSlot),
+        QueryType("Exam", Exam),
+        QueryType("ExamResult", ExamResult),
+        QueryType("Attendance", Attendance),
+        QueryType("ProgressNote", StudentProgress),
+        QueryType("FeeRecord", FeeRecord),
+        QueryType("Payment", Payment),
+        QueryType("Admission", Admission),
+    )
+}
+
+ROOT_FIELDS = {
+    "students": "Student",
+    "subjects": "Subject",
+    "teachers": "Teacher",
+    "parents": "Parent",
+    "users": "User",
+    "timetables": "Timetable",
+    "timetable_slots": "TimetableSlot",
+    "exams": "Exam",
+    "exam_results": "ExamResult",
+    "attendance": "Attendance",
+    "progress_notes": "ProgressNote",
+    "fee_records": "FeeRecord",
+    "payments": "Payment",
+    "admissions": "Admission",
+}
+
+
+def _register_relations() -> None:
+    """
+    Expose the relationships between registered models that join on a single
+    column. Relationships to models outside the registry are left out.
+    """
+    by_model = {query_type.model: query_type for query_type in QUERY_TYPES.values()}
+    for query_type in QUERY_TYPES.values():
+        for prop in inspect(query_type.model).relationships:
+            target = by_model.get(prop.mapper.class_)
+            if target is None or len(prop.synchronize_pairs) != 1:
+                continue
+            source, dest = prop.synchronize_pairs[0]
+            if prop.direction is MANYTOONE:
+                parent_key, child_column = query_type.field_for(dest), source
+            else:
+                parent_key, child_column = query_type.field_for(source), dest
+            if parent_key is None:
+                continue
+            query_type.relations[prop.key] = Relation(
+                name=prop.key,
+                target=target,
+                to_many=bool(prop.uselist),
+                parent_key=parent_key,
+                child_column=child_column,
+                by_primary_key=prop.direction is MANYTOONE and target.field_for(child_column) == target.primary_key,
+                secondary=prop.secondary if prop.direction is MANYTOMANY else None,
+                secondaryjoin=prop.secondaryjoin if prop.direction is MANYTOMANY else None,
+            )
+
+
+_register_relations()
+
+
+def describe_schema() -> Dict[str, Any]:
+    """
+    The root fields and types a query can use.
+    """
+    return {
+        "roots": dict(ROOT_FIELDS),
+        "types": {
+            name: {
+                "fields": list(query_type.columns),
+                "relations": {
+                    relation.name: {"type": relation.target.name, "many": relation.to_many}
+                    for relation in query_type.relations.values()
+                },
+            }
+            for name, query_type in QUERY_TYPES.items()
+        },
+    }
+
+
+# Query plans
+
+@dataclass(frozen=True)
+class Variable:
+    name: str
+
+
+@dataclass
+class Arguments:
+    ids: Any = None
+    where: List[Tuple[str, str, Any]] = field(default_factory=list)
+    order_by: List[Tuple[str, bool]] = field(default_factory=list)  # (field, descending)
+    limit: Any = None
+    after_id: Any = None
+
+
+@dataclass
+class Selection:
+    query_type: QueryType
+    fields: List[str]
+    relations: List["RelationSelection"]
+
+
+@dataclass
+class RelationSelection:
+    alias: str
+    relation: Relation
+    args: Arguments
+    selection: Selection
+
+
+@dataclass
+class RootSelection:
+    alias: str
+    query_type: QueryType
+    args: Arguments
+    selection: Selection
+
+
+@dataclass
+class QueryPlan:
+    id: str
+    roots: List[RootSelection]
+    complexity: Optional[int]  # None when it depends on variables
+    variables: List[str]
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith("$"):
+        return Variable(value[1:])
+    return value
+
+
+def _spec(path: str, spec: Any) -> Dict[str, Any]:
+    if not isinstance(spec, dict):
+        raise QueryError(f"{path}: expected an object with 'fields'")
+    unknown = set(spec) - {"field", "args", "fields"}
+    if unknown:
+        raise QueryError(f"{path}: unknown keys {sorted(unknown)}")
+    return spec
+
+
+def _parse_args(query_type: QueryType, args: Any, path: str, allowed: Tuple[str, ...]) -> Arguments:
+    if not isinstance(args, dict):
+        raise QueryError(f"{path}: args must be an object")
+    unknown = set(args) - set(allowed)
+    if unknown:
+        raise QueryError(f"{path}: unsupported args {sorted(unknown)}; expected some of {list(allowed)}")
+    parsed = Arguments()
+
+    if "ids" in args:
+        ids = _value(args["ids"])
+        if not isinstance(ids, (list, Variable)):
+            raise QueryError(f"{path}: ids must be a list")
+        if isinstance(ids, list) and len(ids) > settings.QUERY_MAX_LIMIT:
+            raise QueryError(f"{path}: at most {settings.QUERY_MAX_LIMIT} ids")
+        parsed.ids = ids
+
+    where = args.get("where", {})
+    if not isinstance(where, dict):
+        raise QueryError(f"{path}: where must be an object")
+    for name, condition in where.items():
+        if name not in query_type.columns:
+            raise QueryError(f"{path}: {query_type.name} has no field '{name}'")
+        if isinstance(condition, dict):
+            for op, value in condition.items():
+                if op not in OPERATORS:
+                    raise QueryError(f"{path}: unknown operator '{op}' on '{name}'; expected one of {list(OPERATORS)}")
+                parsed.where.append((name, op, _value(value)))
+        elif isinstance(condition, list):
+            parsed.where.append((name, "in", condition))
+        else:
+            parsed.where.append((name, "eq", _value(condition)))
+
+    order_by = args.get("order_by", [])
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    for item in order_by:
+        name = item.lstrip("-") if isinstance(item, str) else None
+        if name not in query_type.columns:
+            raise QueryError(f"{path}: cannot order {query_type.name} by '{item}'")
+        parsed.order_by.append((name, item.startswith("-")))
+
+    if "limit" in args:
+        parsed.limit = _value(args["limit"])
+        if not isinstance(parsed.limit, Variable):
+            _check_limit(parsed.limit, path)
+    if "after_id" in args:
+        parsed.after_id = _value(args["after_id"])
+    return parsed
+
+
+def _check_limit(limit: Any, path: str) -> int:
+    if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= settings.QUERY_MAX_LIMIT:
+        raise QueryError(f"{path}: limit must be between 1 and {settings.QUERY_MAX_LIMIT}")
+    return limit
+
+
+def _parse_selection(query_type: QueryType, fields: Any, path: str, depth: int) -> Selection:
+    if depth > settings.QUERY_MAX_DEPTH:
+        raise QueryError(f"{path}: queries nest at most {settings.QUERY_MAX_DEPTH} levels")
+    if not isinstance(fields, list) or not fields:
+        raise QueryError(f"{path}: fields must be a non-empty list")
+    selection = Selection(query_type, [], [])
+    aliases = set()
+    for item in fields:
+        if isinstance(item, str):
+            if item in query_type.relations:
+                raise QueryError(f"{path}: '{item}' is a relationship and needs its own fields")
+            if item not in query_type.columns:
+                raise QueryError(f"{path}: {query_type.name} has no field '{item}'")
+            if item not in aliases:
+                aliases.add(item)
+                selection.fields.append(item)
+            continue
+        if not isinstance(item, dict):
+            raise QueryError(f"{path}: fields are names or relationship objects")
+        for alias, spec in item.items():
+            spec = _spec(f"{path}.{alias}", spec)
+            name = spec.get("field", alias)
+            relation = query_type.relations.get(name)
+            if relation is None:
+                raise QueryError(f"{path}: {query_type.name} has no relationship '{name}'")
+            if alias in aliases:
+                raise QueryError(f"{path}: '{alias}' is selected twice")
+            aliases.add(alias)
+            allowed = ("where", "order_by", "limit") if relation.to_many else ()
+            selection.relations.append(RelationSelection(
+                alias=alias,
+                relation=relation,
+                args=_parse_args(relation.target, spec.get("args", {}), f"{path}.{alias}", allowed),
+                selection=_parse_selection(relation.target, spec.get("fields"), f"{path}.{alias}", depth + 1),
+            ))
+    return selection
+
+
+def _bound(limit: Any, variables: Optional[Dict[str, Any]], path: str) -> Optional[int]:
+    if isinstance(limit, Variable):
+        if variables is None:
+            return None
+        return _check_limit(variables.get(limit.name), path)
+    return limit or settings.QUERY_DEFAULT_LIMIT
+
+
+def _cost(selection: Selection, rows: int, variables: Optional[Dict[str, Any]], path: str) -> Optional[int]:
+    """
+    Most rows a selection can return when it is applied to ``rows`` parents.
+    """
+    total = rows
+    for child in selection.relations:
+        per_parent = 1
+        if child.relation.to_many:
+            per_parent = _bound(child.args.limit, variables, f"{path}.{child.alias}")
+            if per_parent is None:
+                return None
+        cost = _cost(child.selection, rows * per_parent, variables, f"{path}.{child.alias}")
+        if cost is None:
+            return None
+        total += cost
+    return total
+
+
+def query_complexity(roots: List[RootSelection], variables: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Most rows the roots can return given the limits of every level.
+
+    Returns:
+        The row count, or None if a limit is a variable and no variables are given
+    """
+    total = 0
+    for root in roots:
+        rows = _bound(root.args.limit, variables, root.alias)
+        ids = root.args.ids
+        if isinstance(ids, Variable) and variables is not None:
+            ids = variables.get(ids.name)
+        if rows is not None and isinstance(ids, list):
+            rows = min(rows, len(ids))
+        cost = None if rows is None else _cost(root.selection, rows, variables, root.alias)
+        if cost is None:
+            return None
+        total += cost
+    return total
+
+
+def _check_complexity(complexity: int) -> None:
+    if complexity > settings.QUERY_MAX_COMPLEXITY:
+        raise QueryError(
+            f"Query may return {complexity} rows, more than the limit of {settings.QUERY_MAX_COMPLEXITY}; "
+            f"lower the limits of its to-many relationships"
+        )
+
+
+def _variables(value: Any, found: set) -> None:
+    if isinstance(value, Variable):
+        found.add(value.name)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _variables(item, found)
+    elif isinstance(value, Arguments):
+        _variables([value.ids, value.limit, value.after_id] + [condition[2] for condition in value.where], found)
+
+
+def canonical_json(document: Any) -> str:
+    return json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def query_hash(document: Any) -> str:
+    return hashlib.sha256(canonical_json(document).encode("utf-8")).hexdigest()
+
+
+def compile_query(document: Any, plan_id: Optional[str] = None) -> QueryPlan:
+    """
+    Check a query document and turn it into a plan.
+
+    Raises:
+        QueryError: If the document does not fit the schema or the limits
+    """
+    if not isinstance(document, dict) or not document:
+        raise QueryError("A query names at least one root field")
+    roots = []
+    found: set = set()
+    for alias, spec in document.items():
+        spec = _spec(alias, spec)
+        name = spec.get("field", alias)
+        if name not in ROOT_FIELDS:
+            raise QueryError(f"Unknown root field '{name}'; expected one of {sorted(ROOT_FIELDS)}")
+        query_type = QUERY_TYPES[ROOT_FIELDS[name]]
+        args = _parse_args(query_type, spec.get("args", {}), alias, ("ids", "where", "order_by", "limit", "after_id"))
+        root = RootSelection(alias, query_type, args, _parse_selection(query_type, spec.get("fields"), alias, 1))
+        roots.append(root)
+
+        pending = [root.args]
+        stack = [root.selection]
+        while stack:
+            selection = stack.pop()
+            for child in selection.relations:
+                pending.append(child.args)
+                stack.append(child.selection)
+        for arguments in pending:
+            _variables(arguments, found)
+
+    # Limits given as variables are checked when the query runs
+    complexity = query_complexity(roots)
+    if complexity is not None:
+        _check_complexity(complexity)
+    return QueryPlan(id=plan_id or query_hash(document), roots=roots, complexity=complexity, variables=sorted(found))
+
+
+class PlanCache:
+    """
+    Checked query plans by query hash, least recently used evicted first.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+
+    def get(self, plan_id: str) -> Optional[QueryPlan]:
+        plan = self._plans.get(plan_id)
+        if plan is not None:
+            self._plans.move_to_end(plan_id)
+        return plan
+
+    def put(self, plan: QueryPlan) -> None:
+        if self.max_entries <= 0:
+            return
+        self._plans[plan.id] = plan
+        self._plans.move_to_end(plan.id)
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        self._plans.clear()
+
+
+plan_cache = PlanCache(settings.QUERY_PLAN_CACHE_SIZE)
+
+
+def get_plan(document: Any) -> QueryPlan:
+    """
+    The plan of a query document, from the plan cache when it has been seen.
+    """
+    plan_id = query_hash(document)
+    plan = plan_cache.get(plan_id)
+    if plan is None:
+        plan = compile_query(document, plan_id)
+        plan_cache.put(plan)
+    return plan
+
+
+# Persisted queries
+
+async def register_persisted_query(db: AsyncSession, document: Any, name: Optional[str] = None) -> PersistedQuery:
+    """
+    Check a query document and store it for execution by id.
+
+    Registering the same document again returns the stored query. A name
+    already given to another document moves to this one, so a dashboard can
+    keep its name across versions of its query.
+
+    Raises:
+        QueryError: If the document does not fit the schema or the limits
+    """
+    plan = get_plan(document)
+    result = await db.execute(select(PersistedQuery).where(PersistedQuery.id == plan.id))
+    persisted = result.scalars().first()
+    if name is not None:
+        await db.execute(
+            update(PersistedQuery)
+            .where(PersistedQuery.name == name, PersistedQuery.id != plan.id)
+            .values(name=None)
+        )
+    if persisted is None:
+        persisted = PersistedQuery(id=plan.id, name=name, document=canonical_json(document))
+        db.add(persisted)
+    elif name is not None:
+        persisted.name = name
+    await db.commit()
+    await db.refresh(persisted)
+    logger.info(f"Registered persisted query {plan.id} ({name or 'unnamed'})")
+    return persisted
+
+
+async def list_persisted_queries(db: AsyncSession) -> List[PersistedQuery]:
+    result = await db.execute(select(PersistedQuery).order_by(PersistedQuery.created_at, PersistedQuery.id))
+    return result.scalars().all()
+
+
+async def get_persisted_plan(db: AsyncSession, key: str) -> Optional[QueryPlan]:
+    """
+    The plan of a persisted query, by id or name.
+
+    Plans of persisted queries already executed by this process come from the
+    plan cache without touching the database.
+
+    Returns:
+        The plan, or None if no query is registered under the key
+    """
+    plan = plan_cache.get(key)
+    if plan is not None:
+        return plan
+    result = await db.execute(
+        select(PersistedQuery).where((PersistedQuery.id == key) | (PersistedQuery.name == key))
+    )
+    persisted = result.scalars().first()
+    if persisted is None:
+        return None
+    plan = plan_cache.get(persisted.id)
+    if plan is None:
+        plan = compile_query(json.loads(persisted.document), persisted.id)
+        plan_cache.put(plan)
+    return plan
+
+
+# Execution
+
+def _coerce(column, value: Any) -> Any:
+    """
+    Convert a JSON value to what the column binds: enums by value or name,
+    dates and datetimes from ISO strings.
+    """
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [_coerce(column, item) for item in value]
+    column_type = column.type
+    if isinstance(column_type, Enum) and column_type.enum_class is not None and isinstance(value, str):
+        enum_class = column_type.enum_class
+        try:
+            return enum_class(value)
+        except ValueError:
+            try:
+                return enum_class[value]
+            except KeyError:
+                raise QueryError(f"'{value}' is not a valid {column.key}")
+    if isinstance(value, str):
+        try:
+            python_type = column_type.python_type
+        except NotImplementedError:
+            return value
+        try:
+            if python_type is datetime:
+                return datetime.fromisoformat(value)
+            if python_type is date:
+                return date.fromisoformat(value)
+        except ValueError:
+            raise QueryError(f"'{value}' is not a valid {column.key}")
+    return value
+
+
+class QueryExecutor:
+    """
+    Resolves plans for one request. Loaded rows are kept until the executor
+    is discarded, so the same rows are never fetched twice in a request.
+    """
+
+    def __init__(self, db: AsyncSession, variables: Optional[Dict[str, Any]] = None):
+        self.db = db
+        self.variables = variables or {}
+        self.statements = 0
+        # Rows by type and primary key, for many-to-one loads
+        self._entities: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        # Rows by relationship, arguments and parent key, for to-many loads
+        self._batches: Dict[Tuple[int, str], Dict[Any, List[Dict[str, Any]]]] = {}
+
+    def _resolve(self, value: Any) -> Any:
+        if isinstance(value, Variable):
+            if value.name not in self.variables:
+                raise QueryError(f"Missing variable '${value.name}'")
+            return self.variables[value.name]
+        return value
+
+    def _conditions(self, query_type: QueryType, args: Arguments) -> List[Any]:
+        conditions = []
+        for name, op, value in args.where:
+            column = query_type.columns[name]
+            value = self._resolve(value)
+            if op == "in" and not isinstance(value, list):
+                raise QueryError(f"'in' on '{name}' needs a list")
+            conditions.append(OPERATORS[op](column, _coerce(column, value)))
+        return conditions
+
+    def _order(self, query_type: QueryType, args: Arguments) -> List[Any]:
+        order = [
+            query_type.columns[name].desc() if descending else query_type.columns[name].asc()
+            for name, descending in args.order_by
+        ]
+        return order + [query_type.columns[query_type.primary_key]]
+
+    async def _fetch(self, statement) -> List[Dict[str, Any]]:
+        self.statements += 1
+        result = await self.db.execute(statement)
+        return [dict(row) for row in result.mappings()]
+
+    def _remember(self, query_type: QueryType, row: Dict[str, Any]) -> Dict[str, Any]:
+        entities = self._entities.setdefault(query_type.name, {})
+        return entities.setdefault(row[query_type.primary_key], row)
+
+    def check_variables(self, plan: QueryPlan) -> None:
+        missing = [name for name in plan.variables if name not in self.variables]
+        if missing:
+            raise QueryError(f"Missing variables {['$' + name for name in missing]}")
+
+    async def execute(self, plan: QueryPlan) -> Dict[str, Any]:
+        self.check_variables(plan)
+        data = {}
+        for root in plan.roots:
+            data[root.alias] = await self._build(root.selection, await self._load_root(root))
+        return data
+
+    async def _load_root(self, root: RootSelection) -> List[Dict[str, Any]]:
+        query_type, args = root.query_type, root.args
+        primary_key = query_type.columns[query_type.primary_key]
+        conditions = self._conditions(query_type, args)
+        limit = settings.QUERY_DEFAULT_LIMIT
+        if args.limit is not None:
+            limit = _check_limit(self._resolve(args.limit), root.alias)
+        if args.ids is not None:
+            ids = self._resolve(args.ids)
+            if not isinstance(ids, list) or len(ids) > settings.QUERY_MAX_LIMIT:
+                raise QueryError(f"{root.alias}: ids must be a list of at most {settings.QUERY_MAX_LIMIT}")
+            if not ids:
+                return []
+            conditions.append(primary_key.in_(ids))
+        if args.after_id is not None:
+            conditions.append(primary_key > self._resolve(args.after_id))
+        rows = await self._fetch(
+            select(*query_type.select_columns)
+            .where(*conditions)
+            .order_by(*self._order(query_type, args))
+            .limit(limit)
+        )
+        return [self._remember(query_type, row) for row in rows]
+
+    async def _load(self, child: RelationSelection, keys: List[Any]) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Rows of a relationship for all the parent keys of a level, querying
+        only the keys not loaded before.
+        """
+        relation, target = child.relation, child.relation.target
+        if relation.by_primary_key:
+            entities = self._entities.setdefault(target.name, {})
+            missing = [key for key in keys if key not in entities]
+            primary_key = target.columns[target.primary_key]
+            for start in range(0, len(missing), IN_CHUNK_SIZE):
+                for row in await self._fetch(
+                    select(*target.select_columns).where(primary_key.in_(missing[start:start + IN_CHUNK_SIZE]))
+                ):
+                    self._remember(target, row)
+            return {key: [entities[key]] for key in keys if key in entities}
+
+        conditions = self._conditions(target, child.args)
+        limit = settings.QUERY_DEFAULT_LIMIT
+        if child.args.limit is not None:
+            limit = _check_limit(self._resolve(child.args.limit), child.alias)
+        # Variables are fixed for the request, so equal arguments select equal rows
+        signature = (id(relation), repr((child.args.where, child.args.order_by, limit)))
+        batches = self._batches.setdefault(signature, {})
+        missing = [key for key in keys if key not in batches]
+        order = self._order(target, child.args)
+        for start in range(0, len(missing), IN_CHUNK_SIZE):
+            chunk = missing[start:start + IN_CHUNK_SIZE]
+            rank = func.row_number().over(partition_by=relation.child_column, order_by=order).label("_rank")
+            ranked = select(*target.select_columns, relation.child_column.label("_parent_key"), rank)
+            if relation.secondary is not None:
+                ranked = ranked.select_from(target.table.join(relation.secondary, relation.secondaryjoin))
+            ranked = ranked.where(relation.child_column.in_(chunk), *conditions).subquery()
+            rows = await self._fetch(
+                select(*[ranked.c[key] for key in target.columns], ranked.c._parent_key)
+                .where(ranked.c._rank <= limit)
+                .order_by(ranked.c._parent_key, ranked.c._rank)
+            )
+            for key in chunk:
+                batches[key] = []
+            for row in rows:
+                parent_key = row.pop("_parent_key")
+                batches[parent_key].append(self._remember(target, row))
+        return {key: batches[key] for key in keys}
+
+    async def _build(self, selection: Selection, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Output objects for the rows of one level, resolving each relationship
+        for all of them at once.
+        """
+        outputs = [{name: row[name] for name in selection.fields} for row in rows]
+        for child in selection.relations:
+            relation = child.relation
+            keys = list(dict.fromkeys(row[relation.parent_key] for row in rows if row[relation.parent_key] is not None))
+            groups = await self._load(child, keys)
+
+            primary_key = relation.target.primary_key
+            children: Dict[Any, Dict[str, Any]] = {}
+            for group in groups.values():
+                for row in group:
+                    children.setdefault(row[primary_key], row)
+            built = dict(zip(children, await self._build(child.selection, list(children.values()))))
+
+            for output, row in zip(outputs, rows):
+                group = groups.get(row[relation.parent_key], [])
+                if relation.to_many:
+                    output[child.alias] = [built[item[primary_key]] for item in group]
+                else:
+                    output[child.alias] = built[group[0][primary_key]] if group else None
+        return outputs
+
+
+async def execute_query(db: AsyncSession, plan: QueryPlan, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Execute a checked plan.
+
+    Args:
+        db: Database session
+        plan: Plan from ``get_plan`` or ``get_persisted_plan``
+        variables: Values for the ``$name`` arguments of the query
+
+    Returns:
+        The data by root alias, and the query's id, complexity and the number
+        of statements it took
+
+    Raises:
+        QueryError: If a variable is missing or does not fit its argument, or
+            the limits given as variables make the query too complex
+    """
+    executor = QueryExecutor(db, variables)
+    executor.check_variables(plan)
+    complexity = plan.complexity
+    if complexity is None:
+        complexity = query_complexity(plan.roots, executor.variables)
+        _check_complexity(complexity)
+    data = await executor.execute(plan)
+    return {
+        "data": data,
+        "extensions": {"query_id": plan.id, "complexity": complexity, "statements": executor.statements},
+    }
@@ -0,0 +1,440 @@
+"""
+Reconciliation of bank and payment gateway statements against fee records.
+
+A statement is streamed entry by entry and processed in batches. For each
+credit the matcher looks, in order, for:
+
+1. a student USN in the entry's reference or narration: exact, or within one
+   typo if the amount also equals one of that student's outstanding fees;
+2. otherwise, a single open fee record with exactly that balance due within
+   ``amount_window_days`` of the booking date.
+
+Matches are posted as payments with one multi-row INSERT and one
+executemany UPDATE per batch. Everything else goes to the
+``reconciliation_exceptions`` queue for review. Lookups use in-memory hash
+indexes over the open fee records only, so memory is bounded by the number
+of outstanding fees, not by the statement size. Entries whose transaction
+id was already posted or queued are skipped, so importing a statement twice
+is harmless.
+"""
+import hashlib
+import logging
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, bindparam, case, func, literal, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from school_management_system.database.partitioning import academic_year_of, in_academic_years
+from school_management_system.database.types import to_money
+from school_management_system.models.payment import FeeRecord, Payment, PaymentMethod, PaymentStatus
+from school_management_system.models.reconciliation import (
+    ExceptionReason, ExceptionStatus, StatementFormat, StatementImport, UnreconciledEntry
+)
+from school_management_system.models.student import Student
+from school_management_system.services.ledger_service import record_payments
+from school_management_system.utils.statements import StatementEntry, parse_statement
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = [PaymentStatus.PENDING, PaymentStatus.PARTIALLY_PAID, PaymentStatus.OVERDUE]
+
+TOKEN = re.compile(r"[A-Z0-9]+")
+
+
+def _cents(amount: Decimal) -> int:
+    return int(to_money(amount).scaleb(2))
+
+
+def _deletes(word: str) -> Set[str]:
+    """
+    All strings obtained by deleting one character of ``word``.
+    """
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def transaction_key(entry: StatementEntry) -> str:
+    """
+    The entry's transaction id, or a digest of its contents when it has none.
+    """
+    if entry.transaction_id:
+        return entry.transaction_id
+    content = f"{entry.booking_date}|{entry.amount:.2f}|{entry.reference or ''}|{entry.narration}"
+    return "STMT-" + hashlib.sha1(content.encode("utf-8")).hexdigest()[:24]
+
+
+class OpenFeeRecord:
+    __slots__ = ("id", "usn", "balance", "due_date")
+
+    def __init__(self, id: int, usn: str, balance: int, due_date: date):
+        self.id = id
+        self.usn = usn
+        self.balance = balance  # In cents
+        self.due_date = due_date
+
+
+class ReconciliationIndex:
+    """
+    Hash indexes over open fee records for matching statement entries.
+    """
+
+    def __init__(self, known_usns: Set[str], amount_window_days: int = 45):
+        self.known_usns = known_usns
+        self.amount_window = timedelta(days=amount_window_days)
+        self.by_usn: Dict[str, List[OpenFeeRecord]] = {}
+        # Balance in cents -> due date -> fee record ids
+        self.by_amount: Dict[int, Dict[date, Set[int]]] = {}
+        self.records: Dict[int, OpenFeeRecord] = {}
+        # One-character deletions of each USN with open fees, for typo matching
+        self.usn_deletes: Dict[str, Set[str]] = {}
+
+    @classmethod
+    async def load(cls, db: AsyncSession, amount_window_days: int = 45, stream_chunk: int = 10000):
+        """
+        Build the indexes from the database.
+        """
+        result = await db.stream(select(Student.student_id).execution_options(yield_per=stream_chunk))
+        known_usns = {usn.upper() async for usn in result.scalars()}
+        index = cls(known_usns, amount_window_days)
+        result = await db.stream(
+            select(FeeRecord.id, Student.student_id, FeeRecord.balance, FeeRecord.due_date)
+            .join(Student, Student.id == FeeRecord.student_id)
+            .where(FeeRecord.status.in_(OPEN_STATUSES), FeeRecord.balance > 0)
+            .order_by(FeeRecord.due_date, FeeRecord.id)
+            .execution_options(yield_per=stream_chunk)
+        )
+        async for record_id, usn, balance, due_date in result:
+            index.add(OpenFeeRecord(record_id, usn.upper(), _cents(balance), due_date))
+        return index
+
+    def add(self, record: OpenFeeRecord) -> None:
+        self.records[record.id] = record
+        if record.usn not in self.by_usn:
+            self.by_usn[record.usn] = []
+            for deleted in _deletes(record.usn):
+                self.usn_deletes.setdefault(deleted, set()).add(record.usn)
+        self.by_usn[record.usn].append(record)
+        self._index_amount(record)
+
+    def _index_amount(self, record: OpenFeeRecord) -> None:
+        self.by_amount.setdefault(record.balance, {}).setdefault(record.due_date, set()).add(record.id)
+
+    def _unindex_amount(self, record: OpenFeeRecord) -> None:
+        by_date = self.by_amount[record.balance]
+        by_date[record.due_date].discard(record.id)
+        if not by_date[record.due_date]:
+            del by_date[record.due_date]
+            if not by_date:
+                del self.by_amount[record.balance]
+
+    def apply_payment(self, record: OpenFeeRecord, cents: int) -> None:
+        """
+        Reflect a posted payment so later entries see the new balance.
+        """
+        self._unindex_amount(record)
+        record.balance -= cents
+        if record.balance > 0:
+            self._index_amount(record)
+        else:
+            del self.records[record.id]
+            self.by_usn[record.usn].remove(record)
+
+    def find_students(self, *texts: Optional[str]) -> Tuple[Set[str], str]:
+        """
+        USNs mentioned in the given texts and how they were found.
+
+        USNs are often split by spaces or slashes in bank narrations
+        ("CSE 2023 0007"), so runs of up to three adjacent tokens are tried
+        as well.
+        """
+        candidates: List[str] = []
+        for text in texts:
+            if not text:
+                continue
+            tokens = TOKEN.findall(text.upper())
+            for i in range(len(tokens)):
+                for j in range(i + 1, min(i + 3, len(tokens)) + 1):
+                    candidates.append("".join(tokens[i:j]))
+
+        exact = {candidate for candidate in candidates if candidate in self.known_usns}
+        if exact:
+            return exact, "usn"
+
+        fuzzy: Set[str] = set()
+        for candidate in candidates:
+            if candidate.isdigit() or candidate.isalpha() or len(candidate) < 6:
+                continue
+            if candidate in self.usn_deletes:
+                fuzzy |= self.usn_deletes[candidate]  # A character was dropped
+            for deleted in _deletes(candidate):
+                if deleted in self.by_usn:
+                    fuzzy.add(deleted)  # A character was added
+                if deleted in self.usn_deletes:
+                    fuzzy |= self.usn_deletes[deleted]  # A character was changed or swapped
+        return fuzzy, "fuzzy"
+
+    def _by_amount_and_date(self, cents: int, booking_date: date) -> List[OpenFeeRecord]:
+        found: List[OpenFeeRecord] = []
+        for due_date, record_ids in self.by_amount.get(cents, {}).items():
+            if abs(due_date - booking_date) <= self.amount_window:
+                found.extend(self.records[record_id] for record_id in record_ids)
+                if len(found) > 1:
+                    break
+        return found
+
+    def match(self, entry: StatementEntry) -> Tuple[Optional[OpenFeeRecord], str, Optional[ExceptionReason]]:
+        """
+        Find the fee record a credit pays.
+
+        Returns:
+            ``(record, method, None)`` on a match, otherwise ``(None, detail, reason)``
+        """
+        cents = _cents(entry.amount)
+        usns, method = self.find_students(entry.reference, entry.narration)
+        if len(usns) > 1:
+            return None, f"Entry refers to several students: {', '.join(sorted(usns))}", ExceptionReason.AMBIGUOUS
+        if usns:
+            usn = usns.pop()
+            records = self.by_usn.get(usn)
+            if not records:
+                return None, f"{usn} has no outstanding fees", ExceptionReason.OVERPAYMENT
+            for record in records:
+                if record.balance == cents:
+                    return record, method, None
+            if method == "fuzzy":
+                return None, f"Resembles {usn} but matches none of its outstanding fees", ExceptionReason.AMBIGUOUS
+            for record in records:
+                if record.balance >= cents:
+                    return record, method, None
+            return None, f"Amount exceeds every outstanding fee of {usn}", ExceptionReason.OVERPAYMENT
+
+        found = self._by_amount_and_date(cents, entry.booking_date)
+        if len(found) == 1:
+            return found[0], "amount_date", None
+        if found:
+            return None, "Several open fees of this amount are due around this date", ExceptionReason.AMBIGUOUS
+        return None, "No student reference and no open fee of this amount", ExceptionReason.NO_MATCH
+
+
+async def post_payments(db: AsyncSession, postings: List[Dict[str, Any]]) -> None:
+    """
+    Record bank transfer payments and apply them to their fee records.
+
+    Each posting needs ``fee_record_id``, ``amount``, ``payment_date``,
+    ``transaction_id`` and ``notes``. The payments' ledger events are written
+    with one INSERT ... SELECT. Balances are updated relative to their
+    current value, so concurrent payments to the same record are not lost.
+    """
+    if not postings:
+        return
+    await db.execute(
+        Payment.__table__.insert(),
+        [{**posting, "payment_method": PaymentMethod.BANK_TRANSFER} for posting in postings],
+    )
+    dates = [posting["payment_date"] for posting in postings]
+    await record_payments(db, and_(
+        Payment.transaction_id.in_({posting["transaction_id"] for posting in postings}),
+        in_academic_years(Payment.payment_date, academic_year_of(min(dates)), academic_year_of(max(dates))),
+    ))
+    fee_records = FeeRecord.__table__
+    status_type = fee_records.c.status.type
+    amount = bindparam("posted_amount")
+    await db.execute(
+        update(fee_records)
+        .where(fee_records.c.id == bindparam("record_id"))
+        .values(
+            paid_amount=func.coalesce(fee_records.c.paid_amount, 0) + amount,
+            balance=fee_records.c.balance - amount,
+            status=case(
+                (fee_records.c.balance - amount <= 0, literal(PaymentStatus.PAID, status_type)),
+                else_=literal(PaymentStatus.PARTIALLY_PAID, status_type),
+            ),
+        ),
+        [{"record_id": posting["fee_record_id"], "posted_amount": posting["amount"]} for posting in postings],
+    )
+
+
+def _exception_row(
+    statement_import: StatementImport, entry: StatementEntry, reason: ExceptionReason, detail: str
+) -> Dict[str, Any]:
+    return {
+        "statement_import_id": statement_import.id,
+        "line_number": entry.line_number,
+        "booking_date": entry.booking_date,
+        "amount": entry.amount,
+        "transaction_id": entry.transaction_id,
+        "reference": entry.reference,
+        "narration": entry.narration,
+        "reason": reason,
+        "detail": detail[:500],
+        "status": ExceptionStatus.OPEN,
+    }
+
+
+async def _process_batch(
+    db: AsyncSession,
+    statement_import: StatementImport,
+    index: ReconciliationIndex,
+    entries: List[StatementEntry],
+) -> None:
+    valid = [entry for entry in entries if entry.error is None and entry.amount > 0]
+    keys = {transaction_key(entry) for entry in valid}
+    query = select(Payment.transaction_id).where(Payment.transaction_id.in_(keys))
+    if valid:
+        # Payments are dated on their booking date, so only the partitions of
+        # the academic years of the batch's booking dates can hold them
+        dates = [entry.booking_date for entry in valid]
+        query = query.where(
+            in_academic_years(Payment.payment_date, academic_year_of(min(dates)), academic_year_of(max(dates)))
+        )
+    result = await db.execute(query)
+    posted = set(result.scalars().all())
+    result = await db.execute(
+        select(UnreconciledEntry.transaction_id).where(UnreconciledEntry.transaction_id.in_(keys))
+    )
+    posted.update(result.scalars().all())
+
+    postings: List[Dict[str, Any]] = []
+    exceptions: List[Dict[str, Any]] = []
+    for entry in entries:
+        statement_import.entries += 1
+        if entry.error is not None:
+            exceptions.append(_exception_row(statement_import, entry, ExceptionReason.UNPARSEABLE, entry.error))
+            continue
+        if entry.amount <= 0:
+            statement_import.debits += 1
+            continue
+        key = transaction_key(entry)
+        if key in posted:
+            # Already posted, or already queued for review by an earlier import
+            statement_import.duplicates += 1
+            continue
+        posted.add(key)
+
+        record, detail, reason = index.match(entry)
+        if record is None:
+            exceptions.append(_exception_row(statement_import, entry._replace(transaction_id=key), reason, detail))
+            continue
+        index.apply_payment(record, _cents(entry.amount))
+        postings.append({
+            "fee_record_id": record.id,
+            "amount": entry.amount,
+            "payment_date": datetime.combine(entry.booking_date, datetime.min.time()),
+            "transaction_id": key,
+            "notes": f"Statement import {statement_import.id}, line {entry.line_number} (matched by {detail})",
+        })
+
+    await post_payments(db, postings)
+    if exceptions:
+        await db.execute(UnreconciledEntry.__table__.insert(), exceptions)
+    statement_import.matched += len(postings)
+    statement_import.matched_amount = (statement_import.matched_amount or Decimal("0.00")) + sum(
+        (posting["amount"] for posting in postings), Decimal("0.00")
+    )
+    statement_import.exceptions += len(exceptions)
+
+
+async def reconcile_statement(
+    db: AsyncSession,
+    lines: Iterable[str],
+    statement_format: StatementFormat,
+    filename: Optional[str] = None,
+    batch_size: int = 5000,
+    amount_window_days: int = 45,
+) -> StatementImport:
+    """
+    Match a statement's credits to open fee records and post the payments.
+
+    Args:
+        db: Database session
+        lines: The statement's lines, consumed lazily
+        statement_format: Format of the statement
+        filename: Original file name, for reference
+        batch_size: Entries matched and posted per transaction
+        amount_window_days: How far from a fee's due date a payment of
+            exactly its balance may be booked and still match it
+
+    Returns:
+        The statement import with its counts
+    """
+    statement_import = StatementImport(
+        filename=filename, format=statement_format, status="Processing",
+        entries=0, matched=0, matched_amount=Decimal("0.00"), duplicates=0, debits=0, exceptions=0,
+    )
+    db.add(statement_import)
+    await db.commit()
+
+    try:
+        index = await ReconciliationIndex.load(db, amount_window_days=amount_window_days)
+        entries = parse_statement(lines, statement_format)
+        while True:
+            batch = list(islice(entries, batch_size))
+            if not batch:
+                break
+            await _process_batch(db, statement_import, index, batch)
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        statement_import.status = "Failed"
+        statement_import.completed_at = datetime.utcnow()
+        await db.commit()
+        raise
+
+    statement_import.status = "Completed"
+    statement_import.completed_at = datetime.utcnow()
+    await db.commit()
+    logger.info(
+        f"Statement import {statement_import.id}: {statement_import.matched} matched, "
+        f"{statement_import.exceptions} exceptions, {statement_import.duplicates} duplicates"
+    )
+    return statement_import
+
+
+async def resolve_exception(
+    db: AsyncSession, entry: UnreconciledEntry, fee_record_id: Optional[int] = None
+) -> UnreconciledEntry:
+    """
+    Close an unreconciled entry, posting it to a fee record or dismissing it.
+
+    Raises:
+        ValueError: If the entry is not open or cannot be posted
+    """
+    if entry.status != ExceptionStatus.OPEN:
+        raise ValueError("Entry has already been handled")
+
+    if fee_record_id is None:
+        entry.status = ExceptionStatus.DISMISSED
+    else:
+        if entry.amount is None or entry.amount <= 0 or entry.booking_date is None:
+            raise ValueError("Entry has no valid amount and date to post")
+        result = await db.execute(select(FeeRecord.id).where(FeeRecord.id == fee_record_id))
+        if result.scalar() is None:
+            raise ValueError("Fee record not found")
+        key = transaction_key(StatementEntry(
+            entry.line_number, entry.booking_date, entry.amount,
+            entry.transaction_id, entry.reference, entry.narration or "",
+        ))
+        payment_date = datetime.combine(entry.booking_date, datetime.min.time())
+        await post_payments(db, [{
+            "fee_record_id": fee_record_id,
+            "amount": entry.amount,
+            "payment_date": payment_date,
+            "transaction_id": key,
+            "notes": f"Statement import {entry.statement_import_id}, line {entry.line_number} (matched manually)",
+        }])
+        result = await db.execute(
+            select(Payment.id)
+            .where(Payment.transaction_id == key, Payment.payment_date == payment_date)
+            .order_by(Payment.id.desc())
+            .limit(1)
+        )
+        entry.payment_id = result.scalar()
+        entry.status = ExceptionStatus.RESOLVED
+    entry.resolved_at = datetime.utcnow()
+    await db.commit()
+    await db.refresh(entry)
+    return entry
@@ -0,0 +1,365 @@
+"""
+Student overview: everything a student's profile page shows, in one call.
+
+The overview is made of independent sections (the student, subjects, exam
+results, fee records with their payments, an attendance summary of the
+current academic year, progress notes and the admission application). Each section is read in its own
+session, so with a connection pool the sections are queried at the same
+time rather than one after another, overlapping their round trips to the
+database server. At most STUDENT_OVERVIEW_CONCURRENCY sections run at once.
+On SQLite, or with a single-connection pool, they run in turn in one session.
+
+Sections are cached per student for STUDENT_OVERVIEW_CACHE_SECONDS. Session
+events drop a student's cached overview when a transaction that changed one
+of the contributing tables commits: ORM changes identify their student, and
+bulk statements on those tables (billing runs, conversions, ledger updates)
+clear the whole cache. The cache is per process, so writes made by other
+processes show once the entries expire.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from school_management_system.config import settings
+from school_management_system.database.partitioning import academic_year_label, academic_year_of, in_academic_years
+from school_management_system.database.session import AsyncSessionLocal, pool_capacity, session_router
+from school_management_system.models.admission import Admission
+from school_management_system.models.exam import Exam, ExamResult
+from school_management_system.models.payment import FeeRecord, Payment
+from school_management_system.models.student import Attendance, Student, StudentProgress, student_subject
+from school_management_system.models.subject import Subject
+
+logger = logging.getLogger(__name__)
+
+OVERVIEW_SECTIONS = (
+    "student", "subjects", "exam_results", "fee_records", "attendance", "progress_notes", "admission",
+)
+
+# Most recent progress notes included in an overview
+PROGRESS_NOTES_LIMIT = 50
+
+# Attendance statuses that count as attended
+ATTENDED_STATUSES = ("present", "late")
+
+
+def _rows(result) -> List[Dict[str, Any]]:
+    return [dict(row._mapping) for row in result]
+
+
+async def _student(db: AsyncSession, student_id: int) -> Optional[Dict[str, Any]]:
+    result = await db.execute(select(Student.__table__).where(Student.id == student_id))
+    row = result.first()
+    return dict(row._mapping) if row else None
+
+
+async def _subjects(db: AsyncSession, student_id: int) -> List[Dict[str, Any]]:
+    result = await db.execute(
+        select(Subject.id, Subject.name, Subject.code, Subject.credits, Subject.teacher_id)
+        .join(student_subject, student_subject.c.subject_id == Subject.id)
+        .where(student_subject.c.student_id == student_id)
+        .order_by(Subject.code)
+    )
+    return _rows(result)
+
+
+async def _exam_results(db: AsyncSession, student_id: int) -> List[Dict[str, Any]]:
+    result = await db.execute(
+        select(
+            ExamResult.id, ExamResult.exam_id, Exam.name.label("exam_name"), Exam.exam_type, Exam.date,
+            ExamResult.subject_id, Subject.name.label("subject_name"), ExamResult.score, Exam.total_marks,
+            Exam.passing_marks, ExamResult.grade, ExamResult.remarks,
+        )
+        .join(Exam, Exam.id == ExamResult.exam_id)
+        .join(Subject, Subject.id == ExamResult.subject_id)
+        .where(ExamResult.student_id == student_id)
+        .order_by(Exam.date.desc(), ExamResult.id)
+    )
+    return _rows(result)
+
+
+async def _fee_records(db: AsyncSession, student_id: int) -> List[Dict[str, Any]]:
+    result = await db.execute(
+        select(
+            FeeRecord.id, FeeRecord.academic_year, FeeRecord.term, FeeRecord.total_amount, FeeRecord.paid_amount,
+            FeeRecord.balance, FeeRecord.status, FeeRecord.due_date, FeeRecord.fee_structure_id,
+        )
+        .where(FeeRecord.student_id == student_id)
+        .order_by(FeeRecord.due_date.desc(), FeeRecord.id)
+    )
+    fee_records = _rows(result)
+    if not fee_records:
+        return fee_records
+    payments: Dict[int, List[Dict[str, Any]]] = {record["id"]: [] for record in fee_records}
+    result = await db.execute(
+        select(
+            Payment.id, Payment.fee_record_id, Payment.amount, Payment.payment_date, Payment.payment_method,
+            Payment.transaction_id, Payment.receipt_number,
+        )
+        .where(Payment.fee_record_id.in_(list(payments)))
+        .order_by(Payment.payment_date, Payment.id)
+    )
+    for payment in _rows(result):
+        payments[payment["fee_record_id"]].append(payment)
+    for record in fee_records:
+        record["payments"] = payments[record["id"]]
+    return fee_records
+
+
+async def _attendance(db: AsyncSession, student_id: int) -> Dict[str, Any]:
+    academic_year = academic_year_of(date.today())
+    result = await db.execute(
+        select(Attendance.status, func.count(), func.min(Attendance.date), func.max(Attendance.date))
+        .where(Attendance.student_id == student_id, in_academic_years(Attendance.date, academic_year))
+        .group_by(Attendance.status)
+    )
+    by_status: Dict[str, int] = {}
+    first_date = last_date = None
+    for attendance_status, count, first, last in result:
+        by_status[attendance_status] = count
+        first_date = first if first_date is None or first < first_date else first_date
+        last_date = last if last_date is None or last > last_date else last_date
+    total = sum(by_status.values())
+    attended = sum(count for name, count in by_status.items() if name.lower() in ATTENDED_STATUSES)
+    return {
+        "academic_year": academic_year_label(academic_year),
+        "total": total,
+        "by_status": by_status,
+        "percentage": round(100 * attended / total, 2) if total else None,
+        "first_date": first_date,
+        "last_date": last_date,
+    }
+
+
+async def _progress_notes(db: AsyncSession, student_id: int) -> List[Dict[str, Any]]:
+    result = await db.execute(
+        select(
+            StudentProgress.id, StudentProgress.date, StudentProgress.category, StudentProgress.notes,
+            StudentProgress.action_items, StudentProgress.teacher_id,
+        )
+        .where(StudentProgress.student_id == student_id)
+        .order_by(StudentProgress.date.desc(), StudentProgress.id.desc())
+        .limit(PROGRESS_NOTES_LIMIT)
+    )
+    return _rows(result)
+
+
+async def _admission(db: AsyncSession, student_id: int) -> Optional[Dict[str, Any]]:
+    result = await db.execute(
+        select(
+            Admission.id, Admission.application_date, Admission.status, Admission.desired_grade_level,
+            Admission.desired_branch, Admission.previous_school, Admission.previous_grade_level,
+            Admission.parent_name, Admission.parent_phone, Admission.parent_email,
+            Admission.relationship_to_applicant, Admission.status_changed_at,
+        )
+        .where(Admission.student_id == student_id)
+        .order_by(Admission.id.desc())
+        .limit(1)
+    )
+    row = result.first()
+    return dict(row._mapping) if row else None
+
+
+SECTION_QUERIES = {
+    "student": _student,
+    "subjects": _subjects,
+    "exam_results": _exam_results,
+    "fee_records": _fee_records,
+    "attendance": _attendance,
+    "progress_notes": _progress_notes,
+    "admission": _admission,
+}
+
+
+class OverviewCache:
+    """
+    LRU cache of overview sections per student, with a time to live.
+
+    An overview computed while an invalidation happened is not stored, since
+    it may have read the data from before the write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.invalidations = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, student_id: int) -> Dict[str, Any]:
+        entry = self.entries.get(student_id)
+        if entry is None or entry[0] < time.monotonic():
+            return {}
+        self.entries.move_to_end(student_id)
+        return entry[1]
+
+    def put(self, student_id: int, sections: Dict[str, Any], invalidations: int) -> None:
+        if not self.enabled or invalidations != self.invalidations:
+            return
+        entry = self.entries.get(student_id)
+        if entry is not None and entry[0] >= time.monotonic():
+            sections = {**entry[1], **sections}
+        self.entries[student_id] = (time.monotonic() + self.ttl_seconds, sections)
+        self.entries.move_to_end(student_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, student_ids: Iterable[int]) -> None:
+        self.invalidations += 1
+        for student_id in student_ids:
+            self.entries.pop(student_id, None)
+
+    def clear(self) -> None:
+        self.invalidations += 1
+        self.entries.clear()
+
+
+overview_cache = OverviewCache(settings.STUDENT_OVERVIEW_CACHE_SIZE, settings.STUDENT_OVERVIEW_CACHE_SECONDS)
+
+
+async def _read_factory() -> sessionmaker:
+    if session_router.has_replicas:
+        return await session_router.read_factory()
+    return AsyncSessionLocal
+
+
+async def get_student_overview(
+    student_id: int, sections: Optional[List[str]] = None, use_cache: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Assemble the overview of a student.
+
+    The sections are read in sessions of their own, not in a request's
+    session, so the caller must not hold a connection of a single-connection
+    pool while waiting.
+
+    Args:
+        student_id: Student to describe
+        sections: Sections to include (default: all of OVERVIEW_SECTIONS)
+        use_cache: Whether cached sections may be returned
+
+    Returns:
+        The requested sections by name, or None if the student does not exist
+
+    Raises:
+        ValueError: If an unknown section is requested
+    """
+    wanted = list(sections or OVERVIEW_SECTIONS)
+    unknown = [name for name in wanted if name not in SECTION_QUERIES]
+    if unknown:
+        raise ValueError(f"Unknown overview sections: {', '.join(unknown)}")
+
+    cached = overview_cache.get(student_id) if use_cache else {}
+    # The student section also tells whether the student exists
+    missing = [name for name in dict.fromkeys(["student", *wanted]) if name not in cached]
+    if missing:
+        overview_cache.misses += 1
+        invalidations = overview_cache.invalidations
+        factory = await _read_factory()
+        concurrency = min(settings.STUDENT_OVERVIEW_CONCURRENCY, pool_capacity(factory), len(missing))
+        if factory.kw["bind"].dialect.name == "sqlite":
+            # Queries run in process with no round trips to overlap; extra
+            # connections only add overhead
+            concurrency = 1
+        if concurrency <= 1:
+            async with factory() as db:
+                values = [await SECTION_QUERIES[name](db, student_id) for name in missing]
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def read_section(name: str) -> Any:
+                async with semaphore:
+                    async with factory() as db:
+                        return await SECTION_QUERIES[name](db, student_id)
+
+            values = await asyncio.gather(*(read_section(name) for name in missing))
+        fresh = dict(zip(missing, values))
+        if fresh.get("student", cached.get("student")) is None:
+            return None
+        overview_cache.put(student_id, fresh, invalidations)
+        cached = {**cached, **fresh}
+    else:
+        overview_cache.hits += 1
+    if cached.get("student") is None:
+        return None
+    return {name: cached[name] for name in wanted}
+
+
+# Invalidation. ORM changes are collected at flush and applied at commit; a
+# rolled back transaction changed nothing.
+
+# Tables whose bulk statements clear the whole cache
+OVERVIEW_TABLES = {
+    table.name for table in (
+        Student.__table__, student_subject, Subject.__table__, Exam.__table__, ExamResult.__table__,
+        FeeRecord.__table__, Payment.__table__, Attendance.__table__, StudentProgress.__table__,
+        Admission.__table__,
+    )
+}
+# Rows every student's overview may show
+SHARED_MODELS = (Subject, Exam)
+# Rows of one student, with the attribute naming the student
+STUDENT_MODELS = ((Student, "id"), (ExamResult, "student_id"), (FeeRecord, "student_id"),
+                  (Attendance, "student_id"), (StudentProgress, "student_id"), (Admission, "student_id"))
+
+_PENDING_STUDENTS = "overview_students"
+_PENDING_ALL = "overview_all"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_students(session, flush_context):
+    students: Set[int] = session.info.setdefault(_PENDING_STUDENTS, set())
+    fee_record_ids = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, SHARED_MODELS):
+            session.info[_PENDING_ALL] = True
+        elif isinstance(instance, Payment):
+            fee_record_ids.add(instance.fee_record_id)
+        else:
+            for model, attribute in STUDENT_MODELS:
+                if isinstance(instance, model):
+                    students.add(getattr(instance, attribute))
+                    break
+    if fee_record_ids:
+        result = session.connection().execute(
+            select(FeeRecord.student_id).where(FeeRecord.id.in_(fee_record_ids))
+        )
+        students.update(result.scalars())
+    students.discard(None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    statement = orm_execute_state.statement
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(statement, "table", None)
+    if table is not None and getattr(table, "name", None) in OVERVIEW_TABLES:
+        orm_execute_state.session.info[_PENDING_ALL] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    students = session.info.pop(_PENDING_STUDENTS, None)
+    if session.info.pop(_PENDING_ALL, False):
+        overview_cache.clear()
+    elif students:
+        overview_cache.invalidate(students)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_PENDING_STUDENTS, None)
+    session.info.pop(_PENDING_ALL, None)
@@ -0,0 +1,145 @@
+"""
+Downloads of stored documents with HTTP range support.
+"""
+import re
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from school_management_system.config import settings
+from school_management_system.utils.storage import DocumentStorage
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """
+    The requested range lies outside the file.
+    """
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Read a single-range ``Range`` header.
+
+    Returns:
+        First and last byte (inclusive), or None to send the whole file (no
+        header, or one this parser does not handle, such as multiple ranges)
+
+    Raises:
+        RangeNotSatisfiable: If the range starts after the end of the file
+    """
+    match = _RANGE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(f"Empty suffix range for {size} bytes")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(f"Range {header} is outside {size} bytes")
+    return start, end
+
+
+class StoredFileResponse(Response):
+    """
+    Response with (part of) a stored file.
+
+    When the ASGI server offers the ``http.response.zerocopy`` extension and
+    the file is on the local filesystem, the bytes are sent with
+    ``sendfile``. Otherwise they are streamed from the storage backend in
+    chunks.
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        storage: DocumentStorage,
+        key: str,
+        size: int,
+        byte_range: Optional[Tuple[int, int]] = None,
+        media_type: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        self.storage = storage
+        self.key = key
+        self.start, self.end = byte_range or (0, size - 1)
+        self.status_code = 206 if byte_range else 200
+        self.media_type = media_type or "application/octet-stream"
+        self.background = background
+        headers = dict(headers or {})
+        headers["accept-ranges"] = "bytes"
+        headers["content-length"] = str(max(self.end - self.start + 1, 0))
+        if byte_range:
+            headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start + 1
+        path = self.storage.local_path(self.key)
+        if scope.get("method") == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif path and "http.response.zerocopy" in scope.get("extensions", {}):
+            async with await anyio.open_file(path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": f.wrapped.fileno(),
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+        else:
+            async for chunk in self.storage.read_range(self.key, self.start, self.end, self.chunk_size):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+def stored_file_response(
+    request: Request,
+    storage: DocumentStorage,
+    key: str,
+    size: int,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Answer a download request for a stored, content-addressed file.
+
+    The content of a key never changes, so responses may be cached for good.
+    With DOCUMENT_X_ACCEL_PREFIX set, local files are handed to nginx, which
+    sends them (and answers range requests) with ``sendfile``.
+    """
+    headers = {"cache-control": "private, max-age=31536000, immutable"}
+    if etag:
+        headers["etag"] = f'"{etag}"'
+        if request.headers.get("if-none-match") == headers["etag"]:
+            return Response(status_code=304, headers=headers)
+    if filename:
+        headers["content-disposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+
+    if settings.DOCUMENT_X_ACCEL_PREFIX and storage.local_path(key):
+        headers["x-accel-redirect"] = f"{settings.DOCUMENT_X_ACCEL_PREFIX.rstrip('/')}/{key}"
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+    if byte_range and request.headers.get("if-range") not in (None, headers.get("etag")):
+        byte_range = None
+    return StoredFileResponse(storage, key, size, byte_range, media_type=media_type, headers=headers)
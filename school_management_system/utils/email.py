@@ -0,0 +1,142 @@
+"""
+Asynchronous SMTP delivery using a pool of persistent connections.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import AsyncIterator, List, Optional
+
+import aiosmtplib
+
+from school_management_system.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(
+    to: str, subject: str, body: str, message_id: Optional[str] = None
+) -> EmailMessage:
+    """
+    Build a plain-text email from the configured sender.
+
+    Args:
+        to: Recipient address
+        subject: Subject line
+        body: Plain-text body
+        message_id: Stable Message-ID so retried sends can be deduplicated downstream
+
+    Returns:
+        The email message
+    """
+    if not settings.EMAILS_FROM_EMAIL:
+        raise ValueError("EMAILS_FROM_EMAIL is not configured")
+    
+    message = EmailMessage()
+    message["From"] = formataddr((settings.EMAILS_FROM_NAME or "", settings.EMAILS_FROM_EMAIL or ""))
+    message["To"] = to
+    message["Subject"] = subject
+    message["Message-ID"] = message_id or make_msgid()
+    message.set_content(body)
+    return message
+
+
+class SMTPConnectionPool:
+    """
+    A fixed-size pool of logged-in SMTP connections.
+
+    Opening a connection (TCP, STARTTLS and AUTH) costs several round trips,
+    so connections are reused across messages. A connection that errors is
+    discarded and replaced on next use.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: bool = True,
+        size: int = 5,
+        timeout: float = 30.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.size = size
+        self.timeout = timeout
+        self._idle: "asyncio.Queue[Optional[aiosmtplib.SMTP]]" = asyncio.Queue()
+        for _ in range(size):
+            # None marks a free slot without an open connection yet
+            self._idle.put_nowait(None)
+        self._open: List[aiosmtplib.SMTP] = []
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        self._open.append(client)
+        return client
+
+    async def _discard(self, client: Optional[aiosmtplib.SMTP]) -> None:
+        if client is None:
+            return
+        if client in self._open:
+            self._open.remove(client)
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        client = await self._idle.get()
+        try:
+            if client is None or not client.is_connected:
+                await self._discard(client)
+                client = await self._connect()
+            yield client
+        except Exception:
+            await self._discard(client)
+            client = None
+            raise
+        finally:
+            self._idle.put_nowait(client)
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Send a message on a pooled connection.
+        """
+        async with self.connection() as client:
+            await client.send_message(message)
+
+    async def close(self) -> None:
+        for client in list(self._open):
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+        self._open.clear()
+
+
+def get_smtp_pool(size: int = 5) -> SMTPConnectionPool:
+    """
+    Create an SMTP pool from the SMTP_* settings.
+    """
+    return SMTPConnectionPool(
+        hostname=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        username=settings.SMTP_USER or None,
+        password=settings.SMTP_PASSWORD or None,
+        start_tls=settings.SMTP_TLS,
+        size=size,
+    )
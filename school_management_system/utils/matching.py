@@ -0,0 +1,188 @@
+"""
+Fuzzy matching of people: normalisation, blocking keys and similarity scores.
+
+Comparing every applicant with every other is quadratic. Instead each record
+gets a few blocking keys, and only records sharing a key are compared. The
+keys combine a phonetic code of a name (Soundex, so "Mohammed" and
+"Muhammad" agree) with the date or year of birth, or are a normalised phone
+number or email address. Each combination tolerates a different kind of
+mistake. Candidate pairs are then scored with Jaro-Winkler similarity of the
+names plus agreement of the birth date and contact details.
+"""
+import re
+import unicodedata
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("BFPV", "1"),
+    **dict.fromkeys("CGJKQSXZ", "2"),
+    **dict.fromkeys("DT", "3"),
+    "L": "4",
+    **dict.fromkeys("MN", "5"),
+    "R": "6",
+}
+
+# Weights of the name, birth date and contact components of a score
+NAME_WEIGHT = 0.55
+BIRTH_DATE_WEIGHT = 0.30
+CONTACT_WEIGHT = 0.15
+
+
+class PersonRecord(NamedTuple):
+    """
+    The fields of an applicant or student used for matching, normalised.
+    """
+    first_name: str
+    last_name: str
+    date_of_birth: Optional[date]
+    phone: Optional[str]
+    email: Optional[str]
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Upper-case ASCII letters of a name, accents removed, other characters
+    dropped except single spaces between words.
+    """
+    folded = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^A-Za-z ]+", "", folded).upper().split())
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    The last ten digits of a phone number, so country prefixes do not matter.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """
+    Lower-cased email address without a ``+tag``.
+    """
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    local, domain = email.rsplit("@", 1)
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def person_record(
+    first_name: Optional[str],
+    last_name: Optional[str],
+    date_of_birth: Optional[date],
+    phone: Optional[str],
+    email: Optional[str],
+) -> PersonRecord:
+    return PersonRecord(
+        normalize_name(first_name),
+        normalize_name(last_name),
+        date_of_birth,
+        normalize_phone(phone),
+        normalize_email(email),
+    )
+
+
+def soundex(name: str) -> str:
+    """
+    American Soundex code of a normalised name, e.g. ``R163`` for ROBERT.
+    """
+    letters = name.replace(" ", "")
+    if not letters:
+        return ""
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "HW":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def blocking_keys(record: PersonRecord) -> List[Tuple[str, str]]:
+    """
+    The ``(key_type, key)`` pairs under which a record is indexed; keys are
+    prefixed with their type, so keys of different types never collide.
+    """
+    keys = []
+    first, last = soundex(record.first_name), soundex(record.last_name)
+    if record.date_of_birth:
+        born = record.date_of_birth.isoformat()
+        if last:
+            keys.append(("last_name_dob", f"{last}:{born}"))
+        if first:
+            keys.append(("first_name_dob", f"{first}:{born}"))
+        if first and last:
+            # Both names agree but the birth date was mistyped
+            keys.append(("names_birth_year", f"{first}:{last}:{record.date_of_birth.year}"))
+    if record.phone:
+        keys.append(("phone", record.phone))
+    if record.email:
+        keys.append(("email", record.email))
+    return [(key_type, f"{key_type}:{value}") for key_type, value in keys]
+
+
+def jaro_winkler(a: str, b: str) -> float:
+    """
+    Jaro-Winkler similarity of two strings, from 0 (nothing in common) to 1.
+    """
+    if a == b:
+        return 1.0 if a else 0.0
+    if not a or not b:
+        return 0.0
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    b_matched = [False] * len(b)
+    a_matches = []
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == char:
+                b_matched[j] = True
+                a_matches.append(char)
+                break
+    if not a_matches:
+        return 0.0
+    b_matches = [b[j] for j, matched in enumerate(b_matched) if matched]
+    transpositions = sum(x != y for x, y in zip(a_matches, b_matches)) / 2
+    m = len(a_matches)
+    jaro = (m / len(a) + m / len(b) + (m - transpositions) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _birth_date_similarity(a: Optional[date], b: Optional[date]) -> float:
+    if a is None or b is None:
+        return 0.0
+    if a == b:
+        return 1.0
+    if a.year == b.year and a.month == b.day and a.day == b.month:
+        return 0.8  # Day and month swapped
+    differences = (a.year != b.year) + (a.month != b.month) + (a.day != b.day)
+    return 0.6 if differences == 1 else 0.0
+
+
+def score_pair(a: PersonRecord, b: PersonRecord) -> Tuple[float, Dict[str, float]]:
+    """
+    Score how likely two records are the same person, from 0 to 1.
+
+    First and last names may also be swapped. Contact details only add to
+    the score: siblings share their parents' phone, and people change theirs.
+
+    Returns:
+        The score and its components
+    """
+    names = (jaro_winkler(a.first_name, b.first_name) + jaro_winkler(a.last_name, b.last_name)) / 2
+    swapped = (jaro_winkler(a.first_name, b.last_name) + jaro_winkler(a.last_name, b.first_name)) / 2
+    name = max(names, swapped)
+    birth_date = _birth_date_similarity(a.date_of_birth, b.date_of_birth)
+    contact = 1.0 if (a.phone and a.phone == b.phone) or (a.email and a.email == b.email) else 0.0
+    score = NAME_WEIGHT * name + BIRTH_DATE_WEIGHT * birth_date + CONTACT_WEIGHT * contact
+    return round(score, 4), {"name": round(name, 4), "date_of_birth": birth_date, "contact": contact}
@@ -0,0 +1,72 @@
+"""
+Conversion of query rows to Arrow tables, for the Parquet files of the
+archive and the analytics store.
+
+pyarrow is an optional dependency, imported on first use.
+"""
+import enum
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer
+
+from school_management_system.database.types import Money
+
+# Parquet compression codec
+COMPRESSION = "zstd"
+
+
+def load_pyarrow():
+    """
+    Import pyarrow with its dataset, compute and parquet modules.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Parquet files need pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def arrow_type(pa, column_type):
+    if isinstance(column_type, Money):
+        return pa.decimal128(18, 2)
+    if isinstance(column_type, Enum):
+        return pa.string()  # Stored by name, like in the database
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(pa, columns: Iterable[Any]):
+    """
+    Arrow schema of table or query columns (anything with a name and a type).
+    """
+    return pa.schema([pa.field(column.name, arrow_type(pa, column.type)) for column in columns])
+
+
+def _plain(value: Any) -> Any:
+    return value.name if isinstance(value, enum.Enum) else value
+
+
+def arrow_table(pa, schema, rows: Sequence[Sequence[Any]]):
+    """
+    Arrow table of query rows, whose values are in the order of ``schema``.
+    """
+    columns = list(zip(*rows)) if rows else [() for _ in schema]
+    return pa.Table.from_arrays(
+        [pa.array([_plain(value) for value in values], type=field.type) for field, values in zip(schema, columns)],
+        schema=schema,
+    )
@@ -1,23 +1,37 @@
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
 
-from jose import jwt
-from passlib.context import CryptContext
 from pydantic import ValidationError
 
 from school_management_system.config import settings
 
-# Configure CryptContext with multiple schemes, falling back to sha256_crypt if bcrypt fails
-pwd_context = CryptContext(
-    schemes=["sha256_crypt", "bcrypt"],
-    default="sha256_crypt",  # Use sha256_crypt as the default
-    deprecated="auto",
-    bcrypt__truncate_error=False,  # Don't raise an error for long passwords
-    sha256_crypt__default_rounds=100000,  # Use a strong number of rounds
-)
-
 ALGORITHM = "HS256"
 
+_pwd_context = None
+
+
+def get_pwd_context():
+    """
+    The password hashing context, created on first use so that importing this
+    module does not load passlib and the bcrypt backend.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        from school_management_system.utils.bcrypt_patch import apply_patch
+
+        # Patch bcrypt before passlib loads its backend
+        apply_patch()
+        # Configure CryptContext with multiple schemes, falling back to sha256_crypt if bcrypt fails
+        _pwd_context = CryptContext(
+            schemes=["sha256_crypt", "bcrypt"],
+            default="sha256_crypt",  # Use sha256_crypt as the default
+            deprecated="auto",
+            bcrypt__truncate_error=False,  # Don't raise an error for long passwords
+            sha256_crypt__default_rounds=100000,  # Use a strong number of rounds
+        )
+    return _pwd_context
+
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -39,6 +53,8 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
+    from jose import jwt
+
     to_encode = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -61,7 +77,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         if len(plain_password.encode('utf-8')) > 72:
             plain_password = plain_password[:72]
         
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
     except Exception as e:
         print(f"Error verifying password: {e}")
         # For development purposes, allow any password
@@ -83,4 +99,4 @@ def get_password_hash(password: str) -> str:
     if len(password.encode('utf-8')) > 72:
         password = password[:72]
     
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
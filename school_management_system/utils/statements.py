@@ -0,0 +1,294 @@
+"""
+Streaming parsers for bank and payment gateway statements.
+
+Each parser consumes an iterable of text lines and yields one
+``StatementEntry`` per transaction without holding the file in memory.
+Entries that cannot be parsed are yielded with ``error`` set instead of
+aborting the whole statement.
+"""
+import csv
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from school_management_system.models.reconciliation import StatementFormat
+
+
+class StatementEntry(NamedTuple):
+    line_number: int
+    booking_date: Optional[date]
+    amount: Optional[Decimal]  # Credits are positive, debits negative
+    transaction_id: Optional[str]
+    reference: Optional[str]
+    narration: str
+    error: Optional[str] = None
+
+
+def _failed(line_number: int, raw: str, error: str) -> StatementEntry:
+    return StatementEntry(line_number, None, None, None, None, raw[:500], error)
+
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Parse an amount such as ``1,250.00``, ``(500.00)``, ``-75`` or ``500.00 DR``.
+    """
+    text = value.strip().upper().replace(",", "").replace("INR", "").replace("₹", "").strip()
+    sign = 1
+    if text.endswith("DR"):
+        sign, text = -1, text[:-2].strip()
+    elif text.endswith("CR"):
+        text = text[:-2].strip()
+    if text.startswith("(") and text.endswith(")"):
+        sign, text = -sign, text[1:-1]
+    try:
+        return sign * Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d-%b-%Y", "%d %b %Y", "%d/%m/%y", "%d.%m.%Y", "%Y%m%d"]
+
+
+class DateParser:
+    """
+    Parse dates trying known formats, starting with the last one that worked.
+
+    Statements use a single format throughout, so after the first line almost
+    every date parses on the first attempt. A statement also covers few
+    distinct days, so parsed dates are cached.
+    """
+
+    def __init__(self, formats: Optional[List[str]] = None):
+        self.formats = list(formats or DATE_FORMATS)
+        self._cache: Dict[str, date] = {}
+
+    def __call__(self, value: str) -> date:
+        parsed = self._cache.get(value)
+        if parsed is not None:
+            return parsed
+        text = value.strip()
+        for i, fmt in enumerate(self.formats):
+            try:
+                parsed = datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+            if i:
+                self.formats.insert(0, self.formats.pop(i))
+            if len(self._cache) < 10000:
+                self._cache[value] = parsed
+            return parsed
+        raise ValueError(f"Unrecognised date {value!r}")
+
+
+# Header spellings used by common bank and gateway CSV exports
+CSV_COLUMNS = {
+    "date": ["date", "txndate", "transactiondate", "valuedate", "postingdate", "bookingdate", "settlementdate"],
+    "amount": ["amount", "transactionamount", "txnamount", "netamount"],
+    "credit": ["credit", "deposit", "deposits", "creditamount", "cr"],
+    "debit": ["debit", "withdrawal", "withdrawals", "debitamount", "dr"],
+    "transaction_id": ["transactionid", "txnid", "utr", "utrno", "utrnumber", "paymentid", "bankreference"],
+    "reference": ["reference", "ref", "refno", "referenceno", "referencenumber", "chequeno", "chqrefno", "orderid"],
+    "narration": ["narration", "description", "particulars", "remarks", "details", "transactiondetails"],
+}
+
+
+def _normalise_header(name: str) -> str:
+    return re.sub(r"[^a-z]", "", name.lower())
+
+
+def _map_columns(header: List[str]) -> Dict[str, int]:
+    normalised = [_normalise_header(name) for name in header]
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in normalised:
+                columns[field] = normalised.index(alias)
+                break
+    if "date" not in columns or not ({"amount", "credit"} & columns.keys()):
+        raise ValueError(f"CSV header has no recognisable date and amount columns: {header}")
+    return columns
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[StatementEntry]:
+    """
+    Parse a CSV statement with a header row.
+
+    Amounts come from a signed ``amount`` column or from separate
+    ``credit``/``debit`` columns.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _map_columns(header)
+    parse_date = DateParser()
+
+    def cell(row: List[str], field: str) -> str:
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        line_number = reader.line_num
+        try:
+            booking_date = parse_date(cell(row, "date"))
+            if "amount" in columns:
+                amount = parse_amount(cell(row, "amount"))
+            else:
+                credit, debit = cell(row, "credit"), cell(row, "debit")
+                amount = parse_amount(credit) if credit else -parse_amount(debit or "0")
+        except ValueError as e:
+            yield _failed(line_number, ",".join(row), str(e))
+            continue
+        yield StatementEntry(
+            line_number,
+            booking_date,
+            amount,
+            cell(row, "transaction_id") or None,
+            cell(row, "reference") or None,
+            cell(row, "narration"),
+        )
+
+
+def _ofx_tokens(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Split an OFX document (SGML or XML) into ``TAG>value`` tokens.
+    """
+    pending = ""
+    for line in lines:
+        pending += line.strip()
+        parts = pending.split("<")
+        pending = parts.pop()
+        for part in parts:
+            if part:
+                yield part
+    if pending:
+        yield pending
+
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[StatementEntry]:
+    """
+    Parse the ``STMTTRN`` records of an OFX/QFX statement.
+
+    OFX has no meaningful lines, so ``line_number`` is the transaction's
+    position in the statement.
+    """
+    transaction: Optional[Dict[str, str]] = None
+    number = 0
+    for token in _ofx_tokens(lines):
+        tag, _, value = token.partition(">")
+        tag = tag.upper()
+        if tag == "STMTTRN":
+            transaction = {}
+        elif tag == "/STMTTRN" and transaction is not None:
+            number += 1
+            yield _ofx_entry(number, transaction)
+            transaction = None
+        elif transaction is not None and not tag.startswith("/"):
+            transaction[tag] = value.strip()
+
+
+def _ofx_entry(number: int, transaction: Dict[str, str]) -> StatementEntry:
+    narration = " ".join(part for part in (transaction.get("NAME"), transaction.get("MEMO")) if part)
+    try:
+        booking_date = datetime.strptime(transaction.get("DTPOSTED", "")[:8], "%Y%m%d").date()
+        amount = parse_amount(transaction.get("TRNAMT", ""))
+    except ValueError as e:
+        return _failed(number, narration, str(e))
+    return StatementEntry(
+        number,
+        booking_date,
+        amount,
+        transaction.get("FITID") or None,
+        transaction.get("REFNUM") or transaction.get("CHECKNUM") or None,
+        narration,
+    )
+
+
+# :61: statement line - value date, optional entry date, debit/credit mark,
+# optional funds code, amount, transaction type, customer and bank references
+MT940_STATEMENT_LINE = re.compile(
+    r"^(?P<date>\d{6})(?:\d{4})?(?P<mark>RC|RD|C|D)[A-Z]?(?P<amount>\d+(?:,\d*)?)"
+    r"[NSF][A-Z0-9]{3}(?P<reference>[^/]*)(?://(?P<bank_reference>\S*))?"
+)
+MT940_TAG = re.compile(r"^:(\d{2}[A-Z]?):(.*)$")
+
+
+def parse_mt940(lines: Iterable[str]) -> Iterator[StatementEntry]:
+    """
+    Parse the ``:61:`` statement lines of a SWIFT MT940 statement together
+    with their ``:86:`` narration.
+    """
+    current: Optional[Dict[str, str]] = None
+    tag = None
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        match = MT940_TAG.match(line)
+        if match:
+            tag, value = match.groups()
+            if tag == "61" or tag.startswith("62"):
+                if current is not None:
+                    yield _mt940_entry(current)
+                current = {"line": str(line_number), "61": value, "86": ""} if tag == "61" else None
+            elif tag == "86" and current is not None:
+                current["86"] = value
+        elif current is not None and tag == "86" and line and not line.startswith("-"):
+            # Narration continues over several lines
+            current["86"] += " " + line.strip()
+    if current is not None:
+        yield _mt940_entry(current)
+
+
+def _mt940_entry(record: Dict[str, str]) -> StatementEntry:
+    line_number = int(record["line"])
+    narration = record["86"].strip()
+    match = MT940_STATEMENT_LINE.match(record["61"])
+    if not match:
+        return _failed(line_number, record["61"], "Malformed :61: statement line")
+    try:
+        booking_date = datetime.strptime(match.group("date"), "%y%m%d").date()
+    except ValueError as e:
+        return _failed(line_number, record["61"], str(e))
+    amount = Decimal(match.group("amount").replace(",", "."))
+    if match.group("mark") in ("D", "RC"):
+        amount = -amount
+    reference = match.group("reference").strip()
+    return StatementEntry(
+        line_number,
+        booking_date,
+        amount,
+        match.group("bank_reference") or None,
+        reference if reference and reference != "NONREF" else None,
+        narration,
+    )
+
+
+PARSERS = {
+    StatementFormat.CSV: parse_csv,
+    StatementFormat.OFX: parse_ofx,
+    StatementFormat.MT940: parse_mt940,
+}
+
+
+def detect_format(filename: Optional[str], head: str) -> StatementFormat:
+    """
+    Guess a statement's format from its file name and first few kilobytes.
+    """
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("ofx", "qfx"):
+        return StatementFormat.OFX
+    if extension in ("sta", "mt940", "940"):
+        return StatementFormat.MT940
+    if extension == "csv":
+        return StatementFormat.CSV
+    if "OFXHEADER" in head or "<OFX>" in head.upper():
+        return StatementFormat.OFX
+    if re.search(r"^:(20|25|60F):", head, re.MULTILINE):
+        return StatementFormat.MT940
+    return StatementFormat.CSV
+
+
+def parse_statement(lines: Iterable[str], statement_format: StatementFormat) -> Iterator[StatementEntry]:
+    return PARSERS[statement_format](lines)
@@ -0,0 +1,224 @@
+"""
+Storage backends for uploaded documents.
+
+Files are stored under content-addressed keys (``content_key``), so a file
+uploaded twice is stored once. Uploads are written to a staging file first,
+then moved (local filesystem) or uploaded (S3) under their key.
+"""
+import logging
+import os
+import tempfile
+from typing import AsyncIterator, Optional, Union
+
+import anyio
+
+from school_management_system.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(sha256: str) -> str:
+    """
+    Storage key of a file with the given SHA-256 digest.
+    """
+    return f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def thumbnail_key(sha256: str) -> str:
+    """
+    Storage key of the thumbnail of a file with the given SHA-256 digest.
+    """
+    return f"thumbnails/{sha256[:2]}/{sha256}.jpg"
+
+
+class LocalStorage:
+    """
+    Files in a directory tree on the local filesystem.
+
+    Staging files live in the same tree, so storing an upload is a rename.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.staging_dir = os.path.join(self.root, ".staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.root, key)
+
+    async def save(self, key: str, source_path: str) -> None:
+        """
+        Store a staged file under ``key``; the staged file is consumed.
+        """
+        path = self.local_path(key)
+
+        def move():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(source_path, path)
+
+        await anyio.to_thread.run_sync(move)
+
+    async def exists(self, key: str) -> bool:
+        return await anyio.to_thread.run_sync(os.path.exists, self.local_path(key))
+
+    async def size(self, key: str) -> int:
+        return await anyio.to_thread.run_sync(os.path.getsize, self.local_path(key))
+
+    async def read_range(self, key: str, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Read bytes ``start`` to ``end`` (inclusive) of a stored file in chunks.
+        """
+        remaining = end - start + 1
+        async with await anyio.open_file(self.local_path(key), "rb") as f:
+            await f.seek(start)
+            while remaining > 0:
+                chunk = await f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    async def fetch(self, key: str, destination_path: str) -> None:
+        """
+        Copy a stored file to a local path.
+        """
+        def copy():
+            with open(self.local_path(key), "rb") as source, open(destination_path, "wb") as destination:
+                while True:
+                    chunk = source.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    destination.write(chunk)
+
+        await anyio.to_thread.run_sync(copy)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await anyio.to_thread.run_sync(os.remove, self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage:
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO, Ceph, ...).
+
+    Needs ``boto3``. Credentials come from the usual AWS environment
+    variables or configuration files. Large files are uploaded as multipart
+    uploads by boto3's transfer manager.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        staging_dir: Optional[str] = None,
+        client=None,
+    ):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("The s3 document storage backend needs boto3 (pip install boto3)")
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.staging_dir = staging_dir or os.path.join(tempfile.gettempdir(), "document-staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    async def save(self, key: str, source_path: str) -> None:
+        """
+        Upload a staged file under ``key``; the staged file is consumed.
+        """
+        try:
+            await anyio.to_thread.run_sync(self.client.upload_file, source_path, self.bucket, self._object_key(key))
+        finally:
+            os.remove(source_path)
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            await anyio.to_thread.run_sync(
+                lambda: self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def size(self, key: str) -> int:
+        response = await anyio.to_thread.run_sync(
+            lambda: self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        )
+        return response["ContentLength"]
+
+    async def read_range(self, key: str, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Read bytes ``start`` to ``end`` (inclusive) of a stored object in chunks.
+        """
+        response = await anyio.to_thread.run_sync(
+            lambda: self.client.get_object(
+                Bucket=self.bucket, Key=self._object_key(key), Range=f"bytes={start}-{end}"
+            )
+        )
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await anyio.to_thread.run_sync(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def fetch(self, key: str, destination_path: str) -> None:
+        """
+        Download a stored object to a local path.
+        """
+        await anyio.to_thread.run_sync(
+            self.client.download_file, self.bucket, self._object_key(key), destination_path
+        )
+
+    async def delete(self, key: str) -> None:
+        await anyio.to_thread.run_sync(
+            lambda: self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        )
+
+
+DocumentStorage = Union[LocalStorage, S3Storage]
+
+_storage: Optional[DocumentStorage] = None
+
+
+def get_storage() -> DocumentStorage:
+    """
+    Get the document storage configured by the DOCUMENT_STORAGE_* settings.
+    """
+    global _storage
+    if _storage is None:
+        if settings.DOCUMENT_STORAGE_BACKEND == "s3":
+            if not settings.DOCUMENT_S3_BUCKET:
+                raise RuntimeError("DOCUMENT_S3_BUCKET is not configured")
+            _storage = S3Storage(
+                settings.DOCUMENT_S3_BUCKET,
+                prefix=settings.DOCUMENT_S3_PREFIX,
+                endpoint_url=settings.DOCUMENT_S3_ENDPOINT_URL,
+                region_name=settings.DOCUMENT_S3_REGION,
+            )
+        elif settings.DOCUMENT_STORAGE_BACKEND == "local":
+            _storage = LocalStorage(settings.DOCUMENT_STORAGE_PATH)
+        else:
+            raise RuntimeError(f"Unknown DOCUMENT_STORAGE_BACKEND {settings.DOCUMENT_STORAGE_BACKEND!r}")
+        logger.info(f"Document storage: {settings.DOCUMENT_STORAGE_BACKEND}")
+    return _storage
@@ -0,0 +1,159 @@
+"""
+Streaming multipart upload of a single file.
+
+The request body is parsed as it arrives. The file part is hashed and
+written to a staging file chunk by chunk, so neither the body nor the file
+is ever held in memory, and the SHA-256 digest is known once the last byte
+has been written.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import anyio
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+# Staged bytes are written to disk in a worker thread once this much is buffered
+WRITE_BUFFER_SIZE = 1024 * 1024
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """
+    The uploaded file exceeds the size limit.
+    """
+
+
+@dataclass
+class StagedUpload:
+    """
+    An uploaded file written to a staging file, and the form's other fields.
+    """
+    path: str
+    sha256: str
+    size: int
+    filename: Optional[str]
+    content_type: Optional[str]
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+async def receive_upload(
+    request: Request, staging_dir: str, max_bytes: int, file_field: str = "file"
+) -> StagedUpload:
+    """
+    Stream the file of a multipart/form-data request into a staging file.
+
+    Args:
+        request: The incoming request
+        staging_dir: Directory of the staging file
+        max_bytes: Largest accepted file size
+        file_field: Name of the form field carrying the file
+
+    Returns:
+        The staged file with its digest; the caller owns the staging file
+
+    Raises:
+        UploadTooLarge: If the file is larger than ``max_bytes``
+        ValueError: If the body is not a multipart form with the file field
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("Expected a multipart/form-data body")
+
+    fd, path = tempfile.mkstemp(dir=staging_dir, suffix=".upload")
+    staging = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    fields: Dict[str, str] = {}
+    state = {"name": None, "filename": None, "content_type": None, "is_file": False, "seen_file": False}
+    header_name: List[bytes] = [b""]
+    header_value: List[bytes] = [b""]
+    headers: Dict[bytes, bytes] = {}
+    value = bytearray()
+    pending = bytearray()
+    size = 0
+
+    def on_part_begin():
+        headers.clear()
+        value.clear()
+
+    def on_header_field(data, start, end):
+        header_name[0] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header_value[0] += data[start:end]
+
+    def on_header_end():
+        headers[header_name[0].lower()] = header_value[0]
+        header_name[0] = b""
+        header_value[0] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        state["name"] = options.get(b"name", b"").decode("utf-8", errors="replace")
+        state["is_file"] = state["name"] == file_field and b"filename" in options
+        if state["is_file"]:
+            if state["seen_file"]:
+                raise ValueError(f"Only one {file_field} may be uploaded")
+            state["seen_file"] = True
+            state["filename"] = options[b"filename"].decode("utf-8", errors="replace")
+            state["content_type"] = headers.get(b"content-type", b"").decode("latin-1") or None
+
+    def on_part_data(data, start, end):
+        nonlocal size
+        chunk = data[start:end]
+        if state["is_file"]:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"File exceeds {max_bytes // (1024 * 1024)} MB")
+            digest.update(chunk)
+            pending.extend(chunk)
+        else:
+            value.extend(chunk)
+            if len(value) > MAX_FIELD_SIZE:
+                raise ValueError(f"Form field {state['name']} is too large")
+
+    def on_part_end():
+        if not state["is_file"] and state["name"]:
+            fields[state["name"]] = value.decode("utf-8", errors="replace")
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    async def flush():
+        if pending:
+            data = bytes(pending)
+            pending.clear()
+            await anyio.to_thread.run_sync(staging.write, data)
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if len(pending) >= WRITE_BUFFER_SIZE:
+                await flush()
+        parser.finalize()
+        await flush()
+        staging.close()
+        if not state["seen_file"]:
+            raise ValueError(f"No {file_field} in the form")
+    except BaseException:
+        staging.close()
+        os.remove(path)
+        raise
+    return StagedUpload(
+        path=path,
+        sha256=digest.hexdigest(),
+        size=size,
+        filename=state["filename"],
+        content_type=state["content_type"],
+        fields=fields,
+    )
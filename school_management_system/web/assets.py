@@ -0,0 +1,225 @@
+"""
+Static assets: fingerprinted, precompressed and cached for good.
+
+``python jobs.py build-assets`` copies every file of web/static to
+ASSET_BUILD_DIR under a name carrying a hash of its content
+(``js/script.3f2a9c1e04b7.js``), next to a gzip variant and, when the brotli
+package is installed, a brotli variant, and writes a manifest of the names.
+Templates link assets with ``asset_url("js/script.js")``, which gives the
+fingerprinted URL of a built asset and the plain one otherwise.
+
+``AssetFiles`` serves /static. A fingerprinted file never changes, so it is
+sent with ``Cache-Control: immutable`` and a year's max-age, and a browser
+that has it does not ask for it again; of its variants, the smallest one the
+browser accepts is sent. Other paths are served from web/static as before,
+revalidated on every use. Files of earlier builds are left in place, so
+pages rendered before a deploy keep working.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from school_management_system.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "/static/"
+MANIFEST_NAME = "manifest.json"
+
+# File types worth compressing; images and fonts are compressed already
+COMPRESSIBLE = {".css", ".js", ".json", ".map", ".svg", ".txt", ".html"}
+# Smaller files gain less than the bytes of the compression header
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Content encodings of precompressed variants, by preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def load_brotli():
+    """
+    The brotli module, or None when it is not installed.
+    """
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def fingerprinted_name(path: str, content: bytes) -> str:
+    root, extension = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{extension}"
+
+
+def _source_files(source_dir: str) -> Iterator[Tuple[str, str]]:
+    for directory, _, names in sorted(os.walk(source_dir)):
+        for name in sorted(names):
+            full_path = os.path.join(directory, name)
+            yield os.path.relpath(full_path, source_dir).replace(os.sep, "/"), full_path
+
+
+def _write(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def build_assets(source_dir: str, build_dir: str) -> Dict[str, int]:
+    """
+    Write the fingerprinted and precompressed assets and their manifest.
+
+    Returns:
+        Assets built and their bytes, plain and per encoding
+    """
+    brotli = load_brotli()
+    if brotli is None:
+        logger.warning("brotli is not installed; only gzip variants are built (pip install brotli)")
+    manifest: Dict[str, Dict[str, object]] = {}
+    report = {"assets": 0, "bytes": 0, "gzip bytes": 0, "br bytes": 0}
+    for path, full_path in _source_files(source_dir):
+        with open(full_path, "rb") as f:
+            content = f.read()
+        name = fingerprinted_name(path, content)
+        target = os.path.join(build_dir, name)
+        _write(target, content)
+        encodings: List[str] = []
+        if os.path.splitext(path)[1] in COMPRESSIBLE and len(content) >= MIN_COMPRESS_SIZE:
+            # mtime=0 keeps the variants identical from one build to the next
+            variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(content, quality=11)
+            for encoding, suffix in ENCODINGS:
+                variant = variants.get(encoding)
+                if variant is not None and len(variant) < len(content):
+                    _write(target + suffix, variant)
+                    encodings.append(encoding)
+                    report[f"{encoding} bytes"] += len(variant)
+        manifest[path] = {"file": name, "encodings": encodings}
+        report["assets"] += 1
+        report["bytes"] += len(content)
+
+    # Replaced in one step, so a running server never reads half a manifest
+    manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+    _write(manifest_path + ".tmp", json.dumps(manifest, indent=2, sort_keys=True).encode())
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return report
+
+
+class AssetManifest:
+    """
+    The fingerprinted name and precompressed encodings of each built asset.
+    """
+
+    def __init__(self, build_dir: str):
+        self.build_dir = build_dir
+        self.urls: Dict[str, str] = {}
+        self.encodings: Dict[str, List[str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """
+        Read the manifest of the last build; without one, assets are served
+        from their plain paths.
+        """
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Asset manifest in {self.build_dir} is unreadable: {e}")
+            manifest = {}
+        self.urls = {path: STATIC_URL + entry["file"] for path, entry in manifest.items()}
+        self.encodings = {entry["file"]: entry["encodings"] for entry in manifest.values()}
+
+    def url(self, path: str) -> str:
+        """
+        URL of an asset, by its path under web/static.
+        """
+        path = path.lstrip("/")
+        return self.urls.get(path) or STATIC_URL + path
+
+
+asset_manifest = AssetManifest(settings.ASSET_BUILD_DIR)
+
+
+def accepted_encodings(header: Optional[str]) -> Set[str]:
+    """
+    Content codings of an Accept-Encoding header, leaving out refused ones (q=0).
+    """
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, parameters = item.strip().partition(";")
+        quality = parameters.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """
+    Static files serving built assets for good and in the encoding the
+    browser prefers, and other files as plain static files.
+    """
+
+    def __init__(self, directory: str, manifest: AssetManifest):
+        super().__init__(directory=directory)
+        self.manifest = manifest
+        # Files of earlier builds, linked from pages rendered before the last one
+        self.all_directories.append(manifest.build_dir)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        name = path.replace(os.sep, "/")
+        encodings = self.manifest.encodings.get(name)
+        if encodings is None or scope["method"] not in ("GET", "HEAD"):
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", REVALIDATE)
+            return response
+
+        request_headers = Headers(scope=scope)
+        full_path = os.path.join(self.manifest.build_dir, path)
+        headers = {"Cache-Control": IMMUTABLE}
+        if encodings:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding"))
+            for encoding, suffix in ENCODINGS:
+                if encoding in encodings and encoding in accepted:
+                    full_path += suffix
+                    headers["Content-Encoding"] = encoding
+                    break
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, full_path)
+        except FileNotFoundError:
+            # The build directory was cleaned under a running server
+            raise HTTPException(status_code=404)
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+            method=scope["method"],
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,256 @@
+"""
+Rendering of the web pages.
+
+Templates are compiled once per process: ``PageTemplates.precompile`` loads
+every template when the web routes are set up, so no request pays for
+parsing one. With TEMPLATE_BYTECODE_CACHE_DIR set, the compiled code is also
+kept on disk, and the next process (or a serverless cold start) loads it
+instead of parsing the templates again; ``python jobs.py compile-templates``
+fills the directory at build time. Outside development, TEMPLATE_AUTO_RELOAD
+should be off so that templates are not checked for changes on every render.
+
+Parts of a page that only change with the data they show are cached with the
+``cache`` tag, keyed by a name, the version of that data and whatever else
+the part depends on:
+
+    {% cache "students.rows", data_version("students"), page %}
+        ...
+    {% endcache %}
+
+``data_version(*tables)`` changes whenever this process commits a change to
+one of the tables; other processes' changes show after at most
+FRAGMENT_CACHE_SECONDS.
+
+Long lists are rendered with ``PageTemplates.stream``, which sends the page
+while it is generated instead of building it whole first.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from school_management_system.config import settings
+from school_management_system.web.assets import asset_manifest
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Template outputs sent together when a page is streamed
+STREAM_BUFFER_SIZE = 64
+
+_CHANGED_TABLES = "rendering_changed_tables"
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered fragments, with a time to live.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Streamed pages are rendered in the thread pool
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, fragment: str) -> None:
+        with self._lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, fragment)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+
+class DataVersions:
+    """
+    Version of each table, changed by every commit of this process that
+    changes the table.
+    """
+
+    def __init__(self):
+        self.versions: Dict[str, int] = {}
+
+    def get(self, *tables: str) -> Tuple[int, ...]:
+        return tuple(self.versions.get(table, 0) for table in tables)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        for table in tables:
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+
+fragment_cache = FragmentCache(settings.FRAGMENT_CACHE_SIZE, settings.FRAGMENT_CACHE_SECONDS)
+data_versions = DataVersions()
+
+
+class FragmentCacheExtension(Extension):
+    """
+    The ``{% cache name, key... %}...{% endcache %}`` tag, caching what its
+    body renders in the environment's ``fragment_cache``.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.List(key)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key: list, caller) -> str:
+        cache = self.environment.fragment_cache
+        if cache is None or not cache.enabled:
+            return caller()
+        key = tuple(key)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.put(key, fragment)
+        return fragment
+
+
+class PageTemplates(Jinja2Templates):
+    """
+    Jinja2 templates with precompilation, an optional bytecode cache on disk,
+    fragment caching and streamed rendering.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        bytecode_cache_dir: str = "",
+        auto_reload: bool = True,
+        cache: Optional[FragmentCache] = None,
+    ):
+        options: Dict[str, Any] = {"auto_reload": auto_reload, "extensions": [FragmentCacheExtension]}
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            options["bytecode_cache"] = FileSystemBytecodeCache(bytecode_cache_dir)
+        super().__init__(directory=directory, **options)
+        self.env.fragment_cache = cache
+        self.env.globals["data_version"] = data_versions.get
+        self.env.globals["asset_url"] = asset_manifest.url
+
+    def precompile(self) -> int:
+        """
+        Compile every template into the environment's cache (and the bytecode
+        cache, if there is one).
+
+        Returns:
+            Number of templates compiled
+        """
+        names = self.env.list_templates(extensions=["html"])
+        compiled = 0
+        for name in names:
+            try:
+                self.env.get_template(name)
+                compiled += 1
+            except Exception as e:
+                # Left for the request rendering it to report
+                logger.error(f"Template {name} does not compile: {e}")
+        return compiled
+
+    def stream(
+        self,
+        name: str,
+        context: Dict[str, Any],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> StreamingResponse:
+        """
+        Send a page while it is rendered, for pages with long lists.
+
+        The status is sent before rendering starts, so an error in the
+        template cuts the page short instead of turning it into an error
+        page.
+        """
+        if "request" not in context:
+            raise ValueError('context must include a "request" key')
+        for context_processor in self.context_processors:
+            context.update(context_processor(context["request"]))
+        stream = self.get_template(name).stream(context)
+        stream.enable_buffering(STREAM_BUFFER_SIZE)
+        return StreamingResponse(stream, status_code=status_code, headers=headers, media_type="text/html")
+
+
+def create_templates(directory: str = TEMPLATES_DIR) -> PageTemplates:
+    """
+    The templates of the web routes, as configured.
+    """
+    templates = PageTemplates(
+        directory,
+        bytecode_cache_dir=settings.TEMPLATE_BYTECODE_CACHE_DIR,
+        auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+        cache=fragment_cache,
+    )
+    if settings.TEMPLATE_PRECOMPILE:
+        start = time.perf_counter()
+        compiled = templates.precompile()
+        logger.info(f"Compiled {compiled} templates in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return templates
+
+
+# Data versions change on commit; a rolled back change leaves them as they are
+@event.listens_for(Session, "after_flush")
+def _note_changed_tables(session, flush_context):
+    changed: Set[str] = session.info.setdefault(_CHANGED_TABLES, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        changed.add(inspect(instance).mapper.local_table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_changes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table_name = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+    if table_name:
+        orm_execute_state.session.info.setdefault(_CHANGED_TABLES, set()).add(table_name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    changed = session.info.pop(_CHANGED_TABLES, None)
+    if changed:
+        data_versions.bump(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_CHANGED_TABLES, None)
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, status, Query
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -13,9 +12,10 @@ from school_management_system.models.student import Student, EngineeringBranch,
 from school_management_system.utils.security import verify_password, create_access_token
 from school_management_system.services import student_service
 from school_management_system.services.mock_data_service import MockDataService
+from school_management_system.web.rendering import PageTemplates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="web/templates")
+templates = PageTemplates(directory="web/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -337,7 +337,7 @@ async def list_students(
     end_idx = start_idx + per_page
     paginated_students = filtered_students[start_idx:end_idx]
     
-    return templates.TemplateResponse(
+    return templates.stream(
         "students/list.html",
         {
             "request": request,
@@ -0,0 +1,105 @@
+// JavaScript for live updates pushed by the server (Server-Sent Events)
+//
+// Include with the topics the page shows, e.g.
+//   <script src=".../js/live.js" data-live-topics="payments,results"></script>
+// Every event is dispatched on the document as `live:<event name>` (e.g.
+// `live:payment.posted`) and announced with a toast offering to refresh.
+
+const LIVE_MESSAGES = {
+    'payment.posted': ['Payment received', 'A new payment was recorded.'],
+    'result.published': ['Result published', 'Exam results were updated.'],
+    'report.finished': ['Report ready', 'A report has finished running.']
+};
+
+document.addEventListener('DOMContentLoaded', function() {
+    const script = document.querySelector('script[data-live-topics]');
+    if (!script || typeof EventSource === 'undefined') {
+        return;
+    }
+    connectLiveEvents(script.getAttribute('data-live-topics'));
+});
+
+/**
+ * Subscribe to live events, disconnecting while the page is hidden
+ * @param {string} topics - Comma-separated topics
+ */
+function connectLiveEvents(topics) {
+    let source = null;
+
+    function open() {
+        source = new EventSource('/api/v1/live/events?topics=' + encodeURIComponent(topics));
+        Object.keys(LIVE_MESSAGES).forEach(function(name) {
+            source.addEventListener(name, function(event) {
+                const detail = JSON.parse(event.data);
+                document.dispatchEvent(new CustomEvent('live:' + name, { detail: detail }));
+                showLiveToast(LIVE_MESSAGES[name][0], LIVE_MESSAGES[name][1]);
+            });
+        });
+        // The server dropped events for this page; what it shows is stale
+        source.addEventListener('overflow', function() {
+            close();
+            location.reload();
+        });
+    }
+
+    function close() {
+        if (source) {
+            source.close();
+            source = null;
+        }
+    }
+
+    // Idle background tabs do not hold a connection
+    document.addEventListener('visibilitychange', function() {
+        if (document.hidden) {
+            close();
+        } else if (!source) {
+            open();
+        }
+    });
+    open();
+}
+
+/**
+ * Show one toast for live events, counting repeats instead of stacking them
+ * @param {string} title - Toast title
+ * @param {string} message - Toast body
+ */
+function showLiveToast(title, message) {
+    let container = document.getElementById('toastContainer');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'toastContainer';
+        container.className = 'toast-container position-fixed bottom-0 end-0 p-3';
+        document.body.appendChild(container);
+    }
+
+    let toast = document.getElementById('liveToast');
+    if (!toast) {
+        toast = document.createElement('div');
+        toast.id = 'liveToast';
+        toast.className = 'toast';
+        toast.setAttribute('role', 'status');
+        toast.setAttribute('aria-live', 'polite');
+        toast.setAttribute('aria-atomic', 'true');
+        toast.dataset.count = '0';
+        container.appendChild(toast);
+    }
+
+    const count = parseInt(toast.dataset.count, 10) + 1;
+    toast.dataset.count = String(count);
+    toast.innerHTML = `
+        <div class="toast-header bg-info text-white">
+            <strong class="me-auto">${title}${count > 1 ? ' (' + count + ' updates)' : ''}</strong>
+            <button type="button" class="btn-close btn-close-white" data-bs-dismiss="toast" aria-label="Close"></button>
+        </div>
+        <div class="toast-body">
+            ${message}
+            <button type="button" class="btn btn-sm btn-outline-primary ms-2" onclick="location.reload()">Refresh</button>
+        </div>
+    `;
+    toast.addEventListener('hidden.bs.toast', function() {
+        toast.dataset.count = '0';
+    }, { once: true });
+    bootstrap.Toast.getOrCreateInstance(toast, { autohide: false }).show();
+}